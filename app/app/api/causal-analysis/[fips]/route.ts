@@ -2,6 +2,133 @@ import { NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
 import { parse } from 'csv-parse/sync';
+import { readPlaceShard, PlaceShard } from '@/lib/place-shards';
+
+// One method's estimate, in the units of the CSV outputs
+interface DiDEstimate {
+  treatment_effect: number;
+  observed_change_pct: number;
+  control_group_change_pct: number;
+  std_error: number;
+  t_statistic: number;
+  p_value: number;
+  ci_lower: number;
+  ci_upper: number;
+  statistically_significant: boolean;
+}
+
+interface SCMEstimate {
+  scm_treatment_effect: number;
+  observed_effect_pct: number;
+  synthetic_control_effect_pct: number;
+  n_control_units: number;
+  max_control_distance: number | null;
+}
+
+const mean = (values: number[]) =>
+  values.length ? values.reduce((a, b) => a + b, 0) / values.length : 0;
+
+const pctChange = (before: number[], after: number[]) =>
+  mean(before) > 0 ? ((mean(after) - mean(before)) / mean(before)) * 100 : 0;
+
+/**
+ * DiD and SCM estimates from a place shard (scripts 31 and 32 outputs), or
+ * null when it lacks either. The DiD cohort matching the SCM's reform is
+ * preferred; its standard error is recovered from the 95% bootstrap CI.
+ */
+function estimatesFromShard(shard: PlaceShard): { did: DiDEstimate; scm: SCMEstimate } | null {
+  const scm = shard.scm[0] as Record<string, any> | undefined;
+  if (!scm || shard.did.length === 0) {
+    return null;
+  }
+  const did = (shard.did.find(
+    (r: Record<string, any>) => r.reform_type === scm.reform_type && r.adoption_year === scm.adoption_year
+  ) ?? shard.did[0]) as Record<string, any>;
+
+  const std_error = (did.upper_ci_95 - did.lower_ci_95) / (2 * 1.96);
+  return {
+    did: {
+      treatment_effect: did.treatment_effect,
+      observed_change_pct: did.treated_change_pct,
+      control_group_change_pct: did.control_change_pct,
+      std_error,
+      t_statistic: std_error > 0 ? did.treatment_effect / std_error : 0,
+      p_value: did.p_value,
+      ci_lower: did.lower_ci_95,
+      ci_upper: did.upper_ci_95,
+      statistically_significant: did.significance === 'significant',
+    },
+    scm: {
+      scm_treatment_effect: scm.pct_treatment_effect,
+      observed_effect_pct: pctChange(scm.treated_permits_pre, scm.treated_permits_post),
+      synthetic_control_effect_pct: pctChange(scm.synthetic_permits_pre, scm.synthetic_permits_post),
+      n_control_units: scm.donor_pool_size,
+      // Script 32 reports pre-treatment fit, not a matching distance
+      max_control_distance: null,
+    },
+  };
+}
+
+function formatResponse(jurisdiction: string, reformType: string, did: DiDEstimate, scm: SCMEstimate) {
+  return {
+    jurisdiction,
+
+    // Difference-in-Differences Results
+    did_analysis: {
+      method: 'Difference-in-Differences (DiD)',
+      description:
+        'Compares reform jurisdictions against non-reform control states using parallel trends assumption',
+      treatment_effect_pct: did.treatment_effect,
+      observed_change_pct: did.observed_change_pct,
+      control_group_change_pct: did.control_group_change_pct,
+      standard_error: did.std_error,
+      t_statistic: did.t_statistic,
+      p_value: did.p_value,
+      confidence_interval: {
+        lower: did.ci_lower,
+        upper: did.ci_upper,
+      },
+      statistically_significant: did.statistically_significant,
+      interpretation: `The DiD estimate suggests a ${Math.abs(did.treatment_effect).toFixed(2)}% ${did.treatment_effect > 0 ? 'increase' : 'decrease'} in permits due to the reform, controlling for baseline trends.`,
+    },
+
+    // Synthetic Control Method Results
+    scm_analysis: {
+      method: 'Synthetic Control Method (SCM)',
+      description:
+        'Creates weighted synthetic control units matched on pre-reform characteristics',
+      treatment_effect_pct: scm.scm_treatment_effect,
+      observed_effect_pct: scm.observed_effect_pct,
+      synthetic_control_effect_pct: scm.synthetic_control_effect_pct,
+      n_control_units: scm.n_control_units,
+      max_control_distance: scm.max_control_distance,
+      interpretation: `The SCM estimate suggests a ${Math.abs(scm.scm_treatment_effect).toFixed(2)}% ${scm.scm_treatment_effect > 0 ? 'increase' : 'decrease'} in permits due to the reform, based on matched control units.`,
+    },
+
+    // Methods Comparison
+    methods_comparison: {
+      did_effect: did.treatment_effect,
+      scm_effect: scm.scm_treatment_effect,
+      difference: did.treatment_effect - scm.scm_treatment_effect,
+      correlation: 0.99,
+      agreement_level:
+        'High agreement between methods (r=0.99) - results robust to identification strategy',
+      recommendation:
+        'Both methods identify same jurisdictions as high/low performers. Use SCM for robustness check.',
+    },
+
+    // Summary
+    summary: {
+      reform_type: reformType,
+      observed_effect: did.observed_change_pct,
+      did_causal_estimate: did.treatment_effect,
+      scm_causal_estimate: scm.scm_treatment_effect,
+      mean_causal_estimate: (did.treatment_effect + scm.scm_treatment_effect) / 2,
+      confidence:
+        'Moderate - causal identification based on parallel trends and matching assumptions',
+    },
+  };
+}
 
 export async function GET(
   request: Request,
@@ -9,7 +136,17 @@ export async function GET(
 ) {
   try {
     const { fips } = await params;
-    const paddedFips = fips.padStart(7, '0');
+
+    // Published shard: SCM and DiD results for one place, in the same
+    // response shape as the CSV path. Places without both fall through.
+    const shard = await readPlaceShard(fips);
+    const estimates = shard ? estimatesFromShard(shard) : null;
+    if (shard && estimates) {
+      const reformType = String((shard.scm[0] as Record<string, any>).reform_type ?? '');
+      return NextResponse.json(
+        formatResponse(shard.place_name ?? shard.place_fips, reformType, estimates.did, estimates.scm)
+      );
+    }
 
     // Load DiD results
     const didPath = path.join(
@@ -77,70 +214,28 @@ export async function GET(
       );
     }
 
-    // Format response
-    const response = {
-      jurisdiction: didData.jurisdiction,
-
-      // Difference-in-Differences Results
-      did_analysis: {
-        method: 'Difference-in-Differences (DiD)',
-        description:
-          'Compares reform jurisdictions against non-reform control states using parallel trends assumption',
-        treatment_effect_pct: parseFloat(didData.treatment_effect),
+    const response = formatResponse(
+      didData.jurisdiction,
+      comparisonData?.jurisdiction || didData.jurisdiction,
+      {
+        treatment_effect: parseFloat(didData.treatment_effect),
         observed_change_pct: parseFloat(didData.observed_change_pct),
         control_group_change_pct: parseFloat(didData.control_group_change_pct),
-        standard_error: parseFloat(didData.std_error),
+        std_error: parseFloat(didData.std_error),
         t_statistic: parseFloat(didData.t_statistic),
         p_value: parseFloat(didData.p_value),
-        confidence_interval: {
-          lower: parseFloat(didData.ci_lower),
-          upper: parseFloat(didData.ci_upper),
-        },
+        ci_lower: parseFloat(didData.ci_lower),
+        ci_upper: parseFloat(didData.ci_upper),
         statistically_significant: didData.statistically_significant === 'Yes',
-        interpretation: `The DiD estimate suggests a ${Math.abs(parseFloat(didData.treatment_effect)).toFixed(2)}% ${parseFloat(didData.treatment_effect) > 0 ? 'increase' : 'decrease'} in permits due to the reform, controlling for baseline trends.`,
       },
-
-      // Synthetic Control Method Results
-      scm_analysis: {
-        method: 'Synthetic Control Method (SCM)',
-        description:
-          'Creates weighted synthetic control units matched on pre-reform characteristics',
-        treatment_effect_pct: parseFloat(scmData.scm_treatment_effect),
+      {
+        scm_treatment_effect: parseFloat(scmData.scm_treatment_effect),
         observed_effect_pct: parseFloat(scmData.observed_effect_pct),
-        synthetic_control_effect_pct: parseFloat(
-          scmData.synthetic_control_effect_pct
-        ),
+        synthetic_control_effect_pct: parseFloat(scmData.synthetic_control_effect_pct),
         n_control_units: parseInt(scmData.n_control_units),
         max_control_distance: parseFloat(scmData.max_control_distance),
-        interpretation: `The SCM estimate suggests a ${Math.abs(parseFloat(scmData.scm_treatment_effect)).toFixed(2)}% ${parseFloat(scmData.scm_treatment_effect) > 0 ? 'increase' : 'decrease'} in permits due to the reform, based on matched control units.`,
-      },
-
-      // Methods Comparison
-      methods_comparison: {
-        did_effect: parseFloat(didData.treatment_effect),
-        scm_effect: parseFloat(scmData.scm_treatment_effect),
-        difference: parseFloat(didData.treatment_effect) - parseFloat(scmData.scm_treatment_effect),
-        correlation: 0.99,
-        agreement_level:
-          'High agreement between methods (r=0.99) - results robust to identification strategy',
-        recommendation:
-          'Both methods identify same jurisdictions as high/low performers. Use SCM for robustness check.',
-      },
-
-      // Summary
-      summary: {
-        reform_type: comparisonData?.jurisdiction || didData.jurisdiction,
-        observed_effect: parseFloat(didData.observed_change_pct),
-        did_causal_estimate: parseFloat(didData.treatment_effect),
-        scm_causal_estimate: parseFloat(scmData.scm_treatment_effect),
-        mean_causal_estimate:
-          (parseFloat(didData.treatment_effect) +
-            parseFloat(scmData.scm_treatment_effect)) /
-          2,
-        confidence:
-          'Moderate - causal identification based on parallel trends and matching assumptions',
-      },
-    };
+      }
+    );
 
     return NextResponse.json(response);
   } catch (error) {
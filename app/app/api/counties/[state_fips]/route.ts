@@ -3,6 +3,33 @@ import path from "path";
 import { promises as fs } from "fs";
 import { parse } from "csv-parse/sync";
 
+/**
+ * Per-state documents published by scripts/08_fetch_county_permits.py from
+ * the year-partitioned Parquet dataset (data/outputs/county_permits), already
+ * in this route's response shape with one series point per year. Null when
+ * the state has no document, in which case the route falls back to the
+ * monthly CSV from script 09.
+ */
+async function readStateDocument(state_fips: string) {
+  if (!/^\d{2}$/.test(state_fips)) return null;
+  const docPath = path.join(
+    process.cwd(),
+    "..",
+    "data",
+    "outputs",
+    "county_states",
+    `${state_fips}.json`
+  );
+  try {
+    return JSON.parse(await fs.readFile(docPath, "utf-8"));
+  } catch (error) {
+    if ((error as NodeJS.ErrnoException).code === "ENOENT") {
+      return null;
+    }
+    throw error;
+  }
+}
+
 export async function GET(
   request: Request,
   { params }: { params: Promise<{ state_fips: string }> }
@@ -10,6 +37,11 @@ export async function GET(
   try {
     const { state_fips } = await params;
 
+    const doc = await readStateDocument(state_fips);
+    if (doc) {
+      return NextResponse.json({ success: true, ...doc });
+    }
+
     const csvPath = path.join(
       process.cwd(),
       "..",
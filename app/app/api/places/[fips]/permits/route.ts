@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server'
 import { promises as fs } from 'fs'
 import path from 'path'
+import { readPlaceShard } from '@/lib/place-shards'
 
 export async function GET(
   request: NextRequest,
@@ -9,6 +10,20 @@ export async function GET(
   try {
     const { fips } = await params
 
+    // Published shard: one small file per place
+    const shard = await readPlaceShard(fips)
+    if (shard) {
+      const years = shard.permits.year ?? []
+      const permits = years.map((year, i) => ({
+        year,
+        single_family: shard.permits.sf_units?.[i],
+        multi_family: shard.permits.mf_units?.[i],
+        total_units: shard.permits.total_units?.[i],
+      }))
+      return NextResponse.json({ permits })
+    }
+
+    // Fallback: scan the full permits file
     // Read permits file
     const permitsPath = path.join(process.cwd(), '..', 'data', 'raw', 'census_bps_place_annual_permits.csv')
     const permitsData = await fs.readFile(permitsPath, 'utf-8')
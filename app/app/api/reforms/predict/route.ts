@@ -1,28 +1,36 @@
 /**
  * POST /api/reforms/predict
- * Predict reform impact using heuristic model
+ * Predict reform impact from the precomputed v3 model tables, falling back to
+ * the heuristic when scripts/35_build_scenario_tables.py has not run
  */
 
 import { NextRequest, NextResponse } from 'next/server'
 import fs from 'fs'
 import path from 'path'
+import { lookupScenario, readScenarioTables } from '@/lib/scenario-tables'
 
 interface PredictionRequest {
   reform_type: string
   wrluri: number
   city_name?: string
   state_name?: string
+  annual_permits?: number
 }
 
 interface PredictionResponse {
   predicted_change: number
-  confidence: 'high' | 'medium' | 'low'
+  // Heuristic only: the v3 model has no additive breakdown; its only
+  // uncertainty signal is tree_spread
+  confidence: 'high' | 'medium' | 'low' | null
   factors: {
     reform_type_effect: number
     wrluri_effect: number
     base_effect: number
-  }
+  } | null
   comparable_cities: string[]
+  // Spread of the per-tree predictions, not a prediction interval
+  tree_spread?: [number, number]
+  source: 'model_v3' | 'heuristic'
 }
 
 // Reform type impact coefficients (based on research)
@@ -37,7 +45,7 @@ const REFORM_TYPE_EFFECTS: Record<string, number> = {
 export async function POST(request: NextRequest) {
   try {
     const body: PredictionRequest = await request.json()
-    const { reform_type, wrluri, city_name } = body
+    const { reform_type, wrluri, city_name, annual_permits } = body
 
     // Get base effect for reform type
     const reform_type_effect = REFORM_TYPE_EFFECTS[reform_type] || 8.0
@@ -50,7 +58,7 @@ export async function POST(request: NextRequest) {
     const base_effect = 2.5
 
     // Total predicted change
-    const predicted_change = reform_type_effect + wrluri_effect + base_effect
+    const heuristic_change = reform_type_effect + wrluri_effect + base_effect
 
     // Determine confidence based on data availability
     let confidence: 'high' | 'medium' | 'low' = 'medium'
@@ -60,34 +68,48 @@ export async function POST(request: NextRequest) {
       confidence = 'low'
     }
 
+    const tables = await readScenarioTables()
+    const cell = tables ? lookupScenario(tables, reform_type, wrluri, annual_permits) : null
+    const predicted_change = cell ? cell.predicted_change : heuristic_change
+
     // Find comparable cities
     const comparable_cities: string[] = []
-    try {
-      const filePath = path.join(process.cwd(), 'data/raw/city_reforms_expanded.csv')
-      if (fs.existsSync(filePath)) {
-        const content = fs.readFileSync(filePath, 'utf-8')
-        const lines = content.split('\n').slice(1)
+    if (cell) {
+      for (const city of cell.comparables) {
+        if (city.city_name !== city_name) {
+          comparable_cities.push(`${city.city_name}, ${city.state_name}`)
+        }
+      }
+    } else {
+      try {
+        const filePath = path.join(process.cwd(), 'data/raw/city_reforms_expanded.csv')
+        if (fs.existsSync(filePath)) {
+          const content = fs.readFileSync(filePath, 'utf-8')
+          const lines = content.split('\n').slice(1)
 
-        lines.forEach(line => {
-          const parts = line.split(',')
-          if (parts[5] === reform_type && parts[1] !== city_name) {
-            comparable_cities.push(`${parts[1]}, ${parts[3]}`)
-          }
-        })
+          lines.forEach(line => {
+            const parts = line.split(',')
+            if (parts[5] === reform_type && parts[1] !== city_name) {
+              comparable_cities.push(`${parts[1]}, ${parts[3]}`)
+            }
+          })
+        }
+      } catch (e) {
+        // Ignore errors in finding comparables
       }
-    } catch (e) {
-      // Ignore errors in finding comparables
     }
 
     const response: PredictionResponse = {
       predicted_change: Math.round(predicted_change * 10) / 10,
-      confidence,
-      factors: {
+      confidence: cell ? null : confidence,
+      factors: cell ? null : {
         reform_type_effect: Math.round(reform_type_effect * 10) / 10,
         wrluri_effect: Math.round(wrluri_effect * 10) / 10,
         base_effect
       },
-      comparable_cities: comparable_cities.slice(0, 5)
+      comparable_cities: comparable_cities.slice(0, 5),
+      tree_spread: cell?.tree_spread,
+      source: cell ? 'model_v3' : 'heuristic'
     }
 
     return NextResponse.json(response)
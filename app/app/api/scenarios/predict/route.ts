@@ -8,6 +8,38 @@ import {
   ReformData
 } from '@/lib/scenario-utils';
 
+// Parsed inputs are reused across requests until the file's mtime changes
+const parsedFiles = new Map<string, { mtimeMs: number; value: unknown }>();
+
+async function readParsed<T>(filePath: string, parseContent: (content: string) => T): Promise<T> {
+  const { mtimeMs } = await fs.stat(filePath);
+  const hit = parsedFiles.get(filePath);
+  if (hit && hit.mtimeMs === mtimeMs) {
+    return hit.value as T;
+  }
+  const value = parseContent(await fs.readFile(filePath, 'utf-8'));
+  parsedFiles.set(filePath, { mtimeMs, value });
+  return value;
+}
+
+function parseReforms(content: string): ReformData[] {
+  const records = parse(content, {
+    columns: true,
+    skip_empty_lines: true
+  });
+
+  return (records as Record<string, string>[]).map((row) => ({
+    place_fips: row.place_fips,
+    city_name: row.city_name,
+    state_fips: row.state_fips,
+    state_name: row.state_name,
+    reform_name: row.reform_name,
+    reform_type: row.reform_type,
+    effective_date: row.effective_date,
+    baseline_wrluri: parseFloat(row.baseline_wrluri) || 0
+  }));
+}
+
 export async function POST(request: NextRequest) {
   try {
     const body = await request.json();
@@ -30,30 +62,14 @@ export async function POST(request: NextRequest) {
 
     // Load places data
     const placesPath = path.join(process.cwd(), 'public', 'data', 'places.json');
-    const placesContent = await fs.readFile(placesPath, 'utf-8');
-    const allPlaces: PlaceData[] = JSON.parse(placesContent);
+    const allPlaces = await readParsed<PlaceData[]>(placesPath, JSON.parse);
 
     // Load reforms data
     const reformsPath = path.join(process.cwd(), '..', 'data', 'raw', 'city_reforms_expanded.csv');
     let allReforms: ReformData[] = [];
 
     try {
-      const reformsContent = await fs.readFile(reformsPath, 'utf-8');
-      const records = parse(reformsContent, {
-        columns: true,
-        skip_empty_lines: true
-      });
-
-      allReforms = (records as Record<string, string>[]).map((row) => ({
-        place_fips: row.place_fips,
-        city_name: row.city_name,
-        state_fips: row.state_fips,
-        state_name: row.state_name,
-        reform_name: row.reform_name,
-        reform_type: row.reform_type,
-        effective_date: row.effective_date,
-        baseline_wrluri: parseFloat(row.baseline_wrluri) || 0
-      }));
+      allReforms = await readParsed(reformsPath, parseReforms);
     } catch (err) {
       // If reforms file not found, generate synthetic data from places
       console.warn('Reforms file not found, using synthetic data');
@@ -3,6 +3,7 @@
 import React, { useState, useEffect, useRef, useCallback } from 'react'
 import Fuse from 'fuse.js'
 import { Search, MapPin, TrendingUp, TrendingDown } from 'lucide-react'
+import { ShardedPlaceSearch } from '@/lib/search-index'
 
 interface Place {
   place_fips: string
@@ -22,45 +23,57 @@ interface PlaceSearchProps {
 export function PlaceSearch({ onPlaceSelect, placeholder = "Search places..." }: PlaceSearchProps) {
   const [query, setQuery] = useState('')
   const [results, setResults] = useState<Place[]>([])
-  const [places, setPlaces] = useState<Place[]>([])
   const [isLoading, setIsLoading] = useState(true)
   const [showDropdown, setShowDropdown] = useState(false)
   const [selectedIndex, setSelectedIndex] = useState(-1)
   const inputRef = useRef<HTMLInputElement>(null)
+  const indexRef = useRef<ShardedPlaceSearch | null>(null)
+  const queryRef = useRef('')
   const fuseRef = useRef<Fuse<Place> | null>(null)
 
-  // Load places data
+  // Load the hot search shard (state shards stream in behind it), falling back to places.json + Fuse.js
   useEffect(() => {
-    fetch('/data/places.json')
-      .then(res => res.json())
-      .then(data => {
-        setPlaces(data)
-        fuseRef.current = new Fuse(data, {
-          keys: ['place_name', 'state_name'],
-          threshold: 0.3,
-          includeScore: true,
-        })
-        setIsLoading(false)
-      })
-      .catch(err => {
-        console.error('Failed to load places:', err)
-        setIsLoading(false)
+    const refresh = () => {
+      if (indexRef.current && queryRef.current.trim()) {
+        setResults(indexRef.current.search(queryRef.current, 10))
+      }
+    }
+    ShardedPlaceSearch.load(refresh)
+      .then(index => {
+        indexRef.current = index
       })
+      .catch(() =>
+        fetch('/data/places.json')
+          .then(res => res.json())
+          .then(data => {
+            fuseRef.current = new Fuse(data, {
+              keys: ['place_name', 'state_name'],
+              threshold: 0.3,
+              includeScore: true,
+            })
+          })
+      )
+      .catch(err => console.error('Failed to load places:', err))
+      .finally(() => setIsLoading(false))
   }, [])
 
   // Search logic
   const handleSearch = useCallback((searchQuery: string) => {
     setQuery(searchQuery)
+    queryRef.current = searchQuery
     setSelectedIndex(-1)
 
-    if (!searchQuery.trim() || !fuseRef.current) {
+    if (!searchQuery.trim() || !(indexRef.current || fuseRef.current)) {
       setResults([])
       setShowDropdown(false)
       return
     }
 
-    const searchResults = fuseRef.current.search(searchQuery, { limit: 10 })
-    setResults(searchResults.map(r => r.item))
+    if (indexRef.current) {
+      setResults(indexRef.current.search(searchQuery, 10))
+    } else if (fuseRef.current) {
+      setResults(fuseRef.current.search(searchQuery, { limit: 10 }).map(r => r.item))
+    }
     setShowDropdown(true)
   }, [])
 
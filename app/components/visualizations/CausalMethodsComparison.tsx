@@ -47,7 +47,7 @@ interface CausalAnalysisData {
     observed_effect_pct: number;
     synthetic_control_effect_pct: number;
     n_control_units: number;
-    max_control_distance: number;
+    max_control_distance: number | null;
     interpretation: string;
   };
   methods_comparison: {
@@ -230,9 +230,11 @@ export default function CausalMethodsComparison({
               <p className="text-sm font-semibold text-gray-700">
                 {data.scm_analysis.n_control_units} matched units
               </p>
-              <p className="text-xs text-gray-600">
-                Max distance: {data.scm_analysis.max_control_distance.toFixed(3)}
-              </p>
+              {data.scm_analysis.max_control_distance !== null && (
+                <p className="text-xs text-gray-600">
+                  Max distance: {data.scm_analysis.max_control_distance.toFixed(3)}
+                </p>
+              )}
             </div>
 
             <div className="grid grid-cols-2 gap-2">
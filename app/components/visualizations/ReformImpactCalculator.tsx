@@ -15,13 +15,15 @@ interface Reform {
 
 interface PredictionResult {
   predicted_change: number
-  confidence: 'high' | 'medium' | 'low'
+  confidence: 'high' | 'medium' | 'low' | null
   factors: {
     reform_type_effect: number
     wrluri_effect: number
     base_effect: number
-  }
+  } | null
   comparable_cities: string[]
+  tree_spread?: [number, number]
+  source: 'model_v3' | 'heuristic'
 }
 
 export function ReformImpactCalculator() {
@@ -195,33 +197,42 @@ export function ReformImpactCalculator() {
             <p className="text-sm text-gray-600 mt-1">
               Estimated change in building permits
             </p>
-            <span className={`inline-block px-2 py-1 rounded text-xs mt-2 ${
-              prediction.confidence === 'high' ? 'bg-green-100 text-green-800' :
-              prediction.confidence === 'medium' ? 'bg-yellow-100 text-yellow-800' :
-              'bg-gray-100 text-gray-800'
-            }`}>
-              {prediction.confidence.toUpperCase()} confidence
-            </span>
+            {prediction.tree_spread && (
+              <p className="text-xs text-gray-500 mt-1">
+                Spread across model trees: {prediction.tree_spread[0].toFixed(1)}% to {prediction.tree_spread[1].toFixed(1)}%
+              </p>
+            )}
+            {prediction.confidence && (
+              <span className={`inline-block px-2 py-1 rounded text-xs mt-2 ${
+                prediction.confidence === 'high' ? 'bg-green-100 text-green-800' :
+                prediction.confidence === 'medium' ? 'bg-yellow-100 text-yellow-800' :
+                'bg-gray-100 text-gray-800'
+              }`}>
+                {prediction.confidence.toUpperCase()} confidence
+              </span>
+            )}
           </div>
 
-          {/* Factor Breakdown */}
-          <div className="mt-4 space-y-2">
-            <p className="text-sm font-medium text-gray-700">Contributing Factors:</p>
-            <div className="grid grid-cols-3 gap-2 text-center text-xs">
-              <div className="p-2 bg-white rounded border">
-                <p className="font-semibold">{prediction.factors.reform_type_effect > 0 ? '+' : ''}{prediction.factors.reform_type_effect.toFixed(1)}%</p>
-                <p className="text-gray-500">Reform Type</p>
-              </div>
-              <div className="p-2 bg-white rounded border">
-                <p className="font-semibold">{prediction.factors.wrluri_effect > 0 ? '+' : ''}{prediction.factors.wrluri_effect.toFixed(1)}%</p>
-                <p className="text-gray-500">WRLURI Effect</p>
-              </div>
-              <div className="p-2 bg-white rounded border">
-                <p className="font-semibold">{prediction.factors.base_effect > 0 ? '+' : ''}{prediction.factors.base_effect.toFixed(1)}%</p>
-                <p className="text-gray-500">Base Effect</p>
+          {/* Factor Breakdown (heuristic estimate only) */}
+          {prediction.factors && (
+            <div className="mt-4 space-y-2">
+              <p className="text-sm font-medium text-gray-700">Contributing Factors:</p>
+              <div className="grid grid-cols-3 gap-2 text-center text-xs">
+                <div className="p-2 bg-white rounded border">
+                  <p className="font-semibold">{prediction.factors.reform_type_effect > 0 ? '+' : ''}{prediction.factors.reform_type_effect.toFixed(1)}%</p>
+                  <p className="text-gray-500">Reform Type</p>
+                </div>
+                <div className="p-2 bg-white rounded border">
+                  <p className="font-semibold">{prediction.factors.wrluri_effect > 0 ? '+' : ''}{prediction.factors.wrluri_effect.toFixed(1)}%</p>
+                  <p className="text-gray-500">WRLURI Effect</p>
+                </div>
+                <div className="p-2 bg-white rounded border">
+                  <p className="font-semibold">{prediction.factors.base_effect > 0 ? '+' : ''}{prediction.factors.base_effect.toFixed(1)}%</p>
+                  <p className="text-gray-500">Base Effect</p>
+                </div>
               </div>
             </div>
-          </div>
+          )}
 
           {/* Comparable Cities */}
           {prediction.comparable_cities.length > 0 && (
@@ -0,0 +1,50 @@
+/**
+ * Per-place JSON shards published by scripts/34_publish_place_shards.py
+ *
+ * Each place has one pre-serialized document under
+ * data/outputs/place_shards/{state_fips}/{place_fips}.json, so place routes
+ * read a single small file instead of parsing the full CSV outputs.
+ */
+
+import { promises as fs } from 'fs'
+import path from 'path'
+
+export const SHARD_DIR = path.join(process.cwd(), '..', 'data', 'outputs', 'place_shards')
+
+export interface PlaceShard {
+  place_fips: string
+  place_name: string | null
+  state_fips: string
+  permits: {
+    year?: number[]
+    sf_units?: number[]
+    mf_units?: number[]
+    total_units?: number[]
+  }
+  metrics: Record<string, string | number | null> | null
+  reforms: Record<string, string | number | null>[]
+  scm: Record<string, unknown>[]
+  did: Record<string, unknown>[]
+  event_study: Record<string, unknown>[]
+}
+
+/**
+ * Read one place's shard. Returns null when the FIPS is not a 7-digit code
+ * or no shard has been published for it.
+ */
+export async function readPlaceShard(fips: string): Promise<PlaceShard | null> {
+  if (!/^\d{1,7}$/.test(fips)) {
+    return null
+  }
+  const padded = fips.padStart(7, '0')
+
+  try {
+    const content = await fs.readFile(path.join(SHARD_DIR, padded.slice(0, 2), `${padded}.json`), 'utf-8')
+    return JSON.parse(content) as PlaceShard
+  } catch (error) {
+    if ((error as NodeJS.ErrnoException).code === 'ENOENT') {
+      return null
+    }
+    throw error
+  }
+}
@@ -0,0 +1,90 @@
+/**
+ * Reform-calculator lookup tables built by scripts/35_build_scenario_tables.py
+ *
+ * Every (reform type, WRLURI bucket, city-size bucket) cell carries the v3
+ * model prediction, the spread of the tree predictions and the most similar cities
+ * that adopted the same reform, so a prediction is a bucket lookup instead of
+ * a CSV parse per request. The parsed file is cached until its mtime changes.
+ *
+ * City size is not a model feature: it only selects the comparables, so the
+ * size cells of one reform type and WRLURI bucket share a prediction.
+ */
+
+import { promises as fs } from 'fs'
+import path from 'path'
+
+export const SCENARIO_TABLES_FILE = path.join(process.cwd(), '..', 'data', 'outputs', 'scenario_tables.json')
+
+export interface ScenarioComparable {
+  place_fips: string
+  city_name: string
+  state_name: string
+  baseline_wrluri: number
+  recent_units_2024: number | null
+  similarity: number
+}
+
+export interface ScenarioCell {
+  /** Forest mean, as model.predict returns it */
+  predicted_change: number
+  /** Percentiles of the per-tree predictions: tree disagreement, not a prediction interval */
+  tree_spread: [number, number]
+  comparables: ScenarioComparable[]
+}
+
+export interface ScenarioTables {
+  generated_at: string
+  model: {
+    file: string
+    features: string[]
+    reference_year: number
+    spread_percentiles: [number, number]
+    point_estimate: string
+  }
+  wrluri_edges: number[]
+  size_edges: number[]
+  size_labels: string[]
+  reform_types: string[]
+  entries: Record<string, ScenarioCell>
+}
+
+let cached: { mtimeMs: number; tables: ScenarioTables } | null = null
+
+/** The parsed tables, or null when the build stage has not produced them. */
+export async function readScenarioTables(): Promise<ScenarioTables | null> {
+  try {
+    const { mtimeMs } = await fs.stat(SCENARIO_TABLES_FILE)
+    if (!cached || cached.mtimeMs !== mtimeMs) {
+      const tables = JSON.parse(await fs.readFile(SCENARIO_TABLES_FILE, 'utf-8')) as ScenarioTables
+      cached = { mtimeMs, tables }
+    }
+    return cached.tables
+  } catch (error) {
+    if ((error as NodeJS.ErrnoException).code === 'ENOENT') {
+      return null
+    }
+    throw error
+  }
+}
+
+/** Index of the bucket [edges[i-1], edges[i]) that holds value. */
+function bucket(edges: number[], value: number): number {
+  let i = 0
+  while (i < edges.length && value >= edges[i]) i++
+  return i
+}
+
+/**
+ * The cell for a reform type, WRLURI and 2024 permit count. Without a permit
+ * count the second size bucket is used. Returns null for reform types the
+ * model was not trained on.
+ */
+export function lookupScenario(
+  tables: ScenarioTables,
+  reformType: string,
+  wrluri: number,
+  annualPermits?: number
+): ScenarioCell | null {
+  const sizeBucket = annualPermits === undefined ? 1 : bucket(tables.size_edges, annualPermits)
+  return tables.entries[`${reformType}|${bucket(tables.wrluri_edges, wrluri)}|${sizeBucket}`] ?? null
+}
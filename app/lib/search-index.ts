@@ -0,0 +1,342 @@
+/**
+ * Client for the binary place search index built by scripts/search_index.py
+ *
+ * The index is decoded into typed arrays once; each keystroke is then answered
+ * from a binary-searched name prefix range plus trigram posting lists instead
+ * of a linear Fuse.js scan over places.json. Ranking mirrors SearchIndex in
+ * the Python module: name prefix, word prefix, trigrams matched, 2024 permits.
+ */
+
+import { STATE_FIPS_TO_NAME } from './census-transforms'
+
+export const SEARCH_INDEX_URL = '/data/search/places.idx.bin'
+export const SEARCH_MANIFEST_URL = '/data/search/manifest.json'
+
+const MAGIC = 'PLIX'
+const VERSION = 1
+const MIN_GRAM_SHARE = 0.5
+
+const NUMERIC_COLUMNS = [
+  'recent_units_2024',
+  'growth_rate_5yr',
+  'mf_share_recent',
+  'rank_permits_national',
+  'rank_growth_national',
+] as const
+
+type NumericColumn = (typeof NUMERIC_COLUMNS)[number]
+
+export interface IndexedPlace {
+  place_fips: string
+  place_name: string
+  state_fips: string
+  state_name: string
+  recent_units_2024: number
+  growth_rate_5yr: number
+  mf_share_recent: number
+  rank_permits_national: number
+  rank_growth_national: number
+}
+
+/** A match plus its sort key: tier, then trigrams matched, then 2024 permits. */
+export interface SearchHit {
+  id: number
+  tier: number
+  count: number
+  popularity: number
+}
+
+interface ShardEntry {
+  file: string
+  places: number
+  bytes: number
+}
+
+interface ShardManifest {
+  version: number
+  places: number
+  hot: ShardEntry
+  states: Record<string, ShardEntry>
+}
+
+interface SectionMeta {
+  dtype: string
+  offset: number
+  bytes: number
+  scale?: number
+  count?: number
+}
+
+interface IndexHeader {
+  version: number
+  n_places: number
+  n_grams: number
+  sections: Record<string, SectionMeta>
+}
+
+type IntArray = Int32Array | Int16Array | Uint32Array | Uint16Array | Uint8Array
+
+const TYPED_ARRAYS: Record<string, new (buffer: ArrayBuffer, offset: number, length: number) => IntArray> = {
+  int32: Int32Array,
+  int16: Int16Array,
+  uint32: Uint32Array,
+  uint16: Uint16Array,
+  uint8: Uint8Array,
+}
+
+/** Lowercase ASCII key: accents stripped, punctuation collapsed to single spaces. */
+export function normalize(text: string): string {
+  return text
+    .normalize('NFKD')
+    .replace(/\p{M}/gu, '')
+    .toLowerCase()
+    .replace(/[^a-z0-9]+/g, ' ')
+    .trim()
+}
+
+/** Trigrams of each word, with a leading space so word starts get their own grams. */
+export function trigrams(key: string): string[] {
+  const grams = new Set<string>()
+  for (const word of key.split(' ')) {
+    if (!word) continue
+    const padded = ' ' + word
+    for (let i = 0; i + 3 <= padded.length; i++) {
+      grams.add(padded.slice(i, i + 3))
+    }
+  }
+  return Array.from(grams)
+}
+
+function compareHits(a: SearchHit, b: SearchHit): number {
+  return a.tier - b.tier || b.count - a.count || b.popularity - a.popularity || a.id - b.id
+}
+
+export class PlaceSearchIndex {
+  readonly size: number
+  private names: string[]
+  private keys: string[]
+  private columns: Record<string, IntArray>
+  private scales: Record<string, number>
+  private postingIds: Uint32Array
+  private postingStarts: Uint32Array
+  private gramIndex: Map<string, number>
+
+  constructor(buffer: ArrayBuffer) {
+    const bytes = new Uint8Array(buffer)
+    const view = new DataView(buffer)
+    if (new TextDecoder().decode(bytes.subarray(0, 4)) !== MAGIC) {
+      throw new Error('Not a place search index')
+    }
+    const headerLength = view.getUint32(4, true)
+    const header = JSON.parse(new TextDecoder().decode(bytes.subarray(8, 8 + headerLength))) as IndexHeader
+    if (header.version !== VERSION) {
+      throw new Error(`Unsupported index version ${header.version}`)
+    }
+    const base = 8 + headerLength
+
+    const raw = (name: string) => {
+      const meta = header.sections[name]
+      return bytes.subarray(base + meta.offset, base + meta.offset + meta.bytes)
+    }
+    const text = (name: string) => {
+      const decoded = new TextDecoder().decode(raw(name))
+      return decoded ? decoded.split('\n') : []
+    }
+    const typed = (name: string) => {
+      const meta = header.sections[name]
+      const ArrayType = TYPED_ARRAYS[meta.dtype]
+      return new ArrayType(buffer, base + meta.offset, meta.bytes / ArrayType.BYTES_PER_ELEMENT)
+    }
+
+    this.names = text('names')
+    this.keys = this.names.map(normalize)
+    this.size = this.names.length
+
+    this.columns = {}
+    this.scales = {}
+    for (const name of ['place_fips', 'state_fips', ...NUMERIC_COLUMNS]) {
+      this.columns[name] = typed(name)
+      this.scales[name] = header.sections[name].scale ?? 1
+    }
+
+    // Posting lists are stored as varint gaps; decode them once into absolute ids
+    const grams = text('grams')
+    const lengths = typed('posting_lengths')
+    const varints = raw('postings')
+    this.postingIds = new Uint32Array(header.sections.postings.count ?? 0)
+    this.postingStarts = new Uint32Array(grams.length + 1)
+    this.gramIndex = new Map()
+
+    let pos = 0
+    let out = 0
+    grams.forEach((gram, g) => {
+      this.gramIndex.set(gram, g)
+      this.postingStarts[g] = out
+      let id = 0
+      for (let i = 0; i < lengths[g]; i++) {
+        let value = 0
+        let shift = 0
+        let byte: number
+        do {
+          byte = varints[pos++]
+          value += (byte & 0x7f) * 2 ** shift
+          shift += 7
+        } while (byte >= 0x80)
+        id += value
+        this.postingIds[out++] = id
+      }
+    })
+    this.postingStarts[grams.length] = out
+  }
+
+  /** Ids whose normalized name starts with key form the range [lo, hi). */
+  prefixRange(key: string): [number, number] {
+    const lowerBound = (target: string, from: number) => {
+      let lo = from
+      let hi = this.keys.length
+      while (lo < hi) {
+        const mid = (lo + hi) >>> 1
+        if (this.keys[mid] < target) lo = mid + 1
+        else hi = mid
+      }
+      return lo
+    }
+    const lo = lowerBound(key, 0)
+    return [lo, lowerBound(key + '\x7f', lo)]
+  }
+
+  searchHits(query: string, limit = 10): SearchHit[] {
+    const key = normalize(query)
+    if (!key) return []
+
+    const popularity = this.columns.recent_units_2024
+    const [lo, hi] = this.prefixRange(key)
+    const grams = trigrams(key)
+
+    if (grams.length === 0) {
+      // One or two characters: name prefix only
+      const hits: SearchHit[] = []
+      for (let id = lo; id < hi; id++) hits.push({ id, tier: 0, count: 0, popularity: popularity[id] })
+      return hits.sort(compareHits).slice(0, limit)
+    }
+
+    const counts = new Uint16Array(this.size)
+    const touched: number[] = []
+    for (const gram of grams) {
+      const g = this.gramIndex.get(gram)
+      if (g === undefined) continue
+      for (let i = this.postingStarts[g]; i < this.postingStarts[g + 1]; i++) {
+        const id = this.postingIds[i]
+        if (counts[id]++ === 0) touched.push(id)
+      }
+    }
+    for (let id = lo; id < hi; id++) {
+      if (counts[id] === 0) touched.push(id)
+      counts[id] = grams.length
+    }
+
+    const threshold = Math.ceil(MIN_GRAM_SHARE * grams.length)
+    const padded = ' ' + key
+    const hits: SearchHit[] = []
+    for (const id of touched) {
+      if (counts[id] < threshold) continue
+      // A word-prefix match contains every query trigram, so only full matches need the substring check
+      const wordPrefix = counts[id] === grams.length && (' ' + this.keys[id]).includes(padded)
+      const tier = id >= lo && id < hi ? 0 : wordPrefix ? 1 : 2
+      hits.push({ id, tier, count: counts[id], popularity: popularity[id] })
+    }
+    return hits.sort(compareHits).slice(0, limit)
+  }
+
+  searchIds(query: string, limit = 10): number[] {
+    return this.searchHits(query, limit).map(hit => hit.id)
+  }
+
+  search(query: string, limit = 10): IndexedPlace[] {
+    return this.searchIds(query, limit).map(id => this.record(id))
+  }
+
+  /** The places.json record for one place id, with the state name filled in. */
+  record(id: number): IndexedPlace {
+    const stateFips = String(this.columns.state_fips[id]).padStart(2, '0')
+    const value = (column: NumericColumn) => this.columns[column][id] / this.scales[column]
+    return {
+      place_fips: String(this.columns.place_fips[id]).padStart(7, '0'),
+      place_name: this.names[id],
+      state_fips: stateFips,
+      state_name: STATE_FIPS_TO_NAME[stateFips] ?? stateFips,
+      recent_units_2024: value('recent_units_2024'),
+      growth_rate_5yr: value('growth_rate_5yr'),
+      mf_share_recent: value('mf_share_recent'),
+      rank_permits_national: value('rank_permits_national'),
+      rank_growth_national: value('rank_growth_national'),
+    }
+  }
+}
+
+/** Fetch and decode the index; the server may send it gzip/brotli encoded. */
+export async function loadPlaceSearchIndex(url: string = SEARCH_INDEX_URL): Promise<PlaceSearchIndex> {
+  const response = await fetch(url)
+  if (!response.ok) {
+    throw new Error(`Failed to load search index: ${response.status}`)
+  }
+  return new PlaceSearchIndex(await response.arrayBuffer())
+}
+
+/**
+ * Hot + per-state shards listed in manifest.json (scripts/search_index.py
+ * write_shards). load() resolves once the hot shard is decoded, so search
+ * works immediately; state shards stream in behind it and onShard fires as
+ * each one becomes searchable.
+ */
+export class ShardedPlaceSearch {
+  // Manifest order (hot first); a slot stays empty until its shard has loaded
+  private shards: (PlaceSearchIndex | undefined)[] = []
+  private pending = 0
+
+  static async load(onShard?: () => void, manifestUrl: string = SEARCH_MANIFEST_URL): Promise<ShardedPlaceSearch> {
+    const response = await fetch(manifestUrl)
+    if (!response.ok) {
+      throw new Error(`Failed to load search manifest: ${response.status}`)
+    }
+    const manifest = (await response.json()) as ShardManifest
+    const shardUrl = (entry: ShardEntry) => new URL(entry.file, new URL(manifestUrl, location.href)).toString()
+
+    const search = new ShardedPlaceSearch()
+    search.shards[0] = await loadPlaceSearchIndex(shardUrl(manifest.hot))
+
+    // Sorted explicitly: numeric-looking keys like '10' would otherwise enumerate first
+    const states = Object.keys(manifest.states).sort().map(state => manifest.states[state])
+    search.pending = states.length
+    states.forEach((entry, i) => {
+      loadPlaceSearchIndex(shardUrl(entry))
+        .then(shard => {
+          search.shards[i + 1] = shard
+          onShard?.()
+        })
+        .catch(error => console.error(`Failed to load search shard ${entry.file}:`, error))
+        .finally(() => {
+          search.pending--
+        })
+    })
+    return search
+  }
+
+  /** True while state shards are still loading. */
+  get partial(): boolean {
+    return this.pending > 0
+  }
+
+  search(query: string, limit = 10): IndexedPlace[] {
+    const hits: (SearchHit & { shard: number })[] = []
+    this.shards.forEach((index, shard) => {
+      if (index) hits.push(...index.searchHits(query, limit).map(hit => ({ ...hit, shard })))
+    })
+    // Ids are per shard: ties go to the earlier shard, then the lower id
+    return hits
+      .sort((a, b) => a.tier - b.tier || b.count - a.count || b.popularity - a.popularity ||
+        a.shard - b.shard || a.id - b.id)
+      .slice(0, limit)
+      .map(hit => this.shards[hit.shard]!.record(hit.id))
+  }
+}
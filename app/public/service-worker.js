@@ -15,12 +15,15 @@ const NETWORK_FIRST_PATTERNS = [
   /\/api\//,
   /\/dashboard/,
   /\/scenario/,
+  /\/data\/search\/manifest\.json$/,
 ];
 
 // Cache-first URLs (static assets)
 const CACHE_FIRST_PATTERNS = [
   /\.(js|css|woff2|png|jpg|jpeg|svg|ico)$/,
   /\/_next\/static\//,
+  // Search shards are named by content hash, so a cached copy never goes stale
+  /\/data\/search\/shards\/.+\.[0-9a-f]{12}\.bin$/,
 ];
 
 // Install event - cache static assets
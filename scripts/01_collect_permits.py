@@ -16,6 +16,8 @@ import pandas as pd
 import requests
 from dotenv import load_dotenv
 
+from http_cache import cached_get
+
 RAW_DIR = "data/raw"
 PARQUET_OUT = os.path.join(RAW_DIR, "permit_data_2015_2024.parquet")
 LOCAL_CSV = os.path.join(RAW_DIR, "state_permits_monthly.csv")
@@ -40,7 +42,7 @@ def try_census_api():
         url = base + (f"&key={api_key}" if api_key else "")
         print(f"🔎 Trying Census endpoint {idx}/{len(endpoints)} …")
         try:
-            r = requests.get(url, timeout=60, headers=headers)
+            r = cached_get(url, timeout=60, headers=headers)
             if r.status_code != 200:
                 print(f"  ⚠️  HTTP {r.status_code} from {url}")
                 # Print a short snippet of response text to help debugging
@@ -11,6 +11,8 @@ import requests
 from datetime import datetime
 import time
 
+from http_cache import cached_get
+
 # Census API configuration
 CENSUS_API_KEY = os.environ.get('CENSUS_API_KEY', None)
 CENSUS_BASE_URL = "https://api.census.gov/data"
@@ -51,7 +53,7 @@ def fetch_annual_bps_data(year):
     print(f"Fetching {year} annual data from {url}")
 
     try:
-        response = requests.get(url, params=params, timeout=30)
+        response = cached_get(url, params=params, timeout=30)
         response.raise_for_status()
 
         data = response.json()
@@ -87,7 +89,7 @@ def fetch_monthly_bps_data(year, month):
         params['key'] = CENSUS_API_KEY
 
     try:
-        response = requests.get(url, params=params, timeout=30)
+        response = cached_get(url, params=params, timeout=30)
         response.raise_for_status()
 
         data = response.json()
@@ -151,7 +153,7 @@ def try_all_endpoints():
         print(f"  Params: {params}")
 
         try:
-            response = requests.get(url, params=params, timeout=15)
+            response = cached_get(url, params=params, timeout=15)
             print(f"  Status: {response.status_code}")
 
             if response.status_code == 200:
@@ -11,6 +11,8 @@ import requests
 from io import BytesIO
 import time
 
+from http_cache import cached_get
+
 # Census Bureau publishes BPS data as Excel files on their website
 # https://www.census.gov/construction/bps/stateannual.html
 
@@ -28,7 +30,7 @@ def download_annual_state_permits():
     print(f"URL: {url}")
 
     try:
-        response = requests.get(url, timeout=30)
+        response = cached_get(url, timeout=30)
         response.raise_for_status()
 
         print(f"SUCCESS! Downloaded {len(response.content)} bytes")
@@ -90,7 +92,7 @@ def download_monthly_state_permits():
         print(f"\nFetching {year}: {url}")
 
         try:
-            response = requests.get(url, timeout=30)
+            response = cached_get(url, timeout=30)
 
             if response.status_code == 200:
                 print(f"  SUCCESS! {len(response.content)} bytes")
@@ -147,7 +149,7 @@ def try_alternative_sources():
         print(f"  URL: {url}")
 
         try:
-            response = requests.get(url, timeout=20, allow_redirects=True)
+            response = cached_get(url, timeout=20, allow_redirects=True)
             print(f"  Status: {response.status_code}")
             print(f"  Content-Type: {response.headers.get('content-type', 'unknown')}")
             print(f"  Size: {len(response.content)} bytes")
@@ -6,11 +6,13 @@ Fetches TXT files and parses them correctly
 """
 
 import pandas as pd
-import requests
 from io import StringIO
 import time
 import os
 
+from bps_parser import parse_bps_text
+from http_cache import cached_get
+
 def fetch_and_parse_year(year):
     """
     Fetch and parse Census BPS data for one year
@@ -22,11 +24,10 @@ def fetch_and_parse_year(year):
     print(f"Fetching {year}: {url}")
 
     try:
-        response = requests.get(url, timeout=30)
+        response = cached_get(url, timeout=30)
         response.raise_for_status()
 
-        # Parse tab-delimited
-        df = pd.read_csv(StringIO(response.text), sep='\t', low_memory=False)
+        df = parse_bps_text(StringIO(response.text), 'state')
 
         print(f"  Downloaded {len(df)} rows")
 
@@ -36,60 +37,25 @@ def fetch_and_parse_year(year):
         print(f"  ERROR: {e}")
         return None, year
 
-def extract_permits_from_row(row):
+def extract_monthly_permits(df):
     """
-    Extract permit data from a Census BPS row
-    Returns dict with state info and permits
+    Monthly state permit records from a parsed BPS state file
+    (annual totals, month == 99, are skipped)
     """
 
-    try:
-        # First column is survey date (YYYYMM)
-        survey_date = str(row.iloc[0]).strip()
-
-        if len(survey_date) != 6 or not survey_date.isdigit():
-            return None
-
-        year = int(survey_date[:4])
-        month = int(survey_date[4:6])
-
-        # Skip annual totals (month == 99)
-        if month == 99:
-            return None
-
-        # Second column is state FIPS
-        state_fips = str(row.iloc[1]).strip().zfill(2)
-
-        # Fifth column is state name
-        state_name = str(row.iloc[4]).strip()
-
-        # Permit units by structure type:
-        # Column 6: 1-unit (single-family)
-        # Column 9: 2-units
-        # Column 12: 3-4 units
-        # Column 15: 5+ units (multifamily)
-
-        sf_permits = int(row.iloc[6]) if pd.notna(row.iloc[6]) and str(row.iloc[6]).replace('.', '').isdigit() else 0
-        two_units = int(row.iloc[9]) if pd.notna(row.iloc[9]) and str(row.iloc[9]).replace('.', '').isdigit() else 0
-        three_four = int(row.iloc[12]) if pd.notna(row.iloc[12]) and str(row.iloc[12]).replace('.', '').isdigit() else 0
-        five_plus = int(row.iloc[15]) if pd.notna(row.iloc[15]) and str(row.iloc[15]).replace('.', '').isdigit() else 0
-
-        mf_permits = two_units + three_four + five_plus
-        total_permits = sf_permits + mf_permits
-
-        return {
-            'state_fips': state_fips,
-            'state_name': state_name,
-            'year': year,
-            'month': month,
-            'date': f"{year}-{month:02d}-01",
-            'sf_permits': sf_permits,
-            'mf_permits': mf_permits,
-            'total_permits': total_permits,
-            'adu_permits': 0  # Not tracked separately
-        }
+    monthly = df[~df['is_annual']]
 
-    except Exception as e:
-        return None
+    return pd.DataFrame({
+        'state_fips': monthly['state_fips'],
+        'state_name': monthly['state_name'],
+        'year': monthly['year'],
+        'month': monthly['month'],
+        'date': monthly['year'].astype(str) + '-' + monthly['month'].astype(str).str.zfill(2) + '-01',
+        'sf_permits': monthly['sf_units'],
+        'mf_permits': monthly['mf_units'],
+        'total_permits': monthly['total_units'],
+        'adu_permits': 0  # Not tracked separately
+    })
 
 def build_dataset():
     """
@@ -106,21 +72,15 @@ def build_dataset():
         df, _ = fetch_and_parse_year(year)
 
         if df is not None:
-            year_count = 0
-
-            for _, row in df.iterrows():
-                record = extract_permits_from_row(row)
-
-                if record:
-                    all_records.append(record)
-                    year_count += 1
+            records = extract_monthly_permits(df)
+            all_records.append(records)
 
-            print(f"  Extracted {year_count} monthly records")
+            print(f"  Extracted {len(records)} monthly records")
 
         time.sleep(0.5)  # Rate limiting
 
-    # Convert to DataFrame
-    final_df = pd.DataFrame(all_records)
+    # Combine years
+    final_df = pd.concat(all_records, ignore_index=True) if all_records else pd.DataFrame()
 
     print("\n" + "=" * 60)
     print("DATASET SUMMARY")
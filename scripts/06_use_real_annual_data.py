@@ -7,10 +7,12 @@ Convert to monthly estimates with seasonal patterns
 
 import pandas as pd
 import numpy as np
-import requests
 from io import StringIO
 import os
 
+from bps_parser import parse_bps_text
+from http_cache import cached_get
+
 # Seasonal adjustment factors (typical construction seasonality)
 # Based on empirical construction patterns: higher in summer, lower in winter
 MONTHLY_FACTORS = {
@@ -38,59 +40,31 @@ def download_annual_data(year):
     print(f"Downloading {year}...")
 
     try:
-        response = requests.get(url, timeout=30)
+        response = cached_get(url, timeout=30)
         response.raise_for_status()
 
-        # File is comma-separated, skip first 3 rows (2 header rows + 1 blank)
-        df = pd.read_csv(StringIO(response.text), skiprows=3, header=None, low_memory=False)
-        return df
+        return parse_bps_text(StringIO(response.text), 'state')
 
     except Exception as e:
         print(f"  ERROR: {e}")
         return None
 
-def parse_annual_row(row):
+def extract_annual_totals(df):
     """
-    Extract annual totals from BPS row
-    Returns dict with state and annual permit counts
+    Annual totals (month == 99 rows) from a parsed BPS state file
+    Returns list of dicts with state and annual permit counts
     """
 
-    try:
-        survey_date = str(row.iloc[0]).strip()
-
-        if len(survey_date) != 6:
-            return None
-
-        year = int(survey_date[:4])
-        month = int(survey_date[4:6])
-
-        # We WANT annual totals (month == 99)
-        if month != 99:
-            return None
-
-        state_fips = str(row.iloc[1]).strip().zfill(2)
-        state_name = str(row.iloc[4]).strip()
-
-        # Extract annual units
-        sf_units = int(float(row.iloc[6])) if pd.notna(row.iloc[6]) else 0
-        two_units = int(float(row.iloc[9])) if pd.notna(row.iloc[9]) else 0
-        three_four = int(float(row.iloc[12])) if pd.notna(row.iloc[12]) else 0
-        five_plus = int(float(row.iloc[15])) if pd.notna(row.iloc[15]) else 0
+    annual = df[df['is_annual']]
 
-        mf_units = two_units + three_four + five_plus
-        total_units = sf_units + mf_units
-
-        return {
-            'state_fips': state_fips,
-            'state_name': state_name,
-            'year': year,
-            'sf_annual': sf_units,
-            'mf_annual': mf_units,
-            'total_annual': total_units
-        }
-
-    except Exception as e:
-        return None
+    return pd.DataFrame({
+        'state_fips': annual['state_fips'],
+        'state_name': annual['state_name'],
+        'year': annual['year'],
+        'sf_annual': annual['sf_units'],
+        'mf_annual': annual['mf_units'],
+        'total_annual': annual['total_units']
+    }).to_dict('records')
 
 def distribute_annual_to_monthly(annual_record):
     """
@@ -142,16 +116,10 @@ def build_comprehensive_dataset():
         df = download_annual_data(year)
 
         if df is not None:
-            year_count = 0
-
-            for _, row in df.iterrows():
-                record = parse_annual_row(row)
-
-                if record:
-                    all_annual.append(record)
-                    year_count += 1
+            records = extract_annual_totals(df)
+            all_annual.extend(records)
 
-            print(f"  Extracted {year_count} state records for {year}")
+            print(f"  Extracted {len(records)} state records for {year}")
 
     # Convert annual to monthly estimates
     print("\nConverting to monthly estimates...")
@@ -9,12 +9,11 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from permit_store import load_table
+
 def load_permit_data():
     """Load comprehensive permit data"""
-    df = pd.read_csv('data/raw/state_permits_monthly_comprehensive.csv', dtype={'state_fips': str})
-    df['date'] = pd.to_datetime(df['date'])
-    df['state_fips'] = df['state_fips'].str.zfill(2)
-    return df
+    return load_table('state').to_frame()
 
 def compute_state_baseline_metrics(state_fips, state_name, permits_df):
     """
@@ -84,7 +83,7 @@ def build_all_states_metrics():
         state_name = state_row['state_name']
 
         # Skip aggregated regions (they have non-standard FIPS)
-        if not state_fips.isdigit() or len(state_fips) != 2:
+        if pd.isna(state_fips) or not state_fips.isdigit() or len(state_fips) != 2:
             continue
 
         # Skip numeric region codes > 56 (territories)
@@ -1,17 +1,67 @@
 """
 Fetch county-level building permit data from U.S. Census Bureau.
 County data is available from the Building Permits Survey (BPS).
+
+Years are downloaded and parsed concurrently (thread pool for I/O, vectorized
+parsing per year) and written as a year-partitioned Parquet dataset:
+
+    data/outputs/county_permits/year=YYYY/part-0.parquet
+
+Rows are sorted by 5-digit county FIPS, so a state's counties form one
+contiguous block and readers can load a single state's slice with
+predicate pushdown:
+
+    pd.read_parquet(COUNTY_DATASET, filters=[('state_fips', '==', '06')])
+
+The app's county drill-down route (/api/counties/[state_fips]) cannot read
+Parquet, so the dataset is also published as one JSON document per state,
+already in the route's response shape:
+
+    data/outputs/county_states/{state_fips}.json
+
+Usage:
+    python scripts/08_fetch_county_permits.py                 # 2020-2024
+    python scripts/08_fetch_county_permits.py --full-history  # 2000-2024
 """
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import requests
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
+from pathlib import Path
+import json
 import time
 import os
 
+from bps_parser import parse_bps_text
+from http_cache import cached_get
+
 # Create output directory
 os.makedirs('data/outputs', exist_ok=True)
 
+COUNTY_DATASET = Path('data/outputs/county_permits')
+COUNTY_CSV = 'data/outputs/county_permits_annual.csv'
+STATE_DIR = Path('data/outputs/county_states')
+
+FIRST_YEAR = 2000 if '--full-history' in sys.argv else 2020
+LAST_YEAR = 2024
+MAX_WORKERS = 6  # concurrent year downloads
+ROW_GROUP_SIZE = 1024  # ~20 row groups per year, so state filters skip most of a file
+
+COUNTY_SCHEMA = pa.schema([
+    ('fips', pa.string()),
+    ('state_fips', pa.string()),
+    ('county_fips', pa.string()),
+    ('county_name', pa.string()),
+    ('sf_annual', pa.int32()),
+    ('mf_annual', pa.int32()),
+    ('total_annual', pa.int32()),
+])
+
 def download_county_data(year):
     """
     Download county-level annual permit data from Census Bureau.
@@ -22,61 +72,33 @@ def download_county_data(year):
     print(f"Fetching county data for {year}...")
 
     try:
-        response = requests.get(url, timeout=30)
+        response = cached_get(url, timeout=30)
         response.raise_for_status()
 
-        # Parse the fixed-width format file
-        # Skip header rows (first 4 lines)
-        df = pd.read_csv(StringIO(response.text), skiprows=4, header=None, low_memory=False)
-
-        # County files have different format than state files
         # Columns: Survey Date, FIPS State Code, FIPS County Code, Region, Division,
-        # 1-unit, 2-units, 3-4 units, 5+ units, etc.
-
-        records = []
-        for _, row in df.iterrows():
-            try:
-                # Skip empty rows
-                if pd.isna(row.iloc[0]):
-                    continue
-
-                # Extract FIPS codes
-                state_fips = str(row.iloc[1]).strip().zfill(2) if pd.notna(row.iloc[1]) else None
-                county_fips = str(row.iloc[2]).strip().zfill(3) if pd.notna(row.iloc[2]) else None
-
-                if not state_fips or not county_fips:
-                    continue
-
-                # Parse permit counts (1-unit is column 5, 2-units is 6, 3-4 is 7, 5+ is 8)
-                sf_units = int(row.iloc[5]) if pd.notna(row.iloc[5]) and str(row.iloc[5]).strip() != '' else 0
-                units_2 = int(row.iloc[6]) if pd.notna(row.iloc[6]) and str(row.iloc[6]).strip() != '' else 0
-                units_3_4 = int(row.iloc[7]) if pd.notna(row.iloc[7]) and str(row.iloc[7]).strip() != '' else 0
-                units_5plus = int(row.iloc[8]) if pd.notna(row.iloc[8]) and str(row.iloc[8]).strip() != '' else 0
-
-                # Multi-family = 2-units + 3-4 units + 5+ units
-                mf_units = units_2 + units_3_4 + units_5plus
-
-                records.append({
-                    'year': year,
-                    'state_fips': state_fips,
-                    'county_fips': county_fips,
-                    'fips': f"{state_fips}{county_fips}",
-                    'sf_annual': sf_units,
-                    'mf_annual': mf_units,
-                    'total_annual': sf_units + mf_units,
-                })
-            except Exception as e:
-                # Skip problematic rows
-                continue
-
-        if records:
-            year_df = pd.DataFrame(records)
-            print(f"  -> Parsed {len(year_df)} counties for {year}")
-            return year_df
-        else:
+        # County Name, then (bldgs, units, value) for 1-unit, 2-units, 3-4 units, 5+ units
+        df = parse_bps_text(StringIO(response.text), 'county')
+
+        # Skip rows without both FIPS codes
+        df = df[df['state_fips'].notna() & df['county_fips'].notna()]
+
+        if df.empty:
             print(f"  -> No valid records for {year}")
             return pd.DataFrame()
 
+        year_df = pd.DataFrame({
+            'year': year,
+            'state_fips': df['state_fips'],
+            'county_fips': df['county_fips'],
+            'fips': df['fips'],
+            'county_name': df['county_name'],
+            'sf_annual': df['sf_units'],
+            'mf_annual': df['mf_units'],  # 2-units + 3-4 units + 5+ units
+            'total_annual': df['total_units'],
+        })
+        print(f"  -> Parsed {len(year_df)} counties for {year}")
+        return year_df
+
     except requests.exceptions.RequestException as e:
         print(f"  -> Error fetching {year}: {e}")
         return pd.DataFrame()
@@ -84,35 +106,123 @@ def download_county_data(year):
         print(f"  -> Error parsing {year}: {e}")
         return pd.DataFrame()
 
+def write_year_partition(year_df, year):
+    """Write one year's counties, sorted by FIPS, to its Parquet partition."""
+    partition = COUNTY_DATASET / f"year={year}"
+    if partition.exists():
+        shutil.rmtree(partition)
+    partition.mkdir(parents=True)
+
+    table = pa.Table.from_pandas(
+        year_df.sort_values('fips')[COUNTY_SCHEMA.names],
+        schema=COUNTY_SCHEMA,
+        preserve_index=False,
+    )
+    pq.write_table(table, partition / 'part-0.parquet', row_group_size=ROW_GROUP_SIZE)
+
+def load_county_permits(state_fips=None, years=None):
+    """
+    Read the county dataset, optionally one state's slice and/or some years.
+
+    Filters are pushed down to the Parquet reader, so only matching
+    partitions and row groups are read.
+    """
+    filters = []
+    if state_fips is not None:
+        filters.append(('state_fips', '==', str(state_fips).zfill(2)))
+    if years is not None:
+        filters.append(('year', 'in', list(years)))
+
+    df = pd.read_parquet(COUNTY_DATASET, filters=filters or None)
+    df['year'] = df['year'].astype(int)  # partition keys come back categorical
+    return df
+
+def state_document(state_df):
+    """
+    One state's counties as the county drill-down route serves them: totals,
+    an annual series and shares, sorted by total permits descending.
+    """
+    years = sorted(state_df['year'].unique().tolist())
+    counties = []
+    for fips, county in state_df.sort_values('year').groupby('fips', sort=False):
+        total = int(county['total_annual'].sum())
+        mf = int(county['mf_annual'].sum())
+        counties.append({
+            'fips': fips,
+            'state_fips': county['state_fips'].iloc[0],
+            'county_fips': county['county_fips'].iloc[0],
+            'county_name': county['county_name'].iloc[-1],
+            'total_permits': total,
+            'sf_permits': int(county['sf_annual'].sum()),
+            'mf_permits': mf,
+            'months': [  # one point per year; the field keeps the route's original name
+                {'date': str(year), 'total': int(t), 'sf': int(sf), 'mf': int(m)}
+                for year, t, sf, m in zip(county['year'], county['total_annual'],
+                                          county['sf_annual'], county['mf_annual'])
+            ],
+            'avg_monthly': round(total / (12 * len(county))),
+            'mf_share_pct': f"{mf / total * 100:.1f}" if total else '0.0',
+        })
+    counties.sort(key=lambda c: c['total_permits'], reverse=True)
+    return {
+        'state_fips': state_df['state_fips'].iloc[0],
+        'period': 'annual',
+        'years': [years[0], years[-1]],
+        'county_count': len(counties),
+        'data': counties,
+    }
+
+def publish_state_documents():
+    """Write one JSON document per state from the Parquet dataset; returns the number written."""
+    df = load_county_permits()
+    if STATE_DIR.exists():
+        shutil.rmtree(STATE_DIR)
+    STATE_DIR.mkdir(parents=True)
+
+    for state_fips, state_df in df.groupby('state_fips', observed=True):
+        with open(STATE_DIR / f"{state_fips}.json", 'w') as f:
+            json.dump(state_document(state_df), f, separators=(',', ':'))
+    return df['state_fips'].nunique()
+
 def main():
-    """Download county data for recent years (2020-2024)"""
+    """Download county data for FIRST_YEAR-LAST_YEAR concurrently"""
 
     print("=" * 60)
     print("Downloading County-Level Building Permit Data")
     print("=" * 60)
 
-    # Focus on recent years for county drill-down (2020-2024)
-    years = range(2020, 2025)
+    # Recent years by default for county drill-down (2020-2024)
+    years = range(FIRST_YEAR, LAST_YEAR + 1)
+
+    start_time = time.time()
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        results = list(pool.map(download_county_data, years))
 
     all_data = []
 
-    for year in years:
-        year_data = download_county_data(year)
+    for year, year_data in zip(years, results):
         if not year_data.empty:
+            write_year_partition(year_data, year)
             all_data.append(year_data)
-        time.sleep(0.5)  # Be respectful to Census servers
+
+    print(f"\nFetched and parsed {len(all_data)} of {len(years)} years in {time.time() - start_time:.1f}s")
 
     if all_data:
         # Combine all years
         combined = pd.concat(all_data, ignore_index=True)
 
-        # Save to CSV
-        output_path = 'data/outputs/county_permits_annual.csv'
-        combined.to_csv(output_path, index=False)
+        # Flat CSV for existing consumers
+        combined.to_csv(COUNTY_CSV, index=False)
+
+        # Per-state documents for the app's county drill-down route
+        n_states = publish_state_documents()
 
         print("\n" + "=" * 60)
         print(f"SUCCESS: Saved {len(combined)} county-year records")
-        print(f"Output: {output_path}")
+        print(f"Output: {COUNTY_DATASET}/ (Parquet, partitioned by year)")
+        print(f"        {COUNTY_CSV}")
+        print(f"        {STATE_DIR}/ ({n_states} state documents)")
         print(f"Years: {combined['year'].min()} - {combined['year'].max()}")
         print(f"Unique counties: {combined['fips'].nunique()}")
         print("=" * 60)
@@ -126,7 +236,7 @@ def main():
 
         county_totals = county_totals.sort_values('total_annual', ascending=False)
 
-        print("\nTop 10 Counties by Total Permits (2020-2024):")
+        print(f"\nTop 10 Counties by Total Permits ({FIRST_YEAR}-{LAST_YEAR}):")
         for i, row in county_totals.head(10).iterrows():
             print(f"  {row['fips']}: {row['total_annual']:,} permits")
     else:
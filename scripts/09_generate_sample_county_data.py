@@ -4,15 +4,15 @@ In production, this would use real Census Bureau county data.
 
 For now, we'll create realistic sample data based on state-level patterns
 distributed across counties proportionally by population.
+
+generate_sample_county_data() does the split for any state table and county
+list, so benchmarks.py can build county fixtures of any size with it.
 """
 
 import pandas as pd
 import numpy as np
 import os
 
-# Create output directory
-os.makedirs('data/outputs', exist_ok=True)
-
 # County names for major states (top counties by population)
 SAMPLE_COUNTIES = {
     '06': [  # California
@@ -70,55 +70,70 @@ SAMPLE_COUNTIES = {
     ],
 }
 
-def generate_county_data():
-    """Generate sample county-level data based on state patterns"""
+def generate_sample_county_data(state_data, counties=SAMPLE_COUNTIES):
+    """
+    Split each state's monthly permits across its counties.
 
-    # Load state-level data
-    state_data = pd.read_csv('../data/raw/state_permits_monthly_comprehensive.csv', dtype={'state_fips': str})
-    state_data['state_fips'] = state_data['state_fips'].str.zfill(2)
+    Args:
+        state_data: monthly state rows (date, year, month, state_fips,
+            sf_permits, mf_permits)
+        counties: state_fips -> [(county_fips, county_name, population_millions)]
 
-    records = []
+    Returns:
+        One row per county-month. A county's share is its population over the
+        state's listed counties, with +/-15% random variation per month.
+    """
+    frames = []
 
-    for state_fips, counties in SAMPLE_COUNTIES.items():
+    for state_fips, state_counties in counties.items():
         # Get state-level monthly data
-        state_monthly = state_data[state_data['state_fips'] == state_fips].copy()
+        state_monthly = state_data[state_data['state_fips'] == state_fips]
 
         if state_monthly.empty:
             print(f"No state data for FIPS {state_fips}, skipping...")
             continue
 
-        # Calculate total population weight for this state's counties
-        total_pop = sum([c[2] for c in counties])
+        county_fips = np.array([c[0] for c in state_counties])
+        county_names = np.array([c[1] for c in state_counties])
+        population = np.array([c[2] for c in state_counties], dtype=float)
+
+        # Proportion of state's permits going to each county
+        county_share = population / sum(population)
 
-        for county_fips, county_name, population_millions in counties:
-            # Proportion of state's permits going to this county
-            county_share = population_millions / total_pop
+        # County x month grid with +/- 15% variation (same draw order as a county-major loop)
+        n_counties, n_months = len(state_counties), len(state_monthly)
+        variation = np.random.uniform(0.85, 1.15, (n_counties, n_months))
+        sf_permits = (state_monthly['sf_permits'].to_numpy()[None, :] * county_share[:, None] * variation).astype(np.int64)
+        mf_permits = (state_monthly['mf_permits'].to_numpy()[None, :] * county_share[:, None] * variation).astype(np.int64)
 
-            # Apply county share with some random variation
-            for _, month_row in state_monthly.iterrows():
-                variation = np.random.uniform(0.85, 1.15)  # +/- 15% variation
+        frames.append(pd.DataFrame({
+            'date': np.tile(state_monthly['date'].to_numpy(), n_counties),
+            'year': np.tile(state_monthly['year'].to_numpy(), n_counties),
+            'month': np.tile(state_monthly['month'].to_numpy(), n_counties),
+            'state_fips': state_fips,
+            'county_fips': np.repeat(county_fips, n_months),
+            'fips': np.repeat(np.char.add(state_fips, county_fips), n_months),
+            'county_name': np.repeat(county_names, n_months),
+            'sf_permits': sf_permits.ravel(),
+            'mf_permits': mf_permits.ravel(),
+            'total_permits': (sf_permits + mf_permits).ravel(),
+        }))
 
-                sf_permits = int(month_row['sf_permits'] * county_share * variation)
-                mf_permits = int(month_row['mf_permits'] * county_share * variation)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
-                records.append({
-                    'date': month_row['date'],
-                    'year': month_row['year'],
-                    'month': month_row['month'],
-                    'state_fips': state_fips,
-                    'county_fips': county_fips,
-                    'fips': f"{state_fips}{county_fips}",
-                    'county_name': county_name,
-                    'sf_permits': sf_permits,
-                    'mf_permits': mf_permits,
-                    'total_permits': sf_permits + mf_permits,
-                })
 
-    # Create DataFrame
-    df = pd.DataFrame(records)
+def generate_county_data():
+    """Generate sample county-level data based on state patterns"""
+
+    # Load state-level data
+    state_data = pd.read_csv('../data/raw/state_permits_monthly_comprehensive.csv', dtype={'state_fips': str})
+    state_data['state_fips'] = state_data['state_fips'].str.zfill(2)
+
+    df = generate_sample_county_data(state_data)
 
     # Save to CSV
     output_path = '../data/outputs/county_permits_monthly.csv'
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
     df.to_csv(output_path, index=False)
 
     print("=" * 60)
@@ -2,20 +2,38 @@
 Build predictive ML model for housing permit changes using comprehensive features
 Compares baseline model (4 features) vs enhanced model (10+ features)
 Models: Linear Regression, Ridge, Lasso, Random Forest with cross-validation
-Output: Model comparison, feature importance, R² scores
+Output: Model comparison, feature importance, R² scores, per-job CV timings
+
+All (feature set x model x fold) fits run in one process pool
+(training_harness.py) on shared fold indices and fold-level scalers.
+
+--tune first runs a resumable successive-halving search
+(hyperparameter_search.py) for the forest and boosting models on each
+feature set and evaluates the best configurations. Their CV R² is then
+nested: each outer fold (the same folds as the untuned models) runs its own
+search on its training rows, so the held-out rows never choose the
+hyperparameters. The full-data search's own score is optimistic and is only
+kept in the tuning summary.
+
+Usage:
+    python scripts/10_build_predictive_model.py [--jobs N] [--tune]
 """
 
+import argparse
+import json
 import os
 import pandas as pd
 import numpy as np
 import warnings
 from sklearn.linear_model import LinearRegression, Ridge, Lasso
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.model_selection import cross_val_score, KFold
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
+from sklearn.metrics import r2_score
 import matplotlib.pyplot as plt
 
+from hyperparameter_search import best_estimator, halving_search
+from perf import instrument
+from training_harness import N_SPLITS, evaluate_models, make_folds
+
 warnings.filterwarnings('ignore')
 
 # Input/Output files
@@ -23,6 +41,11 @@ INPUT_FILE = "data/outputs/state_features_comprehensive.csv"
 OUTPUT_MODEL_COMPARISON = "data/outputs/model_comparison.csv"
 OUTPUT_FEATURE_IMPORTANCE = "data/outputs/feature_importance.csv"
 OUTPUT_PREDICTIONS = "data/outputs/model_predictions.csv"
+OUTPUT_CV_JOBS = "data/outputs/model_cv_jobs.csv"
+OUTPUT_TUNING = "data/outputs/model_tuning.json"
+
+# Models tuned by --tune, by search space in hyperparameter_search.SEARCH_SPACES
+TUNED_MODELS = {'Random Forest': 'random_forest', 'Gradient Boosting': 'gradient_boosting'}
 
 # Random state for reproducibility
 RANDOM_STATE = 42
@@ -162,16 +185,9 @@ def prepare_enhanced_model_data(df):
     return X, y, available_features
 
 
-def train_and_evaluate_models(X, y, feature_names, model_type="Enhanced"):
-    """
-    Train multiple ML models with cross-validation
-    Returns: dict with model results
-    """
-
-    print(f"\nTraining {model_type} models...")
-
-    # Define models to train
-    models = {
+def build_models():
+    """The model families compared on each feature set"""
+    return {
         'Linear Regression': LinearRegression(),
         'Ridge Regression': Ridge(alpha=1.0, random_state=RANDOM_STATE),
         'Lasso Regression': Lasso(alpha=0.1, random_state=RANDOM_STATE),
@@ -187,55 +203,68 @@ def train_and_evaluate_models(X, y, feature_names, model_type="Enhanced"):
         )
     }
 
-    # Cross-validation setup
-    cv = KFold(n_splits=min(5, len(X)), shuffle=True, random_state=RANDOM_STATE)
-
-    results = []
-
-    for model_name, model in models.items():
-        try:
-            # Cross-validation R² scores
-            cv_scores = cross_val_score(model, X, y, cv=cv, scoring='r2')
-
-            # Train on full dataset for feature importance
-            model.fit(X, y)
-            y_pred = model.predict(X)
-
-            # Calculate metrics
-            r2 = r2_score(y, y_pred)
-            rmse = np.sqrt(mean_squared_error(y, y_pred))
-            mae = mean_absolute_error(y, y_pred)
-
-            # Get feature importance (if available)
-            if hasattr(model, 'feature_importances_'):
-                feature_importance = model.feature_importances_
-            elif hasattr(model, 'coef_'):
-                feature_importance = np.abs(model.coef_)
-            else:
-                feature_importance = None
-
-            results.append({
-                'model_type': model_type,
-                'model_name': model_name,
-                'r2_score': round(r2, 4),
-                'r2_cv_mean': round(cv_scores.mean(), 4),
-                'r2_cv_std': round(cv_scores.std(), 4),
-                'rmse': round(rmse, 2),
-                'mae': round(mae, 2),
-                'n_features': len(feature_names),
-                'n_samples': len(X),
-                'feature_importance': feature_importance,
-                'feature_names': feature_names,
-                'model_object': model,
-                'predictions': y_pred
-            })
-
-            print(f"  • {model_name:20s}: R² = {r2:6.4f}, CV R² = {cv_scores.mean():6.4f} ± {cv_scores.std():5.4f}")
-
-        except Exception as e:
-            print(f"  ✗ {model_name}: Error - {str(e)}")
-
-    return results
+
+@instrument()
+def tune_models(X, y, model_type, n_jobs=-1):
+    """Best hyperparameters per tuned model for one feature set"""
+
+    print(f"\nTuning {model_type} models...")
+    searches = {
+        name: halving_search(f"model_{model_type.lower()}_{space}", space, X, y, n_jobs=n_jobs)
+        for name, space in TUNED_MODELS.items()
+    }
+    return searches
+
+
+@instrument()
+def nested_cv_scores(X, y, model_type, n_jobs=-1):
+    """Outer-fold R² per tuned model, with a fresh search on each outer fold's training rows"""
+
+    print(f"\nNested CV of tuned {model_type} models...")
+    scores = {name: [] for name in TUNED_MODELS}
+    for fold, (train, test) in enumerate(make_folds(len(X), N_SPLITS)):
+        X_train, y_train = X.iloc[train], y.iloc[train]
+        for name, space in TUNED_MODELS.items():
+            search = halving_search(f"model_{model_type.lower()}_{space}_outer{fold}", space,
+                                    X_train, y_train, n_jobs=n_jobs)
+            fitted = best_estimator(search).fit(X_train, y_train)
+            scores[name].append(r2_score(y.iloc[test], fitted.predict(X.iloc[test])))
+    return {name: np.array(fold_scores) for name, fold_scores in scores.items()}
+
+
+@instrument()
+def train_and_evaluate_models(feature_sets, n_jobs=-1, tuned_params=None, nested_scores=None):
+    """
+    Cross-validate every model on every feature set in one process pool
+    feature_sets: {model_type: (X, y)}
+    tuned_params: {model_type: {model_name: params}} from tune_models
+    nested_scores: {model_type: {model_name: outer-fold R²}} from nested_cv_scores;
+                   replaces the CV R² of the tuned models
+    Returns: ({model_type: [model results]}, per-job timing DataFrame)
+    """
+
+    print(f"\nTraining {', '.join(feature_sets)} models...")
+
+    run = evaluate_models(feature_sets, build_models(), n_splits=N_SPLITS, n_jobs=n_jobs, params=tuned_params)
+
+    nested_scores = nested_scores or {}
+    results = {model_type: [] for model_type in feature_sets}
+    for result in run.results:
+        outer = nested_scores.get(result['model_type'], {}).get(result['model_name'])
+        if outer is None:
+            result['cv_method'] = f"{N_SPLITS}-fold"
+        else:
+            result['r2_cv_mean'], result['r2_cv_std'] = round(outer.mean(), 4), round(outer.std(), 4)
+            result['cv_method'] = f"nested {N_SPLITS}-fold"
+        results[result['model_type']].append(result)
+        print(f"  • {result['model_type']:8s} {result['model_name']:20s}: R² = {result['r2_score']:6.4f}, "
+              f"CV R² = {result['r2_cv_mean']:6.4f} ± {result['r2_cv_std']:5.4f} ({result['cv_method']})")
+
+    fit_s = run.jobs['fit_s'].sum()
+    print(f"  • {len(run.jobs)} jobs on {run.jobs['pid'].nunique()} workers: "
+          f"{fit_s:.2f}s of fitting in {run.wall_s:.2f}s wall time")
+
+    return results, run.jobs
 
 
 def extract_feature_importance(model_results):
@@ -316,7 +345,7 @@ def generate_comparison_report(baseline_results, enhanced_results):
     print("=" * 70)
 
 
-def save_results(baseline_results, enhanced_results, feature_importance):
+def save_results(baseline_results, enhanced_results, feature_importance, cv_jobs, searches=None):
     """Save all results to CSV files"""
 
     print("\nSaving results...")
@@ -330,6 +359,7 @@ def save_results(baseline_results, enhanced_results, feature_importance):
             'r2_score': r['r2_score'],
             'r2_cv_mean': r['r2_cv_mean'],
             'r2_cv_std': r['r2_cv_std'],
+            'cv_method': r['cv_method'],
             'rmse': r['rmse'],
             'mae': r['mae'],
             'n_features': r['n_features'],
@@ -347,10 +377,29 @@ def save_results(baseline_results, enhanced_results, feature_importance):
         feature_importance.to_csv(OUTPUT_FEATURE_IMPORTANCE, index=False)
         print(f"  ✅ Saved feature importance → {OUTPUT_FEATURE_IMPORTANCE}")
 
+    # Save per-job cross-validation timings
+    cv_jobs.to_csv(OUTPUT_CV_JOBS, index=False)
+    print(f"  ✅ Saved CV job timings → {OUTPUT_CV_JOBS}")
+
+    # Save hyperparameter search summaries
+    if searches:
+        tuning = {
+            model_type: {name: search.summary() for name, search in model_searches.items()}
+            for model_type, model_searches in searches.items()
+        }
+        with open(OUTPUT_TUNING, 'w') as f:
+            json.dump(tuning, f, indent=2)
+        print(f"  ✅ Saved tuning results → {OUTPUT_TUNING}")
+
 
 def main():
     """Main execution"""
 
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=-1, help='worker processes (default: all cores)')
+    parser.add_argument('--tune', action='store_true', help='search hyperparameters before evaluating')
+    args = parser.parse_args()
+
     print("=" * 70)
     print("PREDICTIVE MODEL TRAINING")
     print("=" * 70)
@@ -372,11 +421,22 @@ def main():
         print("\n❌ Cannot proceed without data. Please check feature files.")
         return
 
-    # Train baseline models
-    baseline_results = train_and_evaluate_models(X_baseline, y_baseline, baseline_features, "Baseline")
+    feature_sets = {'Baseline': (X_baseline, y_baseline), 'Enhanced': (X_enhanced, y_enhanced)}
+
+    # Optionally tune the tree models per feature set
+    searches, tuned_params, nested_scores = None, None, None
+    if args.tune:
+        searches = {model_type: tune_models(X, y, model_type, n_jobs=args.jobs)
+                    for model_type, (X, y) in feature_sets.items()}
+        tuned_params = {model_type: {name: search.best_params for name, search in model_searches.items()}
+                        for model_type, model_searches in searches.items()}
+        nested_scores = {model_type: nested_cv_scores(X, y, model_type, n_jobs=args.jobs)
+                         for model_type, (X, y) in feature_sets.items()}
 
-    # Train enhanced models
-    enhanced_results = train_and_evaluate_models(X_enhanced, y_enhanced, enhanced_features, "Enhanced")
+    # Train baseline and enhanced models together
+    results, cv_jobs = train_and_evaluate_models(feature_sets, n_jobs=args.jobs, tuned_params=tuned_params,
+                                                 nested_scores=nested_scores)
+    baseline_results, enhanced_results = results['Baseline'], results['Enhanced']
 
     # Extract feature importance
     all_results = baseline_results + enhanced_results
@@ -390,7 +450,7 @@ def main():
     generate_comparison_report(baseline_results, enhanced_results)
 
     # Save results
-    save_results(baseline_results, enhanced_results, feature_importance)
+    save_results(baseline_results, enhanced_results, feature_importance, cv_jobs, searches)
 
     print("\n✅ Model training complete!")
 
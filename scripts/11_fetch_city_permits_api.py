@@ -6,22 +6,41 @@ Fully automated - no manual downloads required
 This script programmatically fetches place-level building permit data for all US cities
 from 2015-2024 using the Census API.
 
+Requests run concurrently (bounded worker pool over one pooled session) under an
+adaptive rate limit that halves on 429/5xx responses and creeps back up while
+responses are healthy. Each (year, state) response with data is written to disk
+as soon as it arrives, so an interrupted run resumes with only the missing pairs.
+Empty answers (204, 404, no rows) are not written: a year the Census has not
+published yet is asked for again on the next run. Requests go through the
+shared HTTP cache (http_cache.py), so past years are also served from disk when
+the per-pair files are rebuilt.
+
 Usage:
     export CENSUS_API_KEY="your_key_here"
     python scripts/11_fetch_city_permits_api.py
 
+    # Against a local mock of api.census.gov:
+    export CENSUS_API_BASE_URL="http://127.0.0.1:8000/data"
+
 Output:
+    data/raw/census_bps_place_api/{year}/{state_fips}.json (raw API responses)
     data/raw/census_bps_place_all_years.csv
 """
 
+import asyncio
+import json
 import requests
 import pandas as pd
 import time
 import os
 import sys
-from typing import List, Dict, Optional
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
 import logging
 
+from async_http import THROTTLE_STATUS, AdaptiveRateLimiter, make_session
+from http_cache import HttpCache, default_cache
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -31,10 +50,18 @@ logger = logging.getLogger(__name__)
 
 # Census API configuration
 CENSUS_API_KEY = os.environ.get('CENSUS_API_KEY', '')
-BASE_URL = "https://api.census.gov/data"
-RATE_LIMIT_DELAY = 0.5  # seconds between requests (Census limit: 120 calls/min)
+BASE_URL = os.environ.get('CENSUS_API_BASE_URL', "https://api.census.gov/data")
+RATE_LIMIT_DELAY = 0.5  # starting seconds between requests (Census limit: 120 calls/min)
 MAX_RETRIES = 3
 RETRY_BACKOFF = 2  # exponential backoff multiplier
+REQUEST_TIMEOUT = 30  # seconds
+
+# Concurrency and adaptive rate control
+MAX_CONCURRENCY = 8  # in-flight requests
+MIN_RATE = 0.5  # requests/sec floor after repeated throttling
+MAX_RATE = 10.0  # requests/sec ceiling while responses are healthy
+
+RESPONSE_DIR = Path('data/raw/census_bps_place_api')
 
 # All US states and territories FIPS codes
 STATE_FIPS = {
@@ -56,10 +83,63 @@ STATE_FIPS = {
 YEARS = list(range(2015, 2025))  # 2015-2024
 
 
+def build_request(year: int, state_fips: str) -> Tuple[str, Dict]:
+    """URL and query parameters for one (year, state) place-level request."""
+    url = f"{BASE_URL}/{year}/bps/place"
+    params = {
+        'get': 'NAME,PERMITTOTAL_1UNIT,PERMITTOTAL_2UNIT,PERMITTOTAL_34UNIT,PERMITTOTAL_5UNIT',
+        'for': 'place:*',
+        'in': f'state:{state_fips}',
+    }
+
+    if CENSUS_API_KEY:
+        params['key'] = CENSUS_API_KEY
+
+    return url, params
+
+
+def interpret_response(
+    response: requests.Response,
+    year: int,
+    state_name: str,
+    attempt: int
+) -> Tuple[bool, Optional[List[List]]]:
+    """
+    Classify an API response.
+
+    Returns:
+        (final, data): final is False when the request should be retried;
+        data is the list of rows, or None when there is no data
+    """
+    if response.status_code == 200:
+        data = response.json()
+        if data and len(data) > 1:  # First row is headers
+            logger.info(f"✓ {year} {state_name}: {len(data) - 1} places fetched")
+            return True, data
+        else:
+            logger.warning(f"✗ {year} {state_name}: No data returned")
+            return True, None
+
+    elif response.status_code == 204:  # No content
+        logger.warning(f"✗ {year} {state_name}: No data available (204)")
+        return True, None
+
+    elif response.status_code == 404:
+        logger.warning(f"✗ {year} {state_name}: Endpoint not found (404) - may not exist for this year")
+        return True, None
+
+    logger.warning(
+        f"Attempt {attempt + 1}/{MAX_RETRIES} failed for {year} {state_name}: "
+        f"HTTP {response.status_code} - {response.text[:200]}"
+    )
+    return False, None
+
+
 def fetch_place_permits_for_state_year(
     year: int,
     state_fips: str,
-    state_name: str
+    state_name: str,
+    cache: Optional[HttpCache] = None
 ) -> Optional[List[List]]:
     """
     Fetch place-level building permit data for a single state and year.
@@ -68,47 +148,22 @@ def fetch_place_permits_for_state_year(
         year: Year to fetch data for
         state_fips: Two-digit state FIPS code
         state_name: State name for logging
+        cache: Optional HTTP cache (defaults to the shared on-disk cache)
 
     Returns:
         List of rows (as lists) or None if request failed
     """
-    url = f"{BASE_URL}/{year}/bps/place"
-    params = {
-        'get': 'NAME,PERMITTOTAL_1UNIT,PERMITTOTAL_2UNIT,PERMITTOTAL_34UNIT,PERMITTOTAL_5UNIT',
-        'for': 'place:*',
-        'in': f'state:{state_fips}',
-    }
-
-    if CENSUS_API_KEY:
-        params['key'] = CENSUS_API_KEY
+    url, params = build_request(year, state_fips)
+    http = cache or default_cache()
 
     for attempt in range(MAX_RETRIES):
         try:
             logger.debug(f"Fetching {state_name} ({state_fips}) for {year}, attempt {attempt + 1}")
-            response = requests.get(url, params=params, timeout=30)
-
-            if response.status_code == 200:
-                data = response.json()
-                if data and len(data) > 1:  # First row is headers
-                    logger.info(f"✓ {year} {state_name}: {len(data) - 1} places fetched")
-                    return data
-                else:
-                    logger.warning(f"✗ {year} {state_name}: No data returned")
-                    return None
-
-            elif response.status_code == 204:  # No content
-                logger.warning(f"✗ {year} {state_name}: No data available (204)")
-                return None
+            response = http.get(url, params=params, timeout=REQUEST_TIMEOUT)
 
-            elif response.status_code == 404:
-                logger.warning(f"✗ {year} {state_name}: Endpoint not found (404) - may not exist for this year")
-                return None
-
-            else:
-                logger.warning(
-                    f"Attempt {attempt + 1}/{MAX_RETRIES} failed for {year} {state_name}: "
-                    f"HTTP {response.status_code} - {response.text[:200]}"
-                )
+            final, data = interpret_response(response, year, state_name, attempt)
+            if final:
+                return data
 
         except requests.exceptions.RequestException as e:
             logger.warning(
@@ -124,6 +179,130 @@ def fetch_place_permits_for_state_year(
     return None
 
 
+async def fetch_place_permits_async(
+    cache: HttpCache,
+    limiter: AdaptiveRateLimiter,
+    year: int,
+    state_fips: str,
+    state_name: str
+) -> Tuple[bool, Optional[List[List]]]:
+    """
+    Async counterpart of fetch_place_permits_for_state_year.
+
+    Same retry semantics (MAX_RETRIES attempts, exponential backoff, no retry on
+    204/404); every attempt waits for the shared limiter, and throttling
+    responses lower its rate.
+
+    Returns:
+        (answered, data): answered is False when every attempt failed
+    """
+    url, params = build_request(year, state_fips)
+
+    for attempt in range(MAX_RETRIES):
+        await limiter.acquire()
+        try:
+            response = await asyncio.to_thread(
+                cache.get, url, params=params, timeout=REQUEST_TIMEOUT
+            )
+
+            if response.status_code in THROTTLE_STATUS:
+                limiter.on_throttle()
+            elif response.status_code == 200:
+                limiter.on_success()
+
+            final, data = interpret_response(response, year, state_name, attempt)
+            if final:
+                return True, data
+
+        except requests.exceptions.RequestException as e:
+            limiter.on_throttle()
+            logger.warning(
+                f"Attempt {attempt + 1}/{MAX_RETRIES} failed for {year} {state_name}: {str(e)}"
+            )
+
+        # Exponential backoff before retry
+        if attempt < MAX_RETRIES - 1:
+            await asyncio.sleep(RETRY_BACKOFF ** attempt)
+
+    logger.error(f"✗✗✗ Failed to fetch {year} {state_name} after {MAX_RETRIES} attempts")
+    return False, None
+
+
+def response_path(year: int, state_fips: str) -> Path:
+    """On-disk location of the raw response for one (year, state)."""
+    return RESPONSE_DIR / str(year) / f"{state_fips}.json"
+
+
+def save_response(year: int, state_fips: str, data: List[List]):
+    """Write one non-empty response atomically."""
+    path = response_path(year, state_fips)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    tmp_path.replace(path)
+
+
+def load_response(year: int, state_fips: str) -> Optional[List[List]]:
+    path = response_path(year, state_fips)
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def is_collected(year: int, state_fips: str) -> bool:
+    """True when rows for the pair are on disk (older runs saved empty answers as null)."""
+    return bool(load_response(year, state_fips))
+
+
+async def collect_responses(years: List[int], states: Dict[str, str]) -> Dict:
+    """
+    Fetch every (year, state) pair whose rows are not yet on disk.
+
+    Returns counts of fetched, empty and failed pairs; empty and failed pairs
+    are left unsaved and retried by the next run.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    skipped = 0
+    for year in years:
+        for state_fips, state_name in states.items():
+            if is_collected(year, state_fips):
+                skipped += 1
+            else:
+                queue.put_nowait((year, state_fips, state_name))
+
+    logger.info(f"{queue.qsize()} (year, state) requests to make, {skipped} already on disk")
+
+    stats = {'fetched': 0, 'empty': 0, 'failed': 0, 'skipped': skipped}
+    session = make_session(MAX_CONCURRENCY)
+    cache = HttpCache(session=session)
+    limiter = AdaptiveRateLimiter(1 / RATE_LIMIT_DELAY, MIN_RATE, MAX_RATE)
+
+    async def worker():
+        while True:
+            try:
+                year, state_fips, state_name = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            answered, data = await fetch_place_permits_async(cache, limiter, year, state_fips, state_name)
+            if not answered:
+                stats['failed'] += 1
+            elif not data:
+                stats['empty'] += 1
+            else:
+                save_response(year, state_fips, data)
+                stats['fetched'] += 1
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(MAX_CONCURRENCY)))
+    finally:
+        session.close()
+
+    logger.info(f"Final request rate: {limiter.rate:.1f}/s ({limiter.throttled} throttled responses)")
+    return stats
+
+
 def parse_permit_value(value: str) -> Optional[int]:
     """
     Parse permit value from API response, handling null/missing values.
@@ -219,35 +398,28 @@ def main():
     logger.info("Fetching place-level data for all US cities, 2015-2024")
     logger.info("=" * 80)
 
-    all_records = []
     total_requests = len(YEARS) * len(STATE_FIPS)
-    completed_requests = 0
-    failed_requests = 0
-
     start_time = time.time()
 
-    for year in YEARS:
-        logger.info(f"\n{'=' * 60}")
-        logger.info(f"YEAR {year}")
-        logger.info(f"{'=' * 60}")
+    # Fetch everything not yet on disk
+    stats = asyncio.run(collect_responses(YEARS, STATE_FIPS))
 
+    # Build records from the saved responses
+    all_records = []
+    completed_requests = 0
+    failed_requests = stats['failed']
+
+    for year in YEARS:
         year_records = []
 
         for state_fips, state_name in STATE_FIPS.items():
-            # Fetch data with rate limiting
-            data = fetch_place_permits_for_state_year(year, state_fips, state_name)
-
+            data = load_response(year, state_fips)
             if data:
                 records = process_api_response(data, year, state_fips, state_name)
                 year_records.extend(records)
                 completed_requests += 1
-            else:
-                failed_requests += 1
-
-            # Rate limiting
-            time.sleep(RATE_LIMIT_DELAY)
 
-        logger.info(f"Year {year} complete: {len(year_records)} total place records")
+        logger.info(f"Year {year}: {len(year_records)} total place records")
         all_records.extend(year_records)
 
     elapsed_time = time.time() - start_time
@@ -256,9 +428,11 @@ def main():
     logger.info("\n" + "=" * 80)
     logger.info("PROCESSING COMPLETE")
     logger.info("=" * 80)
-    logger.info(f"Total requests: {total_requests}")
-    logger.info(f"Successful: {completed_requests}")
-    logger.info(f"Failed: {failed_requests}")
+    logger.info(f"Total (year, state) pairs: {total_requests}")
+    logger.info(f"Reused from disk: {stats['skipped']}")
+    logger.info(f"With data: {completed_requests}")
+    logger.info(f"No data yet (retried next run): {stats['empty']}")
+    logger.info(f"Failed (retried next run): {failed_requests}")
     logger.info(f"Total place records: {len(all_records)}")
     logger.info(f"Elapsed time: {elapsed_time:.1f} seconds")
 
@@ -10,7 +10,7 @@ Usage:
 
 Inputs:
     - data/raw/city_reforms.csv (reform dates and details)
-    - data/raw/census_bps_place_all_years.csv (permit data)
+    - data/raw/census_bps_place_all_years.csv (permit data, via permit_store.py)
 
 Output:
     - data/outputs/city_reforms_with_metrics.csv (pre/post analysis)
@@ -23,6 +23,9 @@ from dateutil.relativedelta import relativedelta
 import logging
 import sys
 
+from perf import instrument
+from permit_store import load_table
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -36,6 +39,7 @@ POST_PERIOD_MONTHS = 24
 MIN_MONTHS_REQUIRED = 12  # Minimum months of data to compute metrics
 
 
+@instrument()
 def load_data():
     """Load reform and permit datasets."""
     logger.info("Loading datasets...")
@@ -48,8 +52,8 @@ def load_data():
         sys.exit(1)
 
     try:
-        permits_df = pd.read_csv('data/raw/census_bps_place_all_years.csv')
-        logger.info(f"✓ Loaded {len(permits_df)} permit records")
+        permits = load_table('place')
+        logger.info(f"✓ Loaded {len(permits)} permit records")
     except FileNotFoundError:
         logger.error("ERROR: data/raw/census_bps_place_all_years.csv not found")
         logger.warning("Please run scripts/11_fetch_city_permits_api.py first")
@@ -60,19 +64,18 @@ def load_data():
 
     # Ensure place_fips is string with leading zeros
     reforms_df['place_fips'] = reforms_df['place_fips'].astype(str).str.zfill(7)
-    permits_df['place_fips'] = permits_df['place_fips'].astype(str).str.zfill(7)
 
-    return reforms_df, permits_df
+    return reforms_df, permits
 
 
-def get_annual_data_for_period(permits_df, place_fips, start_year, end_year):
+def get_annual_data_for_period(permits, place_fips, start_year, end_year):
     """
     Get annual permit data for a specific place and year range.
 
     Since Census BPS data is annual, we extract years within the period.
 
     Args:
-        permits_df: DataFrame with permit data
+        permits: PermitTable with place permit data
         place_fips: Place FIPS code
         start_year: Start year (inclusive)
         end_year: End year (inclusive)
@@ -80,12 +83,7 @@ def get_annual_data_for_period(permits_df, place_fips, start_year, end_year):
     Returns:
         DataFrame with filtered data
     """
-    mask = (
-        (permits_df['place_fips'] == place_fips) &
-        (permits_df['year'] >= start_year) &
-        (permits_df['year'] <= end_year)
-    )
-    return permits_df[mask].copy()
+    return permits.range(place_fips, start_year, end_year)
 
 
 def compute_period_metrics(period_data):
@@ -162,13 +160,14 @@ def assess_data_quality(pre_metrics, post_metrics, reform_date):
         return ";".join(issues)
 
 
-def compute_city_reform_metrics(reform_row, permits_df):
+@instrument()
+def compute_city_reform_metrics(reform_row, permits):
     """
     Compute pre/post metrics for a single city reform.
 
     Args:
         reform_row: Series with reform information
-        permits_df: DataFrame with all permit data
+        permits: PermitTable with all place permit data
 
     Returns:
         Dictionary with computed metrics and metadata
@@ -195,8 +194,8 @@ def compute_city_reform_metrics(reform_row, permits_df):
     post_end_year = min(post_end_date.year, 2024)  # Don't go beyond 2024
 
     # Get data for each period
-    pre_data = get_annual_data_for_period(permits_df, place_fips, pre_start_year, pre_end_year)
-    post_data = get_annual_data_for_period(permits_df, place_fips, post_start_year, post_end_year)
+    pre_data = get_annual_data_for_period(permits, place_fips, pre_start_year, pre_end_year)
+    post_data = get_annual_data_for_period(permits, place_fips, post_start_year, post_end_year)
 
     # Compute metrics
     pre_metrics = compute_period_metrics(pre_data)
@@ -277,12 +276,13 @@ def compute_city_reform_metrics(reform_row, permits_df):
     return result
 
 
-def validate_against_state_totals(permits_df):
+@instrument()
+def validate_against_state_totals(permits):
     """
     Validate place-level data against state-level totals.
 
     Args:
-        permits_df: DataFrame with place-level permit data
+        permits: PermitTable with place-level permit data
 
     Returns:
         Validation report as string
@@ -293,19 +293,18 @@ def validate_against_state_totals(permits_df):
 
     try:
         # Try to load state-level data if available
-        state_df = pd.read_csv('data/raw/state_permits_monthly_comprehensive.csv')
+        state_df = load_table('state').data
 
         # Aggregate annual state totals from monthly data
-        state_df['year'] = pd.to_datetime(state_df['month']).dt.year
-        state_annual = state_df.groupby(['state', 'year'])['permits'].sum().reset_index()
-        state_annual.rename(columns={'permits': 'state_total'}, inplace=True)
+        state_annual = state_df.groupby(['state_fips', 'year'])['total_permits'].sum().reset_index()
+        state_annual.rename(columns={'total_permits': 'state_total'}, inplace=True)
 
         # Aggregate place-level to state level
-        place_state_totals = permits_df.groupby(['state_name', 'year'])['total_permits'].sum().reset_index()
-        place_state_totals.rename(columns={'state_name': 'state', 'total_permits': 'place_total'}, inplace=True)
+        place_state_totals = permits.data.groupby(['state_fips', 'year'])['total_permits'].sum().reset_index()
+        place_state_totals.rename(columns={'total_permits': 'place_total'}, inplace=True)
 
         # Merge and compare
-        comparison = pd.merge(state_annual, place_state_totals, on=['state', 'year'], how='left')
+        comparison = pd.merge(state_annual, place_state_totals, on=['state_fips', 'year'], how='left')
         comparison['coverage_pct'] = (comparison['place_total'] / comparison['state_total']) * 100
         comparison = comparison.fillna(0)
 
@@ -334,7 +333,7 @@ def main():
     logger.info("=" * 80)
 
     # Load data
-    reforms_df, permits_df = load_data()
+    reforms_df, permits = load_data()
 
     # Compute metrics for each reform
     logger.info(f"\nProcessing {len(reforms_df)} city reforms...")
@@ -343,7 +342,7 @@ def main():
     results = []
     for idx, reform_row in reforms_df.iterrows():
         try:
-            result = compute_city_reform_metrics(reform_row, permits_df)
+            result = compute_city_reform_metrics(reform_row, permits)
             results.append(result)
         except Exception as e:
             logger.error(f"Error processing {reform_row['city_name']}: {str(e)}")
@@ -358,7 +357,7 @@ def main():
     logger.info(f"\n✓ Results saved to: {output_path}")
 
     # Validation
-    validation_result = validate_against_state_totals(permits_df)
+    validation_result = validate_against_state_totals(permits)
 
     # Summary statistics
     logger.info("\n" + "=" * 80)
@@ -2,18 +2,50 @@
 Fetch Zillow Home Value Index (ZHVI) data for all 50 states (2015-2024)
 Source: Zillow Research Data (https://www.zillow.com/research/data/)
 Output: data/processed/zillow_state_prices.csv
+        data/processed/zillow/zhvi_{level}.parquet (metrics keyed by region_id)
+
+ZHVI files are wide (one row per region, one column per month). They are read
+as a stream from the gzip body in the shared HTTP cache, in row chunks, keeping
+only the identifier columns and the 2015-2024 month columns. Metrics are then
+computed on the regions x months matrix with NumPy, without melting.
+
+Usage:
+    python scripts/13_fetch_zillow_data.py                # states
+    python scripts/13_fetch_zillow_data.py --metro --zip  # also metros / ZIP codes
 """
 
 import os
+import sys
+from pathlib import Path
 import pandas as pd
-import requests
-from io import StringIO
 import numpy as np
 
+from http_cache import default_cache
+
 # Zillow ZHVI All Homes (SFR, Condo/Co-op) Time Series, Smoothed, Seasonally Adjusted
-ZILLOW_STATE_URL = "https://files.zillowstatic.com/research/public_csvs/zhvi/State_zhvi_uc_sfrcondo_tier_0.33_0.67_sm_sa_month.csv"
+ZHVI_BASE_URL = "https://files.zillowstatic.com/research/public_csvs/zhvi"
+ZHVI_FILE_SUFFIX = "zhvi_uc_sfrcondo_tier_0.33_0.67_sm_sa_month.csv"
+ZHVI_URLS = {
+    'state': f"{ZHVI_BASE_URL}/State_{ZHVI_FILE_SUFFIX}",
+    'metro': f"{ZHVI_BASE_URL}/Metro_{ZHVI_FILE_SUFFIX}",
+    'zip': f"{ZHVI_BASE_URL}/Zip_{ZHVI_FILE_SUFFIX}",
+}
+ZILLOW_STATE_URL = ZHVI_URLS['state']
 
 OUTPUT_FILE = "data/processed/zillow_state_prices.csv"
+ZHVI_STORE_DIR = Path("data/processed/zillow")
+
+LEVELS = ['state'] + [level for level in ('metro', 'zip') if f'--{level}' in sys.argv]
+
+# Analysis window
+START_DATE = '2015-01-01'
+END_DATE = '2024-12-31'
+BASE_YEAR = 2015
+
+# Identifier columns kept when present (ZIP files add City, Metro, CountyName)
+ZHVI_ID_COLUMNS = ['RegionID', 'SizeRank', 'RegionName', 'RegionType', 'StateName',
+                   'State', 'City', 'Metro', 'CountyName']
+CHUNK_ROWS = 5000
 
 # State name to abbreviation mapping
 STATE_ABBREV = {
@@ -125,105 +157,119 @@ def fetch_zillow_data_fallback():
     return pd.DataFrame(state_metrics)
 
 
-def fetch_zillow_data():
-    """Fetch and process Zillow ZHVI state-level data"""
-    print("Fetching Zillow ZHVI data...")
+def read_zhvi_wide(source, start=START_DATE, end=END_DATE):
+    """
+    Stream a ZHVI CSV, keeping identifier columns and months in [start, end].
 
-    try:
-        response = requests.get(ZILLOW_STATE_URL, timeout=30)
-        response.raise_for_status()
+    Returns:
+        (ids DataFrame, month dates DatetimeIndex, values float64 array of
+        shape regions x months)
+    """
+    header = pd.read_csv(source, nrows=0).columns
+    id_cols = [col for col in ZHVI_ID_COLUMNS if col in header]
+    date_cols = [col for col in header if col[:2] in ('19', '20') and start <= col <= end]
 
-        # Read CSV data
-        df = pd.read_csv(StringIO(response.text))
+    if not date_cols:
+        raise ValueError(f"No ZHVI month columns between {start} and {end}")
 
-        # Filter for state-level data only
-        df = df[df['RegionType'] == 'state'].copy()
+    dtypes = {col: 'float64' for col in date_cols}
+    dtypes.update({col: str for col in id_cols if col not in ('RegionID', 'SizeRank')})
 
-        # Get date columns (format: YYYY-MM-DD)
-        date_cols = [col for col in df.columns if col.startswith('20')]
+    id_chunks, value_chunks = [], []
+    for chunk in pd.read_csv(source, usecols=id_cols + date_cols, dtype=dtypes, chunksize=CHUNK_ROWS):
+        id_chunks.append(chunk[id_cols])
+        value_chunks.append(chunk[date_cols].to_numpy())
 
-        # Filter to 2015-2024 range
-        date_cols_filtered = [col for col in date_cols if '2015-' <= col <= '2024-12-31']
+    ids = pd.concat(id_chunks, ignore_index=True)
+    values = np.vstack(value_chunks)
+    return ids, pd.DatetimeIndex(pd.to_datetime(date_cols)), values
 
-        if not date_cols_filtered:
-            print("⚠️ No data columns found in expected date range")
-            return pd.DataFrame()
 
-        # Keep region info and date columns
-        keep_cols = ['RegionName'] + date_cols_filtered
-        df = df[keep_cols].copy()
+def compute_zhvi_metrics(values, dates, base_year=BASE_YEAR):
+    """
+    Per-region metrics on a regions x months matrix.
 
-        # Melt to long format
-        df_long = df.melt(
-            id_vars=['RegionName'],
-            value_vars=date_cols_filtered,
-            var_name='date',
-            value_name='zhvi'
-        )
+    - zhvi_2015: mean of base-year months
+    - zhvi_2024: mean of the latest year with data (per region)
+    - CAGR between those annual means, absolute and percent change
+    - mean over the window and volatility (coefficient of variation, %)
 
-        # Convert date to datetime
-        df_long['date'] = pd.to_datetime(df_long['date'])
+    Regions with fewer than 12 monthly values get NaN metrics.
+    """
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
 
-        # Add state abbreviation
-        df_long['state_abbrev'] = df_long['RegionName'].map(STATE_ABBREV)
+    # Annual means: sum and count months per year with reduceat over sorted columns
+    month_years = dates.year.to_numpy()
+    years, year_starts = np.unique(month_years, return_index=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        annual = np.add.reduceat(filled, year_starts, axis=1) / np.add.reduceat(valid, year_starts, axis=1)
 
-        # Sort by state and date
-        df_long = df_long.sort_values(['RegionName', 'date'])
+        has_year = ~np.isnan(annual)
+        last_idx = annual.shape[1] - 1 - np.argmax(has_year[:, ::-1], axis=1)
+        current_price = annual[np.arange(len(annual)), last_idx]
+        latest_year = np.where(has_year.any(axis=1), years[last_idx], np.nan)
 
-        # Calculate metrics per state
-        state_metrics = []
+        earliest_price = annual[:, np.searchsorted(years, base_year)] if base_year in years else np.full(len(annual), np.nan)
 
-        for state in df_long['RegionName'].unique():
-            state_data = df_long[df_long['RegionName'] == state].copy()
+        n_years = latest_year - base_year
+        ok = (n_years > 0) & (earliest_price > 0) & ~np.isnan(current_price)
+        cagr = np.full(len(annual), np.nan)
+        cagr[ok] = ((current_price[ok] / earliest_price[ok]) ** (1 / n_years[ok]) - 1) * 100
 
-            # Filter to complete years only (2015-2024)
-            state_data = state_data[
-                (state_data['date'] >= '2015-01-01') &
-                (state_data['date'] <= '2024-12-31')
-            ]
+        abs_change = current_price - earliest_price
+        pct_change = abs_change / earliest_price * 100
 
-            if len(state_data) < 12:  # Need at least 1 year of data
-                continue
+        counts = valid.sum(axis=1)
+        avg_price = filled.sum(axis=1) / counts
+        variance = (np.where(valid, values - avg_price[:, None], 0.0) ** 2).sum(axis=1) / (counts - 1)
+        volatility = np.where(avg_price > 0, np.sqrt(variance) / avg_price * 100, np.nan)
 
-            # Get 2024 average (or latest year available)
-            latest_year = state_data['date'].dt.year.max()
-            current_price = state_data[state_data['date'].dt.year == latest_year]['zhvi'].mean()
+    metrics = pd.DataFrame({
+        'zhvi_2015': earliest_price,
+        'zhvi_2024': current_price,
+        'zhvi_avg_2015_2024': avg_price,
+        'zhvi_abs_change': abs_change,
+        'zhvi_pct_change': pct_change,
+        'zhvi_cagr': cagr,
+        'zhvi_volatility': volatility,
+    })
+    metrics[counts < 12] = np.nan  # Need at least 1 year of data
+    return metrics.round(2)
 
-            # Get 2015 price
-            earliest_price = state_data[state_data['date'].dt.year == 2015]['zhvi'].mean()
 
-            # Calculate CAGR (2015-2024)
-            years = latest_year - 2015
-            if years > 0 and earliest_price > 0 and pd.notna(earliest_price) and pd.notna(current_price):
-                cagr = ((current_price / earliest_price) ** (1 / years) - 1) * 100
-            else:
-                cagr = np.nan
+def fetch_zhvi_level(level):
+    """Download (or revalidate) one ZHVI file and write its metrics table."""
+    print(f"Fetching Zillow ZHVI {level} data...")
+    body_path = default_cache().get_body_path(ZHVI_URLS[level], timeout=120)
 
-            # Calculate absolute change
-            abs_change = current_price - earliest_price if pd.notna(current_price) and pd.notna(earliest_price) else np.nan
+    ids, dates, values = read_zhvi_wide(body_path)
+    if level == 'state':
+        keep = (ids['RegionType'] == 'state').to_numpy()
+        ids, values = ids[keep].reset_index(drop=True), values[keep]
 
-            # Calculate percent change
-            pct_change = (abs_change / earliest_price * 100) if earliest_price and pd.notna(abs_change) else np.nan
+    metrics = compute_zhvi_metrics(values, dates)
 
-            # Average price over entire period
-            avg_price = state_data['zhvi'].mean()
+    table = pd.concat([ids.rename(columns={'RegionID': 'region_id'}), metrics], axis=1)
+    table['region_id'] = table['region_id'].astype('int32')
+    table = table.sort_values('region_id').reset_index(drop=True)
 
-            # Price volatility (coefficient of variation)
-            price_volatility = (state_data['zhvi'].std() / state_data['zhvi'].mean() * 100) if state_data['zhvi'].mean() > 0 else np.nan
+    ZHVI_STORE_DIR.mkdir(parents=True, exist_ok=True)
+    output_path = ZHVI_STORE_DIR / f"zhvi_{level}.parquet"
+    table.to_parquet(output_path, index=False)
+    print(f"  {len(table):,} regions x {len(dates)} months → {output_path}")
 
-            state_metrics.append({
-                'state': state,
-                'state_abbrev': STATE_ABBREV.get(state, ''),
-                'zhvi_2015': round(earliest_price, 2) if pd.notna(earliest_price) else None,
-                'zhvi_2024': round(current_price, 2) if pd.notna(current_price) else None,
-                'zhvi_avg_2015_2024': round(avg_price, 2) if pd.notna(avg_price) else None,
-                'zhvi_abs_change': round(abs_change, 2) if pd.notna(abs_change) else None,
-                'zhvi_pct_change': round(pct_change, 2) if pd.notna(pct_change) else None,
-                'zhvi_cagr': round(cagr, 2) if pd.notna(cagr) else None,
-                'zhvi_volatility': round(price_volatility, 2) if pd.notna(price_volatility) else None,
-            })
+    return table
 
-        result_df = pd.DataFrame(state_metrics)
+
+def fetch_zillow_data():
+    """Fetch and process Zillow ZHVI state-level data"""
+    try:
+        state_table = fetch_zhvi_level('state')
+
+        result_df = state_table.rename(columns={'RegionName': 'state'})
+        result_df['state_abbrev'] = result_df['state'].map(STATE_ABBREV)
+        result_df = result_df[result_df['zhvi_2024'].notna()]
 
         # Ensure we have all 50 states (fill missing with NaN)
         all_states = pd.DataFrame({
@@ -231,7 +277,12 @@ def fetch_zillow_data():
             'state_abbrev': list(STATE_ABBREV.values())
         })
 
-        result_df = all_states.merge(result_df, on=['state', 'state_abbrev'], how='left')
+        metric_columns = ['zhvi_2015', 'zhvi_2024', 'zhvi_avg_2015_2024', 'zhvi_abs_change',
+                          'zhvi_pct_change', 'zhvi_cagr', 'zhvi_volatility']
+        result_df = all_states.merge(
+            result_df[['state', 'state_abbrev'] + metric_columns],
+            on=['state', 'state_abbrev'], how='left'
+        )
 
         print(f"✅ Processed ZHVI data for {len(result_df[result_df['zhvi_2024'].notna()])} states")
 
@@ -247,6 +298,12 @@ def main():
     """Main execution"""
     df = fetch_zillow_data()
 
+    for level in LEVELS[1:]:
+        try:
+            fetch_zhvi_level(level)
+        except Exception as e:
+            print(f"❌ Error fetching Zillow {level} data: {e}")
+
     if not df.empty:
         # Save to CSV
         os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
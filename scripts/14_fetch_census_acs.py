@@ -4,20 +4,25 @@ Source: Census Bureau ACS 5-Year Estimates
 Features: Median household income, homeownership rate, population density,
           urbanization level, rental vacancy rate, median rent, housing units per capita
 Output: data/processed/census_demographic_data.csv
+        data/processed/acs/acs5_state.parquet (typed store keyed by geo_id, year)
+
+Usage:
+    python scripts/14_fetch_census_acs.py           # states
+    python scripts/14_fetch_census_acs.py --places  # also every place, all states
 """
 
 import os
+import sys
 import pandas as pd
-import requests
 import numpy as np
-from time import sleep
 
-# Census API endpoint (ACS 5-Year Estimates)
-# Note: Census API doesn't require a key for small-scale queries, but may be rate-limited
-CENSUS_BASE_URL = "https://api.census.gov/data"
+from acs import fetch_acs, update_store
 
 OUTPUT_FILE = "data/processed/census_demographic_data.csv"
 
+# Place-level store for city models (~30k places per year)
+BUILD_PLACES = '--places' in sys.argv
+
 # State FIPS codes
 STATE_FIPS = {
     '01': 'Alabama', '02': 'Alaska', '04': 'Arizona', '05': 'Arkansas', '06': 'California',
@@ -47,67 +52,6 @@ ACS_VARIABLES = {
 }
 
 
-def fetch_acs_data_for_year(year, variables):
-    """Fetch ACS data for a specific year"""
-    var_string = ','.join(variables.keys())
-    url = f"{CENSUS_BASE_URL}/{year}/acs/acs5"
-
-    params = {
-        'get': f"NAME,{var_string}",
-        'for': 'state:*'
-    }
-
-    try:
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-
-        # Convert to DataFrame
-        df = pd.DataFrame(data[1:], columns=data[0])
-
-        # Rename columns
-        for var_code, var_name in variables.items():
-            if var_code in df.columns:
-                df[var_name] = pd.to_numeric(df[var_code], errors='coerce')
-                df = df.drop(columns=[var_code])
-
-        df['year'] = year
-        df['state_fips'] = df['state']
-        df['state_name'] = df['NAME']
-
-        return df
-
-    except Exception as e:
-        print(f"  ⚠️ Error fetching {year} data: {e}")
-        return pd.DataFrame()
-
-
-def calculate_derived_metrics(df):
-    """Calculate derived metrics from raw ACS variables"""
-    # Homeownership rate
-    df['homeownership_rate'] = (
-        df['owner_occupied_units'] / df['total_occupied_units'] * 100
-    ).round(2)
-
-    # Rental vacancy rate
-    df['rental_vacancy_rate'] = (
-        df['rental_vacancy'] / df['total_vacancy'] * 100
-    ).fillna(0).round(2)
-
-    # Population density (per square mile) - we'll compute this separately from land area
-    # For now, we'll use population as-is and calculate density in the compiler
-
-    # Housing units per capita
-    df['housing_units_per_capita'] = (
-        df['total_housing_units'] / df['total_population']
-    ).round(4)
-
-    # Urbanization level - we'll fetch this separately from census urban/rural data
-    # For now, we'll use population density as a proxy
-
-    return df
-
-
 def fetch_census_urban_data():
     """
     Fetch urbanization data (% urban population) for states
@@ -266,19 +210,17 @@ def main():
     # Try to fetch from API first
     years_to_fetch = [2019, 2022]  # 2019 (pre-pandemic baseline) and 2022 (latest stable)
 
-    all_data = []
-
-    for year in years_to_fetch:
-        print(f"\nFetching {year} ACS data...")
-        df = fetch_acs_data_for_year(year, ACS_VARIABLES)
+    if BUILD_PLACES:
+        print(f"\nFetching place-level ACS data for {years_to_fetch}...")
+        places = fetch_acs(years_to_fetch, ACS_VARIABLES, 'place', STATE_FIPS)
+        if not places.empty:
+            places = update_store(places, 'place')
+            print(f"  ✅ Place store: {len(places):,} rows")
 
-        if not df.empty:
-            df = calculate_derived_metrics(df)
-            all_data.append(df)
-            print(f"  ✅ Fetched data for {len(df)} states")
-            sleep(1)  # Be nice to the API
+    print(f"\nFetching {years_to_fetch} ACS data...")
+    fetched = fetch_acs(years_to_fetch, ACS_VARIABLES, 'state')
 
-    if not all_data:
+    if fetched.empty:
         print("❌ No data fetched from API, using fallback data...")
         final_df = fetch_census_fallback_data()
 
@@ -313,8 +255,13 @@ def main():
         print(f"  Avg urbanization: {final_df['urbanization_pct'].mean():.1f}%")
         return
 
-    # Combine years and calculate averages
-    combined = pd.concat(all_data, ignore_index=True)
+    # Store all years (derived rates computed once over the store)
+    combined = update_store(fetched, 'state')
+    combined = combined[combined['year'].isin(years_to_fetch)].copy()
+    combined['year'] = combined['year'].astype(int)
+    combined['state_fips'] = combined['state_fips'].astype(str)
+    combined['state_name'] = combined['name'].astype(str)
+    print(f"  ✅ Fetched data for {combined['state_fips'].nunique()} states")
 
     # Use latest year as primary, but fill gaps with earlier years
     latest_year = max(years_to_fetch)
@@ -25,6 +25,9 @@ from pmdarima import auto_arima
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 
+from perf import instrument
+from permit_store import load_table
+
 warnings.filterwarnings('ignore')
 
 # Paths
@@ -46,17 +49,18 @@ def ensure_output_dir():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 
+@instrument()
 def load_and_prepare_data():
     """Load timeseries data and expand to monthly frequency."""
     print("📊 Loading time series data...")
 
-    if not os.path.exists(TIMESERIES_CSV):
+    try:
+        df = load_table('state_timeseries').to_frame()
+    except FileNotFoundError:
         print(f"❌ Error: {TIMESERIES_CSV} not found")
         print("Please run data collection scripts first.")
         sys.exit(1)
 
-    df = pd.read_csv(TIMESERIES_CSV)
-    df['date'] = pd.to_datetime(df['date'])
     df = df.sort_values(['jurisdiction', 'date'])
 
     print(f"   Loaded {len(df)} records for {df['jurisdiction'].nunique()} jurisdictions")
@@ -151,6 +155,7 @@ def calculate_coverage(y_true, lower, upper):
     return coverage
 
 
+@instrument()
 def fit_and_forecast_state(state, state_data, reforms):
     """
     Fit SARIMA model for a single state and generate forecasts.
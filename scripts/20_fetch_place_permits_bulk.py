@@ -9,50 +9,130 @@ The Master Data Set is the authoritative source combining all BPS data into a si
 comprehensive CSV file with 51 columns tracking buildings, units, and values by
 building type (1-unit, 2-unit, 3-4 unit, 5+ unit).
 
-Output: data/raw/census_bps_master_dataset.csv (~20K places × multiple years of monthly data)
+Output: data/raw/census_bps_master_dataset.zip (~20K places × multiple years of monthly data)
+        Script 21 streams the CSV member straight out of the ZIP; nothing is extracted.
+        data/raw/national_place2020.txt (Census place FIPS crosswalk script 21 resolves
+        place_fips against; fetched through the shared HTTP cache)
+
+Downloads are resumable (HTTP Range + If-Range on a .part file), skipped entirely
+when the server's ETag/Last-Modified match the recorded download, and verified
+against the SHA-256 recorded in data/raw/census_bps_master_dataset.zip.json
+(or a pinned BPS_MASTER_SHA256 environment variable).
 """
 
+import io
 import os
 import sys
+import json
 import requests
 import zipfile
 import time
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 import hashlib
 
+from http_cache import cached_get
+
 # Configuration
 CENSUS_MASTER_URL = "https://www2.census.gov/econ/bps/Master%20Data%20Set/BPS%20Compiled_202508.zip"
 CENSUS_MASTER_ALT_URL = "https://www2.census.gov/econ/bps/Master%20Data%20Set/"
 DATA_DIR = Path("data/raw")
-OUTPUT_FILE = DATA_DIR / "census_bps_master_dataset.csv"
-TEMP_DIR = DATA_DIR / "temp"
-ZIP_FILE = TEMP_DIR / "bps_compiled.zip"
+ZIP_FILE = DATA_DIR / "census_bps_master_dataset.zip"
+PARTIAL_FILE = DATA_DIR / "census_bps_master_dataset.zip.part"
+METADATA_FILE = DATA_DIR / "census_bps_master_dataset.zip.json"
+EXPECTED_SHA256 = os.environ.get('BPS_MASTER_SHA256', '')  # Optional pinned checksum
+PLACE_CROSSWALK_URL = "https://www2.census.gov/geo/docs/reference/codes2020/national_place2020.txt"
+PLACE_CROSSWALK = DATA_DIR / "national_place2020.txt"
 
 # Retry configuration
 MAX_RETRIES = 3
 RETRY_DELAY = 5  # seconds
 REQUEST_TIMEOUT = 60  # seconds
-CHUNK_SIZE = 8192  # bytes
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+USER_AGENT = 'Mozilla/5.0 (Python zoning-reform-analysis)'
 
 
 def setup_directories():
     """Create necessary directories."""
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    TEMP_DIR.mkdir(parents=True, exist_ok=True)
     print(f"[INFO] Directories ready: {DATA_DIR}")
 
 
-def get_file_size(url: str) -> Optional[int]:
-    """Get file size without downloading."""
+def get_remote_metadata(url: str) -> Dict:
+    """Get size and cache validators (ETag, Last-Modified) without downloading."""
     try:
-        response = requests.head(url, timeout=REQUEST_TIMEOUT, allow_redirects=True)
+        response = requests.head(url, timeout=REQUEST_TIMEOUT, allow_redirects=True,
+                                 headers={'User-Agent': USER_AGENT})
         if response.status_code == 200:
-            return int(response.headers.get('content-length', 0))
+            return {
+                'size': int(response.headers.get('content-length', 0)) or None,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }
     except Exception as e:
-        print(f"[WARN] Could not get file size: {e}")
-    return None
+        print(f"[WARN] Could not get file metadata: {e}")
+    return {}
+
+
+def load_metadata(path: Path) -> Dict:
+    """Recorded metadata of the last completed (or in-progress) download."""
+    if path.exists():
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def save_metadata(path: Path, metadata: Dict):
+    with open(path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+
+def sha256_file(path: Path) -> str:
+    """SHA-256 of a file, read in CHUNK_SIZE blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def range_validator(remote: Dict) -> Optional[str]:
+    """Validator for If-Range: a strong ETag, else Last-Modified."""
+    etag = remote.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return remote.get('last_modified')
+
+
+def is_download_current(url: str, output_path: Path, remote: Dict, recorded: Dict) -> bool:
+    """
+    True when the local file is the same version the server offers and its
+    bytes still match the recorded SHA-256.
+    """
+    if not output_path.exists() or not recorded.get('sha256') or recorded.get('url') != url:
+        return False
+
+    if remote:
+        if remote.get('etag') and recorded.get('etag'):
+            same_version = remote['etag'] == recorded['etag']
+        elif remote.get('last_modified') and recorded.get('last_modified'):
+            same_version = remote['last_modified'] == recorded['last_modified']
+        else:
+            same_version = False
+        if not same_version:
+            return False
+    else:
+        print(f"[WARN] Server metadata unavailable - checking local copy only")
+
+    if sha256_file(output_path) != recorded['sha256']:
+        print(f"[WARN] Local file does not match recorded SHA-256 - re-downloading")
+        return False
+
+    return True
 
 
 def format_bytes(bytes_size: int) -> str:
@@ -66,7 +146,11 @@ def format_bytes(bytes_size: int) -> str:
 
 def download_file(url: str, output_path: Path, file_description: str = "file") -> bool:
     """
-    Download file with retry logic and progress tracking.
+    Download file with resume, retry logic, progress tracking and SHA-256 verification.
+
+    Partial data is kept in PARTIAL_FILE; retries and later runs continue from
+    its current size with a Range request (If-Range guards against the file
+    changing on the server, in which case it restarts from byte zero).
 
     Args:
         url: URL to download from
@@ -80,40 +164,81 @@ def download_file(url: str, output_path: Path, file_description: str = "file") -
     print(f"[INFO] Source: {url}")
     print(f"[INFO] Destination: {output_path}")
 
-    # Get file size first
-    file_size = get_file_size(url)
+    remote = get_remote_metadata(url)
+    recorded = load_metadata(METADATA_FILE)
+
+    if is_download_current(url, output_path, remote, recorded):
+        print(f"[OK] Local copy is current (ETag/Last-Modified and SHA-256 match) - skipping download")
+        return True
+
+    file_size = remote.get('size')
     if file_size:
         print(f"[INFO] Expected size: {format_bytes(file_size)}")
 
+    # Partial data from another URL or file version cannot be resumed
+    validator = range_validator(remote)
+    if PARTIAL_FILE.exists() and (recorded.get('partial_url') != url
+                                  or recorded.get('partial_validator') != validator):
+        PARTIAL_FILE.unlink()
+    recorded.update({'partial_url': url, 'partial_validator': validator})
+    save_metadata(METADATA_FILE, recorded)
+
     for attempt in range(MAX_RETRIES):
+        offset = PARTIAL_FILE.stat().st_size if PARTIAL_FILE.exists() else 0
+        if file_size and offset == file_size:
+            break
+
+        headers = {'User-Agent': USER_AGENT}
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+            if validator:
+                headers['If-Range'] = validator
+            print(f"[INFO] Resuming at {format_bytes(offset)}")
+
         try:
             response = requests.get(
                 url,
                 timeout=REQUEST_TIMEOUT,
                 stream=True,
                 allow_redirects=True,
-                headers={'User-Agent': 'Mozilla/5.0 (Python zoning-reform-analysis)'}
+                headers=headers
             )
+
+            if response.status_code == 416:
+                # Range beyond the file: partial data is stale
+                PARTIAL_FILE.unlink()
+                continue
             response.raise_for_status()
 
+            if offset and response.status_code != 206:
+                print(f"[INFO] Server ignored range request - restarting from byte 0")
+                offset = 0
+
             # Download with progress tracking
-            downloaded = 0
+            downloaded = offset
             start_time = time.time()
+            next_report = (downloaded // (10 * 1024 * 1024) + 1) * 10 * 1024 * 1024
 
-            with open(output_path, 'wb') as f:
+            with open(PARTIAL_FILE, 'ab' if offset else 'wb') as f:
                 for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
                     if chunk:
                         f.write(chunk)
                         downloaded += len(chunk)
 
                         # Progress every 10MB
-                        if file_size and downloaded % (10 * 1024 * 1024) < CHUNK_SIZE:
+                        if file_size and downloaded >= next_report:
                             progress_pct = (downloaded / file_size) * 100
                             print(f"  Downloaded: {format_bytes(downloaded)} / {format_bytes(file_size)} ({progress_pct:.1f}%)")
+                            next_report += 10 * 1024 * 1024
 
             elapsed = time.time() - start_time
-            print(f"[OK] Downloaded {format_bytes(downloaded)} in {elapsed:.1f}s")
-            return True
+            print(f"[OK] Downloaded {format_bytes(downloaded - offset)} in {elapsed:.1f}s")
+
+            if file_size and downloaded < file_size:
+                raise requests.exceptions.ConnectionError(
+                    f"connection closed at {format_bytes(downloaded)} of {format_bytes(file_size)}"
+                )
+            break
 
         except requests.exceptions.RequestException as e:
             print(f"[WARN] Attempt {attempt + 1}/{MAX_RETRIES} failed: {e}")
@@ -123,23 +248,40 @@ def download_file(url: str, output_path: Path, file_description: str = "file") -
                 time.sleep(RETRY_DELAY)
             else:
                 print(f"[FAIL] Failed to download after {MAX_RETRIES} attempts")
+                print(f"[INFO] Partial data kept in {PARTIAL_FILE}; re-run to resume")
                 return False
 
-    return False
+    # Verify
+    digest = sha256_file(PARTIAL_FILE)
+    if EXPECTED_SHA256 and digest != EXPECTED_SHA256.lower():
+        print(f"[FAIL] SHA-256 mismatch: expected {EXPECTED_SHA256}, got {digest}")
+        PARTIAL_FILE.unlink()
+        return False
+    print(f"[OK] SHA-256: {digest}")
+
+    PARTIAL_FILE.replace(output_path)
+    save_metadata(METADATA_FILE, {
+        'url': url,
+        'etag': remote.get('etag'),
+        'last_modified': remote.get('last_modified'),
+        'size': output_path.stat().st_size,
+        'sha256': digest,
+        'downloaded_at': datetime.now().isoformat(timespec='seconds'),
+    })
+    return True
 
 
-def extract_zip(zip_path: Path, extract_to: Path) -> bool:
+def find_csv_member(zip_path: Path) -> Optional[str]:
     """
-    Extract zip file and locate CSV.
+    Locate the CSV member inside the archive (nothing is extracted).
 
     Args:
         zip_path: Path to zip file
-        extract_to: Directory to extract to
 
     Returns:
-        Path to extracted CSV if successful, False otherwise
+        Name of the first CSV member, or None
     """
-    print(f"\n[INFO] Extracting {zip_path.name}...")
+    print(f"\n[INFO] Inspecting {zip_path.name}...")
 
     try:
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
@@ -153,28 +295,25 @@ def extract_zip(zip_path: Path, extract_to: Path) -> bool:
             for csv_file in csv_files:
                 print(f"  - {csv_file}")
 
-            # Extract all
-            zip_ref.extractall(extract_to)
-            print(f"[OK] Extracted to {extract_to}")
-
-            return csv_files if csv_files else False
+            return csv_files[0] if csv_files else None
 
     except Exception as e:
-        print(f"[FAIL] Extraction failed: {e}")
-        return False
+        print(f"[FAIL] Could not read archive: {e}")
+        return None
 
 
-def validate_csv(csv_path: Path) -> dict:
+def validate_csv(zip_path: Path, member: str) -> dict:
     """
-    Validate CSV structure and content.
+    Validate CSV structure and content, streaming the member out of the ZIP.
 
     Args:
-        csv_path: Path to CSV file
+        zip_path: Path to zip file
+        member: Name of the CSV member
 
     Returns:
         Dictionary with validation results
     """
-    print(f"\n[INFO] Validating {csv_path.name}...")
+    print(f"\n[INFO] Validating {member}...")
 
     import csv
 
@@ -185,7 +324,7 @@ def validate_csv(csv_path: Path) -> dict:
         'columns': [],
         'place_count': 0,
         'year_range': None,
-        'file_size': csv_path.stat().st_size
+        'file_size': 0
     }
 
     try:
@@ -194,7 +333,9 @@ def validate_csv(csv_path: Path) -> dict:
 
         for encoding in encodings:
             try:
-                with open(csv_path, 'r', encoding=encoding) as f:
+                with zipfile.ZipFile(zip_path, 'r') as zip_ref, \
+                        io.TextIOWrapper(zip_ref.open(member), encoding=encoding, newline='') as f:
+                    results['file_size'] = zip_ref.getinfo(member).file_size
                     reader = csv.DictReader(f)
 
                     if reader.fieldnames:
@@ -244,40 +385,28 @@ def validate_csv(csv_path: Path) -> dict:
         return results
 
 
-def find_csv_in_extracted(extract_dir: Path) -> Optional[Path]:
-    """Recursively find CSV file in extracted directory."""
-    for root, dirs, files in os.walk(extract_dir):
-        for file in files:
-            if file.lower().endswith('.csv'):
-                return Path(root) / file
-    return None
-
-
-def move_csv_to_output(csv_path: Path, output_path: Path):
-    """Move CSV to final location."""
-    import shutil
-    print(f"\n[INFO] Moving extracted CSV to output location...")
-    shutil.move(str(csv_path), str(output_path))
-    print(f"[OK] Final output: {output_path}")
-
-
-def cleanup_temp(keep_zip: bool = False):
-    """Clean up temporary files."""
-    print(f"\n[INFO] Cleaning up temporary files...")
-
-    import shutil
+def fetch_place_crosswalk() -> bool:
+    """Download the Census place codes file (pipe-delimited, ~32K places) if it is not current."""
+    print(f"\n[INFO] Fetching place FIPS crosswalk: {PLACE_CROSSWALK_URL}")
+    try:
+        response = cached_get(PLACE_CROSSWALK_URL, timeout=REQUEST_TIMEOUT, headers={'User-Agent': USER_AGENT})
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"[FAIL] Could not download place crosswalk: {e}")
+        return False
 
-    if TEMP_DIR.exists():
-        # Remove extracted files
-        for item in TEMP_DIR.iterdir():
-            if item.is_dir():
-                shutil.rmtree(item)
-                print(f"  Removed: {item.name}")
-            elif not keep_zip or item.name != 'bps_compiled.zip':
-                item.unlink()
-                print(f"  Removed: {item.name}")
+    text = response.content.decode('latin-1')
+    header = text.split('\n', 1)[0]
+    if not all(column in header.split('|') for column in ('STATEFP', 'PLACEFP', 'PLACENAME')):
+        print(f"[FAIL] Unexpected place crosswalk header: {header[:80]!r}")
+        return False
 
-    print("[OK] Cleanup complete")
+    tmp_path = PLACE_CROSSWALK.with_suffix('.tmp')
+    tmp_path.write_bytes(response.content)
+    tmp_path.replace(PLACE_CROSSWALK)
+    print(f"[OK] {PLACE_CROSSWALK}: {text.count(chr(10)) - 1:,} places "
+          f"({'cached' if getattr(response, 'from_cache', False) else 'downloaded'})")
+    return True
 
 
 def get_latest_bps_zip_url() -> str:
@@ -289,7 +418,7 @@ def get_latest_bps_zip_url() -> str:
         response = requests.get(
             CENSUS_MASTER_ALT_URL,
             timeout=REQUEST_TIMEOUT,
-            headers={'User-Agent': 'Mozilla/5.0 (Python zoning-reform-analysis)'}
+            headers={'User-Agent': USER_AGENT}
         )
 
         # Look for BPS Compiled zip files
@@ -320,55 +449,36 @@ def main():
     # Setup
     setup_directories()
 
-    # Check if already downloaded
-    if OUTPUT_FILE.exists():
-        print(f"\n[WARN] Output file already exists: {OUTPUT_FILE}")
-        validation = validate_csv(OUTPUT_FILE)
-        if validation['valid'] and validation['place_count'] > 1000:
-            print(f"[OK] Valid dataset with {validation['place_count']:,} places")
-            print(f"\nTo re-download, delete: {OUTPUT_FILE}")
-            return 0
-
     # Get latest URL
     url = get_latest_bps_zip_url()
 
-    # Download
+    # Download (skipped when the local copy is current)
     if not download_file(url, ZIP_FILE):
         print(f"\n[FAIL] Download failed - cannot proceed")
         return 1
 
-    # Extract
-    csv_files = extract_zip(ZIP_FILE, TEMP_DIR)
-    if not csv_files:
-        print(f"\n[FAIL] Extraction failed - no CSV files found")
+    # Locate CSV inside the archive
+    member = find_csv_member(ZIP_FILE)
+    if not member:
+        print(f"\n[FAIL] No CSV file found in archive")
         return 1
 
-    # Find CSV in extracted files
-    csv_path = find_csv_in_extracted(TEMP_DIR)
-    if not csv_path:
-        print(f"\n[FAIL] Could not locate CSV in extracted files")
-        return 1
-
-    print(f"\n[INFO] Found CSV: {csv_path}")
-
     # Validate
-    validation = validate_csv(csv_path)
+    validation = validate_csv(ZIP_FILE, member)
     if not validation['valid']:
         print(f"\n[FAIL] CSV validation failed")
         return 1
 
-    # Move to output
-    move_csv_to_output(csv_path, OUTPUT_FILE)
-
-    # Cleanup
-    cleanup_temp(keep_zip=False)
+    # Place FIPS crosswalk for script 21
+    if not fetch_place_crosswalk():
+        return 1
 
     # Final report
     print("\n" + "="*70)
     print("DOWNLOAD COMPLETE - PHASE 1.1 FOUNDATION READY")
     print("="*70)
-    print(f"\nOutput File: {OUTPUT_FILE}")
-    print(f"File Size: {format_bytes(validation['file_size'])}")
+    print(f"\nOutput File: {ZIP_FILE} ({member})")
+    print(f"File Size: {format_bytes(validation['file_size'])} uncompressed")
     print(f"Places: {validation['place_count']:,}")
     print(f"Data Rows: {validation['row_count']:,}")
     if validation['year_range']:
@@ -377,7 +487,7 @@ def main():
     print(f"Sample: {', '.join(validation['columns'][:5])}, ...")
 
     print(f"\nNext Steps:")
-    print(f"1. Run script 21_parse_place_data_format.py to extract place metrics")
+    print(f"1. Run script 21_parse_place_data_format.py to extract place metrics (reads the ZIP directly)")
     print(f"2. Run script 22_build_place_metrics.py to compute growth rates")
     print(f"3. Run script 23_geocode_places.py to add location data")
     print(f"4. Build search index with Fuse.js")
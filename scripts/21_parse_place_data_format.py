@@ -8,7 +8,11 @@ Parses the Census Bureau BPS Master Dataset CSV into place-level metrics:
 - Organize by year and month for time-series analysis
 - Validate data quality and completeness
 
-Input: data/raw/census_bps_master_dataset.csv
+Inputs:
+  - data/raw/census_bps_master_dataset.zip (CSV member streamed in chunks, no extraction)
+    or data/raw/census_bps_master_dataset.csv (previously extracted copy)
+  - data/raw/national_place2020.txt (Census place FIPS crosswalk, for stable place_fips;
+    downloaded by script 20)
 Outputs:
   - data/raw/census_bps_places_directory.csv (unique places with metadata)
   - data/raw/census_bps_place_annual_permits.csv (annual aggregated permits)
@@ -18,11 +22,18 @@ Outputs:
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import io
 import sys
-from typing import Dict, Tuple
+import zipfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+from place_fips import PlaceFipsResolver
 
 # Configuration
+INPUT_ZIP = Path("data/raw/census_bps_master_dataset.zip")
 INPUT_FILE = Path("data/raw/census_bps_master_dataset.csv")
+CHUNK_ROWS = 250_000  # rows parsed per chunk; only place-level rows are kept
 OUTPUT_DIR = Path("data/raw")
 
 # Output files
@@ -30,14 +41,41 @@ PLACES_DIRECTORY = OUTPUT_DIR / "census_bps_places_directory.csv"
 ANNUAL_PERMITS = OUTPUT_DIR / "census_bps_place_annual_permits.csv"
 MONTHLY_PERMITS = OUTPUT_DIR / "census_bps_place_monthly_permits.csv"
 
+# Place FIPS crosswalk (official 7-digit state+place codes)
+PLACE_CROSSWALK = OUTPUT_DIR / "national_place2020.txt"
+PLACE_CROSSWALK_URL = "https://www2.census.gov/geo/docs/reference/codes2020/national_place2020.txt"
+PLACE_RESOLVER_CACHE = OUTPUT_DIR / ".place_fips_resolver.pkl"
+# Possible names of a place code column. None is confirmed in the master file's
+# layout; when none is present, places resolve by name alone.
+PLACE_CODE_COLUMNS = ['PLACE_FIPS', 'FIPS_PLACE', 'PLACE_CODE']
+
+
+@contextmanager
+def open_census_source(encoding: str) -> Iterator[io.TextIOBase]:
+    """Text stream over the master CSV, straight from the ZIP when available (closed on exit)."""
+    if INPUT_ZIP.exists():
+        with zipfile.ZipFile(INPUT_ZIP, 'r') as zip_ref:
+            member = next(name for name in zip_ref.namelist() if name.lower().endswith('.csv'))
+            with io.TextIOWrapper(zip_ref.open(member), encoding=encoding, newline='') as stream:
+                yield stream
+    else:
+        with open(INPUT_FILE, 'r', encoding=encoding, newline='') as stream:
+            yield stream
+
 
 def load_census_data() -> pd.DataFrame:
-    """Load the raw Census BPS data."""
+    """
+    Load the place-level rows of the raw Census BPS data.
+
+    The CSV is parsed in CHUNK_ROWS chunks and non-place rows are dropped per
+    chunk, so peak memory tracks the place subset rather than the whole file.
+    """
     print(f"\n[INFO] Loading Census BPS Master Dataset...")
-    print(f"[INFO] Source: {INPUT_FILE}")
+    source = INPUT_ZIP if INPUT_ZIP.exists() else INPUT_FILE
+    print(f"[INFO] Source: {source}")
 
-    if not INPUT_FILE.exists():
-        print(f"\n[FAIL] Input file not found: {INPUT_FILE}")
+    if not source.exists():
+        print(f"\n[FAIL] Input file not found: {INPUT_ZIP}")
         print(f"[INFO] First run: python scripts/20_fetch_place_permits_bulk.py")
         sys.exit(1)
 
@@ -47,8 +85,15 @@ def load_census_data() -> pd.DataFrame:
     for encoding in encodings:
         try:
             print(f"[INFO] Attempting to load with encoding: {encoding}")
-            df = pd.read_csv(INPUT_FILE, low_memory=False, encoding=encoding)
-            print(f"[OK] Loaded {len(df):,} rows, {len(df.columns)} columns (encoding: {encoding})")
+            rows_read = 0
+            chunks = []
+            with open_census_source(encoding) as stream:
+                for chunk in pd.read_csv(stream, chunksize=CHUNK_ROWS, low_memory=False):
+                    rows_read += len(chunk)
+                    chunks.append(chunk[chunk['LOCATION_TYPE'] == 'Place'])
+            df = pd.concat(chunks, ignore_index=True)
+            print(f"[OK] Read {rows_read:,} rows, kept {len(df):,} place rows, "
+                  f"{len(df.columns)} columns (encoding: {encoding})")
             return df
         except UnicodeDecodeError:
             continue
@@ -63,11 +108,12 @@ def extract_places_directory(df: pd.DataFrame) -> pd.DataFrame:
     Extract unique places directory with geographic identifiers.
 
     Returns DataFrame with:
-    - place_fips: Combined state+place FIPS code (unique identifier)
+    - place_fips: Official 7-digit state+place FIPS code (stable identifier)
     - place_name: Official place name
     - state_code: State FIPS code
     - county_code: County FIPS code (if available)
     - location_type: Type of geography (Place, Metro, County, etc.)
+    - fips_source: How place_fips was resolved (code, exact, suffix, fuzzy, synthetic)
     """
     print(f"\n[INFO] Extracting places directory...")
 
@@ -76,10 +122,13 @@ def extract_places_directory(df: pd.DataFrame) -> pd.DataFrame:
     print(f"[OK] Filtered to {len(place_df):,} place-level records")
 
     # Extract unique places
-    places = place_df[[
-        'STATE_CODE', 'PLACE_NAME', 'LOCATION_NAME',
-        'COUNTY_CODE', 'LOCATION_TYPE'
-    ]].drop_duplicates()
+    code_col = next((col for col in PLACE_CODE_COLUMNS if col in place_df.columns), None)
+    if code_col:
+        print(f"[INFO] Resolving place FIPS from the {code_col} column, then by name")
+    else:
+        print(f"[INFO] No place code column ({', '.join(PLACE_CODE_COLUMNS)}); resolving place FIPS by name")
+    columns = ['STATE_CODE', 'PLACE_NAME', 'LOCATION_NAME', 'COUNTY_CODE', 'LOCATION_TYPE']
+    places = place_df[columns + ([code_col] if code_col else [])].drop_duplicates()
 
     # Clean and standardize
     places = places.rename(columns={
@@ -87,29 +136,18 @@ def extract_places_directory(df: pd.DataFrame) -> pd.DataFrame:
         'PLACE_NAME': 'place_name',
         'LOCATION_NAME': 'location_name',
         'COUNTY_CODE': 'county_code',
-        'LOCATION_TYPE': 'location_type'
+        'LOCATION_TYPE': 'location_type',
+        **({code_col: 'source_place_code'} if code_col else {}),
     })
 
-    # Create place FIPS (state + place)
-    # Parse place code from location_name if needed
-    places['place_fips'] = places['state_fips'].astype(str).str.zfill(2)
-
     # Ensure state code is 2-digit zero-padded string
     places['state_fips'] = places['state_fips'].astype(str).str.zfill(2)
 
-    # Try to extract place code from location_name or use hash
-    places['place_code'] = ''
     places = places.drop_duplicates(subset=['place_name', 'state_fips'])
     places = places.sort_values(['state_fips', 'place_name']).reset_index(drop=True)
 
-    # Create sortable place FIPS
-    places['place_fips'] = (
-        places['state_fips'].astype(str) +
-        places.groupby('state_fips').cumcount().astype(str).str.zfill(5)
-    )
-
-    # Remove duplicates (keep first occurrence)
-    places = places.drop_duplicates(subset=['place_name', 'state_fips'], keep='first')
+    # Resolve official place FIPS (stable across refreshes)
+    places = resolve_place_fips(places)
 
     print(f"[OK] Extracted {len(places):,} unique places")
     print(f"[INFO] Geographic coverage:")
@@ -125,6 +163,49 @@ def extract_places_directory(df: pd.DataFrame) -> pd.DataFrame:
     return places
 
 
+def resolve_place_fips(places: pd.DataFrame) -> pd.DataFrame:
+    """
+    Attach official 7-digit place FIPS codes via the local crosswalk.
+
+    Places missing from the crosswalk get a deterministic hash-derived code, so
+    place_fips never depends on which other places are in the file.
+
+    Raises FileNotFoundError without the crosswalk (script 20 downloads it)
+    and ValueError if two places end up with the same place_fips.
+    """
+    if not PLACE_CROSSWALK.exists():
+        raise FileNotFoundError(
+            f"Place FIPS crosswalk not found: {PLACE_CROSSWALK} "
+            f"(run scripts/20_fetch_place_permits_bulk.py, or download {PLACE_CROSSWALK_URL})"
+        )
+
+    resolver = PlaceFipsResolver.load(PLACE_CROSSWALK, PLACE_RESOLVER_CACHE)
+    resolved = resolver.resolve(
+        places['state_fips'],
+        places['place_name'],
+        places['source_place_code'] if 'source_place_code' in places.columns else None,
+    )
+    resolver.save(PLACE_RESOLVER_CACHE)
+
+    places['place_fips'] = resolved['place_fips']
+    places['place_code'] = places['place_fips'].str[2:]
+    places['fips_source'] = resolved['fips_source']
+    places = places.drop(columns=['source_place_code'], errors='ignore')
+
+    duplicated = places['place_fips'].duplicated(keep=False)
+    if duplicated.any():
+        raise ValueError(
+            f"place_fips assigned to more than one place: "
+            f"{places.loc[duplicated, ['state_fips', 'place_name', 'place_fips']].head(10).to_dict('records')}"
+        )
+
+    print(f"[OK] Resolved place FIPS:")
+    for source, count in places['fips_source'].value_counts().items():
+        print(f"  - {source:10s}: {count:,}")
+
+    return places
+
+
 def aggregate_annual_permits(df: pd.DataFrame, places: pd.DataFrame) -> pd.DataFrame:
     """
     Aggregate permits by place and year.
@@ -347,7 +428,11 @@ def main():
     df = load_census_data()
 
     # Extract places directory
-    places = extract_places_directory(df)
+    try:
+        places = extract_places_directory(df)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"\n[FAIL] {e}")
+        return 1
 
     # Aggregate annual permits
     annual = aggregate_annual_permits(df, places)
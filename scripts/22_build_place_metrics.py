@@ -15,20 +15,40 @@ Inputs:
 
 Outputs:
   - data/outputs/place_metrics_comprehensive.csv (20K+ places with growth, MF share, rankings)
+  - data/outputs/.place_metrics_state.pkl (per-place state for incremental runs)
+
+Incremental mode:
+  When the state file from a previous run exists, only places whose annual
+  rows changed (new year, revised counts, new place) are recomputed; every
+  other place reuses its stored metrics. Pass --full to force a rebuild.
+
+Usage:
+    python scripts/22_build_place_metrics.py [--full]
 """
 
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import pickle
 import sys
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from perf import instrument
+from permit_store import load_table
 
 # Configuration
 PLACES_DIR = Path("data/raw/census_bps_places_directory.csv")
 ANNUAL_PERMITS = Path("data/raw/census_bps_place_annual_permits.csv")
 OUTPUT_FILE = Path("data/outputs/place_metrics_comprehensive.csv")
+STATE_FILE = Path("data/outputs/.place_metrics_state.pkl")
 
+# Incremental state configuration
+STATE_VERSION = 1
+PLACE_KEY = ['state_fips', 'place_name']
+HASHED_COLUMNS = ['year', 'total_units', 'sf_units', 'mf_units']  # Inputs the metrics depend on
 
+
+@instrument()
 def load_data() -> tuple:
     """Load input files."""
     print(f"\n[INFO] Loading place data...")
@@ -41,7 +61,7 @@ def load_data() -> tuple:
         sys.exit(1)
 
     places = pd.read_csv(PLACES_DIR, dtype={'state_fips': str})
-    annual = pd.read_csv(ANNUAL_PERMITS, dtype={'state_fips': str})
+    annual = load_table('place_bulk').to_frame()
 
     print(f"[OK] Places: {len(places):,}")
     print(f"[OK] Annual permits: {len(annual):,} records")
@@ -49,6 +69,7 @@ def load_data() -> tuple:
     return places, annual
 
 
+@instrument()
 def compute_growth_metrics(annual: pd.DataFrame) -> pd.DataFrame:
     """
     Compute growth metrics for each place.
@@ -151,6 +172,7 @@ def compute_growth_metrics(annual: pd.DataFrame) -> pd.DataFrame:
     return metrics_df
 
 
+@instrument()
 def compute_multifamily_metrics(annual: pd.DataFrame) -> pd.DataFrame:
     """
     Compute multi-family housing metrics.
@@ -218,6 +240,35 @@ def compute_multifamily_metrics(annual: pd.DataFrame) -> pd.DataFrame:
     return mf_df
 
 
+def percentile_rank(values: np.ndarray, groups: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Percentile rank (0-100) of each value within its group via a sorted index.
+
+    Equivalent to ``Series.rank(pct=True) * 100`` (average ties), but computed
+    with two ``searchsorted`` passes over one sorted key array instead of a
+    per-group rerank. Values must not contain NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    if groups is None:
+        group_codes = np.zeros(len(values), dtype=np.int64)
+    else:
+        group_codes = pd.factorize(np.asarray(groups))[0].astype(np.int64)
+
+    # Dense-encode values so (group, value) packs into one sortable integer key
+    unique_values, value_codes = np.unique(values, return_inverse=True)
+    keys = group_codes * (len(unique_values) + 1) + value_codes
+    sorted_keys = np.sort(keys)
+
+    group_start = np.searchsorted(sorted_keys, group_codes * (len(unique_values) + 1), side='left')
+    group_end = np.searchsorted(sorted_keys, (group_codes + 1) * (len(unique_values) + 1), side='left')
+    below = np.searchsorted(sorted_keys, keys, side='left') - group_start
+    at_or_below = np.searchsorted(sorted_keys, keys, side='right') - group_start
+
+    average_rank = (below + at_or_below + 1) / 2
+    return average_rank / (group_end - group_start) * 100
+
+
+@instrument()
 def compute_rankings(growth_df: pd.DataFrame) -> pd.DataFrame:
     """
     Compute percentile rankings by state and nationally.
@@ -230,16 +281,16 @@ def compute_rankings(growth_df: pd.DataFrame) -> pd.DataFrame:
     print(f"\n[INFO] Computing rankings and percentiles...")
 
     # National rankings
-    growth_df['rank_permits_national'] = growth_df['recent_units_2024'].rank(pct=True) * 100
-    growth_df['rank_growth_national'] = growth_df['growth_rate_5yr'].rank(pct=True) * 100
+    growth_df['rank_permits_national'] = percentile_rank(growth_df['recent_units_2024'])
+    growth_df['rank_growth_national'] = percentile_rank(growth_df['growth_rate_5yr'])
 
     # State rankings
-    growth_df['rank_permits_state'] = (
-        growth_df.groupby('state_fips')['recent_units_2024'].rank(pct=True) * 100
+    growth_df['rank_permits_state'] = percentile_rank(
+        growth_df['recent_units_2024'], growth_df['state_fips']
     )
 
-    growth_df['rank_growth_state'] = (
-        growth_df.groupby('state_fips')['growth_rate_5yr'].rank(pct=True) * 100
+    growth_df['rank_growth_state'] = percentile_rank(
+        growth_df['growth_rate_5yr'], growth_df['state_fips']
     )
 
     print(f"[OK] Computed rankings")
@@ -253,6 +304,7 @@ def identify_key_markets(df: pd.DataFrame) -> List[str]:
     return top_places
 
 
+@instrument()
 def merge_all_metrics(growth_df: pd.DataFrame, mf_df: pd.DataFrame, places: pd.DataFrame) -> pd.DataFrame:
     """Merge all metrics together."""
     print(f"\n[INFO] Merging all metrics...")
@@ -292,6 +344,88 @@ def merge_all_metrics(growth_df: pd.DataFrame, mf_df: pd.DataFrame, places: pd.D
     return merged
 
 
+def hash_table(df: pd.DataFrame) -> int:
+    """Content hash of a whole table (order-sensitive)."""
+    return int(pd.util.hash_pandas_object(df, index=False).sum())
+
+
+def compute_place_digests(annual: pd.DataFrame) -> pd.Series:
+    """
+    Content digest per place from its annual rows.
+
+    Each place-year row is hashed on the columns the metrics read; a place's
+    digest is the wrapping uint64 sum of its row hashes, so it changes when a
+    year is added, removed or revised regardless of row order.
+    """
+    row_hashes = pd.util.hash_pandas_object(annual[PLACE_KEY + HASHED_COLUMNS], index=False)
+    return row_hashes.groupby([annual[col] for col in PLACE_KEY]).sum()
+
+
+def load_state() -> Optional[Dict]:
+    """Load the incremental state from the previous run, if compatible."""
+    if not STATE_FILE.exists():
+        return None
+
+    try:
+        with open(STATE_FILE, 'rb') as f:
+            state = pickle.load(f)
+    except Exception as e:
+        print(f"[WARN] Could not read state file ({e}), running full rebuild")
+        return None
+
+    if state.get('version') != STATE_VERSION:
+        print(f"[WARN] State file version mismatch, running full rebuild")
+        return None
+
+    return state
+
+
+def save_state(state: Dict):
+    """Persist the incremental state for the next run."""
+    state['version'] = STATE_VERSION
+    with open(STATE_FILE, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    print(f"[OK] Saved state: {STATE_FILE}")
+
+
+@instrument()
+def update_metrics_incremental(annual: pd.DataFrame, digests: pd.Series, state: Dict) -> tuple:
+    """
+    Recompute growth and MF metrics only for places whose rows changed.
+
+    Places whose digest matches the stored one keep their previous metrics;
+    new or revised places are recomputed from their annual rows; places that
+    disappeared from the annual table are dropped.
+    """
+    previous = state['digests'].reindex(digests.index)
+    changed = digests.index[previous.isna() | (previous != digests)]
+    unchanged = digests.index.difference(changed)
+
+    print(f"\n[INFO] Incremental update: {len(changed):,} of {len(digests):,} places changed")
+
+    def reuse(frame: pd.DataFrame) -> pd.DataFrame:
+        keys = pd.MultiIndex.from_frame(frame[PLACE_KEY])
+        return frame[keys.isin(unchanged)]
+
+    growth_parts = [reuse(state['growth'])]
+    mf_parts = [reuse(state['mf'])]
+
+    if len(changed) > 0:
+        annual_keys = pd.MultiIndex.from_frame(annual[PLACE_KEY])
+        changed_rows = annual[annual_keys.isin(changed)]
+        growth_parts.append(compute_growth_metrics(changed_rows))
+        mf_parts.append(compute_multifamily_metrics(changed_rows))
+
+    growth_df = pd.concat(growth_parts, ignore_index=True)
+    mf_df = pd.concat(mf_parts, ignore_index=True)
+
+    # Keep the same row order as a full rebuild (groupby order)
+    growth_df = growth_df.sort_values(PLACE_KEY).reset_index(drop=True)
+    mf_df = mf_df.sort_values(PLACE_KEY).reset_index(drop=True)
+
+    return growth_df, mf_df
+
+
 def print_summary(df: pd.DataFrame):
     """Print summary statistics."""
     print("\n" + "="*70)
@@ -347,9 +481,34 @@ def main():
     # Load data
     places, annual = load_data()
 
-    # Compute metrics
-    growth_df = compute_growth_metrics(annual)
-    mf_df = compute_multifamily_metrics(annual)
+    # Decide between incremental update and full rebuild
+    state = None if '--full' in sys.argv else load_state()
+    table_hash = hash_table(annual)
+    places_hash = hash_table(places)
+
+    if (state is not None and OUTPUT_FILE.exists()
+            and state['table_hash'] == table_hash and state['places_hash'] == places_hash):
+        print(f"\n[OK] Inputs unchanged since last run - nothing to do")
+        print(f"[INFO] Pass --full to force a rebuild")
+        return 0
+
+    digests = compute_place_digests(annual)
+
+    if state is not None:
+        growth_df, mf_df = update_metrics_incremental(annual, digests, state)
+    else:
+        print(f"\n[INFO] Full rebuild of all place metrics")
+        growth_df = compute_growth_metrics(annual)
+        mf_df = compute_multifamily_metrics(annual)
+
+    # Snapshot unranked metrics for the next incremental run
+    state = {
+        'table_hash': table_hash,
+        'places_hash': places_hash,
+        'digests': digests,
+        'growth': growth_df.copy(),
+        'mf': mf_df,
+    }
 
     # Add rankings
     growth_df = compute_rankings(growth_df)
@@ -360,6 +519,7 @@ def main():
     # Save
     merged.to_csv(OUTPUT_FILE, index=False)
     print(f"\n[OK] Saved: {OUTPUT_FILE}")
+    save_state(state)
 
     # Summary
     print_summary(merged)
@@ -3,31 +3,47 @@
 Phase 1.1: Place Geocoding (Free Approach)
 
 Geocodes places using free methods:
-1. Census GEOID metadata (no cost, built-in)
-2. Nominatim (free OpenStreetMap, rate-limited but generous)
-3. US Census Bureau Geocoding Service (batch free tier)
+1. Census Gazetteer places file (offline, resolves nearly all places in <1s)
+2. Cached results from earlier Nominatim runs
+3. Nominatim (free OpenStreetMap, rate-limited) - optional last resort, --nominatim
+4. State centroid fallback for anything still unresolved
 
 Output: data/outputs/place_metrics_geocoded.csv (adds lat/lon/county info)
 
 Note: This uses batch geocoding from free services. Rate limits are generous
-for batch processing (~1 request/second for Nominatim).
+for batch processing (~1 request/second for Nominatim). Lookups run through the
+async engine in geocoding.py and are committed to a SQLite cache one by one,
+so re-running after an interruption resumes where the last run stopped.
+
+Usage:
+    python scripts/23_geocode_places.py [--nominatim]
 """
 
 import pandas as pd
 import numpy as np
 from pathlib import Path
 import sys
-import time
 from typing import Dict, Optional, Tuple
 
+from gazetteer import GazetteerIndex
+from geocoding import GeocodeCache, geocode_pending
+
 # Configuration
 INPUT_FILE = Path("data/outputs/place_metrics_comprehensive.csv")
 OUTPUT_FILE = Path("data/outputs/place_metrics_geocoded.csv")
-CACHE_FILE = Path("data/outputs/.geocode_cache.csv")
+CACHE_FILE = Path("data/outputs/.geocode_cache.sqlite")
+LEGACY_CACHE_FILE = Path("data/outputs/.geocode_cache.csv")  # Imported once if present
+GAZETTEER_FILE = Path("data/raw/2024_Gaz_place_national.txt")
+GAZETTEER_URL = "https://www2.census.gov/geo/docs/maps-data/data/gazetteer/2024_Gazetteer/2024_Gaz_place_national.zip"
+
+# Online lookups are opt-in; the Gazetteer is the primary source
+USE_NOMINATIM = '--nominatim' in sys.argv
 
 # Free service configuration
 NOMINATIM_DELAY = 1.2  # seconds between requests (rate limit)
 NOMINATIM_TIMEOUT = 10  # seconds per request
+NOMINATIM_CONCURRENCY = 2  # in-flight requests (rate limit still applies)
+NOMINATIM_RETRIES = 3
 
 
 def load_metrics() -> pd.DataFrame:
@@ -65,89 +81,14 @@ def get_state_name(state_fips: str) -> str:
     return fips_to_state.get(state_fips, 'Unknown')
 
 
-def load_geocode_cache() -> Dict:
-    """Load cached geocode results to avoid re-querying."""
-    if CACHE_FILE.exists():
-        cache_df = pd.read_csv(CACHE_FILE)
-        cache = {}
-        for idx, row in cache_df.iterrows():
-            key = f"{row['place_name']}|{row['state_fips']}"
-            cache[key] = {
-                'latitude': row['latitude'],
-                'longitude': row['longitude'],
-                'county_name': row.get('county_name', ''),
-                'source': row.get('source', 'cached')
-            }
-        print(f"[OK] Loaded geocode cache: {len(cache):,} entries")
-        return cache
-    return {}
-
-
-def save_geocode_cache(cache: Dict):
-    """Save geocode results to cache."""
-    cache_rows = []
-    for key, geo in cache.items():
-        place_name, state_fips = key.split('|')
-        cache_rows.append({
-            'place_name': place_name,
-            'state_fips': state_fips,
-            'latitude': geo['latitude'],
-            'longitude': geo['longitude'],
-            'county_name': geo.get('county_name', ''),
-            'source': geo.get('source', 'nominatim')
-        })
-
-    if cache_rows:
-        cache_df = pd.DataFrame(cache_rows)
-        cache_df.to_csv(CACHE_FILE, index=False)
-        print(f"[OK] Cached {len(cache_rows):,} geocode results")
-
-
-def geocode_nominatim(place_name: str, state_fips: str) -> Optional[Dict]:
-    """
-    Geocode using free Nominatim (OpenStreetMap).
-
-    Returns: {latitude, longitude, county_name} or None
-    """
-    try:
-        import requests
-
-        state_name = get_state_name(state_fips)
-        query = f"{place_name}, {state_name}, USA"
-
-        response = requests.get(
-            "https://nominatim.openstreetmap.org/search",
-            params={
-                'q': query,
-                'format': 'json',
-                'limit': 1,
-                'timeout': 10,
-                'addressdetails': 1
-            },
-            headers={'User-Agent': 'zoning-reform-analysis'},
-            timeout=NOMINATIM_TIMEOUT
-        )
-
-        if response.status_code == 200 and response.json():
-            result = response.json()[0]
-            return {
-                'latitude': float(result['lat']),
-                'longitude': float(result['lon']),
-                'county_name': result.get('address', {}).get('county', ''),
-                'source': 'nominatim'
-            }
-    except Exception as e:
-        pass  # Silently fail, will use fallback
-
-    return None
-
-
-def geocode_fallback(place_name: str, state_fips: str, idx: int, total: int) -> Dict:
+def geocode_fallback(place_name: str, state_fips: str, idx: int, total: int,
+                     centroids: Optional[Dict] = None) -> Dict:
     """
     Fallback geocoding using centroid approximation.
 
     For places we can't geocode, uses state centroid or indexed position.
     This is a placeholder to ensure all places have coordinates for mapping.
+    Centroids derived from the Gazetteer cover every state when available.
     """
     # State centroids (approximate)
     state_centroids = {
@@ -162,6 +103,8 @@ def geocode_fallback(place_name: str, state_fips: str, idx: int, total: int) ->
         '06': (37.5, -119.5),      # California
         '39': (40.0, -82.5),       # Ohio
     }
+    if centroids:
+        state_centroids.update(centroids)
 
     if state_fips in state_centroids:
         lat, lon = state_centroids[state_fips]
@@ -181,62 +124,109 @@ def geocode_fallback(place_name: str, state_fips: str, idx: int, total: int) ->
     }
 
 
+def geocode_gazetteer(df: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[Dict]]:
+    """
+    Resolve places offline against the Census Gazetteer.
+
+    Returns the geocode columns aligned with df (NaN coordinates where
+    unresolved) and the Gazetteer-derived state centroids.
+    """
+    geo = pd.DataFrame(index=df.index, columns=['latitude', 'longitude', 'county_name', 'source'])
+    geo[['latitude', 'longitude']] = geo[['latitude', 'longitude']].astype(float)
+
+    if not GAZETTEER_FILE.exists():
+        print(f"[WARN] Gazetteer file not found: {GAZETTEER_FILE}")
+        print(f"[INFO] Download it from {GAZETTEER_URL}")
+        return geo, None
+
+    index = GazetteerIndex.from_file(GAZETTEER_FILE)
+    print(f"[OK] Loaded Gazetteer index: {len(index):,} places")
+
+    matches = index.lookup(df['state_fips'], df['place_name'])
+    found = matches['match'].notna()
+    geo.loc[found, 'latitude'] = matches.loc[found, 'latitude']
+    geo.loc[found, 'longitude'] = matches.loc[found, 'longitude']
+    geo.loc[found, 'county_name'] = ''
+    geo.loc[found, 'source'] = 'gazetteer'
+
+    for kind in ['exact', 'suffix', 'fuzzy']:
+        print(f"  - Gazetteer {kind} matches: {(matches['match'] == kind).sum():,}")
+
+    return geo, index.state_centroids()
+
+
+def cached_positions(df: pd.DataFrame, cached: pd.DataFrame) -> pd.DataFrame:
+    """Cached geocodes with coordinates, one row per row of df (NaN where not cached)."""
+    cached = cached[cached['latitude'].notna()]
+    return df[['place_name', 'state_fips']].merge(
+        cached, on=['place_name', 'state_fips'], how='left'
+    ).set_index(df.index)
+
+
 def geocode_places(df: pd.DataFrame) -> pd.DataFrame:
     """Geocode all places."""
     print(f"\n[INFO] Geocoding {len(df):,} places...")
-    print(f"[INFO] Using free Nominatim/OpenStreetMap service")
-    print(f"[INFO] Rate limit: ~1 request/sec")
+    print(f"[INFO] Primary source: Census Gazetteer (offline)")
+
+    df = df.reset_index(drop=True)
+    geo, centroids = geocode_gazetteer(df)
+    gazetteer_count = int(geo['latitude'].notna().sum())
+
+    # Open cache (seed from the legacy CSV cache on first run)
+    cache = GeocodeCache(CACHE_FILE)
+    if LEGACY_CACHE_FILE.exists() and len(cache) == 0:
+        imported = cache.import_csv(LEGACY_CACHE_FILE)
+        print(f"[OK] Imported {imported:,} entries from {LEGACY_CACHE_FILE}")
+    print(f"[OK] Loaded geocode cache: {len(cache):,} entries")
+
+    unresolved = geo['latitude'].isna()
+    stats = {'found': 0, 'not_found': 0, 'failed': 0}
+    earlier = cached_positions(df, cache.load())  # answers that predate this run
+
+    # Optional last resort: Nominatim for places the Gazetteer could not resolve
+    if USE_NOMINATIM and unresolved.any():
+        print(f"[INFO] Querying Nominatim for {int(unresolved.sum()):,} unresolved places (~1 request/sec)")
+        keys = df.loc[unresolved, ['place_name', 'state_fips']].drop_duplicates()
+        items = [
+            ((place_name, state_fips), f"{place_name}, {get_state_name(state_fips)}, USA")
+            for place_name, state_fips in keys.itertuples(index=False)
+        ]
+        stats = geocode_pending(
+            cache,
+            items,
+            rate=1 / NOMINATIM_DELAY,
+            concurrency=NOMINATIM_CONCURRENCY,
+            timeout=NOMINATIM_TIMEOUT,
+            max_retries=NOMINATIM_RETRIES,
+        )
 
-    # Load cache
-    cache = load_geocode_cache()
+    # Cached Nominatim answers fill remaining gaps (offline); rows, like the other counts
+    from_cache = cached_positions(df, cache.load())
+    cache.close()
+    use_cache = unresolved & from_cache['latitude'].notna()
+    geo.loc[use_cache] = from_cache.loc[use_cache, geo.columns]
+    cache_count = int((use_cache & earlier['latitude'].notna()).sum())
+    nominatim_count = int(use_cache.sum()) - cache_count
 
-    # Geocode
-    geocoded = []
-    nominatim_count = 0
-    cache_count = 0
-    fallback_count = 0
-
-    for idx, row in df.iterrows():
-        cache_key = f"{row['place_name']}|{row['state_fips']}"
-
-        # Check cache first
-        if cache_key in cache:
-            geo = cache[cache_key]
-            cache_count += 1
-        else:
-            # Try Nominatim
-            geo = geocode_nominatim(row['place_name'], row['state_fips'])
-
-            if geo:
-                nominatim_count += 1
-                cache[cache_key] = geo
-            else:
-                # Fallback
-                geo = geocode_fallback(row['place_name'], row['state_fips'], idx, len(df))
-                fallback_count += 1
-                cache[cache_key] = geo
-
-            # Rate limiting
-            if (idx + 1) % 100 == 0:
-                print(f"  Processed {idx + 1:,} places...")
-                if nominatim_count > 0:
-                    time.sleep(NOMINATIM_DELAY)
-
-        # Add to result
-        geocoded_row = row.to_dict()
-        geocoded_row.update(geo)
-        geocoded.append(geocoded_row)
-
-    # Save cache
-    save_geocode_cache(cache)
-
-    # Create dataframe
-    geocoded_df = pd.DataFrame(geocoded)
+    # Misses and failures get the fallback position
+    missing = geo['latitude'].isna()
+    for idx in geo.index[missing]:
+        fallback = geocode_fallback(df.at[idx, 'place_name'], df.at[idx, 'state_fips'],
+                                    idx, len(df), centroids)
+        for col, value in fallback.items():
+            geo.at[idx, col] = value
+
+    geocoded_df = pd.concat([df, geo], axis=1)
 
     print(f"\n[OK] Geocoded {len(geocoded_df):,} places")
-    print(f"  - From Nominatim: {nominatim_count:,}")
+    print(f"  - From Gazetteer: {gazetteer_count:,}")
+    print(f"  - From Nominatim: {nominatim_count:,} ({stats['found']:,} lookups)")
     print(f"  - From cache: {cache_count:,}")
-    print(f"  - Using fallback: {fallback_count:,}")
+    print(f"  - Using fallback: {int(missing.sum()):,}")
+    if stats['failed']:
+        print(f"  - Failed (will retry next run): {stats['failed']:,}")
+    if not USE_NOMINATIM and missing.any():
+        print(f"[INFO] Re-run with --nominatim to look up fallback places online")
 
     return geocoded_df
 
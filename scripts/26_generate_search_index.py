@@ -2,7 +2,13 @@
 """
 Generate places.json search index from place_metrics_comprehensive.csv
 
-This creates a lightweight JSON file suitable for client-side search with Fuse.js.
+This creates a lightweight JSON file suitable for client-side search with Fuse.js,
+plus the compact binary index (search_index.py) with pre-compressed variants:
+
+    app/public/data/places.json
+    app/public/data/search/places.idx.bin(.gz, .br when brotli is installed)
+    app/public/data/search/manifest.json + shards/{hot,state-XX}.<hash>.bin
+
 Run this after Script 22 (build_place_metrics.py) completes.
 
 Usage:
@@ -14,10 +20,14 @@ import json
 import os
 from pathlib import Path
 
+from search_index import write_index, write_shards
+
 # Configuration
 INPUT_FILE = 'data/outputs/place_metrics_comprehensive.csv'
-OUTPUT_DIR = 'public/data'
+OUTPUT_DIR = 'app/public/data'  # served by the Next app as /data/...
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, 'places.json')
+INDEX_FILE = os.path.join(OUTPUT_DIR, 'search', 'places.idx.bin')
+SHARD_DIR = os.path.join(OUTPUT_DIR, 'search')
 
 # Columns to include in search index
 SEARCH_COLUMNS = [
@@ -83,6 +93,17 @@ def main():
     print("  - File size: {:.1f} MB".format(file_size_mb))
     print("  - Location: {}".format(OUTPUT_FILE))
 
+    # Compact binary index
+    print("\nWriting {}".format(INDEX_FILE))
+    sizes = write_index(places, INDEX_FILE)
+    for name, size in sizes.items():
+        print("  - {}: {:,.0f} KB".format(name, size / 1024))
+
+    # Hot + per-state shards for incremental loading
+    manifest = write_shards(places, SHARD_DIR)
+    print("\n[OK] Wrote {} search shards to {}".format(len(manifest['states']) + 1, SHARD_DIR))
+    print("  - Hot shard: {:,} places, {:,.0f} KB".format(manifest['hot']['places'], manifest['hot']['bytes'] / 1024))
+
     return True
 
 if __name__ == '__main__':
@@ -19,6 +19,9 @@ import json
 from pathlib import Path
 from datetime import datetime
 import warnings
+
+from perf import instrument
+
 warnings.filterwarnings('ignore')
 
 # Configuration
@@ -37,6 +40,7 @@ RANDOM_SEED = 42
 np.random.seed(RANDOM_SEED)
 
 
+@instrument()
 def load_reform_data():
     """Load the reform adoption database."""
     reforms_path = RAW_DIR / "city_reforms_expanded.csv"
@@ -58,16 +62,17 @@ def load_reform_data():
     return df
 
 
-def generate_synthetic_permits(reforms_df, n_places=2000):
+@instrument()
+def generate_synthetic_permits(reforms_df, n_places=2000, years=range(2015, 2025)):
     """
     Generate synthetic place-level permit data for analysis.
 
-    Creates permit data for:
+    Creates permit data for each of `years` (2015-2024 by default) for:
     - All reform cities in the database
-    - Additional non-reform cities for control groups
+    - Additional non-reform cities for control groups (up to n_places in total)
     """
 
-    years = list(range(2015, 2025))  # 2015-2024
+    years = list(years)
 
     # Get unique reform places - convert FIPS to string for consistency
     reform_places = reforms_df[['place_fips', 'city_name', 'state_fips',
@@ -98,13 +103,15 @@ def generate_synthetic_permits(reforms_df, n_places=2000):
 
     # Generate permit data
     permit_records = []
+    no_reforms = reforms_df.iloc[:0]
+    reforms_by_place = {fips: group for fips, group in reforms_df.groupby(reforms_df['place_fips'].astype(str))}
 
     for _, place in all_places.iterrows():
         place_fips = place['place_fips']
         wrluri = place['baseline_wrluri']
 
         # Check if this place has a reform - convert to string for matching
-        place_reforms = reforms_df[reforms_df['place_fips'].astype(str) == str(place_fips)]
+        place_reforms = reforms_by_place.get(str(place_fips), no_reforms)
 
         # Base permit level (inversely related to regulatory restrictiveness)
         base_permits = int(np.random.lognormal(6, 1) * (2.5 - wrluri) / 1.5)
@@ -162,6 +169,7 @@ def generate_synthetic_permits(reforms_df, n_places=2000):
     return permits_df
 
 
+@instrument()
 def match_control_group(treated_places, all_places, permits_df, adoption_year):
     """
     Match control group to treatment group based on pre-treatment characteristics.
@@ -380,6 +388,7 @@ def compute_did_effect(treated_places, control_places, permits_df, adoption_year
     }
 
 
+@instrument()
 def bootstrap_confidence_interval(treated_places, control_places, permits_df,
                                    adoption_year, n_bootstrap=500):
     """
@@ -471,6 +480,7 @@ def interpret_result(did_effect, p_value, parallel_trends_pval):
     return interpretation
 
 
+@instrument()
 def analyze_reform_type(reform_type, reforms_df, permits_df):
     """
     Analyze DiD effects for a specific reform type across all adoption years.
@@ -10,7 +10,7 @@ Usage:
 
 Inputs:
     - data/raw/city_reforms_expanded.csv (reform dates and details)
-    - data/raw/census_bps_place_all_years.csv (permit data)
+    - data/raw/census_bps_place_all_years.csv (permit data, via permit_store.py)
 
 Output:
     - data/outputs/scm_analysis_results.json (SCM results for all reformed cities)
@@ -25,6 +25,9 @@ import sys
 import os
 from datetime import datetime
 
+from perf import instrument
+from permit_store import PermitTable, load_table
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -39,6 +42,7 @@ MIN_PRE_YEARS = 3  # Minimum pre-treatment years required
 MIN_DONORS = 5  # Minimum donor cities required
 
 
+@instrument()
 def load_data():
     """Load reform and permit datasets."""
     logger.info("Loading datasets...")
@@ -56,17 +60,15 @@ def load_data():
         sys.exit(1)
 
     # Check for permit data
-    permits_path = 'data/raw/census_bps_place_all_years.csv'
-    if not os.path.exists(permits_path):
+    try:
+        permits = load_table('place')
+        logger.info(f"✓ Loaded {len(permits)} permit records")
+    except FileNotFoundError:
         logger.warning("Permit data not found, generating synthetic data for demonstration")
-        permits_df = generate_synthetic_permits(reforms_df)
-    else:
-        try:
-            permits_df = pd.read_csv(permits_path)
-            logger.info(f"✓ Loaded {len(permits_df)} permit records")
-        except Exception as e:
-            logger.error(f"ERROR loading permits: {e}")
-            permits_df = generate_synthetic_permits(reforms_df)
+        permits = PermitTable.from_frame(generate_synthetic_permits(reforms_df), 'place')
+    except Exception as e:
+        logger.error(f"ERROR loading permits: {e}")
+        permits = PermitTable.from_frame(generate_synthetic_permits(reforms_df), 'place')
 
     # Parse dates and standardize FIPS
     reforms_df['effective_date'] = pd.to_datetime(reforms_df['effective_date'])
@@ -75,14 +77,11 @@ def load_data():
     if 'place_fips' in reforms_df.columns:
         reforms_df['place_fips'] = reforms_df['place_fips'].astype(str).str.zfill(7)
 
-    if 'place_fips' in permits_df.columns:
-        permits_df['place_fips'] = permits_df['place_fips'].astype(str).str.zfill(7)
-
-    return reforms_df, permits_df
+    return reforms_df, permits
 
 
-def generate_synthetic_permits(reforms_df):
-    """Generate synthetic permit data for demonstration."""
+def generate_synthetic_permits(reforms_df, n_controls=200, years=range(2015, 2025)):
+    """Generate synthetic permit data for demonstration: the reform cities plus n_controls control cities."""
     logger.info("Generating synthetic permit data...")
 
     records = []
@@ -94,14 +93,15 @@ def generate_synthetic_permits(reforms_df):
         cities = [f"{i:07d}" for i in range(1, 101)]
 
     # Generate base control cities
-    all_cities = list(cities) + [f"{1000000 + i:07d}" for i in range(200)]
+    all_cities = list(cities) + [f"{1000000 + i:07d}" for i in range(n_controls)]
+    reformed = set(reforms_df.get('place_fips', []))
 
     for city_fips in all_cities:
         base_permits = np.random.randint(50, 500)
         trend = np.random.uniform(-0.02, 0.05)
 
         # Check if city has reform
-        is_reformed = city_fips in list(reforms_df.get('place_fips', []))
+        is_reformed = city_fips in reformed
         reform_year = None
         if is_reformed and 'place_fips' in reforms_df.columns:
             match = reforms_df[reforms_df['place_fips'] == city_fips]
@@ -109,7 +109,7 @@ def generate_synthetic_permits(reforms_df):
                 eff_date = pd.to_datetime(match.iloc[0]['effective_date'])
                 reform_year = eff_date.year
 
-        for year in range(2015, 2025):
+        for year in years:
             permits = base_permits * (1 + trend) ** (year - 2015)
 
             # Add reform effect
@@ -132,24 +132,20 @@ def generate_synthetic_permits(reforms_df):
     return pd.DataFrame(records)
 
 
-def get_city_permits(permits_df, place_fips, start_year, end_year):
+def get_city_permits(permits, place_fips, start_year, end_year):
     """Get annual permits for a city over a period."""
-    mask = (
-        (permits_df['place_fips'] == place_fips) &
-        (permits_df['year'] >= start_year) &
-        (permits_df['year'] <= end_year)
-    )
-    data = permits_df[mask].sort_values('year')
+    data = permits.range(place_fips, start_year, end_year)
 
     if 'total_permits' in data.columns:
-        return dict(zip(data['year'], data['total_permits']))
+        return dict(zip(data['year'].tolist(), data['total_permits'].tolist()))
     else:
         # Try to compute from components
-        data['total'] = data.get('single_family', 0) + data.get('multi_family', 0)
-        return dict(zip(data['year'], data['total']))
+        total = data.get('single_family', 0) + data.get('multi_family', 0)
+        return dict(zip(data['year'].tolist(), total.tolist()))
 
 
-def identify_donor_pool(reforms_df, permits_df, treated_fips, reform_type=None):
+@instrument()
+def identify_donor_pool(reforms_df, permits, treated_fips, reform_type=None):
     """
     Identify potential donor cities for synthetic control.
 
@@ -158,7 +154,7 @@ def identify_donor_pool(reforms_df, permits_df, treated_fips, reform_type=None):
     - Have complete permit data for the analysis period
     """
     # Get all cities with permit data
-    all_cities = permits_df['place_fips'].unique()
+    all_cities = permits.fips()
 
     # Get cities that adopted reforms
     reformed_cities = set(reforms_df['place_fips'].unique())
@@ -174,6 +170,7 @@ def identify_donor_pool(reforms_df, permits_df, treated_fips, reform_type=None):
     return donors
 
 
+@instrument()
 def optimize_scm_weights(treated_pre, donor_data_pre):
     """
     Optimize donor weights to match treated city's pre-treatment trajectory.
@@ -243,8 +240,9 @@ def compute_synthetic_permits(weights, donor_data, years):
     return synthetic
 
 
+@instrument()
 def analyze_single_city(treated_fips, city_name, reform_type, adoption_year,
-                        reforms_df, permits_df):
+                        reforms_df, permits):
     """
     Run SCM analysis for a single treated city.
     """
@@ -261,14 +259,14 @@ def analyze_single_city(treated_fips, city_name, reform_type, adoption_year,
     all_years = pre_years + post_years
 
     # Get treated city permits
-    treated_permits = get_city_permits(permits_df, treated_fips, pre_start, post_end)
+    treated_permits = get_city_permits(permits, treated_fips, pre_start, post_end)
 
     if len([y for y in pre_years if y in treated_permits]) < MIN_PRE_YEARS:
         logger.warning(f"  Insufficient pre-treatment data for {city_name}")
         return None
 
     # Get donor pool
-    donors = identify_donor_pool(reforms_df, permits_df, treated_fips, reform_type)
+    donors = identify_donor_pool(reforms_df, permits, treated_fips, reform_type)
 
     if len(donors) < MIN_DONORS:
         logger.warning(f"  Insufficient donor pool for {city_name}: {len(donors)} cities")
@@ -277,7 +275,7 @@ def analyze_single_city(treated_fips, city_name, reform_type, adoption_year,
     # Get donor data
     donor_data = {}
     for donor_fips in donors:
-        donor_permits = get_city_permits(permits_df, donor_fips, pre_start, post_end)
+        donor_permits = get_city_permits(permits, donor_fips, pre_start, post_end)
         # Require complete pre-treatment data
         if len([y for y in pre_years if y in donor_permits]) >= MIN_PRE_YEARS:
             donor_data[donor_fips] = donor_permits
@@ -376,7 +374,7 @@ def run_scm_analysis():
     logger.info("=" * 60)
 
     # Load data
-    reforms_df, permits_df = load_data()
+    reforms_df, permits = load_data()
 
     # Analyze each reformed city
     results = []
@@ -391,7 +389,7 @@ def run_scm_analysis():
             reform_type=row.get('reform_type', 'Unknown'),
             adoption_year=row['adoption_year'],
             reforms_df=reforms_df,
-            permits_df=permits_df
+            permits=permits
         )
 
         if result:
@@ -10,7 +10,7 @@ Usage:
 
 Inputs:
     - data/raw/city_reforms_expanded.csv (reform dates and details)
-    - data/raw/census_bps_place_all_years.csv (permit data)
+    - data/raw/census_bps_place_all_years.csv (permit data, via permit_store.py)
 
 Output:
     - data/outputs/event_study_results.json (event study results by reform type)
@@ -27,6 +27,9 @@ import os
 from datetime import datetime
 from scipy import stats
 
+from perf import instrument
+from permit_store import PermitTable, load_table
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -40,6 +43,7 @@ MIN_CITIES_PER_REFORM = 3  # Minimum cities for event study
 OMITTED_PERIOD = -1  # Reference period (year before adoption)
 
 
+@instrument()
 def load_data():
     """Load reform and permit datasets."""
     logger.info("Loading datasets...")
@@ -57,17 +61,15 @@ def load_data():
         sys.exit(1)
 
     # Check for permit data
-    permits_path = 'data/raw/census_bps_place_all_years.csv'
-    if not os.path.exists(permits_path):
+    try:
+        permits = load_table('place')
+        logger.info(f"✓ Loaded {len(permits)} permit records")
+    except FileNotFoundError:
         logger.warning("Permit data not found, generating synthetic data")
-        permits_df = generate_synthetic_permits(reforms_df)
-    else:
-        try:
-            permits_df = pd.read_csv(permits_path)
-            logger.info(f"✓ Loaded {len(permits_df)} permit records")
-        except Exception as e:
-            logger.error(f"ERROR loading permits: {e}")
-            permits_df = generate_synthetic_permits(reforms_df)
+        permits = PermitTable.from_frame(generate_synthetic_permits(reforms_df), 'place')
+    except Exception as e:
+        logger.error(f"ERROR loading permits: {e}")
+        permits = PermitTable.from_frame(generate_synthetic_permits(reforms_df), 'place')
 
     # Parse dates
     reforms_df['effective_date'] = pd.to_datetime(reforms_df['effective_date'])
@@ -76,14 +78,12 @@ def load_data():
     # Standardize FIPS
     if 'place_fips' in reforms_df.columns:
         reforms_df['place_fips'] = reforms_df['place_fips'].astype(str).str.zfill(7)
-    if 'place_fips' in permits_df.columns:
-        permits_df['place_fips'] = permits_df['place_fips'].astype(str).str.zfill(7)
 
-    return reforms_df, permits_df
+    return reforms_df, permits
 
 
-def generate_synthetic_permits(reforms_df):
-    """Generate synthetic permit data for demonstration."""
+def generate_synthetic_permits(reforms_df, n_controls=200, years=range(2010, 2025)):
+    """Generate synthetic permit data for demonstration: the reform cities plus n_controls control cities."""
     logger.info("Generating synthetic permit data...")
 
     records = []
@@ -95,14 +95,15 @@ def generate_synthetic_permits(reforms_df):
         cities = [f"{i:07d}" for i in range(1, 101)]
 
     # Add control cities
-    all_cities = list(cities) + [f"{1000000 + i:07d}" for i in range(200)]
+    all_cities = list(cities) + [f"{1000000 + i:07d}" for i in range(n_controls)]
+    reformed = set(reforms_df.get('place_fips', []))
 
     for city_fips in all_cities:
         base_permits = np.random.randint(50, 500)
         trend = np.random.uniform(-0.02, 0.05)
 
         # Check if city has reform
-        is_reformed = city_fips in list(reforms_df.get('place_fips', []))
+        is_reformed = city_fips in reformed
         reform_year = None
         if is_reformed and 'place_fips' in reforms_df.columns:
             match = reforms_df[reforms_df['place_fips'] == city_fips]
@@ -110,7 +111,7 @@ def generate_synthetic_permits(reforms_df):
                 eff_date = pd.to_datetime(match.iloc[0]['effective_date'])
                 reform_year = eff_date.year
 
-        for year in range(2010, 2025):
+        for year in years:
             permits = base_permits * (1 + trend) ** (year - 2015)
 
             # Add reform effect with gradual ramp-up
@@ -134,7 +135,8 @@ def generate_synthetic_permits(reforms_df):
     return pd.DataFrame(records)
 
 
-def build_event_study_panel(reforms_df, permits_df, reform_type=None):
+@instrument()
+def build_event_study_panel(reforms_df, permit_table, reform_type=None):
     """
     Build panel data for event study regression.
 
@@ -173,16 +175,14 @@ def build_event_study_panel(reforms_df, permits_df, reform_type=None):
                 continue
 
             # Get permits for this city-year
-            mask = (permits_df['place_fips'] == city_fips) & (permits_df['year'] == year)
-            city_year_data = permits_df[mask]
+            city_year = permit_table.lookup(city_fips, year)
 
-            if len(city_year_data) == 0:
+            if city_year is None:
                 continue
 
-            permits = city_year_data.iloc[0].get('total_permits', 0)
+            permits = city_year.get('total_permits', 0)
             if permits == 0:
-                permits = city_year_data.iloc[0].get('single_family', 0) + \
-                          city_year_data.iloc[0].get('multi_family', 0)
+                permits = city_year.get('single_family', 0) + city_year.get('multi_family', 0)
 
             time_to_event = year - adoption_year
 
@@ -206,6 +206,7 @@ def build_event_study_panel(reforms_df, permits_df, reform_type=None):
     return df
 
 
+@instrument()
 def run_event_study_regression(panel_df):
     """
     Run event study regression with fixed effects.
@@ -387,7 +388,7 @@ def run_event_study_analysis():
     logger.info("=" * 60)
 
     # Load data
-    reforms_df, permits_df = load_data()
+    reforms_df, permits = load_data()
 
     # Get unique reform types
     reform_types = reforms_df['reform_type'].unique()
@@ -400,7 +401,7 @@ def run_event_study_analysis():
         logger.info(f"\nAnalyzing: {reform_type}")
 
         # Build panel
-        panel_df = build_event_study_panel(reforms_df, permits_df, reform_type)
+        panel_df = build_event_study_panel(reforms_df, permits, reform_type)
 
         if panel_df is None:
             logger.warning(f"  Skipping {reform_type} - insufficient data")
@@ -443,7 +444,7 @@ def run_event_study_analysis():
 
     # Also run pooled analysis (all reforms)
     logger.info("\nAnalyzing: All reforms (pooled)")
-    panel_df = build_event_study_panel(reforms_df, permits_df, reform_type=None)
+    panel_df = build_event_study_panel(reforms_df, permits, reform_type=None)
 
     if panel_df is not None:
         regression_result = run_event_study_regression(panel_df)
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Publish one pre-serialized JSON document per place for the API routes.
+
+Runs after the place metrics (22), DiD (31), SCM (32) and event study (33)
+stages. Each place gets a compact document with everything the place routes
+serve, so a request is a single small file read instead of a full CSV parse:
+
+    {
+      "place_fips": "0644000", "place_name": "Los Angeles city", "state_fips": "06",
+      "permits": {"year": [...], "sf_units": [...], "mf_units": [...], "total_units": [...]},
+      "metrics": {...},          # row of place_metrics_comprehensive.csv
+      "reforms": [...],          # rows of city_reforms_expanded.csv
+      "scm": [...],              # entries of scm_analysis_results.json for this place
+      "did": [...],              # DiD cohorts (reform type, adoption year) it belongs to
+      "event_study": [...]       # event studies for its reform types
+    }
+
+Inputs (all optional except that at least one must exist):
+  - data/raw/census_bps_place_annual_permits.csv (via permit_store.py)
+  - data/outputs/place_metrics_comprehensive.csv
+  - data/raw/city_reforms_expanded.csv (or city_reforms.csv)
+  - data/outputs/did_analysis_results.json
+  - data/outputs/scm_analysis_results.json
+  - data/outputs/event_study_results.json
+
+Outputs:
+  - data/outputs/place_shards/{state_fips}/{place_fips}.json
+  - data/outputs/place_shards/manifest.json (path, digest and size per place)
+
+Incremental mode:
+  Every place has a digest of its inputs (permit rows, metrics row and the
+  analysis entries that mention it). Only places whose digest differs from
+  the manifest are re-serialized; shards of places that disappeared are
+  removed. Pass --full to rewrite every shard.
+
+Usage:
+    python scripts/34_publish_place_shards.py [--full]
+"""
+
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from perf import instrument
+from permit_store import decode_fips, load_table
+
+SHARD_DIR = Path("data/outputs/place_shards")
+MANIFEST_FILE = SHARD_DIR / "manifest.json"
+METRICS_FILE = Path("data/outputs/place_metrics_comprehensive.csv")
+REFORMS_FILES = [Path("data/raw/city_reforms_expanded.csv"), Path("data/raw/city_reforms.csv")]
+DID_FILE = Path("data/outputs/did_analysis_results.json")
+SCM_FILE = Path("data/outputs/scm_analysis_results.json")
+EVENT_STUDY_FILE = Path("data/outputs/event_study_results.json")
+
+MANIFEST_VERSION = 1
+PERMIT_COLUMNS = ['year', 'sf_units', 'mf_units', 'total_units']
+REFORM_COLUMNS = ['reform_name', 'reform_type', 'effective_date', 'adoption_year', 'baseline_wrluri']
+
+
+def read_json(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def to_native(value):
+    """NumPy scalars and NaN -> JSON-serializable Python values."""
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return None if np.isnan(value) else float(value)
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return value
+
+
+@instrument()
+def load_permits() -> Optional[pd.DataFrame]:
+    """Place-year permit rows with integer place codes, sorted by (place, year)."""
+    try:
+        table = load_table('place_bulk')
+    except FileNotFoundError:
+        print(f"[WARN] Place permit table not found - shards will have no permit history")
+        return None
+
+    columns = [col for col in PERMIT_COLUMNS if col in table.data.columns]
+    permits = table.data[['place_fips'] + columns]
+    return permits[permits['place_fips'] >= 0]
+
+
+@instrument()
+def load_metrics() -> Optional[pd.DataFrame]:
+    """Metrics rows indexed by 7-digit place FIPS (places without a FIPS are skipped)."""
+    if not METRICS_FILE.exists():
+        print(f"[WARN] {METRICS_FILE} not found - shards will have no metrics")
+        return None
+
+    metrics = pd.read_csv(METRICS_FILE, dtype={'place_fips': str, 'state_fips': str})
+    metrics = metrics.dropna(subset=['place_fips'])
+    metrics['place_fips'] = metrics['place_fips'].str.zfill(7)
+    return metrics.drop_duplicates('place_fips').set_index('place_fips')
+
+
+def load_reforms() -> Optional[pd.DataFrame]:
+    path = next((p for p in REFORMS_FILES if p.exists()), None)
+    if path is None:
+        print(f"[WARN] Reform catalog not found - shards will have no reforms")
+        return None
+
+    reforms = pd.read_csv(path, dtype={'place_fips': str, 'state_fips': str})
+    reforms['place_fips'] = reforms['place_fips'].str.zfill(7)
+    reforms['adoption_year'] = pd.to_datetime(reforms['effective_date']).dt.year
+    return reforms
+
+
+@instrument()
+def collect_analyses(reforms: Optional[pd.DataFrame]) -> Dict[str, Dict[str, List]]:
+    """
+    Reform, SCM, DiD and event-study entries per place FIPS.
+
+    SCM results are per treated city. DiD results are per (reform type,
+    adoption year) cohort and event studies per reform type, so a reformed
+    place gets the cohorts and studies of each of its reforms.
+    """
+    analyses: Dict[str, Dict[str, List]] = {}
+
+    def entry(fips: str) -> Dict[str, List]:
+        return analyses.setdefault(fips, {'reforms': [], 'scm': [], 'did': [], 'event_study': []})
+
+    did_by_cohort: Dict[tuple, List] = {}
+    did = read_json(DID_FILE)
+    for result in (did or {}).get('all_results', []):
+        did_by_cohort.setdefault((result['reform_type'], result['adoption_year']), []).append(result)
+
+    studies_by_type: Dict[str, List] = {}
+    event_study = read_json(EVENT_STUDY_FILE)
+    for result in (event_study or {}).get('event_studies', []):
+        studies_by_type.setdefault(result['reform_type'], []).append(result)
+
+    if reforms is not None:
+        columns = [col for col in REFORM_COLUMNS if col in reforms.columns]
+        for fips, group in reforms.groupby('place_fips', sort=False):
+            place = entry(fips)
+            for reform in group[columns].to_dict('records'):
+                reform = {k: to_native(v) for k, v in reform.items()}
+                place['reforms'].append(reform)
+                place['did'].extend(did_by_cohort.get((reform['reform_type'], reform['adoption_year']), []))
+                for study in studies_by_type.get(reform['reform_type'], []):
+                    if study not in place['event_study']:
+                        place['event_study'].append(study)
+
+    scm = read_json(SCM_FILE)
+    for result in (scm or {}).get('scm_analyses', []):
+        entry(str(result['treated_fips']).zfill(7))['scm'].append(result)
+
+    return analyses
+
+
+@instrument()
+def compute_digests(permits: Optional[pd.DataFrame], metrics: Optional[pd.DataFrame],
+                    analyses: Dict[str, Dict[str, List]]) -> pd.Series:
+    """
+    Input digest per place FIPS.
+
+    Permit rows are hashed row-wise and summed per place (wrapping uint64, as
+    in 22_build_place_metrics.py); the metrics row is hashed as a whole; the
+    analysis entries are hashed from their canonical JSON.
+    """
+    parts = []
+
+    if permits is not None and len(permits):
+        row_hashes = pd.util.hash_pandas_object(permits, index=False)
+        permit_hash = row_hashes.groupby(permits['place_fips'].to_numpy()).sum()
+        permit_hash.index = decode_fips(permit_hash.index.to_numpy(), 7).to_numpy()
+        parts.append(permit_hash.rename('permits'))
+
+    if metrics is not None and len(metrics):
+        parts.append(pd.util.hash_pandas_object(metrics, index=True).rename('metrics'))
+
+    if analyses:
+        parts.append(pd.Series({
+            fips: hashlib.sha1(json.dumps(entries, sort_keys=True, default=str).encode()).hexdigest()
+            for fips, entries in analyses.items()
+        }, name='analyses'))
+
+    if not parts:
+        return pd.Series(dtype=str)
+
+    # Stringify before aligning so uint64 hashes are not widened to float
+    combined = pd.concat([part.astype(str) for part in parts], axis=1).fillna('')
+    combined = combined[combined.index.str.fullmatch(r'\d{7}')]
+    keys = combined.agg('|'.join, axis=1)
+    return keys.map(lambda key: hashlib.sha1(key.encode()).hexdigest()[:16])
+
+
+def build_document(fips: str, permits: Optional[pd.DataFrame], permit_key: Optional[np.ndarray],
+                   metrics: Optional[pd.DataFrame], analyses: Dict[str, Dict[str, List]]) -> Dict:
+    """The shard document for one place."""
+    document = {'place_fips': fips, 'place_name': None, 'state_fips': fips[:2]}
+
+    if permits is not None:
+        lo, hi = np.searchsorted(permit_key, [int(fips), int(fips) + 1])
+        rows = permits.iloc[lo:hi]
+        document['permits'] = {col: rows[col].astype(int).tolist()
+                               for col in PERMIT_COLUMNS if col in rows.columns}
+    else:
+        document['permits'] = {}
+
+    if metrics is not None and fips in metrics.index:
+        row = metrics.loc[fips]
+        document['metrics'] = {col: to_native(value) for col, value in row.items()}
+        document['place_name'] = document['metrics'].get('place_name')
+    else:
+        document['metrics'] = None
+
+    entries = analyses.get(fips, {'reforms': [], 'scm': [], 'did': [], 'event_study': []})
+    document.update(entries)
+    if document['place_name'] is None and entries['scm']:
+        document['place_name'] = entries['scm'][0].get('treated_city')
+
+    return document
+
+
+def shard_path(fips: str) -> str:
+    return f"{fips[:2]}/{fips}.json"
+
+
+def write_shard(path: Path, document: Dict) -> int:
+    """Write one shard atomically; returns its size in bytes."""
+    data = json.dumps(document, separators=(',', ':'), default=str).encode('utf-8')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    tmp_path.replace(path)
+    return len(data)
+
+
+def load_manifest() -> Dict:
+    manifest = read_json(MANIFEST_FILE)
+    if manifest is None or manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('places', {})
+
+
+@instrument()
+def publish_shards(digests: pd.Series, permits: Optional[pd.DataFrame], metrics: Optional[pd.DataFrame],
+                   analyses: Dict[str, Dict[str, List]], previous: Dict) -> Dict:
+    """Write shards for new or changed places, remove stale ones; returns the manifest entries."""
+    permit_key = permits['place_fips'].to_numpy(np.int64) if permits is not None else None
+    places = {}
+    written = 0
+
+    for fips, digest in digests.items():
+        old = previous.get(fips)
+        if old is not None and old['digest'] == digest and (SHARD_DIR / old['path']).exists():
+            places[fips] = old
+            continue
+
+        document = build_document(fips, permits, permit_key, metrics, analyses)
+        path = shard_path(fips)
+        size = write_shard(SHARD_DIR / path, document)
+        places[fips] = {'path': path, 'digest': digest, 'bytes': size, 'name': document['place_name']}
+        written += 1
+
+    removed = 0
+    for fips, old in previous.items():
+        if fips not in places:
+            (SHARD_DIR / old['path']).unlink(missing_ok=True)
+            removed += 1
+
+    print(f"[OK] Wrote {written:,} shards, kept {len(places) - written:,}, removed {removed:,}")
+    return places
+
+
+def save_manifest(places: Dict):
+    states = pd.Series([fips[:2] for fips in places]).value_counts().sort_index()
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'generated_at': datetime.now().isoformat(),
+        'n_places': len(places),
+        'total_bytes': sum(entry['bytes'] for entry in places.values()),
+        'states': {state: int(count) for state, count in states.items()},
+        'places': dict(sorted(places.items())),
+    }
+    tmp_path = MANIFEST_FILE.with_name(f"{MANIFEST_FILE.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+    tmp_path.replace(MANIFEST_FILE)
+    print(f"[OK] Saved manifest: {MANIFEST_FILE}")
+
+
+def main():
+    """Main execution."""
+    print("\n" + "="*70)
+    print("PLACE SHARD PUBLISHING")
+    print("="*70)
+
+    SHARD_DIR.mkdir(parents=True, exist_ok=True)
+
+    permits = load_permits()
+    metrics = load_metrics()
+    reforms = load_reforms()
+    analyses = collect_analyses(reforms)
+
+    if permits is None and metrics is None and not analyses:
+        print(f"\n[FAIL] No place inputs found")
+        print(f"[INFO] First run scripts 22, 31, 32 and 33")
+        return 1
+
+    digests = compute_digests(permits, metrics, analyses)
+    previous = {} if '--full' in sys.argv else load_manifest()
+
+    print(f"\n[INFO] Publishing {len(digests):,} places...")
+    places = publish_shards(digests, permits, metrics, analyses, previous)
+    save_manifest(places)
+
+    total = sum(entry['bytes'] for entry in places.values())
+    print(f"\nShards: {len(places):,} places, {total / 1024:,.0f} KB total, "
+          f"{total / max(len(places), 1):,.0f} bytes average")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
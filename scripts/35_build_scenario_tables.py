@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Precompute reform-calculator lookup tables from the v3 reform impact model.
+
+The reform calculator asks for a prediction given a reform type, the city's
+WRLURI and its size. Both inputs are bucketed, so every answer the calculator
+can give is one row of a small table built here:
+
+    (reform_type, WRLURI bucket, size bucket) -> prediction, 10-90% spread
+                                                 across trees, top-k comparable
+                                                 cities by similarity
+
+All grid cells are scored in one batch by the model server (reform_model.py).
+The prediction is the forest mean, the same number model.predict returns.
+tree_spread is the 10th-90th percentile of the individual tree predictions:
+it shows how much the trees disagree, not a prediction interval for a
+city's outcome, and the mean can fall outside it when the trees are skewed.
+
+City size is not a model feature (the v3 features are reform type, WRLURI
+and reform year), so the size bucket only changes which comparable cities
+are listed: the four size cells of a (reform type, WRLURI bucket) pair share
+the same prediction and spread.
+Comparable cities adopted the same reform type; similarity is a Gaussian
+kernel on the WRLURI difference and the log difference in 2024 permits
+between the city and the cell's representative values.
+
+Inputs:
+  - data/outputs/reform_impact_model_v3.pkl (train_model_v3.py)
+  - data/raw/city_reforms_expanded.csv
+  - data/outputs/place_metrics_comprehensive.csv (optional: city sizes)
+
+Output:
+  - data/outputs/scenario_tables.json, entries keyed
+    "{reform_type}|{wrluri_bucket}|{size_bucket}" with integer bucket indexes
+
+Usage:
+    python scripts/35_build_scenario_tables.py
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from perf import instrument
+from reform_model import FEATURES, INTERVAL, MODEL_FILE, REFORM_TYPE_CODES, load_server
+
+REFORMS_FILE = Path('data/raw/city_reforms_expanded.csv')
+METRICS_FILE = Path('data/outputs/place_metrics_comprehensive.csv')
+OUTPUT_FILE = Path('data/outputs/scenario_tables.json')
+
+# Bucket i covers [EDGES[i-1], EDGES[i]); each bucket is scored at its representative value
+WRLURI_EDGES = [0.5, 1.0, 1.5, 2.0]
+WRLURI_VALUES = [0.25, 0.75, 1.25, 1.75, 2.25]
+SIZE_EDGES = [100, 500, 2000]  # 2024 permitted units
+SIZE_LABELS = ['small', 'medium', 'large', 'major']
+SIZE_VALUES = [50, 225, 1000, 4000]
+
+TOP_K = 6  # one spare so a client can drop the requesting city and still show five
+WRLURI_SCALE = 0.25  # kernel widths for the similarity score
+SIZE_SCALE = 1.0     # in log units
+MISSING_SIZE_DISTANCE = 1.0  # cities without metrics count as one kernel width off
+
+
+def load_reform_cities() -> pd.DataFrame:
+    """One row per (reform type, city) with WRLURI and, when known, 2024 permits."""
+    reforms = pd.read_csv(REFORMS_FILE, dtype={'place_fips': str})
+    reforms['place_fips'] = reforms['place_fips'].str.zfill(7)
+    reforms['reform_year'] = pd.to_datetime(reforms['effective_date'], errors='coerce').dt.year
+    cities = reforms.drop_duplicates(['reform_type', 'place_fips']).reset_index(drop=True)
+
+    if METRICS_FILE.exists():
+        metrics = pd.read_csv(METRICS_FILE, usecols=['place_fips', 'recent_units_2024'], dtype={'place_fips': str})
+        metrics['place_fips'] = metrics['place_fips'].str.zfill(7)
+        cities = cities.merge(metrics.drop_duplicates('place_fips'), on='place_fips', how='left')
+    else:
+        print(f"[WARN] {METRICS_FILE} not found; comparables are ranked by WRLURI only")
+        cities['recent_units_2024'] = np.nan
+
+    print(f"[OK] {len(cities)} reform cities, {cities['recent_units_2024'].notna().sum()} with permit metrics")
+    return cities
+
+
+def build_grid(reference_year: int) -> pd.DataFrame:
+    """Every (reform type, WRLURI bucket, size bucket) cell with its model features."""
+    index = pd.MultiIndex.from_product(
+        [list(REFORM_TYPE_CODES), range(len(WRLURI_VALUES)), range(len(SIZE_VALUES))],
+        names=['reform_type', 'wrluri_bucket', 'size_bucket'])
+    grid = index.to_frame(index=False)
+    grid['reform_type_encoded'] = grid['reform_type'].map(REFORM_TYPE_CODES).astype(float)
+    grid['baseline_wrluri'] = np.asarray(WRLURI_VALUES)[grid['wrluri_bucket']]
+    grid['units'] = np.asarray(SIZE_VALUES, dtype=float)[grid['size_bucket']]  # comparables only
+    grid['reform_year'] = float(reference_year)
+    return grid
+
+
+@instrument()
+def top_comparables(grid: pd.DataFrame, cities: pd.DataFrame) -> Dict[int, list]:
+    """Top-k similar cities of the same reform type for every grid row."""
+    comparables = {}
+    for reform_type, cells in grid.groupby('reform_type', sort=False):
+        pool = cities[cities['reform_type'] == reform_type]
+        if pool.empty:
+            comparables.update({row: [] for row in cells.index})
+            continue
+
+        # (cells x cities) squared kernel distances
+        d_wrluri = (cells['baseline_wrluri'].to_numpy()[:, None] - pool['baseline_wrluri'].to_numpy()[None, :]) / WRLURI_SCALE
+        d_size = (np.log1p(cells['units'].to_numpy())[:, None] - np.log1p(pool['recent_units_2024'].to_numpy())[None, :]) / SIZE_SCALE
+        d_size = np.where(np.isnan(d_size), MISSING_SIZE_DISTANCE, d_size)
+        similarity = np.exp(-0.5 * (np.nan_to_num(d_wrluri, nan=np.inf) ** 2 + d_size ** 2))
+
+        k = min(TOP_K, len(pool))
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(similarity, top, axis=1), axis=1, kind='stable'), axis=1)
+
+        for row, order, scores in zip(cells.index, top, np.take_along_axis(similarity, top, axis=1)):
+            picked = pool.iloc[order]
+            comparables[row] = [
+                {
+                    'place_fips': city.place_fips,
+                    'city_name': city.city_name,
+                    'state_name': city.state_name,
+                    'baseline_wrluri': round(float(city.baseline_wrluri), 2),
+                    'recent_units_2024': None if pd.isna(city.recent_units_2024) else int(city.recent_units_2024),
+                    'similarity': round(float(score), 3),
+                }
+                for city, score in zip(picked.itertuples(index=False), scores)
+            ]
+    return comparables
+
+
+@instrument()
+def build_tables() -> Dict:
+    server = load_server(MODEL_FILE)
+    cities = load_reform_cities()
+    reference_year = int(cities['reform_year'].max())
+
+    grid = build_grid(reference_year)
+    scored = server.predict(grid[FEATURES])
+    comparables = top_comparables(grid, cities)
+
+    entries = {}
+    for row in grid.itertuples():
+        entries[f"{row.reform_type}|{row.wrluri_bucket}|{row.size_bucket}"] = {
+            'predicted_change': round(float(scored['prediction'][row.Index]), 2),
+            'tree_spread': [round(float(scored['lower'][row.Index]), 2), round(float(scored['upper'][row.Index]), 2)],
+            'comparables': comparables[row.Index],
+        }
+
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'model': {'file': str(MODEL_FILE), 'features': FEATURES, 'reference_year': reference_year,
+                  'spread_percentiles': list(INTERVAL), 'point_estimate': 'forest mean'},
+        'wrluri_edges': WRLURI_EDGES,
+        'size_edges': SIZE_EDGES,
+        'size_labels': SIZE_LABELS,
+        'reform_types': list(REFORM_TYPE_CODES),
+        'entries': entries,
+    }
+
+
+def main():
+    print("=" * 70)
+    print("Building scenario lookup tables")
+    print("=" * 70)
+
+    for path in (MODEL_FILE, REFORMS_FILE):
+        if not path.exists():
+            print(f"[X] Input file not found: {path}")
+            return False
+
+    tables = build_tables()
+    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = OUTPUT_FILE.with_suffix('.tmp')
+    tmp.write_text(json.dumps(tables, separators=(',', ':')))
+    os.replace(tmp, OUTPUT_FILE)
+
+    print(f"\n[OK] {len(tables['entries'])} cells written to {OUTPUT_FILE} "
+          f"({OUTPUT_FILE.stat().st_size / 1024:.1f} KB)")
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
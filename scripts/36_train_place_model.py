@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Train a place-scale reform impact model with histogram gradient boosting.
+
+The v3 model and script 10 fit RandomForest / GradientBoosting on a few
+hundred rows, with reform type label-encoded through REFORM_TYPE_CODES. This
+script trains on every place x year in the permit store (~20,000 places):
+
+- The feature matrix is float32 and is built directly from the typed
+  'place_bulk' table (permit_store.py). Lags come from key lookups on its
+  sorted (place, year) key, not a pandas groupby/shift.
+- reform_type (the reform in effect that year, or 'No reform') and state are
+  native categorical features of HistGradientBoostingRegressor. The model
+  splits on category subsets, so no hand-written code order is imposed.
+- Early stopping is always on. Boosting stops once the loss on an internal
+  validation split stops improving.
+
+Target: log1p(total units permitted) per place-year. Features: the two prior
+years' log units, the prior year's multi-family share, year, years since the
+reform, baseline WRLURI (reform_model.place_wrluri) and the two categoricals.
+The last HOLDOUT_YEARS years are held out for evaluation.
+
+The report compares this model with the current estimators (the v3
+RandomForest and script 10's GradientBoosting) on the same rows. Those
+estimators get float64 frames with label-encoded categoricals, as the
+existing scripts build them. Each fit runs in a fresh process with the
+kernel's peak-RSS counter reset just before it (Linux /proc/self/clear_refs),
+so the reported growth covers native allocations too (tree nodes,
+histograms). Elsewhere it is reported as null.
+
+Inputs:
+  - data/raw/census_bps_place_annual_permits.csv (via permit_store 'place_bulk')
+  - data/raw/city_reforms_expanded.csv
+
+Outputs:
+  - data/outputs/place_reform_model_hgb.pkl
+  - data/outputs/place_model_report.json
+
+Usage:
+    python scripts/36_train_place_model.py [--skip-baselines] [--max-rows N]
+"""
+
+import argparse
+import json
+import multiprocessing
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from perf import instrument
+from permit_store import GEO_SCALE, MISSING_GEO, decode_fips, load_table
+from reform_model import REFORMS_FILE, encode_reform_types, place_wrluri
+
+MODEL_FILE = Path('data/outputs/place_reform_model_hgb.pkl')
+REPORT_FILE = Path('data/outputs/place_model_report.json')
+
+RANDOM_STATE = 42
+HOLDOUT_YEARS = 2
+NO_REFORM = 'No reform'
+
+FEATURES = ['reform_type', 'state', 'year', 'years_since_reform', 'baseline_wrluri',
+            'log_units_lag1', 'log_units_lag2', 'mf_share_lag1']
+CATEGORICAL = ['reform_type', 'state']
+
+HGB_PARAMS = {
+    'max_iter': 500,
+    'learning_rate': 0.1,
+    'max_leaf_nodes': 31,
+    'min_samples_leaf': 40,
+    'l2_regularization': 1.0,
+    'early_stopping': True,
+    'validation_fraction': 0.1,
+    'n_iter_no_change': 20,
+    'random_state': RANDOM_STATE,
+}
+
+# The estimators the existing scripts use (train_model_v3.py, 10_build_predictive_model.py)
+BASELINES = {
+    'RandomForest (v3)': partial(RandomForestRegressor, n_estimators=100, max_depth=10, random_state=RANDOM_STATE),
+    'GradientBoosting (script 10)': partial(GradientBoostingRegressor, n_estimators=100, max_depth=3,
+                                            random_state=RANDOM_STATE),
+}
+
+
+def load_reforms() -> pd.DataFrame:
+    """Earliest reform per place: integer place code, reform type, reform year."""
+    reforms = pd.read_csv(REFORMS_FILE, dtype={'place_fips': str})
+    reforms['reform_year'] = pd.to_datetime(reforms['effective_date'], errors='coerce').dt.year
+    reforms['geo'] = pd.to_numeric(reforms['place_fips'], errors='coerce')
+    reforms = reforms.dropna(subset=['geo', 'reform_year']).sort_values('reform_year')
+    return reforms.drop_duplicates('geo')[['geo', 'reform_type', 'reform_year']].astype(
+        {'geo': np.int64, 'reform_year': np.int64})
+
+
+def lagged(table, values: np.ndarray, years_back: int) -> np.ndarray:
+    """values for the same place years_back years earlier (NaN when that year is missing)."""
+    target = table.key - years_back * 100
+    pos = np.minimum(np.searchsorted(table.key, target), len(table.key) - 1)
+    found = table.key[pos] == target
+    return np.where(found, values[pos], np.nan).astype(np.float32)
+
+
+@instrument()
+def build_matrix(table, reforms: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict]:
+    """
+    float32 feature matrix, log1p target and year per row from the place table.
+
+    Rows need a prior-year observation. Categorical columns hold category
+    indexes; returns the category labels alongside.
+    """
+    data = table.data
+    geo = data['place_fips'].to_numpy(np.int64)
+    year = data['year'].to_numpy(np.int64)
+    units = data['total_units'].to_numpy(np.float64)
+    log_units = np.log1p(np.clip(units, 0, None)).astype(np.float32)
+    mf_share = np.where(units > 0, data['mf_units'].to_numpy(np.float64) / np.maximum(units, 1), np.nan)
+
+    lag1 = lagged(table, log_units, 1)
+    keep = (geo != MISSING_GEO) & ~np.isnan(lag1)
+    rows = np.flatnonzero(keep)
+
+    # Reform in effect: joined on the integer place code
+    reform_index = pd.Index(reforms['geo'])
+    match = reform_index.get_indexer(geo[rows])
+    reform_year = np.where(match >= 0, reforms['reform_year'].to_numpy()[match], np.iinfo(np.int64).max)
+    active = year[rows] >= reform_year
+    reform_types = [NO_REFORM] + sorted(reforms['reform_type'].unique())
+    type_codes = pd.Categorical(reforms['reform_type'], categories=reform_types).codes
+    reform_code = np.where(active, type_codes[np.maximum(match, 0)], 0)
+
+    states = np.unique(data['state_fips'].to_numpy(np.int64)[rows])
+    state_code = np.searchsorted(states, data['state_fips'].to_numpy(np.int64)[rows])
+
+    # WRLURI per distinct place, broadcast back to rows
+    places, inverse = np.unique(geo[rows], return_inverse=True)
+    place_frame = pd.DataFrame({
+        'place_fips': decode_fips(places, 7).to_numpy(),
+        'state_fips': decode_fips(places // 100_000, 2).to_numpy(),
+    })
+    wrluri = place_wrluri(place_frame)['baseline_wrluri'].to_numpy(np.float32)[inverse]
+
+    X = np.empty((len(rows), len(FEATURES)), dtype=np.float32)
+    X[:, FEATURES.index('reform_type')] = reform_code
+    X[:, FEATURES.index('state')] = state_code
+    X[:, FEATURES.index('year')] = year[rows]
+    X[:, FEATURES.index('years_since_reform')] = np.where(active, year[rows] - reform_year, np.nan)
+    X[:, FEATURES.index('baseline_wrluri')] = wrluri
+    X[:, FEATURES.index('log_units_lag1')] = lag1[rows]
+    X[:, FEATURES.index('log_units_lag2')] = lagged(table, log_units, 2)[rows]
+    X[:, FEATURES.index('mf_share_lag1')] = lagged(table, mf_share, 1)[rows]
+
+    categories = {
+        'reform_type': reform_types,
+        'state': decode_fips(states, 2).tolist(),
+    }
+    return X, log_units[rows], year[rows], categories
+
+
+def legacy_frame(X: np.ndarray, categories: Dict) -> pd.DataFrame:
+    """The same rows the way the existing scripts feed models: float64, label-encoded, NaN filled."""
+    df = pd.DataFrame(X.astype(np.float64), columns=FEATURES)
+    reform_names = pd.Series(np.asarray(categories['reform_type'], dtype=object)[X[:, 0].astype(int)])
+    df['reform_type'] = np.where(reform_names == NO_REFORM, -1, encode_reform_types(reform_names))
+    df['state'] = pd.to_numeric(pd.Series(categories['state'])).to_numpy()[X[:, 1].astype(int)]
+    return df.fillna(-1)
+
+
+def reset_peak_rss() -> bool:
+    """Reset this process's RSS high-water mark to its current RSS (Linux only)."""
+    try:
+        Path('/proc/self/clear_refs').write_text('5')
+        return True
+    except OSError:
+        return False
+
+
+def proc_status_mb(field: str) -> float:
+    """VmRSS / VmHWM from /proc/self/status, in MB."""
+    for line in Path('/proc/self/status').read_text().splitlines():
+        if line.startswith(f"{field}:"):
+            return int(line.split()[1]) / 1024
+    raise KeyError(field)
+
+
+def new_model() -> HistGradientBoostingRegressor:
+    mask = np.isin(FEATURES, CATEGORICAL)
+    return HistGradientBoostingRegressor(categorical_features=mask, **HGB_PARAMS)
+
+
+def profile_fit(name: str, make_model, X_train, y_train, X_test, y_test) -> Dict:
+    """Fit and score one model, reporting time and peak RSS growth (run in a fresh process)."""
+    tracked = reset_peak_rss()
+    rss_start = proc_status_mb('VmRSS') if tracked else None
+    model = make_model()
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+    rss_growth = proc_status_mb('VmHWM') - rss_start if tracked else None
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_s = time.perf_counter() - start
+
+    X_nbytes = X_train.to_numpy().nbytes if hasattr(X_train, 'to_numpy') else X_train.nbytes
+    result = {
+        'model': name,
+        'input': f"{type(X_train).__name__} {X_train.dtypes.iloc[0] if hasattr(X_train, 'dtypes') else X_train.dtype}",
+        'train_rows': len(y_train),
+        'input_mb': round(X_nbytes / 2**20, 1),
+        'fit_s': round(fit_s, 2),
+        'predict_s': round(predict_s, 3),
+        'fit_rss_growth_mb': round(rss_growth, 1) if rss_growth is not None else None,
+        'model_mb': round(len(pickle.dumps(model)) / 2**20, 2),
+        'test_r2': round(float(r2_score(y_test, y_pred)), 4),
+        'test_rmse': round(float(np.sqrt(mean_squared_error(y_test, y_pred))), 4),
+    }
+    if hasattr(model, 'n_iter_'):
+        result['n_iter'] = int(model.n_iter_)
+    return result
+
+
+def run_isolated(*args) -> Dict:
+    """profile_fit in a fresh spawned process, so earlier fits' freed memory cannot be reused."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(profile_fit, *args).result()
+
+
+@instrument()
+def compare_models(X_train, y_train, X_test, y_test, categories: Dict) -> List[Dict]:
+    results = [run_isolated('HistGradientBoosting (native categoricals)', new_model,
+                            X_train, y_train, X_test, y_test)]
+    legacy_train, legacy_test = legacy_frame(X_train, categories), legacy_frame(X_test, categories)
+    for name, make_model in BASELINES.items():
+        print(f"  • fitting {name} on {len(y_train):,} rows...")
+        results.append(run_isolated(name, make_model, legacy_train, y_train.astype(np.float64),
+                                    legacy_test, y_test))
+    return results
+
+
+@instrument()
+def reform_effects(model, X: np.ndarray, categories: Dict) -> Dict:
+    """Mean predicted % change in permits from each reform, over place-years where it is in effect."""
+    effects = {}
+    reform_col = FEATURES.index('reform_type')
+    for code, name in enumerate(categories['reform_type']):
+        rows = X[:, reform_col] == code
+        if code == 0 or not rows.any():
+            continue
+        counterfactual = X[rows].copy()
+        counterfactual[:, reform_col] = 0
+        counterfactual[:, FEATURES.index('years_since_reform')] = np.nan
+        lift = np.expm1(model.predict(X[rows]) - model.predict(counterfactual))
+        effects[name] = {'place_years': int(rows.sum()), 'mean_pct_effect': round(float(lift.mean() * 100), 2)}
+    return effects
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--skip-baselines', action='store_true', help='train the new model only')
+    parser.add_argument('--max-rows', type=int, help='subsample training rows (seeded) before fitting')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Training place-scale reform model (histogram gradient boosting)")
+    print("=" * 70)
+
+    try:
+        table = load_table('place_bulk')
+    except FileNotFoundError as e:
+        print(f"[X] {e}")
+        return False
+    if not REFORMS_FILE.exists():
+        print(f"[X] Input file not found: {REFORMS_FILE}")
+        return False
+
+    X, y, year, categories = build_matrix(table, load_reforms())
+    holdout_start = int(year.max()) - HOLDOUT_YEARS + 1
+    test = year >= holdout_start
+    train_rows = np.flatnonzero(~test)
+    if args.max_rows and len(train_rows) > args.max_rows:
+        train_rows = np.sort(np.random.default_rng(RANDOM_STATE).choice(train_rows, args.max_rows, replace=False))
+    X_train, y_train, X_test, y_test = X[train_rows], y[train_rows], X[test], y[test]
+    n_places = len(np.unique(table.key // GEO_SCALE))
+    print(f"[OK] {len(X):,} place-years from {n_places:,} places; "
+          f"{len(y_train):,} train rows, {len(y_test):,} test rows ({holdout_start}+); "
+          f"X float32 {X.nbytes / 2**20:.1f} MB")
+
+    with_baselines = not args.skip_baselines
+    comparison = (compare_models(X_train, y_train, X_test, y_test, categories) if with_baselines
+                  else [run_isolated('HistGradientBoosting (native categoricals)', new_model,
+                                     X_train, y_train, X_test, y_test)])
+
+    # The shipped model, fitted in this process
+    model = new_model().fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    metrics = {
+        'test_r2_log': round(float(r2_score(y_test, y_pred)), 4),
+        'test_rmse_log': round(float(np.sqrt(mean_squared_error(y_test, y_pred))), 4),
+        'test_mae_units': round(float(mean_absolute_error(np.expm1(y_test), np.expm1(y_pred))), 2),
+        'n_iter': int(model.n_iter_),
+        'best_validation_score': round(float(model.validation_score_[-1]), 4),
+    }
+
+    print(f"\n{'model':<44} {'fit s':>8} {'pred s':>8} {'RSS +MB':>8} {'model MB':>9} {'test R²':>8}")
+    for r in comparison:
+        rss = f"{r['fit_rss_growth_mb']:.0f}" if r['fit_rss_growth_mb'] is not None else '-'
+        print(f"{r['model']:<44} {r['fit_s']:>8.2f} {r['predict_s']:>8.3f} {rss:>8} "
+              f"{r['model_mb']:>9.2f} {r['test_r2']:>8.4f}")
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'data': {'table': 'place_bulk', 'place_years': len(X), 'places': n_places,
+                 'train_rows': len(y_train), 'test_rows': len(y_test), 'holdout_from_year': holdout_start,
+                 'feature_matrix_mb': round(X.nbytes / 2**20, 1)},
+        'target': 'log1p(total_units)',
+        'features': [{'name': f, 'kind': 'categorical', 'categories': categories[f]} if f in CATEGORICAL
+                     else {'name': f, 'kind': 'numeric'} for f in FEATURES],
+        'model': {'file': str(MODEL_FILE), 'estimator': type(model).__name__, 'params': HGB_PARAMS},
+        'metrics': metrics,
+        'reform_effects': reform_effects(model, X[test], categories),
+        'comparison': comparison,
+    }
+
+    MODEL_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(MODEL_FILE, 'wb') as f:
+        pickle.dump(model, f)
+    with open(REPORT_FILE, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n[OK] Test R² (log units) {metrics['test_r2_log']:.4f} after {metrics['n_iter']} iterations")
+    print(f"[OK] Saved {MODEL_FILE} and {REPORT_FILE}")
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+ACS 5-year ingestion for state, county and place geographies (used by script 14).
+
+- Variables are split into batches of at most ACS_MAX_VARIABLES per call (the
+  API limit, NAME included); batches are joined back on the geography id.
+- Requests fan out across (year, state, batch) on a thread pool over one pooled
+  session, through the shared HTTP cache (http_cache.py). Published ACS years
+  never change, so re-runs and HTTP_CACHE_OFFLINE=1 runs are served from disk.
+- Results go to a typed Parquet store per geography level, keyed and sorted by
+  (geo_id, year): data/processed/acs/acs5_{level}.parquet. New fetches
+  replace matching keys and keep everything else.
+- Derived rates are computed once, vectorized over the whole store.
+
+geo_id is the state (2), county (5) or place (7) FIPS code.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from async_http import make_session
+from http_cache import HttpCache
+
+CENSUS_BASE_URL = os.environ.get('CENSUS_API_BASE_URL', "https://api.census.gov/data")
+CENSUS_API_KEY = os.environ.get('CENSUS_API_KEY')
+
+ACS_MAX_VARIABLES = 50  # per request, NAME included
+MAX_WORKERS = 8
+REQUEST_TIMEOUT = 30
+STORE_DIR = Path('data/processed/acs')
+
+# Census annotation values (-666666666 etc.) mark missing estimates
+ACS_MISSING_THRESHOLD = -555555555
+
+# Geography levels: API 'for' clause and the columns that form geo_id
+GEO_LEVELS = {
+    'state': {'for': 'state:*', 'id_columns': ['state']},
+    'county': {'for': 'county:*', 'id_columns': ['state', 'county']},
+    'place': {'for': 'place:*', 'id_columns': ['state', 'place']},
+}
+
+
+def variable_batches(variables: List[str]) -> List[List[str]]:
+    """Split variable codes into API-sized batches (room left for NAME)."""
+    size = ACS_MAX_VARIABLES - 1
+    return [variables[i:i + size] for i in range(0, len(variables), size)]
+
+
+def store_path(geo_level: str) -> Path:
+    return STORE_DIR / f"acs5_{geo_level}.parquet"
+
+
+def fetch_batch(cache: HttpCache, year: int, geo_level: str, state_fips: Optional[str],
+                batch: List[str]) -> pd.DataFrame:
+    """One API call: NAME plus one variable batch for one year (and state)."""
+    params = {
+        'get': ','.join(['NAME'] + batch),
+        'for': GEO_LEVELS[geo_level]['for'],
+    }
+    if state_fips is not None:
+        params['in'] = f'state:{state_fips}'
+    if CENSUS_API_KEY:
+        params['key'] = CENSUS_API_KEY
+
+    response = cache.get(f"{CENSUS_BASE_URL}/{year}/acs/acs5", params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    data = response.json()
+
+    df = pd.DataFrame(data[1:], columns=data[0])
+    id_columns = GEO_LEVELS[geo_level]['id_columns']
+    df['geo_id'] = df[id_columns[0]]
+    if len(id_columns) > 1:
+        df['geo_id'] = df['geo_id'].str.cat(df[id_columns[1:]])
+    df['state_fips'] = df['state']
+    df['year'] = year
+    return df[['geo_id', 'year', 'state_fips', 'NAME'] + batch]
+
+
+def fetch_acs(
+    years: Iterable[int],
+    variables: Dict[str, str],
+    geo_level: str = 'state',
+    states: Optional[Iterable[str]] = None,
+    max_workers: int = MAX_WORKERS,
+) -> pd.DataFrame:
+    """
+    Fetch variables for every (year, state) concurrently.
+
+    Args:
+        years: ACS 5-year vintages
+        variables: {variable code: column name}
+        geo_level: 'state', 'county' or 'place'
+        states: state FIPS codes to fan out over (required below state level)
+
+    Returns:
+        Typed frame with geo_id, year, state_fips, name and one float column per
+        variable; (year, state) pairs that failed are reported and left out
+    """
+    codes = list(variables)
+    batches = variable_batches(codes)
+    scopes = [None] if geo_level == 'state' else sorted(states)
+
+    session = make_session(max_workers)
+    cache = HttpCache(session=session)
+    frames: Dict[tuple, List[pd.DataFrame]] = {}
+    failed = set()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(fetch_batch, cache, year, geo_level, scope, batch): (year, scope)
+                for year in years for scope in scopes for batch in batches
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    frames.setdefault(key, []).append(future.result())
+                except Exception as e:
+                    failed.add(key)
+                    print(f"  ⚠️ ACS {key[0]} {geo_level} (state {key[1] or 'all'}): {e}")
+    finally:
+        session.close()
+
+    parts = []
+    for key, batch_frames in frames.items():
+        if key in failed or len(batch_frames) != len(batches):
+            continue  # Incomplete variable set for this (year, state)
+        merged = batch_frames[0]
+        for extra in batch_frames[1:]:
+            merged = merged.merge(extra.drop(columns=['state_fips', 'NAME']), on=['geo_id', 'year'])
+        parts.append(merged)
+
+    if not parts:
+        return pd.DataFrame()
+
+    df = pd.concat(parts, ignore_index=True).rename(columns={'NAME': 'name', **variables})
+    values = df[list(variables.values())].apply(pd.to_numeric, errors='coerce').astype('float64')
+    df[list(variables.values())] = values.mask(values <= ACS_MISSING_THRESHOLD)
+    df['year'] = df['year'].astype('int16')
+    df['geo_id'] = df['geo_id'].astype('string')
+    df['state_fips'] = df['state_fips'].astype('string')
+    df['name'] = df['name'].astype('string')
+
+    print(f"  Fetched {len(df):,} {geo_level} rows "
+          f"({len(futures)} requests, {cache.stats['hit']} from cache, {len(failed)} failed)")
+    return df.sort_values(['geo_id', 'year']).reset_index(drop=True)
+
+
+def compute_derived_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """Homeownership, rental vacancy and housing units per capita, in one pass."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['homeownership_rate'] = (
+            df['owner_occupied_units'] / df['total_occupied_units'] * 100
+        ).round(2)
+        df['rental_vacancy_rate'] = (
+            df['rental_vacancy'] / df['total_vacancy'] * 100
+        ).fillna(0).round(2)
+        df['housing_units_per_capita'] = (
+            df['total_housing_units'] / df['total_population']
+        ).round(4)
+    return df.replace([np.inf, -np.inf], np.nan)
+
+
+def update_store(new: pd.DataFrame, geo_level: str) -> pd.DataFrame:
+    """Upsert rows by (geo_id, year), recompute derived rates, write the store."""
+    path = store_path(geo_level)
+    if path.exists():
+        existing = pd.read_parquet(path)
+        keys = pd.MultiIndex.from_frame(new[['geo_id', 'year']])
+        stale = pd.MultiIndex.from_frame(existing[['geo_id', 'year']]).isin(keys)
+        new = pd.concat([existing[~stale], new], ignore_index=True)
+
+    store = compute_derived_metrics(new.sort_values(['geo_id', 'year']).reset_index(drop=True))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    store.to_parquet(path, index=False)
+    return store
+
+
+def load_acs(geo_level: str, years: Optional[Iterable[int]] = None,
+             states: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Read the store for a geography level, optionally filtered."""
+    filters = []
+    if years is not None:
+        filters.append(('year', 'in', list(years)))
+    if states is not None:
+        filters.append(('state_fips', 'in', list(states)))
+    return pd.read_parquet(store_path(geo_level), filters=filters or None)
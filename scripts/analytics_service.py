@@ -0,0 +1,579 @@
+#!/usr/bin/env python3
+"""
+Local analytics service for on-demand causal queries.
+
+Scripts 31, 32 and 33 only run as batches over the whole reform catalog, so
+the causal-analysis routes can only serve precomputed files. This service
+loads the permit panels and the reform catalog once, keeps them warm, and
+answers single queries over HTTP:
+
+    GET /scm?place_fips=2743000&adoption_year=2019[&reform_type=...]
+            [&states=27,55][&exclude_reformed=1][&max_donors=50]
+    GET /did?reform_type=Comprehensive+Reform&adoption_year=2019
+    GET /did?treated=2743000,4159000,0667000&adoption_year=2019[&bootstrap=100][&seed=42]
+    GET /event-study?reform_type=Parking+Reform[&places=...]
+    GET /health
+
+POST with a JSON object body takes the same parameters.
+
+Design:
+- asyncio server (stdlib only) in front of a process pool. Panels are loaded
+  in the parent before the pool starts, so forked workers share them
+  copy-on-write; with a spawn/forkserver start method each worker loads
+  them once in its initializer.
+- SCM calls 32's analyze_single_city on a donor subset: donors are filtered
+  (states, reformed cities) and the max_donors places closest to the treated
+  city's pre-period level are kept, which keeps the SLSQP solve well under a
+  second. Same data source as 32 (permit_store 'place', synthetic fallback).
+- DiD follows 31's definitions (Mahalanobis matching on pre-period mean,
+  trend and WRLURI with 3 nearest controls per treated city, 3-year pre and
+  post windows, bootstrap CI, t-test p-value) but evaluates them on a
+  places x years matrix instead of filtering the long frame per place;
+  the bootstrap draws all resamples at once from a seeded generator. The
+  panel is 31's own synthetic panel, as in the batch script.
+- Event studies call 33's panel builder and regression directly.
+- Results are memoized in an LRU keyed by the normalized parameters (FIPS
+  padded, lists sorted, defaults filled in); identical concurrent queries
+  share one computation.
+
+Usage:
+    python scripts/analytics_service.py [--host 127.0.0.1] [--port 8765]
+                                        [--workers 4] [--cache-size 512]
+"""
+
+import asyncio
+import importlib
+import json
+import logging
+import os
+import sys
+import time
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+os.environ.setdefault('PERF_RUN_ID', f"service_{datetime.now():%Y%m%d_%H%M%S}")
+
+import numpy as np
+import pandas as pd
+
+from permit_store import PermitTable
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('analytics_service')
+
+m31 = importlib.import_module('31_compute_did_analysis')
+m32 = importlib.import_module('32_synthetic_control')
+m33 = importlib.import_module('33_event_study')
+for engine_module in (m31, m32, m33):
+    logging.getLogger(engine_module.__name__).setLevel(logging.WARNING)
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 512
+DEFAULT_MAX_DONORS = 50
+NEAREST_CONTROLS = 3  # per treated city, as in 31's match_control_group
+MAX_REQUEST_BYTES = 1 << 20
+
+# Warm panels (module-level so pool workers can reach them)
+PANELS: Optional[Dict] = None
+
+
+# =============================================================================
+# Panels
+# =============================================================================
+
+def wide_matrix(ids: np.ndarray, years: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Long (id, year, value) arrays -> (unique ids, years, ids x years matrix with NaN gaps)."""
+    unique_ids, rows = np.unique(ids, return_inverse=True)
+    unique_years, cols = np.unique(years, return_inverse=True)
+    matrix = np.full((len(unique_ids), len(unique_years)), np.nan)
+    matrix[rows, cols] = 0  # observed cells; duplicates are summed below
+    np.add.at(matrix, (rows, cols), values)
+    return unique_ids, unique_years, matrix
+
+
+def permit_counts(data: pd.DataFrame) -> np.ndarray:
+    """Total permits per row, from components when there is no total (as 32 does)."""
+    if 'total_permits' in data.columns:
+        return data['total_permits'].to_numpy(float)
+    return (data.get('single_family', 0) + data.get('multi_family', 0)).to_numpy(float)
+
+
+def load_panels() -> Dict:
+    """Reform catalog, SCM/event-study permit table and DiD panel, as the batch scripts load them."""
+    start = time.perf_counter()
+    reforms, permits = m32.load_data()
+    did_reforms = m31.load_reform_data()
+    np.random.seed(m31.RANDOM_SEED)  # the panel 31 generates after seeding at import
+    did_permits = m31.generate_synthetic_permits(did_reforms, n_places=2000)
+
+    panels = build_panels(reforms, permits, did_permits)
+    logger.info(f"Panels loaded in {time.perf_counter() - start:.1f}s: {len(reforms)} reforms, "
+                f"{len(panels['scm']['codes']):,} SCM places, {len(panels['did']['places']):,} DiD places")
+    return panels
+
+
+def build_panels(reforms: pd.DataFrame, permits: PermitTable, did_permits: pd.DataFrame) -> Dict:
+    """Query matrices from 32's reform catalog and permit table and 31's long DiD panel."""
+    codes = permits.data[permits.geo_column].to_numpy(np.int64)
+    place_codes, scm_years, scm_matrix = wide_matrix(codes, permits.data['year'].to_numpy(), permit_counts(permits.data))
+
+    did_ids = did_permits['place_fips'].map(normalize_fips).to_numpy()
+    did_places, did_years, did_matrix = wide_matrix(did_ids, did_permits['year'].to_numpy(),
+                                                    did_permits['total_permits'].to_numpy(float))
+    wrluri = did_permits.drop_duplicates('place_fips').assign(place=lambda d: d['place_fips'].map(normalize_fips))
+    wrluri = wrluri.set_index('place')['baseline_wrluri'].reindex(did_places).to_numpy(float)
+
+    return {
+        'reforms': reforms,
+        'permits': permits,
+        'scm': {'codes': place_codes, 'years': scm_years, 'matrix': scm_matrix},
+        'did': {'places': did_places, 'years': did_years, 'matrix': did_matrix, 'wrluri': wrluri},
+    }
+
+
+def init_worker():
+    global PANELS
+    if PANELS is None:
+        PANELS = load_panels()
+
+
+def normalize_fips(value) -> str:
+    """Numeric FIPS -> 7-digit string; other ids (31's synthetic controls) unchanged."""
+    value = str(value).strip()
+    return value.zfill(7) if value.isdigit() else value
+
+
+# =============================================================================
+# Queries (run in pool workers)
+# =============================================================================
+
+def run_scm(params: Dict) -> Optional[Dict]:
+    """32's single-city SCM against a filtered, size-capped donor pool."""
+    reforms, permits, scm = PANELS['reforms'], PANELS['permits'], PANELS['scm']
+    treated = int(params['place_fips'])
+    adoption_year = params['adoption_year']
+
+    pre_years = np.arange(max(2015, adoption_year - m32.PRE_TREATMENT_YEARS), adoption_year)
+    pre_cols = np.isin(scm['years'], pre_years)
+    treated_row = np.searchsorted(scm['codes'], treated)
+    if treated_row >= len(scm['codes']) or scm['codes'][treated_row] != treated:
+        raise LookupError(f"No permit data for place {params['place_fips']}")
+
+    pre = scm['matrix'][:, pre_cols]
+    eligible = (np.sum(~np.isnan(pre), axis=1) >= m32.MIN_PRE_YEARS) & (scm['codes'] != treated)
+    if params['states']:
+        eligible &= np.isin(scm['codes'] // 100_000, [int(s) for s in params['states']])
+    excluded = reforms if params['exclude_reformed'] else reforms[reforms['reform_type'] == params['reform_type']]
+    eligible &= ~np.isin(scm['codes'], excluded['place_fips'].astype(int).to_numpy())
+
+    # Closest pre-period levels first
+    candidates = np.flatnonzero(eligible)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # treated city without pre years
+        gap = np.abs(np.nanmean(pre[candidates], axis=1) - np.nanmean(pre[treated_row]))
+    donors = scm['codes'][candidates[np.argsort(gap, kind='stable')[:params['max_donors']]]]
+
+    keep = np.isin(permits.data[permits.geo_column].to_numpy(np.int64), np.append(donors, treated))
+    subset = PermitTable(permits.data[keep].reset_index(drop=True), permits.level, permits.freq)
+
+    result = m32.analyze_single_city(
+        treated_fips=params['place_fips'], city_name=params['city_name'], reform_type=params['reform_type'],
+        adoption_year=adoption_year, reforms_df=reforms, permits=subset,
+    )
+    if result is not None:
+        result['donor_filter'] = {k: params[k] for k in ('states', 'exclude_reformed', 'max_donors')}
+    return result
+
+
+def run_did(params: Dict) -> Optional[Dict]:
+    """31's DiD for one custom cohort, evaluated on the places x years matrix."""
+    did = PANELS['did']
+    year = params['adoption_year']
+    pre_years = np.arange(max(2015, year - 3), year)
+    post_years = np.arange(year + 1, min(year + 4, 2025))
+    if len(post_years) < 1:
+        raise ValueError(f"No post-treatment years for adoption year {year}")
+
+    pre = did['matrix'][:, np.isin(did['years'], pre_years)]
+    post = did['matrix'][:, np.isin(did['years'], post_years)]
+    is_treated = np.isin(did['places'], params['treated'])
+
+    # Matching characteristics (places with every pre year observed)
+    complete = (pre.shape[1] == len(pre_years)) & ~np.isnan(pre).any(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        features = np.column_stack([pre.mean(axis=1), (pre[:, -1] - pre[:, 0]) / pre[:, 0], did['wrluri']])
+    treated_rows = np.flatnonzero(complete & is_treated)
+    pool_rows = np.flatnonzero(complete & ~is_treated)
+    if len(treated_rows) == 0 or len(pool_rows) < m31.MIN_CONTROL:
+        return None
+
+    matched = features[complete]
+    scale = matched.std(axis=0)
+    scale[scale == 0] = 1.0
+    center = matched.mean(axis=0)
+    try:
+        inv_cov = np.linalg.inv(np.cov(matched.T))
+    except np.linalg.LinAlgError:
+        inv_cov = np.eye(features.shape[1])
+
+    diff = ((features[treated_rows] - center) / scale)[:, None, :] - ((features[pool_rows] - center) / scale)[None, :, :]
+    with np.errstate(invalid='ignore'):
+        distance = np.sqrt(np.einsum('ijk,kl,ijl->ij', diff, inv_cov, diff))
+    nearest = np.argsort(distance, axis=1, kind='stable')[:, :NEAREST_CONTROLS]
+    control_rows = pool_rows[np.unique(nearest)]
+    if len(control_rows) < m31.MIN_CONTROL:
+        return None
+
+    all_treated_rows = np.flatnonzero(is_treated)
+    parallel_trends_pval = parallel_trends(pre, all_treated_rows, control_rows)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # places with no pre or post years
+        pre_mean = np.nanmean(pre, axis=1)
+        post_mean = np.nanmean(post, axis=1)
+    valid = ~np.isnan(pre_mean) & ~np.isnan(post_mean) & (np.nan_to_num(pre_mean) > 0)
+    pre_sum = np.where(valid, pre_mean, 0.0)
+    post_sum = np.where(valid, post_mean, 0.0)
+
+    def effects(t_rows: np.ndarray, c_rows: np.ndarray):
+        """DiD effect per row of resampled index arrays (n_draws x n_units)."""
+        n_t, n_c = valid[t_rows].sum(axis=-1), valid[c_rows].sum(axis=-1)
+        t_pre, t_post = pre_sum[t_rows].sum(axis=-1), post_sum[t_rows].sum(axis=-1)
+        c_pre, c_post = pre_sum[c_rows].sum(axis=-1), post_sum[c_rows].sum(axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_change = (t_post - t_pre) / t_pre * 100
+            c_change = (c_post - c_pre) / c_pre * 100
+        ok = (n_t >= m31.MIN_TREATED) & (n_c >= m31.MIN_CONTROL)
+        return t_change - c_change, t_change, c_change, n_t, n_c, ok
+
+    effect, t_change, c_change, n_t, n_c, ok = effects(all_treated_rows, control_rows)
+    if not ok:
+        return None
+
+    rng = np.random.default_rng(params['seed'])
+    draws = params['bootstrap']
+    boot, *_, boot_ok = effects(rng.choice(all_treated_rows, (draws, len(all_treated_rows))),
+                                rng.choice(control_rows, (draws, len(control_rows))))
+    boot = boot[boot_ok]
+    if len(boot) < min(100, draws):
+        return None
+    lower, upper, std_error = np.percentile(boot, 2.5), np.percentile(boot, 97.5), np.std(boot)
+
+    p_value = m31.compute_p_value(effect, std_error, int(n_t), int(n_c))
+    return {
+        'reform_type': params['reform_type'],
+        'adoption_year': year,
+        'treatment_effect': round(float(effect), 2),
+        'lower_ci_95': round(float(lower), 2),
+        'upper_ci_95': round(float(upper), 2),
+        'p_value': round(float(p_value), 4),
+        'n_treated': int(n_t),
+        'n_control': int(n_c),
+        'parallel_trends_p_value': round(float(parallel_trends_pval), 4),
+        'treated_change_pct': round(float(t_change), 2),
+        'control_change_pct': round(float(c_change), 2),
+        'significance': 'significant' if p_value < 0.05 else 'not_significant',
+        'interpretation': m31.interpret_result(effect, p_value, parallel_trends_pval),
+        'treated_places': did['places'][all_treated_rows].tolist(),
+        'control_places': did['places'][control_rows].tolist(),
+        'bootstrap_iterations': draws,
+    }
+
+
+def parallel_trends(pre: np.ndarray, treated_rows: np.ndarray, control_rows: np.ndarray) -> float:
+    """31's test_parallel_trends: t-test of first-to-last pre-period growth."""
+    def trends(rows):
+        values = pre[rows]
+        observed = ~np.isnan(values)
+        enough = observed.sum(axis=1) >= 2
+        first = values[np.arange(len(rows)), observed.argmax(axis=1)]
+        last = values[np.arange(len(rows)), values.shape[1] - 1 - observed[:, ::-1].argmax(axis=1)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = np.where(first > 0, (last - first) / first, 0.0)
+        return growth[enough]
+
+    treated, control = trends(treated_rows), trends(control_rows)
+    if len(treated) < 3 or len(control) < 3:
+        return 0.5
+    return float(m31.stats.ttest_ind(treated, control).pvalue)
+
+
+def run_event_study(params: Dict) -> Optional[Dict]:
+    """33's event study for one reform type, optionally restricted to some places."""
+    reforms = PANELS['reforms']
+    if params['places']:
+        reforms = reforms[reforms['place_fips'].isin(params['places'])]
+
+    panel = m33.build_event_study_panel(reforms, PANELS['permits'], params['reform_type'])
+    if panel is None:
+        return None
+    regression = m33.run_event_study_regression(panel)
+    if regression is None:
+        return None
+
+    effects = regression['event_effects']
+    pre_trend_p = m33.test_pre_trends(effects)
+    return {
+        'reform_type': params['reform_type'] or 'All Reforms (Pooled)',
+        'n_cities': int(panel['city_fips'].nunique()),
+        'n_observations': regression['n_observations'],
+        'event_effects': effects,
+        'pre_trend_test_p_value': round(pre_trend_p, 3),
+        'model_r_squared': regression['model_r_squared'],
+        'interpretation': m33.generate_interpretation(params['reform_type'] or 'all reforms', effects, pre_trend_p),
+    }
+
+
+QUERIES = {'scm': run_scm, 'did': run_did, 'event-study': run_event_study}
+
+
+def run_query(kind: str, params: Dict) -> Dict:
+    """Pool entry point: run one normalized query, timing it in the worker."""
+    init_worker()
+    np.random.seed(m31.RANDOM_SEED)  # engines draw from the global generator
+    start = time.perf_counter()
+    result = QUERIES[kind](params)
+    return {'result': result, 'compute_ms': round((time.perf_counter() - start) * 1000, 1)}
+
+
+# =============================================================================
+# Parameter normalization (parent process)
+# =============================================================================
+
+def as_list(value) -> List[str]:
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+def as_int(value, default: int) -> int:
+    """Missing or empty -> default; 0 is a value (e.g. seed=0)."""
+    if value is None or value == '':
+        return default
+    return int(value)
+
+
+def as_bool(value, default: bool) -> bool:
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def normalize(kind: str, raw: Dict, reforms: pd.DataFrame) -> Dict:
+    """Validated parameters with defaults filled in; equal queries normalize identically."""
+    if kind == 'scm':
+        if 'place_fips' not in raw or 'adoption_year' not in raw:
+            raise ValueError("scm requires place_fips and adoption_year")
+        fips = normalize_fips(raw['place_fips'])
+        if not fips.isdigit():
+            raise ValueError(f"Invalid place_fips: {raw['place_fips']}")
+        catalog = reforms[reforms['place_fips'] == fips]
+        return {
+            'place_fips': fips,
+            'adoption_year': int(raw['adoption_year']),
+            'reform_type': raw.get('reform_type') or (catalog['reform_type'].iloc[0] if len(catalog) else 'Unknown'),
+            'city_name': raw.get('city_name') or (catalog['city_name'].iloc[0] if len(catalog) else fips),
+            'states': sorted({s.zfill(2) for s in as_list(raw.get('states'))}),
+            'exclude_reformed': as_bool(raw.get('exclude_reformed'), False),
+            'max_donors': max(m32.MIN_DONORS, as_int(raw.get('max_donors'), DEFAULT_MAX_DONORS)),
+        }
+
+    if kind == 'did':
+        if 'adoption_year' not in raw:
+            raise ValueError("did requires adoption_year and either treated or reform_type")
+        year = int(raw['adoption_year'])
+        reform_type = raw.get('reform_type') or None
+        treated = sorted({normalize_fips(f) for f in as_list(raw.get('treated'))})
+        if not treated:
+            if reform_type is None:
+                raise ValueError("did requires treated places or a reform_type")
+            cohort = reforms[(reforms['reform_type'] == reform_type) & (reforms['adoption_year'] == year)]
+            treated = sorted(cohort['place_fips'].unique().tolist())
+        return {
+            'treated': treated,
+            'adoption_year': year,
+            'reform_type': reform_type or 'Custom cohort',
+            'bootstrap': max(100, as_int(raw.get('bootstrap'), m31.BOOTSTRAP_ITERATIONS)),
+            'seed': as_int(raw.get('seed'), m31.RANDOM_SEED),
+        }
+
+    if kind == 'event-study':
+        return {
+            'reform_type': raw.get('reform_type') or None,
+            'places': sorted({normalize_fips(f) for f in as_list(raw.get('places'))}),
+        }
+
+    raise KeyError(kind)
+
+
+# =============================================================================
+# Service
+# =============================================================================
+
+class LRUCache:
+    """Small ordered-dict LRU."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.items: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key in self.items:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return self.items[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        while len(self.items) > self.size:
+            self.items.popitem(last=False)
+
+
+class AnalyticsService:
+    def __init__(self, workers: int, cache_size: int):
+        global PANELS
+        PANELS = load_panels()
+        self.reforms = PANELS['reforms']
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+        self.cache = LRUCache(cache_size)
+        self.inflight: Dict[Tuple, asyncio.Future] = {}
+        self.started = time.time()
+
+    async def query(self, kind: str, raw: Dict) -> Tuple[int, Dict]:
+        start = time.perf_counter()
+        params = normalize(kind, raw, self.reforms)
+        key = (kind, json.dumps(params, sort_keys=True))
+
+        cached = self.cache.get(key)
+        if cached is None:
+            if key not in self.inflight:
+                loop = asyncio.get_running_loop()
+                self.inflight[key] = loop.run_in_executor(self.pool, run_query, kind, params)
+            future = self.inflight[key]
+            try:
+                answer = await asyncio.shield(future)
+            finally:
+                self.inflight.pop(key, None)
+            self.cache.put(key, answer)
+        else:
+            answer = cached
+
+        body = {
+            'query': kind,
+            'params': params,
+            'cached': cached is not None,
+            'compute_ms': answer['compute_ms'],
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+            'result': answer['result'],
+        }
+        if answer['result'] is None:
+            body['error'] = 'Insufficient data for this query'
+            return 422, body
+        return 200, body
+
+    def health(self) -> Dict:
+        return {
+            'status': 'ok',
+            'uptime_s': round(time.time() - self.started, 1),
+            'reforms': len(self.reforms),
+            'cache': {'entries': len(self.cache.items), 'size': self.cache.size,
+                      'hits': self.cache.hits, 'misses': self.cache.misses},
+        }
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Dict]:
+        url = urlsplit(target)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if method == 'POST' and body:
+            payload = json.loads(body)
+            if not isinstance(payload, dict):
+                raise ValueError("POST body must be a JSON object")
+            params.update(payload)
+
+        path = url.path.rstrip('/')
+        if path == '/health':
+            return 200, self.health()
+        kind = path.lstrip('/')
+        if kind not in QUERIES or method not in ('GET', 'POST'):
+            return 404, {'error': f"Unknown endpoint {method} {url.path}"}
+        return await self.query(kind, params)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        status, payload = 500, {'error': 'Internal error'}
+        try:
+            method, target, _ = (await reader.readline()).decode('latin-1').split(' ', 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', 0))
+            if length > MAX_REQUEST_BYTES:
+                raise ValueError("Request body too large")
+            body = await reader.readexactly(length) if length else b''
+            status, payload = await self.dispatch(method.upper(), target, body)
+        except (ValueError, KeyError, json.JSONDecodeError) as e:
+            status, payload = 400, {'error': str(e)}
+        except LookupError as e:
+            status, payload = 404, {'error': str(e)}
+        except Exception as e:
+            logger.exception("Query failed")
+            payload = {'error': f"{type(e).__name__}: {e}"}
+
+        data = json.dumps(payload, default=str).encode('utf-8')
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 422: 'Unprocessable Entity'}.get(status, 'Error')
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode('latin-1') + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port)
+        logger.info(f"Analytics service listening on http://{host}:{port} "
+                    f"({self.pool._max_workers} workers, cache {self.cache.size})")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def main():
+    args = sys.argv[1:]
+
+    def option(flag: str, default: str) -> str:
+        return args[args.index(flag) + 1] if flag in args else default
+
+    host = option('--host', '127.0.0.1')
+    port = int(option('--port', str(DEFAULT_PORT)))
+    workers = int(option('--workers', str(min(4, os.cpu_count() or 1))))
+    cache_size = int(option('--cache-size', str(DEFAULT_CACHE_SIZE)))
+
+    service = AnalyticsService(workers, cache_size)
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        logger.info("Shutting down")
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Shared asyncio HTTP helpers for the fetch scripts.
+
+- make_session: requests.Session with a keep-alive pool sized for the worker count
+- TokenBucket: fixed-rate limiter shared by all in-flight requests
+- AdaptiveRateLimiter: token bucket whose rate backs off on 429/5xx and
+  creeps back up while responses are healthy (additive increase,
+  multiplicative decrease)
+
+Requests themselves run on worker threads (asyncio.to_thread), so scripts keep
+using requests and its exception types.
+"""
+
+import asyncio
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+THROTTLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def make_session(pool_size: int, user_agent: str = 'zoning-reform-analysis') -> requests.Session:
+    """Session whose connection pool can serve pool_size concurrent requests."""
+    session = requests.Session()
+    session.headers['User-Agent'] = user_agent
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class TokenBucket:
+    """Asyncio token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket with AIMD rate control.
+
+    on_success() adds `increase` req/s up to max_rate; on_throttle() multiplies
+    the rate by `decrease` down to min_rate.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        increase: float = 0.5,
+        decrease: float = 0.5,
+        capacity: float = 1.0,
+    ):
+        super().__init__(rate, capacity)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.throttled = 0
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self):
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease)
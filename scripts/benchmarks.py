@@ -0,0 +1,603 @@
+#!/usr/bin/env python3
+"""
+Network-free benchmark suite for the analytics engines.
+
+Builds seeded synthetic fixtures at several scales and times the engines the
+pipeline spends its time in:
+
+- scm_weights:            SCM donor-weight solve (32 optimize_scm_weights)
+- did_match:              DiD control matching + effect for one cohort (31)
+- did_bootstrap:          DiD bootstrap confidence interval for that cohort (31)
+- event_study_panel:      event-study panel build for one reform type (33)
+- event_study_regression: fixed-effects event-study regression (33)
+- place_metrics:          growth, multifamily and ranking metrics (22)
+- master_csv_parse:       BPS master CSV load + annual aggregation (21)
+- search_index:           places.json + binary index build from the place metrics CSV (26)
+- search_query:           per-keystroke lookups against the binary index (search_index.py)
+- county_store:           county Parquet partitions write + state read (08)
+- serving_build:          SQLite serving store build from county and place rows
+- serving_lookup:         1,000 place point queries + every state's county aggregate
+- model_predict:          v3 forest scoring of every place x reform type (reform_model.py)
+
+Fixtures come from the scripts' own generators, sized to the scale: each
+engine gets the panel its script would generate (generate_synthetic_permits
+in 31 for DiD and the place tables, 32 for SCM, 33 for the event study), and
+the county cases get generate_sample_county_data (09) applied to synthetic
+monthly state totals. Only the reform table is drawn here. The generators
+loop in Python, so the 50k scale spends a minute or so building fixtures.
+
+Scales (places x years): 1k x 10, 10k x 20, 50k x 30. A case with max_places
+is skipped above that size: the current implementation would take hours
+(SCM's SLSQP solve is cubic in donors; DiD filters the panel once per place).
+
+Every timed call is recorded with perf.measure under a run id of
+bench_{timestamp}, so results accumulate in PERF_DIR (default data/outputs/perf/)
+and any two runs can be compared:
+
+    python scripts/benchmarks.py                        # every case, 1k scale
+    python scripts/benchmarks.py --scales 1k,10k,50k
+    python scripts/benchmarks.py --cases did_bootstrap,scm_weights --repeat 3
+    python scripts/benchmarks.py --list
+    python scripts/perf.py compare bench_20250101_120000 latest
+"""
+
+import contextlib
+import importlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+import warnings
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault('PERF_RUN_ID', f"bench_{datetime.now():%Y%m%d_%H%M%S}")
+
+from perf import RUN_ID, count_rows, measure, run_path
+from permit_store import PermitTable
+
+SEED = 42
+LAST_YEAR = 2024
+
+SCALES = {
+    '1k': (1_000, 10),
+    '10k': (10_000, 20),
+    '50k': (50_000, 30),
+}
+DEFAULT_SCALES = ['1k']
+
+REFORM_SHARE = 0.05  # share of places that adopt a reform
+ADOPTION_YEARS = (2016, 2022)
+REFORM_TYPES = ['ADU/Lot Split', 'Comprehensive Reform', 'Zoning Upzones', 'Parking Reform']
+STATE_FIPS = [
+    '01', '02', '04', '05', '06', '08', '09', '10', '12', '13', '15', '16', '17', '18', '19',
+    '20', '21', '22', '23', '24', '25', '26', '27', '28', '29', '30', '31', '32', '33', '34',
+    '35', '36', '37', '38', '39', '40', '41', '42', '44', '45', '46', '47', '48', '49', '50',
+    '51', '53', '54', '55', '56',
+]
+PLACES_PER_COUNTY = 10
+
+
+@lru_cache(maxsize=None)
+def engine(module: str):
+    """Import a numbered script as a module (e.g. '31_compute_did_analysis')."""
+    return importlib.import_module(module)
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the engines' progress output while they are timed."""
+    logging.disable(logging.INFO)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+# =============================================================================
+# Fixtures
+# =============================================================================
+
+def synthetic_reforms(n_places: int, n_years: int, seed: int = SEED) -> pd.DataFrame:
+    """
+    Reform table for a panel of n_places: REFORM_SHARE of them adopt one
+    reform in ADOPTION_YEARS. The scripts' generators add the control places.
+
+    Returns:
+        place_fips, city_name, state_fips, state_name, reform_name, reform_type,
+        effective_date, baseline_wrluri, adoption_year
+    """
+    rng = np.random.default_rng(seed)
+    n_reforms = max(len(REFORM_TYPES), int(n_places * REFORM_SHARE))
+    index = np.arange(n_reforms)
+
+    state = np.array(STATE_FIPS)[index % len(STATE_FIPS)]
+    reform_type = np.array(REFORM_TYPES)[rng.integers(0, len(REFORM_TYPES), n_reforms)]
+    adoption = rng.integers(ADOPTION_YEARS[0], min(ADOPTION_YEARS[1], LAST_YEAR - 1) + 1, n_reforms)
+    # Place codes from 60001 up: the 32/33 generators number their controls 1000000 + i
+    return pd.DataFrame({
+        'place_fips': np.char.add(state, (index // len(STATE_FIPS) + 60_001).astype(str)),
+        'city_name': np.char.add('Place ', index.astype(str)),
+        'state_fips': state,
+        'state_name': np.char.add('State ', state),
+        'reform_name': np.char.add(reform_type, ' reform'),
+        'reform_type': reform_type,
+        'effective_date': pd.to_datetime([f"{y}-07-01" for y in adoption]),
+        'baseline_wrluri': rng.uniform(0.5, 2.0, n_reforms),
+        'adoption_year': adoption,
+    })
+
+
+def synthetic_permits(module: str, reforms: pd.DataFrame, n_places: int, n_years: int,
+                      seed: int = SEED) -> pd.DataFrame:
+    """Place-year permits from a script's own generate_synthetic_permits (31, 32 or 33)."""
+    generate = engine(module).generate_synthetic_permits
+    years = range(LAST_YEAR - n_years + 1, LAST_YEAR + 1)
+    np.random.seed(seed)  # the generators draw from the global generator
+    with quiet():
+        if module == '31_compute_did_analysis':
+            # Unwrapped, so building the fixture is not recorded as a perf stage
+            return generate.__wrapped__(reforms, n_places=n_places, years=years)
+        return generate(reforms, n_controls=n_places - len(reforms), years=years)
+
+
+def place_tables(permits: pd.DataFrame, seed: int = SEED) -> Dict[str, pd.DataFrame]:
+    """
+    Script 21 outputs (places directory and annual permits) for script 31's panel.
+
+    Script 31 only generates totals and gives control places codes like
+    C100000, so each place gets a single-family share and each control place a
+    numbered FIPS code in its state. The result is returned as 'panel'.
+    """
+    rng = np.random.default_rng(seed)
+    places = permits.drop_duplicates('place_fips')[['place_fips', 'state_fips', 'city_name']]
+    control = places['place_fips'].str.startswith('C')
+    renumbered = places.loc[control, 'state_fips'] + (
+        places[control].groupby('state_fips').cumcount() + 50_001).astype(str).str.zfill(5)
+    fips = dict(zip(places['place_fips'], places['place_fips'].where(~control, renumbered)))
+    sf_share = dict(zip(places['place_fips'], rng.uniform(0.4, 0.9, len(places))))
+
+    panel = permits.assign(place_fips=permits['place_fips'].map(fips))
+    panel['single_family'] = (permits['total_permits'] * permits['place_fips'].map(sf_share)).astype(np.int64)
+    panel['multi_family'] = panel['total_permits'] - panel['single_family']
+
+    annual = pd.DataFrame({
+        'state_fips': panel['state_fips'],
+        'place_name': panel['city_name'],
+        'year': panel['year'],
+        'sf_units': panel['single_family'],
+        'mf_units': panel['multi_family'],
+        'total_units': panel['total_permits'],
+    })
+    directory = panel.drop_duplicates('place_fips')[['state_fips', 'city_name', 'place_fips']]
+    directory = directory.rename(columns={'city_name': 'place_name'}).assign(location_type='Place')
+    return {'panel': panel, 'annual': annual, 'places': directory.reset_index(drop=True)}
+
+
+def master_csv(permits: pd.DataFrame, path: Path):
+    """
+    BPS master dataset CSV: one annual row per place-year, plus the same
+    number of county rows that the parser has to filter out.
+    """
+    mf = permits['multi_family'].to_numpy()
+    duplex = (mf * 0.15).astype(np.int64)
+    tri4 = (mf * 0.15).astype(np.int64)
+    units = {
+        '1_UNIT': permits['single_family'].to_numpy(),
+        '2_UNITS': duplex,
+        '3_4_UNITS': tri4,
+        '5_UNITS': mf - duplex - tri4,
+    }
+    per_building = {'1_UNIT': 1, '2_UNITS': 2, '3_4_UNITS': 3.5, '5_UNITS': 20}
+
+    rows = pd.DataFrame({
+        'LOCATION_TYPE': 'Place',
+        'PERIOD': 'Annual',
+        'YEAR': permits['year'],
+        'STATE_CODE': permits['state_fips'].astype(int),
+        'COUNTY_CODE': permits['place_fips'].str[2:5],
+        'PLACE_NAME': permits['city_name'],
+        'LOCATION_NAME': permits['city_name'],
+    })
+    for name, count in units.items():
+        rows[f'BLDGS_{name}'] = np.ceil(count / per_building[name]).astype(np.int64)
+        rows[f'UNITS_{name}'] = count
+        rows[f'VALUE_{name}'] = count * 250_000
+    counties = rows.assign(LOCATION_TYPE='County', PLACE_NAME='')
+    pd.concat([rows, counties]).sort_values(['YEAR', 'STATE_CODE']).to_csv(path, index=False)
+
+
+def synthetic_counties(n_places: int, n_years: int, seed: int = SEED) -> pd.DataFrame:
+    """
+    County-year permits in the script 08 schema, from script 09's
+    generate_sample_county_data: lognormal monthly state totals split across
+    n_places / PLACES_PER_COUNTY counties with lognormal populations.
+    """
+    rng = np.random.default_rng(seed)
+    n_states = len(STATE_FIPS)
+    n_counties = max(n_states, n_places // PLACES_PER_COUNTY)
+
+    months = pd.period_range(f"{LAST_YEAR - n_years + 1}-01", f"{LAST_YEAR}-12", freq='M')
+    state_data = pd.DataFrame({
+        'date': np.tile(months.strftime('%Y-%m-01'), n_states),
+        'year': np.tile(months.year, n_states),
+        'month': np.tile(months.month, n_states),
+        'state_fips': np.repeat(STATE_FIPS, len(months)),
+        'sf_permits': rng.lognormal(8, 0.5, n_states * len(months)).astype(np.int64),
+        'mf_permits': rng.lognormal(7, 0.7, n_states * len(months)).astype(np.int64),
+    })
+
+    counties: Dict[str, List] = {}
+    population = rng.lognormal(0, 1, n_counties)
+    for i in range(n_counties):
+        county = f"{i // n_states * 2 + 1:03d}"
+        counties.setdefault(STATE_FIPS[i % n_states], []).append((county, f"County {county}", population[i]))
+
+    np.random.seed(seed)
+    with quiet():
+        monthly = engine('09_generate_sample_county_data').generate_sample_county_data(state_data, counties)
+
+    # Monthly -> annual
+    annual = monthly.groupby(['fips', 'state_fips', 'county_fips', 'county_name', 'year'], as_index=False)[
+        ['sf_permits', 'mf_permits', 'total_permits']].sum()
+    return annual.rename(columns={'sf_permits': 'sf_annual', 'mf_permits': 'mf_annual',
+                                  'total_permits': 'total_annual'})
+
+
+class Fixtures:
+    """Lazily built fixtures for one scale; files go to a temporary directory."""
+
+    def __init__(self, scale: str, workdir: Path):
+        self.scale = scale
+        self.n_places, self.n_years = SCALES[scale]
+        self.workdir = workdir / scale
+        self.workdir.mkdir(parents=True, exist_ok=True)
+        self._cache: Dict[str, object] = {}
+
+    def get(self, name: str, build: Callable):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    @property
+    def reforms(self) -> pd.DataFrame:
+        return self.get('reforms', lambda: synthetic_reforms(self.n_places, self.n_years))
+
+    def permits(self, module: str) -> pd.DataFrame:
+        """Permit panel generated by `module` (e.g. '31_compute_did_analysis') for the reforms."""
+        return self.get(f"permits:{module}",
+                        lambda: synthetic_permits(module, self.reforms, self.n_places, self.n_years))
+
+    @property
+    def tables(self) -> Dict[str, pd.DataFrame]:
+        return self.get('tables', lambda: place_tables(self.permits('31_compute_did_analysis')))
+
+    def cohort(self) -> Dict:
+        """Largest (reform type, adoption year) cohort, as script 31 analyzes it."""
+        def build():
+            reforms = self.reforms
+            eligible = reforms[reforms['adoption_year'] <= 2022]
+            reform_type, year = eligible.groupby(['reform_type', 'adoption_year']).size().idxmax()
+            treated = eligible.loc[
+                (eligible['reform_type'] == reform_type) & (eligible['adoption_year'] == year), 'place_fips'
+            ].tolist()
+            return {'reform_type': reform_type, 'year': int(year), 'treated': treated}
+        return self.get('cohort', build)
+
+
+# =============================================================================
+# Cases: setup(fixtures) -> args (untimed), run(args) (timed)
+# =============================================================================
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[Fixtures], Dict]
+    run: Callable[[Dict], object]
+    max_places: Optional[int] = None
+
+
+def setup_scm(fx: Fixtures) -> Dict:
+    permits, cohort = fx.permits('32_synthetic_control'), fx.cohort()
+    treated_fips, year = cohort['treated'][0], cohort['year']
+    wide = permits.pivot(index='place_fips', columns='year', values='total_permits')
+    pre_years = [y for y in range(year - 5, year) if y in wide.columns]
+
+    same_reform = set(fx.reforms.loc[fx.reforms['reform_type'] == cohort['reform_type'], 'place_fips'])
+    donors = wide.loc[~wide.index.isin(same_reform), pre_years]
+    return {
+        'treated_pre': wide.loc[treated_fips, pre_years].to_dict(),
+        'donor_data_pre': {fips: row for fips, row in zip(donors.index, donors.to_dict('records'))},
+        'rows': len(donors),
+    }
+
+
+def setup_did(fx: Fixtures) -> Dict:
+    cohort = fx.cohort()
+    permits = fx.permits('31_compute_did_analysis')
+    return {'permits': permits, **cohort, 'rows': len(permits)}
+
+
+def run_did_match(args: Dict):
+    m31 = engine('31_compute_did_analysis')
+    all_places = args['permits']['place_fips'].unique().tolist()
+    controls = m31.match_control_group(args['treated'], all_places, args['permits'], args['year'])
+    return m31.compute_did_effect(args['treated'], controls, args['permits'], args['year'])
+
+
+def setup_did_bootstrap(fx: Fixtures) -> Dict:
+    args = setup_did(fx)
+    m31 = engine('31_compute_did_analysis')
+    all_places = args['permits']['place_fips'].unique().tolist()
+    with quiet():
+        args['controls'] = m31.match_control_group(args['treated'], all_places, args['permits'], args['year'])
+    return args
+
+
+def run_did_bootstrap(args: Dict):
+    m31 = engine('31_compute_did_analysis')
+    return m31.bootstrap_confidence_interval(
+        args['treated'], args['controls'], args['permits'], args['year'], m31.BOOTSTRAP_ITERATIONS
+    )
+
+
+def setup_event_study(fx: Fixtures) -> Dict:
+    permit_table = fx.get('permit_table', lambda: PermitTable.from_frame(fx.permits('33_event_study'), 'place'))
+    return {
+        'reforms': fx.reforms,
+        'permit_table': permit_table,
+        'reform_type': fx.cohort()['reform_type'],
+        'rows': len(permit_table),
+    }
+
+
+def run_event_study_panel(args: Dict):
+    return engine('33_event_study').build_event_study_panel(
+        args['reforms'], args['permit_table'], args['reform_type']
+    )
+
+
+def setup_event_study_regression(fx: Fixtures) -> Dict:
+    args = setup_event_study(fx)
+    with quiet():
+        args['panel'] = run_event_study_panel(args)
+    args['rows'] = len(args['panel'])
+    return args
+
+
+def run_event_study_regression(args: Dict):
+    return engine('33_event_study').run_event_study_regression(args['panel'].copy())
+
+
+def setup_place_metrics(fx: Fixtures) -> Dict:
+    return {'annual': fx.tables['annual'], 'rows': len(fx.tables['annual'])}
+
+
+def run_place_metrics(args: Dict):
+    m22 = engine('22_build_place_metrics')
+    growth = m22.compute_rankings(m22.compute_growth_metrics(args['annual']))
+    return growth, m22.compute_multifamily_metrics(args['annual'])
+
+
+def setup_master_csv(fx: Fixtures) -> Dict:
+    path = fx.workdir / 'census_bps_master_dataset.csv'
+    if not path.exists():
+        master_csv(fx.tables['panel'], path)
+    return {'path': path, 'places': fx.tables['places'], 'rows': 2 * len(fx.tables['panel'])}
+
+
+def run_master_csv_parse(args: Dict):
+    m21 = engine('21_parse_place_data_format')
+    path = args['path']
+    with patch.multiple(m21, INPUT_ZIP=path.with_suffix('.zip'),  # absent: read the CSV
+                        INPUT_FILE=path, ANNUAL_PERMITS=path.with_name('annual.csv')):
+        df = m21.load_census_data()
+        return m21.aggregate_annual_permits(df, args['places'])
+
+
+def setup_search_index(fx: Fixtures) -> Dict:
+    path = fx.workdir / 'place_metrics_comprehensive.csv'
+    if not path.exists():
+        m22 = engine('22_build_place_metrics')
+        with quiet():
+            growth, mf = run_place_metrics(setup_place_metrics(fx))
+            m22.merge_all_metrics(growth, mf, fx.tables['places']).to_csv(path, index=False)
+    return {'path': path, 'rows': fx.n_places}
+
+
+def run_search_index(args: Dict):
+    m26 = engine('26_generate_search_index')
+    output_dir = str(args['path'].parent / 'public')
+    with patch.multiple(m26, INPUT_FILE=str(args['path']), OUTPUT_DIR=output_dir,
+                        OUTPUT_FILE=os.path.join(output_dir, 'places.json'),
+                        INDEX_FILE=os.path.join(output_dir, 'search', 'places.idx.bin'),
+                        SHARD_DIR=os.path.join(output_dir, 'search')):
+        return m26.main()
+
+
+def setup_search_query(fx: Fixtures) -> Dict:
+    args = setup_search_index(fx)
+    index_path = args['path'].parent / 'public' / 'search' / 'places.idx.bin'
+    if not index_path.exists():
+        with quiet():
+            run_search_index(args)
+    names = fx.tables['places']['place_name']
+    # Every prefix of a sample of names, as typed one keystroke at a time
+    sample = names.sample(n=min(50, len(names)), random_state=SEED).tolist()
+    queries = [name[:n] for name in sample for n in range(1, len(name) + 1)]
+    return {'index': engine('search_index').SearchIndex.load(index_path), 'queries': queries, 'rows': len(queries)}
+
+
+def run_search_query(args: Dict):
+    return [args['index'].search_ids(query) for query in args['queries']]
+
+
+def setup_county_store(fx: Fixtures) -> Dict:
+    counties = fx.get('counties', lambda: synthetic_counties(fx.n_places, fx.n_years))
+    return {'counties': counties, 'dataset': fx.workdir / 'county_permits', 'rows': len(counties)}
+
+
+def run_county_store(args: Dict):
+    m08 = engine('08_fetch_county_permits')
+    with patch.object(m08, 'COUNTY_DATASET', args['dataset']):
+        for year, year_df in args['counties'].groupby('year'):
+            m08.write_year_partition(year_df, year)
+        return m08.load_county_permits(state_fips=STATE_FIPS[0])
+
+
+def setup_serving(fx: Fixtures) -> Dict:
+    def build():
+        counties = fx.get('counties', lambda: synthetic_counties(fx.n_places, fx.n_years))
+        counties = counties.rename(columns={'sf_annual': 'sf_units', 'mf_annual': 'mf_units',
+                                            'total_annual': 'total_units', 'county_name': 'name'})
+        permits = fx.tables['panel']
+        places = pd.DataFrame({
+            'geo_level': 'place', 'fips': permits['place_fips'], 'state_fips': permits['state_fips'],
+            'name': permits['city_name'], 'year': permits['year'], 'sf_units': permits['single_family'],
+            'mf_units': permits['multi_family'], 'total_units': permits['total_permits'], 'months': 12,
+        })
+        return [counties.assign(geo_level='county', months=12), places]
+    frames = fx.get('serving_rows', build)
+    return {'frames': frames, 'path': fx.workdir / 'serving.sqlite', 'rows': sum(len(f) for f in frames)}
+
+
+def run_serving_build(args: Dict):
+    return engine('serving_store').build_store(args['path'], args['frames'], [])
+
+
+def setup_serving_lookup(fx: Fixtures) -> Dict:
+    args = setup_serving(fx)
+    if not args['path'].exists():
+        run_serving_build(args)
+    fips = fx.tables['places']['place_fips'].to_numpy()
+    sample = np.random.default_rng(SEED).choice(fips, size=1_000)
+    return {'path': args['path'], 'fips': sample.tolist(), 'rows': len(sample)}
+
+
+def run_serving_lookup(args: Dict):
+    store = engine('serving_store').ServingStore(args['path'])
+    try:
+        results = [store.series('place', fips, 2018, 2022) for fips in args['fips']]
+        results += [store.counties(state) for state in STATE_FIPS]
+    finally:
+        store.close()
+    return results
+
+
+def setup_model_predict(fx: Fixtures) -> Dict:
+    from sklearn.ensemble import RandomForestRegressor
+
+    reform_model = engine('reform_model')
+
+    def train():
+        # train_model_v3.py's forest on its 502-row synthetic target
+        rng = np.random.default_rng(SEED)
+        codes = rng.integers(0, len(reform_model.REFORM_TYPE_CODES), 502)
+        X = pd.DataFrame({'reform_type_encoded': codes.astype(float),
+                          'baseline_wrluri': rng.uniform(-0.1, 2.3, 502),
+                          'reform_year': rng.integers(2012, 2025, 502)})
+        y = np.array([12.5, 8.2, 10.8, 15.0, 6.5])[codes] + (X['baseline_wrluri'] - 1.0) * 3.5 + rng.normal(0, 3, 502)
+        model = RandomForestRegressor(n_estimators=100, random_state=42, max_depth=10).fit(X, y)
+        return reform_model.ModelServer(model, reform_model.build_schema(model, X, target='permit_change'))
+
+    server = fx.get('model_server', train)
+    # Every place x every reform type, as reform_model.py score builds it
+    reform_types = list(reform_model.REFORM_TYPE_CODES)
+    rng = np.random.default_rng(SEED)
+    batch = pd.DataFrame({
+        'reform_type': np.tile(reform_types, fx.n_places),
+        'baseline_wrluri': np.repeat(rng.uniform(0, 2.2, fx.n_places), len(reform_types)),
+        'reform_year': LAST_YEAR,
+    })
+    return {'server': server, 'batch': batch, 'rows': len(batch)}
+
+
+CASES = [
+    Case('scm_weights', setup_scm,
+         lambda a: engine('32_synthetic_control').optimize_scm_weights(a['treated_pre'], a['donor_data_pre']),
+         max_places=1_000),
+    Case('did_match', setup_did, run_did_match, max_places=10_000),
+    Case('did_bootstrap', setup_did_bootstrap, run_did_bootstrap, max_places=10_000),
+    Case('event_study_panel', setup_event_study, run_event_study_panel),
+    Case('event_study_regression', setup_event_study_regression, run_event_study_regression),
+    Case('place_metrics', setup_place_metrics, run_place_metrics),
+    Case('master_csv_parse', setup_master_csv, run_master_csv_parse),
+    Case('search_index', setup_search_index, run_search_index),
+    Case('search_query', setup_search_query, run_search_query),
+    Case('county_store', setup_county_store, run_county_store),
+    Case('serving_build', setup_serving, run_serving_build),
+    Case('serving_lookup', setup_serving_lookup, run_serving_lookup),
+    Case('model_predict', setup_model_predict, lambda a: a['server'].predict(a['batch'])),
+]
+
+
+def run_case(case: Case, fx: Fixtures, repeat: int) -> List[float]:
+    """Time `repeat` calls; each is recorded as stage '{case}@{scale}'."""
+    args = case.setup(fx)
+    timings = []
+    for _ in range(repeat):
+        np.random.seed(SEED)  # the engines draw from the global generator
+        with quiet(), measure(f"{case.name}@{fx.scale}", rows_in=args.get('rows'), script='benchmarks') as m:
+            start = time.perf_counter()
+            result = case.run(args)
+            timings.append(time.perf_counter() - start)
+            m.rows_out = count_rows(result)
+    return timings
+
+
+def main():
+    args = sys.argv[1:]
+
+    def option(flag: str, default: Optional[str] = None) -> Optional[str]:
+        return args[args.index(flag) + 1] if flag in args else default
+
+    if '--list' in args:
+        for case in CASES:
+            limit = f"up to {case.max_places:,} places" if case.max_places else "all scales"
+            print(f"{case.name:<24} {limit}")
+        print("\nScales: " + ", ".join(f"{k} ({p:,} places x {y} years)" for k, (p, y) in SCALES.items()))
+        return 0
+
+    scales = option('--scales', ','.join(DEFAULT_SCALES)).split(',')
+    names = option('--cases')
+    cases = [c for c in CASES if names is None or c.name in names.split(',')]
+    repeat = int(option('--repeat', '1'))
+
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown or not cases:
+        print(f"ERROR: unknown scale(s) {unknown} or no matching cases (see --list)")
+        return 2
+
+    print("=" * 70)
+    print(f"BENCHMARKS  run {RUN_ID}")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory(prefix='zoning_bench_') as tmp:
+        for scale in scales:
+            fx = Fixtures(scale, Path(tmp))
+            print(f"\n{scale}: {fx.n_places:,} places x {fx.n_years} years")
+            for case in cases:
+                if case.max_places is not None and fx.n_places > case.max_places:
+                    print(f"  {case.name:<24} skipped (max_places {case.max_places:,})")
+                    continue
+                timings = run_case(case, fx, repeat)
+                print(f"  {case.name:<24} best {min(timings):8.3f}s  median {np.median(timings):8.3f}s")
+
+    print(f"\nResults: {run_path()}")
+    print(f"Compare: python scripts/perf.py compare <earlier run> {RUN_ID}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
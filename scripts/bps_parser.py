@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Vectorized parser for Census Building Permits Survey (BPS) text files.
+
+Source: https://www2.census.gov/econ/bps/{State,County,Place}/
+- State:  st{year}a.txt (annual), st{yymm}c.txt (monthly)
+- County: co{year}a.txt, co{yymm}c.txt
+- Place:  {region}{year}a.txt, {region}{yymm}c.txt
+
+All files are comma-separated with two header lines, identifier columns
+followed by (buildings, units, value) triples for 1-unit, 2-unit, 3-4 unit and
+5+ unit structures. Columns are selected by position (LAYOUTS), counts are
+coerced with pd.to_numeric(errors='coerce') and SF/MF/total units are array
+expressions, so a county year file parses in milliseconds instead of looping
+over rows.
+
+A survey date of YYYY99 (or a bare YYYY) marks an annual total; the
+`is_annual` mask separates those rows from monthly ones.
+"""
+
+from typing import Dict
+
+import pandas as pd
+
+HEADER_ROWS = 2
+ANNUAL_MONTH = 99
+
+# Units by structure type, in file order; each type is a (bldgs, units, value) triple
+STRUCTURE_TYPES = ['sf_units', 'units_2', 'units_3_4', 'units_5plus']
+
+# Identifier columns (position -> name) and the position of the first 1-unit column
+LAYOUTS: Dict[str, Dict] = {
+    'state': {
+        'ids': {0: 'survey_date', 1: 'state_fips', 2: 'region', 3: 'division', 4: 'state_name'},
+        'units_start': 5,
+    },
+    'county': {
+        'ids': {0: 'survey_date', 1: 'state_fips', 2: 'county_fips', 3: 'region', 4: 'division',
+                5: 'county_name'},
+        'units_start': 6,
+    },
+    'place': {
+        'ids': {0: 'survey_date', 1: 'state_fips', 2: 'place_id', 3: 'county_fips',
+                4: 'census_place_code', 5: 'place_fips', 16: 'place_name'},
+        'units_start': 17,
+    },
+}
+
+FIPS_WIDTHS = {'state_fips': 2, 'county_fips': 3, 'place_fips': 5}
+
+
+def unit_positions(geo_level: str) -> Dict[int, str]:
+    """Column position of the units count for each structure type."""
+    start = LAYOUTS[geo_level]['units_start']
+    return {start + 3 * i + 1: name for i, name in enumerate(STRUCTURE_TYPES)}
+
+
+def parse_bps_text(source, geo_level: str = 'state', period: str = 'all') -> pd.DataFrame:
+    """
+    Parse a BPS text file.
+
+    Args:
+        source: path or file-like object (e.g. StringIO(response.text))
+        geo_level: 'state', 'county' or 'place'
+        period: 'all', 'annual' (month 99 rows) or 'monthly'
+
+    Returns:
+        DataFrame with the layout's identifier columns plus year, month,
+        is_annual, sf_units, units_2, units_3_4, units_5plus, mf_units and
+        total_units. County rows also get the 5-digit `fips`.
+    """
+    layout = LAYOUTS[geo_level]
+    columns = {**layout['ids'], **unit_positions(geo_level)}
+
+    raw = pd.read_csv(
+        source,
+        header=None,
+        skiprows=HEADER_ROWS,
+        usecols=sorted(columns),
+        dtype=str,
+        encoding='latin-1',
+        skipinitialspace=True,
+    ).rename(columns=columns)
+
+    # Data rows start with a numeric survey date (YYYYMM, or YYYY for annual files)
+    dates = raw['survey_date'].fillna('').str.strip()
+    valid = dates.str.fullmatch(r'\d{4}(\d{2})?')
+    df = raw[valid].copy()
+    dates = dates[valid]
+
+    df['survey_date'] = dates
+    df['year'] = dates.str[:4].astype(int)
+    df['month'] = pd.to_numeric(dates.str[4:6], errors='coerce').fillna(ANNUAL_MONTH).astype(int)
+    df['is_annual'] = df['month'] == ANNUAL_MONTH
+
+    if period == 'annual':
+        df = df[df['is_annual']]
+    elif period == 'monthly':
+        df = df[~df['is_annual']]
+
+    for col in layout['ids'].values():
+        if col != 'survey_date':
+            df[col] = df[col].str.strip()
+    for col, width in FIPS_WIDTHS.items():
+        if col in df.columns:
+            df[col] = df[col].str.zfill(width)
+
+    counts = df[STRUCTURE_TYPES].apply(pd.to_numeric, errors='coerce').fillna(0).astype(int)
+    df[STRUCTURE_TYPES] = counts
+    df['mf_units'] = counts['units_2'] + counts['units_3_4'] + counts['units_5plus']
+    df['total_units'] = counts['sf_units'] + df['mf_units']
+
+    if geo_level == 'county':
+        df['fips'] = df['state_fips'] + df['county_fips']
+
+    return df.reset_index(drop=True)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Offline place geocoding from the Census Gazetteer places file.
+
+Source: https://www2.census.gov/geo/docs/maps-data/data/gazetteer/
+        (e.g. 2024_Gazetteer/2024_Gaz_place_national.zip, tab-separated,
+        one row per incorporated place / CDP with GEOID and INTPTLAT/INTPTLONG)
+
+The file is loaded into an in-memory index keyed by normalized
+(state_fips, place name), with and without the legal descriptor. Lookups
+try, in order:
+1. exact normalized full name ("St. Louis city" == "Saint Louis city")
+2. name with its legal descriptor removed ("Los Angeles" -> "Los Angeles
+   city"), first for queries without a descriptor, then for the rest
+3. trigram candidates within the state, verified by edit-distance ratio
+
+Steps 2-3 only use places whose stripped name is unique in their state, so
+"Jackson" never picks between "Jackson city" and "Jackson township"; those
+are only found by their full names.
+
+Steps 1-2 are vectorized merges, so a full 20,000-place batch resolves in well
+under a second with no network access; only leftovers go through step 3, and
+only against same-state places that no other query already matched.
+"""
+
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Legal/statistical descriptors the Gazetteer appends to place names
+PLACE_SUFFIXES = [
+    'city and borough', 'consolidated government', 'metropolitan government',
+    'unified government', 'urban county', 'city', 'town', 'village', 'borough',
+    'township', 'municipality', 'plantation', 'cdp', 'comunidad', 'zona urbana',
+]
+SUFFIX_PATTERN = r'\s+(?:' + '|'.join(re.escape(s) for s in PLACE_SUFFIXES) + r')$'
+
+ABBREVIATIONS = [
+    (r'\bst\b', 'saint'),
+    (r'\bste\b', 'sainte'),
+    (r'\bft\b', 'fort'),
+    (r'\bmt\b', 'mount'),
+]
+
+FUZZY_MIN_JACCARD = 0.3  # trigram prefilter
+FUZZY_MIN_RATIO = 0.85  # SequenceMatcher ratio to accept a fuzzy match
+FUZZY_CANDIDATES = 5
+
+
+def normalize_place_names(names: pd.Series) -> pd.Series:
+    """Lowercase, drop parentheticals/punctuation and expand common abbreviations."""
+    s = names.fillna('').astype(str).str.lower()
+    s = s.str.replace(r'\(.*?\)', ' ', regex=True)  # "(balance)", "(pt.)"
+    s = s.str.replace(r'[^a-z0-9 ]', ' ', regex=True)
+    s = s.str.replace(r'\s+', ' ', regex=True).str.strip()
+    for pattern, replacement in ABBREVIATIONS:
+        s = s.str.replace(pattern, replacement, regex=True)
+    return s
+
+
+def strip_place_suffix(keys: pd.Series) -> pd.Series:
+    """Remove one trailing legal descriptor ("city", "town", "village", ...)."""
+    return keys.str.replace(SUFFIX_PATTERN, '', regex=True)
+
+
+def trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class GazetteerIndex:
+    """In-memory (state_fips, normalized name) index over Gazetteer places."""
+
+    def __init__(self, places: pd.DataFrame):
+        """
+        Args:
+            places: DataFrame with geoid, state_fips, name, latitude, longitude
+        """
+        places = places.copy()
+        places['full_key'] = normalize_place_names(places['name'])
+        places['key'] = strip_place_suffix(places['full_key'])
+
+        # Prefer active incorporated places over CDPs when full names collide
+        if 'funcstat' in places.columns:
+            places['_rank'] = (places['funcstat'] != 'A').astype(int)
+            places = places.sort_values(['_rank', 'geoid'], kind='stable').drop(columns='_rank')
+        places = places.drop_duplicates(subset=['state_fips', 'full_key'], keep='first')
+
+        self.places = places.reset_index(drop=True)
+        # Same stripped name as another place in the state: reachable by full name only
+        self.places['ambiguous'] = self.places.duplicated(['state_fips', 'key'], keep=False)
+        self._keys = self.places['key'].tolist()
+
+    @classmethod
+    def from_file(cls, path: Path) -> 'GazetteerIndex':
+        """Load a Gazetteer places file (tab-separated, national or per state)."""
+        raw = pd.read_csv(path, sep='\t', dtype=str, encoding='latin-1')
+        raw.columns = raw.columns.str.strip()  # last header carries trailing spaces
+
+        places = pd.DataFrame({
+            'geoid': raw['GEOID'].str.zfill(7),
+            'name': raw['NAME'],
+            'latitude': pd.to_numeric(raw['INTPTLAT'], errors='coerce'),
+            'longitude': pd.to_numeric(raw['INTPTLONG'], errors='coerce'),
+        })
+        places['state_fips'] = places['geoid'].str[:2]
+        if 'FUNCSTAT' in raw.columns:
+            places['funcstat'] = raw['FUNCSTAT']
+
+        return cls(places)
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def state_centroids(self) -> Dict[str, Tuple[float, float]]:
+        """Mean internal point of each state's places."""
+        means = self.places.groupby('state_fips')[['latitude', 'longitude']].mean()
+        return {state: (row.latitude, row.longitude) for state, row in means.iterrows()}
+
+    def _match_keys(self, queries: pd.DataFrame, key_col: str, index_col: str) -> pd.Series:
+        """
+        Row position in self.places for each query key, NaN when absent.
+
+        index_col 'full_key' matches every place; 'key' (stripped) only
+        places whose stripped name is unambiguous in their state.
+        """
+        places = self.places if index_col == 'full_key' else self.places[~self.places['ambiguous']]
+        positions = places[['state_fips', index_col]].reset_index().rename(columns={'index': '_pos'})
+        matched = queries[['state_fips', key_col]].merge(
+            positions, left_on=['state_fips', key_col], right_on=['state_fips', index_col], how='left'
+        )
+        return pd.Series(matched['_pos'].values, index=queries.index)
+
+    def _fuzzy_pool(self, positions) -> Tuple[Dict, Dict]:
+        """Trigram postings over the given place positions."""
+        postings = defaultdict(list)
+        grams_by_pos = {}
+        for pos in positions:
+            grams = trigrams(self._keys[pos])
+            grams_by_pos[pos] = grams
+            for gram in grams:
+                postings[gram].append(pos)
+        return postings, grams_by_pos
+
+    def fuzzy_match(self, key: str, pool: Tuple[Dict, Dict]) -> Optional[int]:
+        """Best fuzzy candidate position in a trigram pool, or None."""
+        postings, grams_by_pos = pool
+        query_grams = trigrams(key)
+        overlap = Counter()
+        for gram in query_grams:
+            overlap.update(postings.get(gram, ()))
+
+        scored = []
+        for pos, shared in overlap.items():
+            jaccard = shared / (len(query_grams) + len(grams_by_pos[pos]) - shared)
+            if jaccard >= FUZZY_MIN_JACCARD:
+                scored.append((jaccard, pos))
+
+        best_pos, best_ratio = None, FUZZY_MIN_RATIO
+        for _, pos in sorted(scored, reverse=True)[:FUZZY_CANDIDATES]:
+            ratio = SequenceMatcher(None, key, self._keys[pos]).ratio()
+            if ratio >= best_ratio:
+                best_pos, best_ratio = pos, ratio
+        return best_pos
+
+    def lookup(self, state_fips: pd.Series, place_names: pd.Series, fuzzy: bool = True,
+               one_to_one: bool = False, exclude: Iterable[str] = ()) -> pd.DataFrame:
+        """
+        Resolve place names to Gazetteer records.
+
+        Returns a DataFrame aligned with the inputs: geoid, latitude,
+        longitude and match ('exact', 'suffix', 'fuzzy' or None).
+
+        Places whose geoid is in exclude are never matched. Fuzzy matches only
+        use places no other query matched, and a place two fuzzy queries both
+        pick is given to neither. With one_to_one the same holds for every
+        stage: a matched place is claimed for the later stages, and queries
+        that tie for one place in the same stage stay unmatched (as does the
+        place).
+        """
+        queries = pd.DataFrame({'state_fips': state_fips.astype(str).str.zfill(2).values})
+        queries['key'] = normalize_place_names(pd.Series(place_names.values))
+        queries['stripped'] = strip_place_suffix(queries['key'])
+        queries['bare'] = queries['key'].where(queries['key'] == queries['stripped'])  # no descriptor
+
+        excluded = pd.Index(exclude)
+        claimed = set(self.places.index[self.places['geoid'].isin(excluded)]) if len(excluded) else set()
+        position = pd.Series(np.nan, index=queries.index)
+        match = pd.Series(None, index=queries.index, dtype=object)
+        contested = pd.Series(False, index=queries.index)  # lost a tie: stays unmatched
+
+        stages = (('exact', 'key', 'full_key'), ('suffix', 'bare', 'key'), ('suffix', 'stripped', 'key'))
+        for stage, key_col, index_col in stages:
+            todo = queries[position.isna() & ~contested & queries[key_col].notna()]
+            found = self._match_keys(todo, key_col, index_col).dropna()
+            found = found[~found.isin(claimed)]
+            if one_to_one:
+                tied = found.duplicated(keep=False)
+                contested[found.index[tied]] = True
+                claimed.update(found[tied].astype(int))
+                found = found[~tied]
+                claimed.update(found.astype(int))
+            position[found.index] = found
+            match[found.index] = stage
+
+        if fuzzy and (position.isna() & ~contested).any():
+            # Candidates: unambiguous same-state places no other query has claimed
+            claimed.update(position.dropna().astype(int))
+            unresolved = queries[position.isna() & ~contested]
+            picks = {}
+            for state, group in unresolved.groupby('state_fips'):
+                in_state = (self.places['state_fips'] == state) & ~self.places['ambiguous']
+                candidates = self.places.index[in_state].difference(list(claimed))
+                pool = self._fuzzy_pool(candidates)
+                for idx, key in group['stripped'].items():
+                    pos = self.fuzzy_match(key, pool)
+                    if pos is not None:
+                        picks[idx] = pos
+            picks = pd.Series(picks, dtype=float)
+            picks = picks[~picks.duplicated(keep=False)]
+            position[picks.index] = picks
+            match[picks.index] = 'fuzzy'
+
+        found = position.notna()
+        result = pd.DataFrame(index=queries.index, columns=['geoid', 'latitude', 'longitude'])
+        rows = self.places.iloc[position[found].astype(int)]
+        result.loc[found, 'geoid'] = rows['geoid'].values
+        result.loc[found, 'latitude'] = rows['latitude'].values
+        result.loc[found, 'longitude'] = rows['longitude'].values
+        result['latitude'] = result['latitude'].astype(float)
+        result['longitude'] = result['longitude'].astype(float)
+        result['match'] = match
+
+        result.index = place_names.index
+        return result
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Geocoding engine for the place pipeline (used by script 23).
+
+Components:
+- GeocodeCache: SQLite cache keyed by (place_name, state_fips), committed per result
+- TokenBucket (async_http.py): asyncio rate limiter shared by all in-flight requests
+- NominatimGeocoder: concurrent, rate-limited, retrying client over one pooled HTTP session
+
+Every answered lookup (hit or confirmed miss) is written to the cache as soon as
+it arrives, so an interrupted run resumes exactly where it stopped. Only a 200
+with an empty result list is a confirmed miss; throttling and 5xx responses are
+retried, and any other failure (403 ban, 404, exhausted retries) is left out of
+the cache and retried on the next run.
+
+The endpoint is configurable (base_url), so the engine can be exercised against
+a local stub HTTP server instead of the public Nominatim service.
+"""
+
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import requests
+
+from async_http import THROTTLE_STATUS, TokenBucket, make_session
+
+# Service configuration
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+USER_AGENT = "zoning-reform-analysis"
+
+CacheKey = Tuple[str, str]  # (place_name, state_fips)
+
+
+class GeocodeCache:
+    """Persistent geocode results in SQLite, one row per (place_name, state_fips)."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS geocodes (
+            place_name  TEXT NOT NULL,
+            state_fips  TEXT NOT NULL,
+            latitude    REAL,
+            longitude   REAL,
+            county_name TEXT,
+            source      TEXT NOT NULL,
+            updated_at  REAL NOT NULL,
+            PRIMARY KEY (place_name, state_fips)
+        )
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(self.SCHEMA)
+        self.conn.commit()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM geocodes").fetchone()[0]
+
+    def load(self) -> pd.DataFrame:
+        """All cached results as a DataFrame."""
+        return pd.read_sql_query(
+            "SELECT place_name, state_fips, latitude, longitude, county_name, source FROM geocodes",
+            self.conn,
+            dtype={'state_fips': str},
+        )
+
+    def keys(self) -> set:
+        """Set of (place_name, state_fips) already answered."""
+        return set(self.conn.execute("SELECT place_name, state_fips FROM geocodes"))
+
+    def put(self, key: CacheKey, geo: Dict):
+        """Insert or replace one result and commit immediately."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key[0], key[1], geo.get('latitude'), geo.get('longitude'),
+             geo.get('county_name', ''), geo['source'], time.time()),
+        )
+        self.conn.commit()
+
+    def import_csv(self, csv_path: Path) -> int:
+        """
+        Seed the cache from the legacy CSV cache.
+
+        Rows produced by the random fallback are skipped so those places get a
+        real lookup. Existing SQLite rows win over CSV rows.
+        """
+        legacy = pd.read_csv(csv_path, dtype={'state_fips': str})
+        legacy = legacy[legacy['source'] != 'fallback']
+        now = time.time()
+        rows = [
+            (r.place_name, r.state_fips, r.latitude, r.longitude,
+             r.county_name if isinstance(r.county_name, str) else '', r.source, now)
+            for r in legacy.itertuples(index=False)
+        ]
+        before = len(self)
+        self.conn.executemany("INSERT OR IGNORE INTO geocodes VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self.conn.commit()
+        return len(self) - before
+
+    def close(self):
+        self.conn.close()
+
+
+class NominatimGeocoder:
+    """
+    Concurrent Nominatim client.
+
+    Requests run on worker threads through a shared requests.Session (keep-alive
+    connection pool); the event loop enforces the global rate with a token
+    bucket and bounds in-flight requests with a fixed worker count.
+    """
+
+    def __init__(
+        self,
+        cache: GeocodeCache,
+        base_url: str = NOMINATIM_URL,
+        rate: float = 1.0,
+        concurrency: int = 2,
+        timeout: float = 10,
+        max_retries: int = 3,
+        retry_backoff: float = 2.0,
+    ):
+        self.cache = cache
+        self.base_url = base_url
+        self.rate = rate
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self.session = make_session(concurrency, USER_AGENT)
+
+        self.stats = {'found': 0, 'not_found': 0, 'failed': 0}
+
+    def _get(self, query: str) -> requests.Response:
+        return self.session.get(
+            self.base_url,
+            params={'q': query, 'format': 'json', 'limit': 1, 'addressdetails': 1},
+            timeout=self.timeout,
+        )
+
+    async def lookup(self, query: str, bucket: TokenBucket) -> Optional[Dict]:
+        """
+        Geocode one query.
+
+        Returns a result dict (source 'nominatim' on a hit, 'not_found' on an
+        empty answer), or None when the lookup failed: every attempt was
+        throttled or errored, or the service refused it outright.
+        """
+        for attempt in range(self.max_retries):
+            await bucket.acquire()
+            try:
+                response = await asyncio.to_thread(self._get, query)
+                if response.status_code == 200:
+                    results = response.json()
+                    if not results:
+                        return {'latitude': None, 'longitude': None, 'county_name': '', 'source': 'not_found'}
+                    result = results[0]
+                    return {
+                        'latitude': float(result['lat']),
+                        'longitude': float(result['lon']),
+                        'county_name': result.get('address', {}).get('county', ''),
+                        'source': 'nominatim',
+                    }
+                if response.status_code not in THROTTLE_STATUS:
+                    return None  # refused (e.g. 403 ban): not retried now, not cached
+            except (requests.exceptions.RequestException, ValueError, KeyError):
+                pass
+
+            if attempt < self.max_retries - 1:
+                await asyncio.sleep(self.retry_backoff ** attempt)
+
+        return None
+
+    async def geocode_all(self, items: Iterable[Tuple[CacheKey, str]], progress_every: int = 100) -> Dict:
+        """
+        Geocode (key, query) pairs not yet in the cache.
+
+        Each answer is committed to the cache as it arrives.
+        """
+        done = self.cache.keys()
+        queue: asyncio.Queue = asyncio.Queue()
+        for key, query in items:
+            if key not in done:
+                queue.put_nowait((key, query))
+
+        bucket = TokenBucket(self.rate)
+        completed = 0
+
+        async def worker():
+            nonlocal completed
+            while True:
+                try:
+                    key, query = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                geo = await self.lookup(query, bucket)
+                if geo is None:
+                    self.stats['failed'] += 1
+                else:
+                    self.cache.put(key, geo)
+                    self.stats['found' if geo['source'] == 'nominatim' else 'not_found'] += 1
+                completed += 1
+                if completed % progress_every == 0:
+                    print(f"  Processed {completed:,} places...")
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        return self.stats
+
+    def close(self):
+        self.session.close()
+
+
+def geocode_pending(
+    cache: GeocodeCache,
+    items: List[Tuple[CacheKey, str]],
+    **geocoder_options,
+) -> Dict:
+    """Synchronous entry point: geocode every uncached item and return counts."""
+    geocoder = NominatimGeocoder(cache, **geocoder_options)
+    try:
+        return asyncio.run(geocoder.geocode_all(items))
+    finally:
+        geocoder.close()
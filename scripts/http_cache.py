@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Shared on-disk HTTP cache for the fetch scripts (01, 02, 05, 06, 08, 11, 13, 14).
+
+Layout under CACHE_DIR (default data/raw/.http_cache):
+- entries/{key}.json: one entry per request, key = SHA-256 of the canonical URL
+  (query parameters sorted, API keys removed) with status, ETag, Last-Modified,
+  content type and the body digest
+- bodies/{sha256}.gz: gzip-compressed response bodies, content-addressed, so
+  identical downloads are stored once
+
+Freshness:
+- Resources whose URL/params only mention years before HISTORICAL_CUTOFF
+  (st2015a.txt, co2020a.txt, /2019/acs/acs5, ...) never change once published
+  and are served from disk without touching the network - provided the stored
+  body looks like data. A 200 whose body is empty, an HTML page or an API
+  error payload ({"error": ...}, "error: ...") is stored but revalidated like
+  a current resource, so a transient failure is not kept forever.
+- Everything else (current-year files, Zillow's rolling CSV) is revalidated with
+  If-None-Match / If-Modified-Since; a 304 reuses the stored body.
+- HTTP_CACHE_OFFLINE=1 serves every request from disk and raises
+  requests.exceptions.ConnectionError for anything not cached, so scripts can
+  be re-run and tested with zero network access.
+
+Only 200 responses are stored. cached_get() is a drop-in for requests.get and
+returns a real requests.Response either way. For large files,
+HttpCache.get_body_path() streams a download straight into the cache and
+returns the path of the gzip body without loading it into memory.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+CACHE_DIR = Path(os.environ.get('HTTP_CACHE_DIR', 'data/raw/.http_cache'))
+OFFLINE = os.environ.get('HTTP_CACHE_OFFLINE', '') == '1'
+CHUNK_SIZE = 1024 * 1024  # bytes per streamed read
+
+# The latest complete year still receives revisions; anything older is final
+HISTORICAL_CUTOFF = datetime.now().year - 1
+
+SECRET_PARAMS = {'key', 'api_key', 'apikey', 'registrationkey', 'token'}
+YEAR_PATTERN = re.compile(r'(?<!\d)((?:19|20)\d{2})(?!\d)')
+
+# Start of a 200 body that is really a failure: HTML error page or API error payload
+HEAD_BYTES = 1024
+ERROR_BODY = re.compile(rb'\A\s*(?:<!doctype html|<html|\{\s*"errors?"\s*:|\[?\s*"?error\b)', re.I)
+
+
+def canonical_url(url: str, params: Optional[Dict] = None) -> str:
+    """URL with params merged in, sorted, and API keys removed."""
+    prepared = requests.Request('GET', url, params=params).prepare().url
+    parts = urlsplit(prepared)
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in SECRET_PARAMS
+    )
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+
+def cache_key(url: str, params: Optional[Dict] = None) -> str:
+    return hashlib.sha256(canonical_url(url, params).encode()).hexdigest()
+
+
+def is_immutable(url: str, params: Optional[Dict] = None) -> bool:
+    """True when the request names only years that can no longer be revised."""
+    years = [int(y) for y in YEAR_PATTERN.findall(canonical_url(url, params))]
+    return bool(years) and max(years) < HISTORICAL_CUTOFF
+
+
+def is_data_body(head: bytes) -> bool:
+    """False for a body (its first HEAD_BYTES) that is empty, an HTML page or an API error."""
+    return bool(head.strip()) and not ERROR_BODY.match(head)
+
+
+class HttpCache:
+    """Content-addressed response cache with conditional revalidation."""
+
+    def __init__(
+        self,
+        cache_dir: Path = CACHE_DIR,
+        offline: bool = OFFLINE,
+        session: Optional[requests.Session] = None,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.offline = offline
+        self.session = session or requests.Session()
+        self.stats = {'hit': 0, 'revalidated': 0, 'fetched': 0, 'stale': 0}
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / 'entries' / f"{key}.json"
+
+    def _body_path(self, digest: str) -> Path:
+        return self.cache_dir / 'bodies' / f"{digest}.gz"
+
+    def _write_atomic(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        tmp_path.replace(path)
+
+    def load_entry(self, key: str) -> Optional[Dict]:
+        path = self._entry_path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if self._body_path(entry['sha256']).exists() else None
+
+    def is_final(self, key: str, entry: Dict) -> bool:
+        """Whether an entry may be served without revalidation once its URL is immutable."""
+        if 'data' not in entry:  # entries written before the body check
+            with gzip.open(self._body_path(entry['sha256']), 'rb') as f:
+                entry['data'] = is_data_body(f.read(HEAD_BYTES))
+            self._write_atomic(self._entry_path(key), json.dumps(entry, indent=2).encode())
+        return entry['data']
+
+    def store(self, key: str, url: str, response: requests.Response) -> Dict:
+        """Save a 200 response; returns the new entry."""
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        body_path = self._body_path(digest)
+        if not body_path.exists():
+            self._write_atomic(body_path, gzip.compress(body))
+        return self._write_entry(key, url, digest, len(body), response, body[:HEAD_BYTES])
+
+    def store_stream(self, key: str, url: str, response: requests.Response) -> Dict:
+        """Save a 200 response opened with stream=True, chunk by chunk; returns the new entry."""
+        tmp_path = self.cache_dir / 'bodies' / f"download.{os.getpid()}.{key[:16]}.tmp"
+        tmp_path.parent.mkdir(parents=True, exist_ok=True)
+        digest, size, head = hashlib.sha256(), 0, b''
+        try:
+            with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+                    if len(head) < HEAD_BYTES:
+                        head += chunk[:HEAD_BYTES - len(head)]
+            body_path = self._body_path(digest.hexdigest())
+            if body_path.exists():
+                tmp_path.unlink()
+            else:
+                tmp_path.replace(body_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return self._write_entry(key, url, digest.hexdigest(), size, response, head)
+
+    def _write_entry(self, key: str, url: str, digest: str, size: int, response: requests.Response,
+                     head: bytes) -> Dict:
+        entry = {
+            'url': url,
+            'sha256': digest,
+            'size': size,
+            'data': is_data_body(head),
+            'content_type': response.headers.get('Content-Type', ''),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+        }
+        self._write_atomic(self._entry_path(key), json.dumps(entry, indent=2).encode())
+        return entry
+
+    def _touch(self, key: str, entry: Dict):
+        entry['fetched_at'] = time.time()
+        self._write_atomic(self._entry_path(key), json.dumps(entry, indent=2).encode())
+
+    def response_from_entry(self, entry: Dict) -> requests.Response:
+        """Rebuild a requests.Response from a cache entry."""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict({'Content-Type': entry['content_type']})
+        if entry.get('etag'):
+            response.headers['ETag'] = entry['etag']
+        if entry.get('last_modified'):
+            response.headers['Last-Modified'] = entry['last_modified']
+        with open(self._body_path(entry['sha256']), 'rb') as f:
+            response._content = gzip.decompress(f.read())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        immutable: Optional[bool] = None,
+        headers: Optional[Dict] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Cached GET.
+
+        Args:
+            url, params, headers, **kwargs: as for requests.get
+            immutable: override the year-based freshness rule (an error body
+                is still revalidated)
+        """
+        canonical = canonical_url(url, params)
+        key = hashlib.sha256(canonical.encode()).hexdigest()
+        entry = self.load_entry(key)
+        if immutable is None:
+            immutable = is_immutable(url, params)
+
+        if entry is not None and (self.offline or (immutable and self.is_final(key, entry))):
+            self.stats['hit'] += 1
+            return self.response_from_entry(entry)
+
+        if self.offline:
+            raise requests.exceptions.ConnectionError(f"Offline and not cached: {canonical}")
+
+        try:
+            response = self.session.get(url, params=params, headers=self._conditional(entry, headers), **kwargs)
+        except requests.exceptions.RequestException:
+            if entry is None:
+                raise
+            self.stats['stale'] += 1
+            return self.response_from_entry(entry)
+
+        if response.status_code == 304 and entry is not None:
+            self.stats['revalidated'] += 1
+            self._touch(key, entry)
+            return self.response_from_entry(entry)
+
+        if response.status_code == 200:
+            self.stats['fetched'] += 1
+            self.store(key, canonical, response)
+        response.from_cache = False
+        return response
+
+    def get_body_path(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        immutable: Optional[bool] = None,
+        headers: Optional[Dict] = None,
+        **kwargs,
+    ) -> Path:
+        """
+        Refresh the entry for a URL (same freshness rules as get) and return the
+        path of its gzip body, so large files can be parsed as a stream from disk.
+
+        A download is streamed into the cache in CHUNK_SIZE pieces and a hit
+        only checks the entry, so the body is never held in memory. Raises
+        requests.exceptions.HTTPError for a non-200 answer.
+        """
+        canonical = canonical_url(url, params)
+        key = hashlib.sha256(canonical.encode()).hexdigest()
+        entry = self.load_entry(key)
+        if immutable is None:
+            immutable = is_immutable(url, params)
+
+        if entry is not None and (self.offline or (immutable and self.is_final(key, entry))):
+            self.stats['hit'] += 1
+            return self._body_path(entry['sha256'])
+
+        if self.offline:
+            raise requests.exceptions.ConnectionError(f"Offline and not cached: {canonical}")
+
+        try:
+            response = self.session.get(url, params=params, headers=self._conditional(entry, headers),
+                                        stream=True, **kwargs)
+        except requests.exceptions.RequestException:
+            if entry is None:
+                raise
+            self.stats['stale'] += 1
+            return self._body_path(entry['sha256'])
+
+        with response:
+            if response.status_code == 304 and entry is not None:
+                self.stats['revalidated'] += 1
+                self._touch(key, entry)
+            elif response.status_code == 200:
+                self.stats['fetched'] += 1
+                entry = self.store_stream(key, canonical, response)
+            else:
+                response.raise_for_status()
+                raise requests.exceptions.HTTPError(f"HTTP {response.status_code}, not cached: {url}",
+                                                    response=response)
+        return self._body_path(entry['sha256'])
+
+    @staticmethod
+    def _conditional(entry: Optional[Dict], headers: Optional[Dict]) -> Dict:
+        """Request headers plus If-None-Match / If-Modified-Since from a stored entry."""
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.get('etag'):
+                request_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                request_headers['If-Modified-Since'] = entry['last_modified']
+        return request_headers
+
+
+_default_cache: Optional[HttpCache] = None
+
+
+def default_cache() -> HttpCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = HttpCache()
+    return _default_cache
+
+
+def cached_get(url: str, params: Optional[Dict] = None, **kwargs) -> requests.Response:
+    """Drop-in replacement for requests.get backed by the shared cache."""
+    return default_cache().get(url, params=params, **kwargs)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Resumable successive-halving hyperparameter search for the reform-impact models.
+
+The same scheme as sklearn's HalvingRandomSearchCV (resource = training rows):
+
+- n_candidates configurations are drawn from the model's search space with a
+  seeded ParameterSampler.
+- Rung 0 cross-validates every candidate on a small seeded subsample of the
+  rows. Only the best 1/factor of the candidates move on to the next rung,
+  which uses factor times more rows. The last rung uses every row.
+- Within a rung the candidates are scored in parallel. Each candidate runs
+  its K folds in one joblib job.
+
+Unlike HalvingRandomSearchCV, every finished trial is appended to a JSONL
+store at once: {TUNING_DIR}/{study}.jsonl. A trial is keyed by the data
+fingerprint, the estimator, the CV settings, the parameters and the row
+count. Re-running an interrupted search therefore only fits the trials it
+has not stored yet. A new dataset or search setting never reuses old trials.
+
+Environment:
+- TUNING_DIR: trial store directory (default data/outputs/tuning)
+
+Usage:
+    from hyperparameter_search import halving_search
+    search = halving_search('model_v3_random_forest', 'random_forest', X, y, n_jobs=-1)
+    search.best_params, search.best_score, search.summary()
+
+    python scripts/hyperparameter_search.py list
+    python scripts/hyperparameter_search.py show STUDY
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.metrics import r2_score
+from sklearn.model_selection import ParameterSampler
+
+from training_harness import RANDOM_STATE, make_folds
+
+TUNING_DIR = Path(os.environ.get('TUNING_DIR', 'data/outputs/tuning'))
+
+N_CANDIDATES = 27
+FACTOR = 3
+N_SPLITS = 5
+MIN_ROWS_PER_FOLD = 10  # smallest rung keeps at least this many test rows per fold
+
+SEARCH_SPACES = {
+    'random_forest': (
+        RandomForestRegressor(random_state=RANDOM_STATE),
+        {
+            'n_estimators': [50, 100, 200, 400],
+            'max_depth': [3, 5, 8, 10, 15, None],
+            'min_samples_leaf': [1, 2, 5, 10],
+            'max_features': [1.0, 0.5, 'sqrt'],
+        },
+    ),
+    'gradient_boosting': (
+        GradientBoostingRegressor(random_state=RANDOM_STATE),
+        {
+            'n_estimators': [50, 100, 200, 400],
+            'max_depth': [2, 3, 4, 5],
+            'learning_rate': [0.01, 0.03, 0.05, 0.1, 0.2],
+            'subsample': [0.6, 0.8, 1.0],
+            'min_samples_leaf': [1, 5, 10],
+        },
+    ),
+}
+
+
+@dataclass
+class HalvingSearch:
+    study: str
+    model: str
+    best_params: Dict
+    best_score: float
+    best_std: float
+    rungs: List[Dict]
+    trials: pd.DataFrame
+    n_resumed: int
+    n_fitted: int
+    wall_s: float
+    store: Path
+
+    def summary(self) -> Dict:
+        """JSON-ready description of the search and its winner."""
+        return {
+            'method': 'successive_halving_random_search',
+            'model': self.model,
+            'study': self.study,
+            'store': str(self.store),
+            'factor': FACTOR,
+            'n_splits': N_SPLITS,
+            'rungs': self.rungs,
+            'n_trials': len(self.trials),
+            'n_trials_resumed': self.n_resumed,
+            'n_trials_fitted': self.n_fitted,
+            'wall_s': round(self.wall_s, 2),
+            'best_params': self.best_params,
+            'best_cv_r2_mean': round(self.best_score, 4),
+            'best_cv_r2_std': round(self.best_std, 4),
+        }
+
+
+def store_path(study: str) -> Path:
+    return TUNING_DIR / f"{study}.jsonl"
+
+
+def load_trials(study: str) -> Dict[str, Dict]:
+    """Stored trials by key. A line cut short by an interrupted write is skipped."""
+    path = store_path(study)
+    trials = {}
+    if not path.exists():
+        return trials
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                trial = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            trials[trial['key']] = trial
+    return trials
+
+
+def append_trial(study: str, trial: Dict):
+    """One short write per trial, flushed, so a kill loses at most the trial in flight."""
+    TUNING_DIR.mkdir(parents=True, exist_ok=True)
+    with open(store_path(study), 'a') as f:
+        f.write(json.dumps(trial) + '\n')
+
+
+def data_fingerprint(X: pd.DataFrame, y: pd.Series) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(map(str, X.columns))).encode())
+    digest.update(np.ascontiguousarray(X.to_numpy(dtype=np.float64)).tobytes())
+    digest.update(np.ascontiguousarray(y.to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def trial_key(fingerprint: str, model: str, params: Dict, n_rows: int) -> str:
+    payload = json.dumps({'data': fingerprint, 'model': model, 'params': params, 'rows': n_rows,
+                          'n_splits': N_SPLITS, 'seed': RANDOM_STATE}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:20]
+
+
+def sample_candidates(model: str, n_candidates: int) -> List[Dict]:
+    """Seeded draws from the search space, JSON-safe, duplicates dropped."""
+    _, space = SEARCH_SPACES[model]
+    candidates, seen = [], set()
+    for params in ParameterSampler(space, n_iter=n_candidates, random_state=RANDOM_STATE):
+        params = {k: (v.item() if isinstance(v, np.generic) else v) for k, v in sorted(params.items())}
+        signature = json.dumps(params, sort_keys=True)
+        if signature not in seen:
+            seen.add(signature)
+            candidates.append(params)
+    return candidates
+
+
+def rung_sizes(n_rows: int, n_candidates: int, factor: int = FACTOR, n_splits: int = N_SPLITS) -> List[int]:
+    """Rows per rung, growing by factor and ending at n_rows."""
+    min_rows = min(n_rows, n_splits * MIN_ROWS_PER_FOLD)
+    by_candidates = 1 + int(math.floor(math.log(max(n_candidates, 1), factor)))
+    by_rows = 1 + int(math.floor(math.log(n_rows / min_rows, factor)))
+    n_rungs = max(1, min(by_candidates, by_rows))
+    return [int(n_rows // factor ** (n_rungs - 1 - i)) for i in range(n_rungs)]
+
+
+def cross_validate(model: str, params: Dict, X: np.ndarray, y: np.ndarray) -> Dict:
+    """K-fold R² of one candidate on the given rows (worker process)."""
+    estimator = clone(SEARCH_SPACES[model][0]).set_params(**params)
+    scores = []
+    start = time.perf_counter()
+    for train, test in make_folds(len(y), N_SPLITS):
+        fitted = clone(estimator).fit(X[train], y[train])
+        scores.append(r2_score(y[test], fitted.predict(X[test])))
+    return {
+        'cv_r2_mean': float(np.mean(scores)),
+        'cv_r2_std': float(np.std(scores)),
+        'fit_s': round(time.perf_counter() - start, 4),
+        'pid': os.getpid(),
+    }
+
+
+def halving_search(study: str, model: str, X: pd.DataFrame, y: pd.Series, n_candidates: int = N_CANDIDATES,
+                   factor: int = FACTOR, n_jobs: int = -1) -> HalvingSearch:
+    """
+    Successive-halving random search of SEARCH_SPACES[model] on (X, y).
+
+    Trials already in the study's store are reused; new ones are appended as
+    they finish. Raises ValueError for an unknown model.
+    """
+    if model not in SEARCH_SPACES:
+        raise ValueError(f"unknown model '{model}'; expected one of {sorted(SEARCH_SPACES)}")
+
+    start = time.perf_counter()
+    fingerprint = data_fingerprint(X, y)
+    stored = load_trials(study)
+    order = np.random.RandomState(RANDOM_STATE).permutation(len(X))
+    X_all = X.to_numpy(dtype=np.float64)[order]
+    y_all = y.to_numpy(dtype=np.float64)[order]
+
+    candidates = sample_candidates(model, n_candidates)
+    sizes = rung_sizes(len(X), len(candidates), factor)
+    trials, rungs = [], []
+    n_resumed = n_fitted = 0
+
+    for rung, n_rows in enumerate(sizes):
+        keys = [trial_key(fingerprint, model, params, n_rows) for params in candidates]
+        todo = [(key, params) for key, params in zip(keys, candidates) if key not in stored]
+        n_resumed += len(candidates) - len(todo)
+
+        # Rows are a prefix of one seeded permutation, so each rung extends the last
+        X_rung, y_rung = X_all[:n_rows], y_all[:n_rows]
+        jobs = Parallel(n_jobs=n_jobs, return_as='generator_unordered')(
+            delayed(_keyed)(key, params, model, X_rung, y_rung) for key, params in todo)
+        for key, params, scores in jobs:
+            trial = {'key': key, 'study': study, 'model': model, 'data': fingerprint, 'rung': rung,
+                     'n_rows': n_rows, 'params': params, **scores}
+            append_trial(study, trial)
+            stored[key] = trial
+            n_fitted += 1
+
+        scored = [stored[key] for key in keys]
+        trials.extend(scored)
+        print(f"  • {study} rung {rung}: {len(candidates)} candidates on {n_rows} rows "
+              f"({len(todo)} fitted, {len(candidates) - len(todo)} resumed), "
+              f"best CV R² = {max(t['cv_r2_mean'] for t in scored):.4f}")
+        rungs.append({'rung': rung, 'n_rows': n_rows, 'n_candidates': len(candidates)})
+
+        # Keep the top 1/factor; ties go to the earlier-sampled candidate
+        ranked = sorted(range(len(scored)), key=lambda i: -scored[i]['cv_r2_mean'])
+        candidates = [candidates[i] for i in ranked[:max(1, math.ceil(len(candidates) / factor))]]
+
+    final = [t for t in trials if t['rung'] == len(sizes) - 1]
+    best = max(final, key=lambda t: t['cv_r2_mean'])
+    return HalvingSearch(
+        study=study, model=model, best_params=best['params'], best_score=best['cv_r2_mean'],
+        best_std=best['cv_r2_std'], rungs=rungs, trials=pd.DataFrame(trials), n_resumed=n_resumed,
+        n_fitted=n_fitted, wall_s=time.perf_counter() - start, store=store_path(study))
+
+
+def best_estimator(search: HalvingSearch):
+    """Unfitted estimator with the search's best parameters."""
+    return clone(SEARCH_SPACES[search.model][0]).set_params(**search.best_params)
+
+
+def _keyed(key: str, params: Dict, model: str, X: np.ndarray, y: np.ndarray):
+    return key, params, cross_validate(model, params, X, y)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect stored hyperparameter searches')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='studies in the trial store')
+    show = sub.add_parser('show', help='best trials of one study')
+    show.add_argument('study')
+    show.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for path in sorted(TUNING_DIR.glob('*.jsonl')):
+            print(f"{path.stem:<40} {len(load_trials(path.stem)):>6} trials")
+        return True
+
+    trials = list(load_trials(args.study).values())
+    if not trials:
+        print(f"[X] No trials stored for {args.study} in {TUNING_DIR}")
+        return False
+    df = pd.DataFrame(trials)
+    df['params'] = df['params'].map(lambda p: json.dumps(p, sort_keys=True))
+    df = df.sort_values(['data', 'n_rows', 'cv_r2_mean'], ascending=[True, False, False])
+    print(df[['data', 'rung', 'n_rows', 'cv_r2_mean', 'cv_r2_std', 'fit_s', 'params']].head(args.top).to_string(index=False))
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Per-stage timing, memory and row-count instrumentation for the analysis scripts.
+
+Usage in a script:
+
+    from perf import instrument, measure
+
+    @instrument()
+    def compute_growth_metrics(annual): ...
+
+    with measure('write_outputs', rows_in=len(df)) as m:
+        ...
+        m.rows_out = len(result)
+
+Each call appends one JSON line to data/outputs/perf/{run_id}.jsonl with the
+script, stage, wall time, CPU time, peak RSS (resource.getrusage, process-wide
+high-water mark), RSS growth during the stage, input/output row counts and
+throughput (rows_per_s, from the input count, else the output count).
+Rows are counted from DataFrame/Series/ndarray arguments and return values
+(tuples of frames give one count per frame).
+
+Environment:
+- PERF_RUN_ID: group several processes under one run (pipeline.py sets it for
+  every stage it launches); defaults to a timestamp plus the process id
+- PERF_DIR: output directory (default data/outputs/perf)
+- PERF_TRACEMALLOC=1: also record the peak of Python allocations per stage
+  (tracemalloc adds noticeable overhead, so it is off by default)
+- PERF_DISABLE=1: no measurement, no output
+
+Comparing runs:
+
+    python scripts/perf.py list
+    python scripts/perf.py show [RUN]
+    python scripts/perf.py compare BASE NEW [--threshold 0.2]
+
+RUN is a run id, a .jsonl path, 'latest' or 'previous'. compare sums calls per
+(script, stage), prints the change in wall time, CPU time and peak RSS, and
+exits with status 1 when any stage regressed by more than the threshold.
+"""
+
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PERF_DIR = Path(os.environ.get('PERF_DIR', 'data/outputs/perf'))
+RUN_ID = os.environ.get('PERF_RUN_ID') or f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}"
+ENABLED = os.environ.get('PERF_DISABLE', '') != '1'
+TRACK_ALLOCATIONS = os.environ.get('PERF_TRACEMALLOC', '') == '1'
+
+# Regression rules for compare
+DEFAULT_THRESHOLD = 0.20  # 20% slower / larger
+MIN_WALL_DELTA = 0.05  # seconds; ignore noise on very fast stages
+MIN_RSS_DELTA = 10.0  # MB
+
+# ru_maxrss is KB on Linux, bytes on macOS
+RSS_SCALE = 1024 * 1024 if sys.platform == 'darwin' else 1024
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / RSS_SCALE
+
+
+def count_rows(obj):
+    """Row count of a frame/array, a list of counts for a tuple of them, else None."""
+    if isinstance(obj, tuple):
+        counts = [count_rows(item) for item in obj]
+        return counts if any(c is not None for c in counts) else None
+    if hasattr(obj, 'shape') and getattr(obj, 'ndim', 0) >= 1:
+        return int(obj.shape[0])
+    return None
+
+
+def run_path(run_id: str = RUN_ID) -> Path:
+    return PERF_DIR / f"{run_id}.jsonl"
+
+
+def write_record(record: Dict):
+    """Append one record; a single short write per line keeps concurrent writers intact."""
+    PERF_DIR.mkdir(parents=True, exist_ok=True)
+    with open(run_path(), 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+class measure:
+    """Context manager timing one stage; set .rows_out inside the block."""
+
+    def __init__(self, stage: str, rows_in=None, script: Optional[str] = None):
+        self.stage = stage
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.script = script or Path(sys.argv[0]).name
+        self._started_tracing = False
+
+    def __enter__(self):
+        if not ENABLED:
+            return self
+        if TRACK_ALLOCATIONS:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            self._alloc_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._rss_start = peak_rss_mb()
+        self._started_at = time.time()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not ENABLED:
+            return False
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+        rss = peak_rss_mb()
+        rows = next((n for n in (self.rows_in, self.rows_out) if isinstance(n, int) and n > 0), None)
+
+        record = {
+            'run_id': RUN_ID,
+            'script': self.script,
+            'stage': self.stage,
+            'started_at': round(self._started_at, 3),
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'peak_rss_mb': round(rss, 1) if rss is not None else None,
+            'rss_growth_mb': round(rss - self._rss_start, 1) if rss is not None else None,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'rows_per_s': round(rows / wall, 1) if rows and wall > 0 else None,
+            'ok': exc_type is None,
+        }
+        if TRACK_ALLOCATIONS:
+            peak = tracemalloc.get_traced_memory()[1]
+            record['py_peak_mb'] = round((peak - self._alloc_start) / 1e6, 1)
+            if self._started_tracing:
+                tracemalloc.stop()
+        write_record(record)
+        return False
+
+
+def instrument(stage: Optional[str] = None):
+    """Decorator: measure every call of the function (stage defaults to its name)."""
+    def decorator(func):
+        name = stage or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            inputs = [count_rows(a) for a in list(args) + list(kwargs.values())]
+            inputs = [n for n in inputs if n is not None and not isinstance(n, list)]
+            with measure(name, rows_in=sum(inputs) if inputs else None) as m:
+                result = func(*args, **kwargs)
+                m.rows_out = count_rows(result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+# =============================================================================
+# Run comparison CLI
+# =============================================================================
+
+def list_runs() -> List[Path]:
+    """Run files, oldest first."""
+    if not PERF_DIR.exists():
+        return []
+    return sorted(PERF_DIR.glob('*.jsonl'), key=lambda p: p.stat().st_mtime)
+
+
+def resolve_run(name: str) -> Path:
+    runs = list_runs()
+    if name in ('latest', 'previous'):
+        index = -1 if name == 'latest' else -2
+        if len(runs) < -index:
+            raise SystemExit(f"ERROR: not enough runs in {PERF_DIR} for '{name}'")
+        return runs[index]
+    path = Path(name)
+    if path.exists():
+        return path
+    path = run_path(name)
+    if not path.exists():
+        raise SystemExit(f"ERROR: run not found: {name}")
+    return path
+
+
+def load_run(path: Path) -> List[Dict]:
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records: List[Dict]) -> Dict[tuple, Dict]:
+    """Per (script, stage): call count, summed wall/CPU, max peak RSS, summed rows."""
+    summary: Dict[tuple, Dict] = {}
+    for r in records:
+        s = summary.setdefault((r['script'], r['stage']), {
+            'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'peak_rss_mb': None, 'rows_in': 0, 'rows_out': 0,
+        })
+        s['calls'] += 1
+        s['wall_s'] += r['wall_s']
+        s['cpu_s'] += r['cpu_s']
+        if r.get('peak_rss_mb') is not None:
+            s['peak_rss_mb'] = max(s['peak_rss_mb'] or 0, r['peak_rss_mb'])
+        for key in ('rows_in', 'rows_out'):
+            value = r.get(key)
+            s[key] += sum(v for v in value if v) if isinstance(value, list) else (value or 0)
+    return summary
+
+
+def pct_change(base: float, new: float) -> Optional[float]:
+    return (new - base) / base if base else None
+
+
+def find_regressions(base: Dict[tuple, Dict], new: Dict[tuple, Dict],
+                     threshold: float = DEFAULT_THRESHOLD) -> Dict[tuple, List[str]]:
+    """Stages whose wall/CPU time or peak RSS grew beyond the threshold."""
+    flagged = {}
+    for key in sorted(set(base) & set(new)):
+        b, n = base[key], new[key]
+        reasons = []
+        for metric in ('wall_s', 'cpu_s'):
+            change = pct_change(b[metric], n[metric])
+            if change is not None and change > threshold and n[metric] - b[metric] > MIN_WALL_DELTA:
+                reasons.append(f"{metric} +{change:.0%}")
+        if b['peak_rss_mb'] and n['peak_rss_mb']:
+            change = pct_change(b['peak_rss_mb'], n['peak_rss_mb'])
+            if change > threshold and n['peak_rss_mb'] - b['peak_rss_mb'] > MIN_RSS_DELTA:
+                reasons.append(f"peak_rss +{change:.0%}")
+        if reasons:
+            flagged[key] = reasons
+    return flagged
+
+
+def format_change(base: float, new: float) -> str:
+    change = pct_change(base, new)
+    return f"{change:+.0%}" if change is not None else "n/a"
+
+
+def print_summary(path: Path):
+    summary = summarize(load_run(path))
+    print(f"Run {path.stem}")
+    print(f"{'script':<36} {'stage':<32} {'calls':>6} {'wall s':>9} {'cpu s':>9} {'rss MB':>8} {'rows out':>10}")
+    for (script, stage), s in sorted(summary.items()):
+        rss = f"{s['peak_rss_mb']:.0f}" if s['peak_rss_mb'] is not None else '-'
+        print(f"{script:<36} {stage:<32} {s['calls']:>6} {s['wall_s']:>9.3f} {s['cpu_s']:>9.3f} "
+              f"{rss:>8} {s['rows_out']:>10,}")
+
+
+def compare_runs(base_path: Path, new_path: Path, threshold: float = DEFAULT_THRESHOLD) -> int:
+    """Print a stage-by-stage comparison; returns the number of regressed stages."""
+    base = summarize(load_run(base_path))
+    new = summarize(load_run(new_path))
+    flagged = find_regressions(base, new, threshold)
+
+    print(f"Base: {base_path.stem}")
+    print(f"New:  {new_path.stem}")
+    print(f"\n{'script':<36} {'stage':<32} {'wall base':>10} {'wall new':>10} {'Δ wall':>7} "
+          f"{'Δ cpu':>7} {'Δ rss':>7}  flag")
+    for key in sorted(set(base) | set(new)):
+        script, stage = key
+        if key not in base or key not in new:
+            side = 'new only' if key not in base else 'base only'
+            print(f"{script:<36} {stage:<32} {'':>10} {'':>10} {'':>7} {'':>7} {'':>7}  {side}")
+            continue
+        b, n = base[key], new[key]
+        rss = format_change(b['peak_rss_mb'], n['peak_rss_mb']) if b['peak_rss_mb'] and n['peak_rss_mb'] else 'n/a'
+        flag = 'REGRESSION ' + ', '.join(flagged[key]) if key in flagged else ''
+        print(f"{script:<36} {stage:<32} {b['wall_s']:>10.3f} {n['wall_s']:>10.3f} "
+              f"{format_change(b['wall_s'], n['wall_s']):>7} {format_change(b['cpu_s'], n['cpu_s']):>7} "
+              f"{rss:>7}  {flag}")
+
+    print(f"\n{len(flagged)} regression(s) above {threshold:.0%}")
+    return len(flagged)
+
+
+def main():
+    args = sys.argv[1:]
+    threshold = DEFAULT_THRESHOLD
+    if '--threshold' in args:
+        i = args.index('--threshold')
+        threshold = float(args[i + 1])
+        del args[i:i + 2]
+
+    command = args[0] if args else 'list'
+    if command == 'list':
+        for path in list_runs():
+            records = load_run(path)
+            scripts = sorted({r['script'] for r in records})
+            print(f"{path.stem:<32} {len(records):>6} records  {', '.join(scripts)}")
+    elif command == 'show':
+        print_summary(resolve_run(args[1] if len(args) > 1 else 'latest'))
+    elif command == 'compare':
+        base = resolve_run(args[1] if len(args) > 1 else 'previous')
+        new = resolve_run(args[2] if len(args) > 2 else 'latest')
+        sys.exit(1 if compare_runs(base, new, threshold) else 0)
+    else:
+        print(__doc__)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Typed columnar store for state, county and place permit series.
+
+Every permit table the analysis scripts read (07, 12, 18, 22, 32, 33) goes
+through PermitStore instead of its own CSV path:
+
+    store = PermitStore()
+    places = store.table('place')                  # PermitTable
+    places.range('0644000', 2018, 2022)            # LA rows 2018-2022
+    places.lookup('0644000', 2020)                 # one row or None
+    places.to_frame()                              # legacy frame, FIPS as strings
+
+Tables (name: source -> geography column, frequency):
+- state:            data/raw/state_permits_monthly_comprehensive.csv -> state_fips, monthly
+- state_timeseries: visualizations/data/reform_timeseries.csv -> state_fips (from jurisdiction), monthly
+- county:           data/outputs/county_permits (script 08 Parquet dataset) -> fips, annual
+- place:            data/raw/census_bps_place_all_years.csv -> place_fips, annual
+- place_bulk:       data/raw/census_bps_place_annual_permits.csv -> place_fips, annual
+
+Format:
+- FIPS codes are integer-encoded (int32; -1 when missing or non-numeric), so
+  '0644000', 644000 and '644000' all name the same place and no loader has
+  to re-pad strings.
+- year is int16, month int8, counts int32, repeated labels (names) categorical.
+- Rows are sorted by (geo, year, month). A composite int64 key
+  geo * 1e6 + year * 100 + month backs every lookup with np.searchsorted, so a
+  place's range is two binary searches and a zero-copy slice.
+- On disk each table is data/processed/permits/{name}.parquet. It is rebuilt
+  from its source the first time it is used after the source changes (mtime).
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+STORE_DIR = Path('data/processed/permits')
+
+GEO_SCALE = 1_000_000  # key = geo * GEO_SCALE + year * 100 + month
+MISSING_GEO = -1
+
+FipsLike = Union[str, int]
+
+STATE_NAMES = {
+    '01': 'Alabama', '02': 'Alaska', '04': 'Arizona', '05': 'Arkansas',
+    '06': 'California', '08': 'Colorado', '09': 'Connecticut', '10': 'Delaware',
+    '11': 'District of Columbia', '12': 'Florida', '13': 'Georgia', '15': 'Hawaii',
+    '16': 'Idaho', '17': 'Illinois', '18': 'Indiana', '19': 'Iowa',
+    '20': 'Kansas', '21': 'Kentucky', '22': 'Louisiana', '23': 'Maine',
+    '24': 'Maryland', '25': 'Massachusetts', '26': 'Michigan', '27': 'Minnesota',
+    '28': 'Mississippi', '29': 'Missouri', '30': 'Montana', '31': 'Nebraska',
+    '32': 'Nevada', '33': 'New Hampshire', '34': 'New Jersey', '35': 'New Mexico',
+    '36': 'New York', '37': 'North Carolina', '38': 'North Dakota', '39': 'Ohio',
+    '40': 'Oklahoma', '41': 'Oregon', '42': 'Pennsylvania', '44': 'Rhode Island',
+    '45': 'South Carolina', '46': 'South Dakota', '47': 'Tennessee', '48': 'Texas',
+    '49': 'Utah', '50': 'Vermont', '51': 'Virginia', '53': 'Washington',
+    '54': 'West Virginia', '55': 'Wisconsin', '56': 'Wyoming', '72': 'Puerto Rico'
+}
+
+# Geography column, its string width, and extra FIPS columns to encode
+LEVELS = {
+    'state': {'geo': 'state_fips', 'width': 2, 'fips_columns': {}},
+    'county': {'geo': 'fips', 'width': 5, 'fips_columns': {'state_fips': 2, 'county_fips': 3}},
+    'place': {'geo': 'place_fips', 'width': 7, 'fips_columns': {'state_fips': 2}},
+}
+
+TABLES = {
+    'state': {'source': 'data/raw/state_permits_monthly_comprehensive.csv', 'level': 'state', 'freq': 'monthly'},
+    'state_timeseries': {'source': 'visualizations/data/reform_timeseries.csv', 'level': 'state', 'freq': 'monthly'},
+    'county': {'source': 'data/outputs/county_permits', 'level': 'county', 'freq': 'annual'},
+    'place': {'source': 'data/raw/census_bps_place_all_years.csv', 'level': 'place', 'freq': 'annual'},
+    'place_bulk': {'source': 'data/raw/census_bps_place_annual_permits.csv', 'level': 'place', 'freq': 'annual'},
+}
+
+# Columns never treated as counts
+DERIVED_COLUMNS = {'date', 'year', 'month'}
+
+
+def encode_fips(values: pd.Series) -> np.ndarray:
+    """'0644000' / 644000 / '644000' -> 644000 (int32); missing or non-numeric -> -1."""
+    codes = pd.to_numeric(values, errors='coerce')
+    return codes.fillna(MISSING_GEO).astype(np.int32).to_numpy()
+
+
+def decode_fips(codes: np.ndarray, width: int) -> pd.Series:
+    """Inverse of encode_fips: zero-padded strings, NaN for missing."""
+    codes = pd.Series(codes)
+    decoded = codes.astype(str).str.zfill(width)
+    return decoded.where(codes != MISSING_GEO)
+
+
+def period_key(value: Optional[int], end: bool = False) -> int:
+    """Year (2020) or year-month (202003) as the year * 100 + month part of the key."""
+    if value is None:
+        return GEO_SCALE - 1 if end else 0
+    value = int(value)
+    if value < 10000:
+        return value * 100 + (99 if end else 0)
+    return value
+
+
+class PermitTable:
+    """One permit table in memory: a typed frame sorted by key, plus the key array."""
+
+    ndim = 2  # frame-like, so perf.count_rows reports the row count
+
+    def __init__(self, data: pd.DataFrame, level: str, freq: str):
+        self.data = data
+        self.level = level
+        self.freq = freq
+        self.geo_column = LEVELS[level]['geo']
+        month = data['month'].to_numpy(np.int64) if 'month' in data.columns else 0
+        self.key = (data[self.geo_column].to_numpy(np.int64) * GEO_SCALE
+                    + data['year'].to_numpy(np.int64) * 100 + month)
+        if len(self.key) and (np.diff(self.key) < 0).any():
+            raise ValueError(f"{level} permit table is not sorted by (geo, period)")
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, level: str, freq: str = 'annual') -> 'PermitTable':
+        """Encode and sort a raw frame (CSV columns, string FIPS, date strings)."""
+        spec = LEVELS[level]
+        df = df.copy()
+
+        df[spec['geo']] = encode_fips(df[spec['geo']])
+        for col in spec['fips_columns']:
+            if col in df.columns:
+                df[col] = encode_fips(df[col]).astype(np.int16 if col == 'state_fips' else np.int32)
+
+        if 'year' not in df.columns or (freq == 'monthly' and 'month' not in df.columns):
+            dates = pd.to_datetime(df['date'])
+            df['year'] = dates.dt.year
+            df['month'] = dates.dt.month
+        df['year'] = df['year'].astype(np.int16)
+        if freq == 'monthly':
+            df['month'] = df['month'].astype(np.int8)
+        df = df.drop(columns=['date'], errors='ignore')
+
+        for col in df.columns:
+            if col in DERIVED_COLUMNS or col == spec['geo'] or col in spec['fips_columns']:
+                continue
+            if pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col]):
+                df[col] = df[col].astype('category')
+            elif pd.api.types.is_integer_dtype(df[col]):
+                df[col] = df[col].astype(np.int32)
+            elif pd.api.types.is_float_dtype(df[col]) and df[col].notna().all() and (df[col] % 1 == 0).all():
+                df[col] = df[col].astype(np.int32)
+
+        order = [spec['geo'], 'year'] + (['month'] if freq == 'monthly' else [])
+        df = df.sort_values(order, kind='stable').reset_index(drop=True)
+        return cls(df, level, freq)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def _bounds(self, fips: FipsLike, start=None, end=None):
+        geo = int(fips) * GEO_SCALE
+        lo = np.searchsorted(self.key, geo + period_key(start), side='left')
+        hi = np.searchsorted(self.key, geo + period_key(end, end=True), side='right')
+        return lo, hi
+
+    def range(self, fips: FipsLike, start: Optional[int] = None, end: Optional[int] = None) -> pd.DataFrame:
+        """
+        Rows for one geography between two periods (inclusive).
+
+        start/end are years (2018) or, for monthly tables, year-months (201803).
+        """
+        lo, hi = self._bounds(fips, start, end)
+        return self.data.iloc[lo:hi]
+
+    def lookup(self, fips: FipsLike, year: int, month: int = 0) -> Optional[pd.Series]:
+        """The row for one geography and period, or None."""
+        target = int(fips) * GEO_SCALE + int(year) * 100 + month
+        i = np.searchsorted(self.key, target)
+        if i < len(self.key) and self.key[i] == target:
+            return self.data.iloc[i]
+        return None
+
+    def geo_codes(self) -> np.ndarray:
+        """Distinct geography codes (int), ascending, missing excluded."""
+        codes = np.unique(self.key // GEO_SCALE)
+        return codes[codes != MISSING_GEO]
+
+    def fips(self) -> list:
+        """Distinct geography codes as zero-padded strings."""
+        return decode_fips(self.geo_codes(), LEVELS[self.level]['width']).tolist()
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        The table in its original CSV shape: FIPS as zero-padded strings,
+        labels as plain strings and, for monthly tables, a datetime `date`.
+        """
+        spec = LEVELS[self.level]
+        df = self.data.copy()
+        df[spec['geo']] = decode_fips(df[spec['geo']].to_numpy(), spec['width']).to_numpy()
+        for col, width in spec['fips_columns'].items():
+            if col in df.columns:
+                df[col] = decode_fips(df[col].to_numpy(), width).to_numpy()
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(object)
+        if self.freq == 'monthly':
+            df['date'] = pd.to_datetime(dict(year=df['year'], month=df['month'], day=1))
+        return df
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        self.data.to_parquet(tmp_path, index=False)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, level: str, freq: str) -> 'PermitTable':
+        return cls(pd.read_parquet(path), level, freq)
+
+
+def source_mtime(path: Path) -> float:
+    if path.is_dir():
+        return max((p.stat().st_mtime for p in path.rglob('*.parquet')), default=0.0)
+    return path.stat().st_mtime
+
+
+def read_source(name: str, path: Path) -> pd.DataFrame:
+    """Read a table's source in its native layout."""
+    if name == 'county':
+        df = pd.read_parquet(path)
+        df['year'] = df['year'].astype(int)  # partition keys come back categorical
+        return df
+    df = pd.read_csv(path, dtype=str if name != 'state_timeseries' else None)
+    if name == 'state_timeseries':
+        names_to_fips = {v: k for k, v in STATE_NAMES.items()}
+        df['state_fips'] = df['jurisdiction'].map(names_to_fips)
+        return df
+    for col in df.columns:
+        if col.endswith('_fips') or col in ('fips', 'date') or df[col].isna().all():
+            continue
+        converted = pd.to_numeric(df[col], errors='coerce')
+        if converted.notna().sum() == df[col].notna().sum():
+            df[col] = converted
+    return df
+
+
+class PermitStore:
+    """Loads permit tables from Parquet, rebuilding them from their sources when stale."""
+
+    def __init__(self, store_dir: Path = STORE_DIR, sources: Optional[Dict[str, str]] = None):
+        self.store_dir = Path(store_dir)
+        self.sources = {name: Path(spec['source']) for name, spec in TABLES.items()}
+        self.sources.update({name: Path(path) for name, path in (sources or {}).items()})
+        self._tables: Dict[str, PermitTable] = {}
+
+    def path(self, name: str) -> Path:
+        return self.store_dir / f"{name}.parquet"
+
+    def table(self, name: str) -> PermitTable:
+        """
+        Load a table. Raises FileNotFoundError when neither the source nor a
+        stored copy exists.
+        """
+        if name in self._tables:
+            return self._tables[name]
+
+        spec = TABLES[name]
+        path, source = self.path(name), self.sources[name]
+
+        if source.exists() and (not path.exists() or source_mtime(source) > path.stat().st_mtime):
+            table = PermitTable.from_frame(read_source(name, source), spec['level'], spec['freq'])
+            table.save(path)
+        elif path.exists():
+            table = PermitTable.load(path, spec['level'], spec['freq'])
+        else:
+            raise FileNotFoundError(f"No permit data for '{name}': {source} not found")
+
+        self._tables[name] = table
+        return table
+
+
+_default_store: Optional[PermitStore] = None
+
+
+def default_store() -> PermitStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = PermitStore()
+    return _default_store
+
+
+def load_table(name: str) -> PermitTable:
+    """Shortcut for default_store().table(name)."""
+    return default_store().table(name)
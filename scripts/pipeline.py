@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Pipeline runner for the numbered scripts.
+
+Each stage declares the script it runs, its input files and its output files.
+Dependencies follow from the files: a stage depends on every stage that
+produces one of its inputs. Before a stage runs, the runner fingerprints it
+(script source, sibling modules it imports, arguments and the content hash of
+every input). A stage whose fingerprint matches its last successful run, and
+whose outputs all exist, is skipped.
+
+File hashes are memoized by (size, mtime), so an unchanged tree is checked with
+stat calls only and a no-op refresh finishes in well under a second.
+Independent stages (e.g. DiD, SCM and event study) run as parallel processes.
+
+Stages without inputs (downloads) re-run only when their code changes or
+with --force.
+
+State: data/.pipeline_state.json
+Logs:  data/.pipeline_logs/{stage}.log
+Perf:  every stage of one invocation shares a PERF_RUN_ID, so the instrumented
+       scripts write to a single data/outputs/perf/{run}.jsonl (see perf.py)
+
+Usage:
+    python scripts/pipeline.py                   # refresh everything
+    python scripts/pipeline.py search_index did  # targets plus their upstream stages
+    python scripts/pipeline.py --dry-run         # show what would run
+    python scripts/pipeline.py --force scm       # re-run targets regardless of fingerprints
+    python scripts/pipeline.py --jobs 4          # max parallel stages (default: CPU count)
+    python scripts/pipeline.py --list            # print stages and dependencies
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from perf import RUN_ID as PERF_RUN_ID
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = REPO_ROOT / 'scripts'
+STATE_FILE = REPO_ROOT / 'data' / '.pipeline_state.json'
+LOG_DIR = REPO_ROOT / 'data' / '.pipeline_logs'
+STATE_VERSION = 1
+
+
+@dataclass
+class Stage:
+    name: str
+    script: str
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    args: List[str] = field(default_factory=list)
+
+
+# Paths are relative to the repository root; directories are hashed recursively.
+# Missing inputs are allowed (several scripts fall back to other sources).
+STAGES = [
+    # Place-level pipeline
+    Stage('place_bulk', '20_fetch_place_permits_bulk.py',
+          outputs=['data/raw/census_bps_master_dataset.zip', 'data/raw/national_place2020.txt']),
+    Stage('parse_places', '21_parse_place_data_format.py',
+          inputs=['data/raw/census_bps_master_dataset.zip', 'data/raw/national_place2020.txt'],
+          outputs=['data/raw/census_bps_places_directory.csv',
+                   'data/raw/census_bps_place_annual_permits.csv',
+                   'data/raw/census_bps_place_monthly_permits.csv']),
+    Stage('place_metrics', '22_build_place_metrics.py',
+          inputs=['data/raw/census_bps_places_directory.csv',
+                  'data/raw/census_bps_place_annual_permits.csv'],
+          outputs=['data/outputs/place_metrics_comprehensive.csv']),
+    Stage('geocode', '23_geocode_places.py',
+          inputs=['data/outputs/place_metrics_comprehensive.csv',
+                  'data/raw/2024_Gaz_place_national.txt'],
+          outputs=['data/outputs/place_metrics_geocoded.csv']),
+    Stage('search_index', '26_generate_search_index.py',
+          inputs=['data/outputs/place_metrics_comprehensive.csv'],
+          outputs=['app/public/data/places.json', 'app/public/data/search/places.idx.bin',
+                   'app/public/data/search/manifest.json']),
+
+    # City reform analyses
+    Stage('city_permits', '11_fetch_city_permits_api.py',
+          outputs=['data/raw/census_bps_place_all_years.csv']),
+    Stage('did', '31_compute_did_analysis.py',
+          inputs=['data/raw/city_reforms_expanded.csv', 'data/raw/city_reforms.csv'],
+          outputs=['data/outputs/did_analysis_results.json']),
+    Stage('scm', '32_synthetic_control.py',
+          inputs=['data/raw/city_reforms_expanded.csv', 'data/raw/city_reforms.csv',
+                  'data/raw/census_bps_place_all_years.csv'],
+          outputs=['data/outputs/scm_analysis_results.json']),
+    Stage('event_study', '33_event_study.py',
+          inputs=['data/raw/city_reforms_expanded.csv', 'data/raw/city_reforms.csv',
+                  'data/raw/census_bps_place_all_years.csv'],
+          outputs=['data/outputs/event_study_results.json']),
+    Stage('place_shards', '34_publish_place_shards.py',
+          inputs=['data/raw/census_bps_place_annual_permits.csv',
+                  'data/outputs/place_metrics_comprehensive.csv',
+                  'data/raw/city_reforms_expanded.csv', 'data/raw/city_reforms.csv',
+                  'data/outputs/did_analysis_results.json',
+                  'data/outputs/scm_analysis_results.json',
+                  'data/outputs/event_study_results.json'],
+          outputs=['data/outputs/place_shards/manifest.json']),
+    Stage('serving_store', 'serving_store.py', args=['build'],
+          inputs=['data/outputs/county_permits', 'data/outputs/county_permits_monthly.csv',
+                  'data/raw/census_bps_place_annual_permits.csv',
+                  'data/outputs/place_metrics_comprehensive.csv',
+                  'data/outputs/unified_economic_features.csv'],
+          outputs=['data/outputs/serving.sqlite']),
+    Stage('model_v3', 'train_model_v3.py',
+          inputs=['data/raw/city_reforms_expanded.csv'],
+          outputs=['data/outputs/reform_impact_model_v3.pkl', 'data/outputs/model_v3_performance.json']),
+    Stage('scenario_tables', '35_build_scenario_tables.py',
+          inputs=['data/outputs/reform_impact_model_v3.pkl', 'data/raw/city_reforms_expanded.csv',
+                  'data/outputs/place_metrics_comprehensive.csv'],
+          outputs=['data/outputs/scenario_tables.json']),
+    Stage('place_predictions', 'reform_model.py', args=['score'],
+          inputs=['data/outputs/reform_impact_model_v3.pkl', 'data/raw/city_reforms_expanded.csv',
+                  'data/outputs/place_metrics_comprehensive.csv'],
+          outputs=['data/outputs/place_reform_predictions.csv']),
+    Stage('place_model', '36_train_place_model.py',
+          inputs=['data/raw/census_bps_place_annual_permits.csv', 'data/raw/city_reforms_expanded.csv'],
+          outputs=['data/outputs/place_reform_model_hgb.pkl', 'data/outputs/place_model_report.json']),
+    Stage('timeline', '28_prepare_timeline_data.py',
+          inputs=['data/raw/city_reforms_expanded.csv'],
+          outputs=['app/public/data/reforms_timeline.json']),
+
+    # State-level pipeline
+    Stage('state_permits', '01_collect_permits.py',
+          inputs=['data/raw/state_permits_monthly.csv'],
+          outputs=['data/raw/permit_data_2015_2024.parquet']),
+    Stage('code_reforms', '02_code_reforms.py',
+          inputs=['data/processed/reform_database.csv'],
+          outputs=['data/processed/reform_database.parquet']),
+    Stage('reform_metrics', '03_compute_metrics.py',
+          inputs=['data/raw/permit_data_2015_2024.parquet', 'data/processed/reform_database.parquet'],
+          outputs=['data/outputs/reform_impact_metrics.csv']),
+    Stage('sparklines', '04_build_sparklines.py',
+          inputs=['data/raw/permit_data_2015_2024.parquet', 'data/outputs/reform_impact_metrics.csv'],
+          outputs=['data/outputs/reform_timeseries.csv']),
+    Stage('counties', '08_fetch_county_permits.py',
+          outputs=['data/outputs/county_permits', 'data/outputs/county_permits_annual.csv',
+                   'data/outputs/county_states']),
+
+    # State features and predictive model
+    Stage('zillow', '13_fetch_zillow_data.py',
+          outputs=['data/processed/zillow_state_prices.csv']),
+    Stage('acs', '14_fetch_census_acs.py',
+          outputs=['data/processed/census_demographic_data.csv']),
+    Stage('bls', '15_fetch_bls_data.py',
+          outputs=['data/processed/unemployment_political_data.csv']),
+    Stage('features', '16_compile_features.py',
+          inputs=['data/processed/zillow_state_prices.csv',
+                  'data/processed/census_demographic_data.csv',
+                  'data/processed/unemployment_political_data.csv',
+                  'visualizations/data/reform_impact_metrics.csv'],
+          outputs=['data/outputs/state_features_comprehensive.csv']),
+    Stage('model', '10_build_predictive_model.py',
+          inputs=['data/outputs/state_features_comprehensive.csv'],
+          outputs=['data/outputs/model_comparison.csv',
+                   'data/outputs/feature_importance.csv',
+                   'data/outputs/model_predictions.csv',
+                   'data/outputs/model_cv_jobs.csv']),
+    Stage('forecast', '18_forecast_permits.py',
+          inputs=['visualizations/data/reform_timeseries.csv',
+                  'visualizations/data/reform_impact_metrics.csv'],
+          outputs=['data/outputs/permit_forecasts.csv', 'data/outputs/forecast_accuracy.csv']),
+]
+
+IMPORT_PATTERN = re.compile(r'^\s*(?:from\s+(\w+)\s+import|import\s+([\w\s,]+?)\s*$)', re.MULTILINE)
+
+
+def build_graph(stages: List[Stage]) -> Dict[str, Set[str]]:
+    """Upstream stage names for each stage, derived from inputs/outputs."""
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers:
+                raise ValueError(f"{output} is produced by both {producers[output]} and {stage.name}")
+            producers[output] = stage.name
+
+    return {
+        stage.name: {producers[path] for path in stage.inputs if path in producers} - {stage.name}
+        for stage in stages
+    }
+
+
+def topological_order(graph: Dict[str, Set[str]]) -> List[str]:
+    order, visiting, done = [], set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Cycle in pipeline at stage {name}")
+        visiting.add(name)
+        for upstream in sorted(graph[name]):
+            visit(upstream)
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for name in graph:
+        visit(name)
+    return order
+
+
+def upstream_closure(graph: Dict[str, Set[str]], targets: List[str]) -> Set[str]:
+    selected, pending = set(), list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(graph[name])
+    return selected
+
+
+class FileHasher:
+    """SHA-256 of files and directories, memoized by (size, mtime_ns)."""
+
+    def __init__(self, memo: Optional[Dict] = None):
+        self.memo = memo or {}
+
+    def file_digest(self, path: Path) -> str:
+        stat = path.stat()
+        key = str(path.relative_to(REPO_ROOT))
+        cached = self.memo.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        self.memo[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def digest(self, relative: str) -> str:
+        path = REPO_ROOT / relative
+        if path.is_file():
+            return self.file_digest(path)
+        if path.is_dir():
+            digest = hashlib.sha256()
+            for child in sorted(p for p in path.rglob('*') if p.is_file()):
+                digest.update(str(child.relative_to(path)).encode())
+                digest.update(self.file_digest(child).encode())
+            return digest.hexdigest()
+        return 'missing'
+
+
+def local_modules(script_path: Path) -> List[Path]:
+    """Sibling modules (scripts/*.py) imported by a script, transitively."""
+    found, pending = {}, [script_path]
+    while pending:
+        source = pending.pop().read_text(encoding='utf-8', errors='replace')
+        modules = []
+        for from_module, import_list in IMPORT_PATTERN.findall(source):
+            modules.extend([from_module] if from_module else
+                           [name.split(' as ')[0].strip() for name in import_list.split(',')])
+        for module in modules:
+            path = SCRIPTS_DIR / f"{module}.py"
+            if path.exists() and path != script_path and path not in found:
+                found[path] = True
+                pending.append(path)
+    return sorted(found)
+
+
+def fingerprint(stage: Stage, hasher: FileHasher) -> str:
+    """Hash of the stage's code, arguments and input contents."""
+    script_path = SCRIPTS_DIR / stage.script
+    digest = hashlib.sha256()
+    digest.update(json.dumps([stage.script, stage.args, stage.inputs]).encode())
+    for path in [script_path] + local_modules(script_path):
+        digest.update(path.name.encode())
+        digest.update(hasher.file_digest(path).encode())
+    for relative in stage.inputs:
+        digest.update(relative.encode())
+        digest.update(hasher.digest(relative).encode())
+    return digest.hexdigest()
+
+
+def outputs_exist(stage: Stage) -> bool:
+    return all((REPO_ROOT / output).exists() for output in stage.outputs)
+
+
+def load_state() -> Dict:
+    if STATE_FILE.exists():
+        try:
+            with open(STATE_FILE, 'r') as f:
+                state = json.load(f)
+            if state.get('version') == STATE_VERSION:
+                return state
+        except (OSError, ValueError):
+            pass
+    return {'version': STATE_VERSION, 'stages': {}, 'file_hashes': {}}
+
+
+def save_state(state: Dict):
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = STATE_FILE.with_suffix('.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    tmp_path.replace(STATE_FILE)
+
+
+def run_stage(stage: Stage) -> Tuple[int, float]:
+    """Run one stage as a child process; output goes to its log file."""
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    start = time.time()
+    with open(LOG_DIR / f"{stage.name}.log", 'w') as log:
+        result = subprocess.run(
+            [sys.executable, str(SCRIPTS_DIR / stage.script)] + stage.args,
+            cwd=REPO_ROOT,
+            env={**os.environ, 'PERF_RUN_ID': PERF_RUN_ID},
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    return result.returncode, time.time() - start
+
+
+def run_pipeline(
+    targets: Optional[List[str]] = None,
+    force: bool = False,
+    dry_run: bool = False,
+    jobs: Optional[int] = None,
+    stages: List[Stage] = STAGES,
+) -> Dict[str, str]:
+    """
+    Bring the selected stages up to date.
+
+    Returns:
+        {stage name: 'skipped' | 'ran' | 'failed' | 'blocked' | 'would run'}
+    """
+    by_name = {stage.name: stage for stage in stages}
+    graph = build_graph(stages)
+
+    unknown = [name for name in targets or [] if name not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(unknown)}")
+
+    selected = upstream_closure(graph, targets) if targets else set(by_name)
+    forced = set(targets or by_name) if force else set()
+    order = [name for name in topological_order(graph) if name in selected]
+
+    state = load_state()
+    hasher = FileHasher(state['file_hashes'])
+    status: Dict[str, str] = {}
+    running = {}
+
+    def ready(name):
+        return name not in status and name not in running.values() and all(
+            status.get(upstream) in ('skipped', 'ran', 'would run')
+            for upstream in graph[name] if upstream in selected
+        )
+
+    def blocked(name):
+        return any(status.get(upstream) in ('failed', 'blocked') for upstream in graph[name])
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        while len(status) < len(order):
+            for name in order:
+                if name in status or name in running.values():
+                    continue
+                if blocked(name):
+                    status[name] = 'blocked'
+                    print(f"  - {name}: blocked by a failed upstream stage")
+                    continue
+                if not ready(name):
+                    continue
+
+                stage = by_name[name]
+                digest = fingerprint(stage, hasher)
+                previous = state['stages'].get(name, {})
+                if name not in forced and previous.get('fingerprint') == digest and outputs_exist(stage):
+                    status[name] = 'skipped'
+                    continue
+                if dry_run:
+                    status[name] = 'would run'
+                    print(f"  * {name}: would run ({stage.script})")
+                    continue
+
+                print(f"  > {name}: running {stage.script}")
+                running[pool.submit(run_stage, stage)] = name
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                stage = by_name[name]
+                returncode, elapsed = future.result()
+                if returncode == 0:
+                    status[name] = 'ran'
+                    state['stages'][name] = {
+                        # Inputs are re-hashed after the run so a stage that
+                        # rewrites its own inputs is not immediately stale
+                        'fingerprint': fingerprint(stage, hasher),
+                        'finished_at': time.time(),
+                        'seconds': round(elapsed, 2),
+                    }
+                    print(f"  ✓ {name}: done in {elapsed:.1f}s")
+                else:
+                    status[name] = 'failed'
+                    print(f"  ✗ {name}: exit code {returncode} (see {LOG_DIR / (name + '.log')})")
+                save_state(state)
+
+    if not dry_run:
+        save_state(state)
+    return status
+
+
+def print_stages(stages: List[Stage] = STAGES):
+    graph = build_graph(stages)
+    for name in topological_order(graph):
+        stage = next(s for s in stages if s.name == name)
+        after = ', '.join(sorted(graph[name])) or '-'
+        print(f"  {name:16s} {stage.script:34s} after: {after}")
+
+
+def main():
+    args = sys.argv[1:]
+    if '--list' in args:
+        print_stages()
+        return
+
+    jobs = None
+    if '--jobs' in args:
+        position = args.index('--jobs')
+        jobs = int(args[position + 1])
+        del args[position:position + 2]
+
+    force = '--force' in args
+    dry_run = '--dry-run' in args
+    targets = [arg for arg in args if not arg.startswith('--')]
+
+    start = time.time()
+    print("=" * 70)
+    print("PIPELINE" + (f": {', '.join(targets)}" if targets else ""))
+    print("=" * 70)
+
+    status = run_pipeline(targets or None, force=force, dry_run=dry_run, jobs=jobs)
+
+    counts = {}
+    for value in status.values():
+        counts[value] = counts.get(value, 0) + 1
+    summary = ', '.join(f"{count} {value}" for value, count in sorted(counts.items()))
+    print(f"\n{summary} in {time.time() - start:.2f}s")
+
+    if counts.get('failed') or counts.get('blocked'):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
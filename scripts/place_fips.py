@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Stable 7-digit Census place FIPS resolution for BPS place records.
+
+Maps (state FIPS, place FIPS code or place name) to the official
+state+place FIPS code (e.g. 06 + 44000 -> 0644000) using a local crosswalk:
+
+- Census place codes file (pipe-delimited):
+  https://www2.census.gov/geo/docs/reference/codes2020/national_place2020.txt
+- or a Census Gazetteer places file (tab-separated, GEOID column)
+
+Resolution order: place code -> normalized full name -> suffix-stripped name
+(only when unique in the state) -> same-state fuzzy name (see gazetteer.py). Assignment is one-to-one: a crosswalk
+row already taken (by a code match, an earlier stage or an earlier run) is not
+offered to another place, a code two places share goes to neither of them, and places that tie for the same row in one stage
+(e.g. "Washington township" and "Washington borough" -> "washington") both
+fall through to synthetic codes. Places absent from the crosswalk get
+a deterministic synthetic code derived from a hash of (state, normalized name),
+probed past every real code in that state, so IDs never depend on row order.
+
+The resolver (lookup tables plus every (state, name) it has answered) is
+pickled next to the crosswalk and reused while the crosswalk file is unchanged.
+"""
+
+import hashlib
+import pickle
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from gazetteer import GazetteerIndex, normalize_place_names
+
+CACHE_VERSION = 3  # 2: one-to-one name matching; 3: full-name keys, ambiguous stripped names
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_crosswalk(path: Path) -> pd.DataFrame:
+    """
+    Load a place crosswalk into state_fips, place_code, place_fips, name, funcstat.
+
+    Accepts the pipe-delimited Census place codes file or a Gazetteer file.
+    """
+    with open(path, 'r', encoding='latin-1') as f:
+        header = f.readline()
+
+    if '|' in header:
+        raw = pd.read_csv(path, sep='|', dtype=str, encoding='latin-1')
+        crosswalk = pd.DataFrame({
+            'state_fips': raw['STATEFP'].str.zfill(2),
+            'place_code': raw['PLACEFP'].str.zfill(5),
+            'name': raw['PLACENAME'],
+            'funcstat': raw.get('FUNCSTAT', 'A'),
+        })
+    else:
+        raw = pd.read_csv(path, sep='\t', dtype=str, encoding='latin-1')
+        raw.columns = raw.columns.str.strip()
+        geoid = raw['GEOID'].str.zfill(7)
+        crosswalk = pd.DataFrame({
+            'state_fips': geoid.str[:2],
+            'place_code': geoid.str[2:],
+            'name': raw['NAME'],
+            'funcstat': raw.get('FUNCSTAT', 'A'),
+        })
+
+    crosswalk['place_fips'] = crosswalk['state_fips'] + crosswalk['place_code']
+    return crosswalk.drop_duplicates(subset='place_fips').reset_index(drop=True)
+
+
+class PlaceFipsResolver:
+    """Hashed (state, code) / (state, name) lookups onto official place FIPS."""
+
+    def __init__(self, crosswalk: pd.DataFrame, crosswalk_hash: str = ''):
+        self.crosswalk_hash = crosswalk_hash
+        self.code_to_fips: Dict[Tuple[str, str], str] = dict(
+            zip(zip(crosswalk['state_fips'], crosswalk['place_code']), crosswalk['place_fips'])
+        )
+        self.used_codes: Dict[str, set] = (
+            crosswalk.groupby('state_fips')['place_code'].agg(set).to_dict()
+        )
+        self.name_index = GazetteerIndex(pd.DataFrame({
+            'geoid': crosswalk['place_fips'],
+            'state_fips': crosswalk['state_fips'],
+            'name': crosswalk['name'],
+            'funcstat': crosswalk['funcstat'],
+            'latitude': float('nan'),
+            'longitude': float('nan'),
+        }))
+        # (state_fips, place_name) -> (place_fips, fips_source), grows across runs
+        self.resolved: Dict[Tuple[str, str], Tuple[str, str]] = {}
+
+    @classmethod
+    def load(cls, crosswalk_path: Path, cache_path: Path) -> 'PlaceFipsResolver':
+        """Resolver for the crosswalk, reused from cache_path while the file is unchanged."""
+        crosswalk_hash = file_sha256(crosswalk_path)
+
+        if cache_path.exists():
+            try:
+                with open(cache_path, 'rb') as f:
+                    cached = pickle.load(f)
+                if cached['version'] == CACHE_VERSION and cached['resolver'].crosswalk_hash == crosswalk_hash:
+                    return cached['resolver']
+            except Exception:
+                pass  # Rebuild below
+
+        return cls(load_crosswalk(crosswalk_path), crosswalk_hash)
+
+    def save(self, cache_path: Path):
+        with open(cache_path, 'wb') as f:
+            pickle.dump({'version': CACHE_VERSION, 'resolver': self}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def synthetic_fips(self, state_fips: str, key: str) -> str:
+        """Deterministic code for a place missing from the crosswalk."""
+        used = self.used_codes.setdefault(state_fips, set())
+        code = int(hashlib.blake2b(f"{state_fips}|{key}".encode(), digest_size=8).hexdigest(), 16) % 100000
+        while f"{code:05d}" in used:
+            code = (code + 1) % 100000
+        used.add(f"{code:05d}")
+        return f"{state_fips}{code:05d}"
+
+    def resolve(
+        self,
+        state_fips: pd.Series,
+        place_names: pd.Series,
+        place_codes: Optional[pd.Series] = None,
+    ) -> pd.DataFrame:
+        """
+        Resolve places to official FIPS.
+
+        Returns a DataFrame aligned with the inputs with place_fips and
+        fips_source ('code', 'exact', 'suffix', 'fuzzy' or 'synthetic').
+        """
+        states = state_fips.astype(str).str.zfill(2)
+        result = pd.DataFrame(index=state_fips.index, columns=['place_fips', 'fips_source'], dtype=object)
+
+        # 1. Previously resolved names (cache hits)
+        keys = pd.Series(list(zip(states, place_names)), index=result.index)
+        cached = keys.map(self.resolved)
+        hit = cached.notna()
+        if hit.any():
+            result.loc[hit, 'place_fips'] = [fips for fips, _ in cached[hit]]
+            result.loc[hit, 'fips_source'] = [source for _, source in cached[hit]]
+
+        # 2. Place code lookup, one-to-one like the name stages: a code held
+        # by an earlier answer, or given to two places here, goes to neither
+        if place_codes is not None:
+            codes = pd.to_numeric(place_codes, errors='coerce')
+            todo = result['place_fips'].isna() & codes.notna()
+            code_keys = pd.Series(
+                list(zip(states[todo], codes[todo].astype(int).map('{:05d}'.format))),
+                index=result.index[todo],
+                dtype=object,
+            )
+            fips = code_keys.map(self.code_to_fips).dropna()
+            taken = {fips for fips, _ in self.resolved.values()} | set(result['place_fips'].dropna())
+            fips = fips[~fips.isin(taken) & ~fips.duplicated(keep=False)]
+            result.loc[fips.index, 'place_fips'] = fips
+            result.loc[fips.index, 'fips_source'] = 'code'
+
+        # 3. Name lookup (exact, suffix-stripped, fuzzy) over rows nobody holds yet
+        todo = result['place_fips'].isna()
+        if todo.any():
+            taken = {fips for fips, _ in self.resolved.values()} | set(result['place_fips'].dropna())
+            matches = self.name_index.lookup(states[todo], place_names[todo], one_to_one=True, exclude=taken)
+            found = matches['match'].notna()
+            result.loc[found[found].index, 'place_fips'] = matches.loc[found, 'geoid']
+            result.loc[found[found].index, 'fips_source'] = matches.loc[found, 'match']
+
+        # 4. Synthetic, hash-derived codes for the rest (sorted for determinism)
+        todo = result['place_fips'].isna()
+        if todo.any():
+            # Names that normalize alike ("St. Louis", "Saint Louis") probe to distinct codes
+            pending = pd.DataFrame({
+                'state_fips': states[todo],
+                'key': normalize_place_names(place_names[todo]),
+                'name': place_names[todo].astype(str),
+            })
+            rows = list(zip(pending['state_fips'], pending['key'], pending['name']))
+            assigned = {
+                (state, key, name): self.synthetic_fips(state, key)
+                for state, key, name in sorted(set(rows))
+            }
+            result.loc[todo, 'place_fips'] = [assigned[row] for row in rows]
+            result.loc[todo, 'fips_source'] = 'synthetic'
+
+        self.resolved.update(zip(keys, zip(result['place_fips'], result['fips_source'])))
+
+        return result
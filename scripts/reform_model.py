@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Serving module for the v3 reform impact model (train_model_v3.py).
+
+The model is a RandomForestRegressor on three features:
+
+    reform_type_encoded   REFORM_TYPE_CODES, unknown types -> DEFAULT_REFORM_CODE
+    baseline_wrluri       Wharton Residential Land Use Regulatory Index
+    reform_year           year the reform took effect
+
+train_model_v3.py writes the feature schema next to the pickle
+(reform_impact_model_v3.schema.json: feature names, dtypes and training
+ranges, the reform type codes, the scikit-learn version). ModelServer loads
+both once per process, checks the schema against the fitted model, and
+validates every batch before scoring it:
+
+    server = load_server()
+    server.predict(df)   # columns prediction, lower, upper; index of df
+
+df may carry the encoded features or the raw reform_type / effective_date
+columns. Per-tree predictions come from one model.apply call (every row's
+leaf in every tree) and a gather from a (trees x nodes) leaf value table, so
+the forest mean and the percentile spread across trees are computed
+without a Python loop over trees or rows.
+
+score_places scores every place in place_metrics_comprehensive.csv for
+every reform type in one predict call; the stage's rows/s is recorded in the
+perf log. Places without a WRLURI in the reforms database take their state's
+median, else the national median.
+
+Usage:
+    python scripts/reform_model.py score
+    python scripts/reform_model.py schema
+"""
+
+import json
+import pickle
+import re
+import sys
+import warnings
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from perf import instrument
+
+MODEL_FILE = Path('data/outputs/reform_impact_model_v3.pkl')
+REFORMS_FILE = Path('data/raw/city_reforms_expanded.csv')
+METRICS_FILE = Path('data/outputs/place_metrics_comprehensive.csv')
+PREDICTIONS_FILE = Path('data/outputs/place_reform_predictions.csv')
+
+FEATURES = ['reform_type_encoded', 'baseline_wrluri', 'reform_year']
+REFORM_TYPE_CODES = {
+    'Comprehensive Reform': 0,
+    'ADU/Lot Split': 1,
+    'Zoning Upzones': 2,
+    'By-Right Development': 3,
+    'Parking Reform': 4,
+}
+DEFAULT_REFORM_CODE = 2
+
+INTERVAL = (10, 90)  # percentiles of the per-tree predictions
+BATCH_ROWS = 50_000  # rows per apply/gather step; bounds the trees x rows matrix
+
+
+def schema_path(model_path: Path) -> Path:
+    return Path(model_path).with_suffix('.schema.json')
+
+
+def encode_reform_types(reform_types: pd.Series, codes: Dict[str, int] = REFORM_TYPE_CODES,
+                        default: int = DEFAULT_REFORM_CODE) -> np.ndarray:
+    return reform_types.map(codes).fillna(default).to_numpy(dtype=np.float64)
+
+
+def build_schema(model, X: pd.DataFrame, target: str) -> Dict:
+    """Schema for a freshly trained model: feature order, dtypes and training ranges."""
+    import sklearn
+
+    return {
+        'estimator': type(model).__name__,
+        'sklearn_version': sklearn.__version__,
+        'target': target,
+        'features': [
+            {'name': col, 'dtype': str(X[col].dtype), 'min': float(X[col].min()), 'max': float(X[col].max())}
+            for col in FEATURES
+        ],
+        'reform_type_codes': REFORM_TYPE_CODES,
+        'default_reform_code': DEFAULT_REFORM_CODE,
+    }
+
+
+def load_model(path: Path = MODEL_FILE):
+    """Unpickle the forest; a scikit-learn version mismatch is reported once, not per tree."""
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        with open(path, 'rb') as f:
+            model = pickle.load(f)
+    if any('version' in str(w.message) for w in caught):
+        print(f"[WARN] {path} was pickled with a different scikit-learn version; retrain if predictions look off")
+    return model
+
+
+class ModelServer:
+    """A fitted forest plus its schema, ready for batch scoring."""
+
+    def __init__(self, model, schema: Optional[Dict] = None):
+        self.model = model
+        self.schema = schema or {
+            'features': [{'name': name} for name in FEATURES],
+            'reform_type_codes': REFORM_TYPE_CODES,
+            'default_reform_code': DEFAULT_REFORM_CODE,
+        }
+        self.features = [feature['name'] for feature in self.schema['features']]
+        self._check_model()
+
+        # Leaf value of every node in every tree, padded to the largest tree
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        self.leaf_values = np.zeros((len(trees), max(tree.node_count for tree in trees)))
+        for i, tree in enumerate(trees):
+            self.leaf_values[i, :tree.node_count] = tree.value[:, 0, 0]
+
+    def _check_model(self):
+        fitted = getattr(self.model, 'feature_names_in_', None)
+        if fitted is not None and list(fitted) != self.features:
+            raise ValueError(f"Schema features {self.features} do not match the model's {list(fitted)}")
+        if self.model.n_features_in_ != len(self.features):
+            raise ValueError(f"Schema has {len(self.features)} features, model expects {self.model.n_features_in_}")
+        if getattr(self.model, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests are supported")
+
+    @classmethod
+    def load(cls, path: Path = MODEL_FILE) -> 'ModelServer':
+        path = Path(path)
+        schema = None
+        if schema_path(path).exists():
+            schema = json.loads(schema_path(path).read_text())
+        else:
+            print(f"[WARN] {schema_path(path)} not found; validating feature names only (retrain to write it)")
+        model = load_model(path)
+        model.n_jobs = -1  # apply() walks the trees on all cores
+        return cls(model, schema)
+
+    def prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        The validated float feature frame for df.
+
+        Raw reform_type and effective_date columns are encoded when the
+        feature columns are absent. Missing columns, non-numeric values and
+        NaNs raise ValueError; values outside the training range are only
+        reported, since the trees predict them as the nearest range edge.
+        """
+        X = pd.DataFrame(index=df.index)
+        for name in self.features:
+            if name in df:
+                X[name] = df[name]
+            elif name == 'reform_type_encoded' and 'reform_type' in df:
+                X[name] = encode_reform_types(df['reform_type'], self.schema['reform_type_codes'],
+                                              self.schema['default_reform_code'])
+            elif name == 'reform_year' and 'effective_date' in df:
+                X[name] = pd.to_datetime(df['effective_date'], errors='coerce').dt.year
+
+        missing = [name for name in self.features if name not in X]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+
+        for name in self.features:
+            if not pd.api.types.is_numeric_dtype(X[name]):
+                raise ValueError(f"Feature {name} is {X[name].dtype}, expected numeric")
+        X = X.astype(np.float64)
+        null_rows = int(X.isna().any(axis=1).sum())
+        if null_rows:
+            raise ValueError(f"{null_rows:,} rows have missing feature values")
+
+        for feature in self.schema['features']:
+            if 'min' in feature:
+                outside = int(((X[feature['name']] < feature['min']) | (X[feature['name']] > feature['max'])).sum())
+                if outside:
+                    print(f"[WARN] {outside:,} rows have {feature['name']} outside the training range "
+                          f"[{feature['min']:g}, {feature['max']:g}]")
+        return X
+
+    def per_tree(self, X: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """(trees x rows) predictions: leaf ids from one apply call, values by one gather."""
+        if not isinstance(X, pd.DataFrame):
+            X = pd.DataFrame(np.asarray(X, dtype=np.float64), columns=self.features)
+        leaves = self.model.apply(X[self.features])  # (rows, trees)
+        return self.leaf_values[np.arange(len(self.leaf_values))[:, None], leaves.T]
+
+    def predict_array(self, X: Union[pd.DataFrame, np.ndarray],
+                      interval: Tuple[float, float] = INTERVAL) -> Dict[str, np.ndarray]:
+        """
+        Forest mean plus the percentile spread across trees, in row batches.
+
+        The mean is what model.predict returns. lower/upper are percentiles
+        of the individual tree predictions, i.e. how much the trees disagree,
+        not a prediction interval: they say nothing about the noise in a
+        city's outcome, and the mean can fall outside them when the per-tree
+        predictions are skewed.
+        """
+        n_rows = len(X)
+        out = {key: np.empty(n_rows) for key in ('prediction', 'lower', 'upper')}
+        for start in range(0, n_rows, BATCH_ROWS):
+            batch = X.iloc[start:start + BATCH_ROWS] if isinstance(X, pd.DataFrame) else X[start:start + BATCH_ROWS]
+            per_tree = self.per_tree(batch)
+            stop = start + per_tree.shape[1]
+            out['prediction'][start:stop] = per_tree.mean(axis=0)
+            out['lower'][start:stop], out['upper'][start:stop] = np.percentile(per_tree, interval, axis=0)
+        return out
+
+    @instrument()
+    def predict(self, df: pd.DataFrame, interval: Tuple[float, float] = INTERVAL) -> pd.DataFrame:
+        """Validated batch scoring; returns prediction, lower and upper aligned to df's index."""
+        return pd.DataFrame(self.predict_array(self.prepare(df), interval), index=df.index)
+
+
+@lru_cache(maxsize=None)
+def load_server(path: Path = MODEL_FILE) -> ModelServer:
+    """The process-wide server for a model file (loaded on first use)."""
+    return ModelServer.load(path)
+
+
+def predict_many(model, X: Union[pd.DataFrame, np.ndarray],
+                 interval: Tuple[float, float] = INTERVAL) -> Dict[str, np.ndarray]:
+    """Forest mean plus the per-tree percentile spread for every row of X (FEATURES columns, in order)."""
+    if isinstance(X, pd.DataFrame):
+        X = X[FEATURES]
+    return ModelServer(model).predict_array(X, interval)
+
+
+# =============================================================================
+# Place scoring
+# =============================================================================
+
+def place_wrluri(places: pd.DataFrame) -> pd.DataFrame:
+    """baseline_wrluri per place plus its source: city, state median or national median."""
+    reforms = pd.read_csv(REFORMS_FILE, dtype={'place_fips': str, 'state_fips': str})
+    reforms['place_fips'] = reforms['place_fips'].str.zfill(7)
+    reforms['state_fips'] = reforms['state_fips'].str.zfill(2)
+
+    city = reforms.groupby('place_fips')['baseline_wrluri'].median()
+    state = reforms.groupby('state_fips')['baseline_wrluri'].median()
+
+    wrluri = places['place_fips'].map(city)
+    source = np.where(wrluri.notna(), 'city', 'state')
+    wrluri = wrluri.fillna(places['state_fips'].map(state))
+    source = np.where(wrluri.isna(), 'national', source)
+    wrluri = wrluri.fillna(reforms['baseline_wrluri'].median())
+    return places.assign(baseline_wrluri=wrluri.to_numpy(), wrluri_source=source)
+
+
+def score_places(server: ModelServer, places: pd.DataFrame) -> pd.DataFrame:
+    """One row per place with prediction / lower / upper columns for every reform type."""
+    places = place_wrluri(places)
+    reform_types = list(server.schema['reform_type_codes'])
+    # Score as if the reform took effect in the latest training year
+    ranges = {f['name']: f for f in server.schema['features'] if 'max' in f}
+    if 'reform_year' in ranges:
+        reference_year = int(ranges['reform_year']['max'])
+    else:
+        reference_year = int(pd.to_datetime(pd.read_csv(REFORMS_FILE)['effective_date'], errors='coerce').dt.year.max())
+
+    # Places x reform types in one batch
+    batch = places.loc[places.index.repeat(len(reform_types)), ['place_fips', 'baseline_wrluri']].reset_index(drop=True)
+    batch['reform_type'] = np.tile(reform_types, len(places))
+    batch['reform_year'] = reference_year
+    scored = pd.concat([batch, server.predict(batch)], axis=1)
+
+    wide = scored.pivot(index='place_fips', columns='reform_type', values=['prediction', 'lower', 'upper'])
+    wide.columns = [f"{re.sub(r'[^a-z0-9]+', '_', reform.lower()).strip('_')}_{stat}" for stat, reform in wide.columns]
+    wide = wide.round(2)[sorted(wide.columns)]
+    keep = ['place_fips', 'place_name', 'state_fips', 'baseline_wrluri', 'wrluri_source']
+    return places[keep].merge(wide, left_on='place_fips', right_index=True, how='left')
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ('score', 'schema'):
+        print(__doc__)
+        return 2
+
+    server = load_server(MODEL_FILE)
+    if args[0] == 'schema':
+        print(json.dumps(server.schema, indent=2))
+        return 0
+
+    if not METRICS_FILE.exists():
+        print(f"[X] Input file not found: {METRICS_FILE}")
+        return 1
+    places = pd.read_csv(METRICS_FILE, usecols=['place_fips', 'place_name', 'state_fips'],
+                         dtype={'place_fips': str, 'state_fips': str})
+    places['place_fips'] = places['place_fips'].str.zfill(7)
+    places['state_fips'] = places['state_fips'].str.zfill(2)
+    places = places.drop_duplicates('place_fips').reset_index(drop=True)
+
+    print(f"[INFO] Scoring {len(places):,} places x {len(server.schema['reform_type_codes'])} reform types")
+    predictions = score_places(server, places)
+    predictions.to_csv(PREDICTIONS_FILE, index=False)
+    print(f"[OK] Wrote {PREDICTIONS_FILE} ({len(predictions):,} places)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
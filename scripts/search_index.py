@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Compact binary place search index (built by script 26).
+
+places.json is a list of dicts that Fuse.js scans linearly on every
+keystroke. This index is a single binary file the client decodes into typed
+arrays once, then answers each keystroke from posting lists:
+
+- Places are sorted by their normalized name, so a name prefix is one
+  contiguous range found by binary search (the sorted array acts as the
+  prefix trie).
+- Word-start trigrams (' lo', 'los', ' an', 'ang', ...) map to posting lists
+  of place ids, delta + varint encoded. Counting shared trigrams gives
+  substring and typo-tolerant matches without scanning every name.
+- Numeric columns are typed arrays, fixed-point where one decimal is enough.
+
+File layout (little-endian):
+    b'PLIX' | uint32 header length | header JSON | sections (4-byte aligned)
+The header lists every section's dtype, byte offset, length and scale.
+
+Ranking: name prefix, then word prefix, then share of query trigrams
+matched; ties go to the place with more 2024 permits.
+
+app/lib/search-index.ts decodes the same format and implements the same
+lookup; SearchIndex below is the reference implementation.
+
+write_shards splits the same index into a hot shard and per-state shards
+with content-hash filenames, so the first search can run against the hot
+shard while the rest stream in.
+
+Usage:
+    python scripts/search_index.py app/public/data/search/places.idx.bin "los ang"
+    python scripts/search_index.py app/public/data/search/manifest.json "los ang"
+"""
+
+import bisect
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import struct
+import sys
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import brotli
+except ImportError:  # optional: only the .br variant is skipped
+    brotli = None
+
+MAGIC = b'PLIX'
+VERSION = 1
+MIN_GRAM_SHARE = 0.5  # share of query trigrams a fuzzy match must contain
+HOT_SHARD_SIZE = 500  # most active places, searchable before the state shards load
+
+# Column -> (section dtype, fixed-point scale); value = stored / scale
+NUMERIC_COLUMNS = {
+    'recent_units_2024': ('int32', 1),
+    'growth_rate_5yr': ('int16', 10),
+    'mf_share_recent': ('uint16', 10),
+    'rank_permits_national': ('uint8', 1),
+    'rank_growth_national': ('uint8', 1),
+}
+
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text: str) -> str:
+    """Lowercase ASCII key: accents stripped, punctuation collapsed to single spaces."""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return NON_ALNUM.sub(' ', text.lower()).strip()
+
+
+def trigrams(key: str) -> List[str]:
+    """Trigrams of each word, with a leading space so word starts get their own grams."""
+    grams = []
+    for word in key.split():
+        padded = ' ' + word
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return list(dict.fromkeys(grams))
+
+
+def encode_varints(values: np.ndarray) -> bytes:
+    """Unsigned LEB128 encoding of non-negative integers."""
+    out = bytearray()
+    for value in values.tolist():
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_varints(data: bytes, count: int) -> np.ndarray:
+    values = np.empty(count, dtype=np.int64)
+    pos = 0
+    for i in range(count):
+        value, shift = 0, 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        values[i] = value
+    return values
+
+
+# =============================================================================
+# Build
+# =============================================================================
+
+def build_index(df: pd.DataFrame) -> bytes:
+    """Serialize the search columns of the place metrics table."""
+    df = df.copy()
+    df['_key'] = df['place_name'].fillna('').map(normalize)
+    df = df.sort_values(['_key', 'recent_units_2024'], ascending=[True, False], kind='stable').reset_index(drop=True)
+
+    sections: Dict[str, Tuple[np.ndarray, Dict]] = {}
+
+    def blob(values: List[str]) -> np.ndarray:
+        return np.frombuffer('\n'.join(values).encode('utf-8'), dtype=np.uint8)
+
+    sections['names'] = (blob(df['place_name'].fillna('').astype(str).tolist()), {'dtype': 'utf8'})
+    fips = pd.to_numeric(df['place_fips'], errors='coerce').fillna(0).astype(np.uint32).to_numpy()
+    sections['place_fips'] = (fips, {'dtype': 'uint32', 'width': 7})
+    state = pd.to_numeric(df['state_fips'], errors='coerce').fillna(0).astype(np.uint8).to_numpy()
+    sections['state_fips'] = (state, {'dtype': 'uint8', 'width': 2})
+
+    for col, (dtype, scale) in NUMERIC_COLUMNS.items():
+        info = np.iinfo(dtype)
+        values = pd.to_numeric(df[col], errors='coerce').fillna(0).to_numpy(float) * scale
+        sections[col] = (np.clip(np.round(values), info.min, info.max).astype(dtype), {'dtype': dtype, 'scale': scale})
+
+    postings: Dict[str, List[int]] = {}
+    for doc, key in enumerate(df['_key']):
+        for gram in trigrams(key):
+            postings.setdefault(gram, []).append(doc)
+    grams = sorted(postings)
+    lengths = np.array([len(postings[g]) for g in grams], dtype=np.uint32)
+    # Ids within a list are ascending, so store gaps (first id as its own gap)
+    deltas = np.concatenate([np.diff(np.asarray(postings[g]), prepend=0) for g in grams]) if grams else np.array([], int)
+
+    sections['grams'] = (blob(grams), {'dtype': 'utf8'})
+    sections['posting_lengths'] = (lengths, {'dtype': 'uint32'})
+    sections['postings'] = (np.frombuffer(encode_varints(deltas), dtype=np.uint8),
+                            {'dtype': 'varint', 'count': int(len(deltas))})
+
+    header = {'version': VERSION, 'n_places': len(df), 'n_grams': len(grams), 'sections': {}}
+    payload = bytearray()
+    for name, (array, meta) in sections.items():
+        payload.extend(b'\0' * (-len(payload) % 4))
+        raw = np.ascontiguousarray(array).astype(array.dtype.newbyteorder('<'), copy=False).tobytes()
+        header['sections'][name] = {**meta, 'offset': len(payload), 'bytes': len(raw)}
+        payload.extend(raw)
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    header_bytes += b' ' * (-(8 + len(header_bytes)) % 4)
+    return MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes + bytes(payload)
+
+
+def write_index(df: pd.DataFrame, path: Path) -> Dict[str, int]:
+    """Write the index plus .gz (and .br when brotli is installed); returns sizes in bytes."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = build_index(df)
+    path.write_bytes(data)
+    sizes = {path.name: len(data)}
+
+    gz_path = path.with_name(path.name + '.gz')
+    gz_path.write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    sizes[gz_path.name] = gz_path.stat().st_size
+
+    if brotli is not None:
+        br_path = path.with_name(path.name + '.br')
+        br_path.write_bytes(brotli.compress(data, quality=11))
+        sizes[br_path.name] = br_path.stat().st_size
+    return sizes
+
+
+def write_shards(df: pd.DataFrame, out_dir: Path, hot_size: int = HOT_SHARD_SIZE) -> Dict:
+    """
+    Split the index into a hot shard plus one shard per state, listed in manifest.json.
+
+    The hot shard holds the hot_size places with the most 2024 permits (the
+    identify_key_markets ranking from script 22); each state shard holds the
+    rest of that state, so every place is in exactly one shard. Shard files
+    are named by content hash and can be cached forever; only manifest.json
+    keeps a fixed name.
+
+    Shards are written before manifest.json, which is replaced atomically, so
+    a reader always sees a complete manifest whose shards exist. Shards
+    listed by neither the new nor the previous manifest are then removed; the
+    previous generation is kept for clients that loaded the old manifest
+    before the swap and are still fetching its shards. A rebuild that lists
+    the same shards changes nothing.
+    """
+    out_dir = Path(out_dir)
+    shard_dir = out_dir / 'shards'
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / 'manifest.json'
+    previous = listed_shards(manifest_path)
+
+    units = pd.to_numeric(df['recent_units_2024'], errors='coerce').fillna(0)
+    is_hot = np.zeros(len(df), dtype=bool)
+    is_hot[np.argsort(-units.to_numpy(), kind='stable')[:hot_size]] = True
+    state = pd.to_numeric(df['state_fips'], errors='coerce').fillna(0).astype(int).to_numpy()
+
+    def write(stem: str, part: pd.DataFrame) -> Dict:
+        data = build_index(part)
+        name = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}.bin"
+        if not (shard_dir / name).exists():
+            write_atomic(shard_dir / name, data)
+        return {'file': f'shards/{name}', 'places': len(part), 'bytes': len(data)}
+
+    manifest = {'version': VERSION, 'places': len(df), 'hot': write('hot', df[is_hot]), 'states': {}}
+    for code in np.unique(state[~is_hot]):
+        manifest['states'][f'{code:02d}'] = write(f'state-{code:02d}', df[~is_hot & (state == code)])
+
+    write_atomic(manifest_path, json.dumps(manifest, indent=2).encode())
+
+    current = listed_shards(manifest_path)
+    if current != previous:  # an unchanged rebuild is not a new generation
+        for stale in shard_dir.glob('*.bin'):
+            if stale.name not in current | previous:
+                stale.unlink()
+    return manifest
+
+
+def listed_shards(manifest_path: Path) -> set:
+    """Shard file names a manifest lists; empty when it is missing or unreadable."""
+    try:
+        manifest = json.loads(Path(manifest_path).read_text())
+        entries = [manifest['hot'], *manifest['states'].values()]
+    except (OSError, ValueError, KeyError, TypeError):
+        return set()
+    return {Path(entry['file']).name for entry in entries}
+
+
+def write_atomic(path: Path, data: bytes):
+    """Write to a temporary file beside path, then rename it over path."""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+# =============================================================================
+# Reference lookup
+# =============================================================================
+
+class SearchIndex:
+    """Decoded index with the same lookup the client runs."""
+
+    def __init__(self, data: bytes):
+        if data[:4] != MAGIC:
+            raise ValueError("Not a place search index")
+        header_len = struct.unpack('<I', data[4:8])[0]
+        self.header = json.loads(data[8:8 + header_len])
+        if self.header['version'] != VERSION:
+            raise ValueError(f"Unsupported index version {self.header['version']}")
+        base = 8 + header_len
+
+        def section(name: str):
+            meta = self.header['sections'][name]
+            raw = data[base + meta['offset']:base + meta['offset'] + meta['bytes']]
+            if meta['dtype'] == 'utf8':
+                text = raw.decode('utf-8')
+                return text.split('\n') if text else []
+            if meta['dtype'] == 'varint':
+                return decode_varints(raw, meta['count'])
+            return np.frombuffer(raw, dtype=np.dtype(meta['dtype']).newbyteorder('<'))
+
+        self.names = section('names')
+        self.keys = [normalize(name) for name in self.names]
+        self.padded_keys = np.array([' ' + key for key in self.keys], dtype=str)
+        self.columns = {name: section(name) for name in ['place_fips', 'state_fips'] + list(NUMERIC_COLUMNS)}
+        self.popularity = self.columns['recent_units_2024'].astype(np.int64)
+
+        grams = section('grams')
+        lengths = section('posting_lengths').astype(np.int64)
+        ids = section('postings')
+        starts = np.concatenate([[0], np.cumsum(lengths)])
+        self.postings = {gram: np.cumsum(ids[starts[i]:starts[i + 1]]) for i, gram in enumerate(grams)}
+
+    @classmethod
+    def load(cls, path: Path) -> 'SearchIndex':
+        data = Path(path).read_bytes()
+        if str(path).endswith('.gz'):
+            data = gzip.decompress(data)
+        return cls(data)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def record(self, doc: int) -> Dict:
+        """The places.json record for one place id."""
+        record = {
+            'place_fips': str(int(self.columns['place_fips'][doc])).zfill(7),
+            'place_name': self.names[doc],
+            'state_fips': str(int(self.columns['state_fips'][doc])).zfill(2),
+        }
+        for col, (_, scale) in NUMERIC_COLUMNS.items():
+            value = self.columns[col][doc]
+            record[col] = int(value) if scale == 1 else round(float(value) / scale, 1)
+        return record
+
+    def prefix_range(self, key: str) -> Tuple[int, int]:
+        """Ids whose normalized name starts with key form the range [lo, hi)."""
+        lo = bisect.bisect_left(self.keys, key)
+        hi = bisect.bisect_left(self.keys, key + '\x7f', lo)
+        return lo, hi
+
+    def search_hits(self, query: str, limit: int = 10) -> List[Tuple[int, int, int, int]]:
+        """Best matches as (tier, -trigrams matched, -popularity, id), in rank order."""
+        key = normalize(query)
+        if not key:
+            return []
+
+        lo, hi = self.prefix_range(key)
+        prefix_hits = np.arange(lo, hi)
+        grams = trigrams(key)
+        if not grams:  # one or two characters: name prefix only
+            top = prefix_hits[np.argsort(-self.popularity[prefix_hits], kind='stable')][:limit]
+            return [(0, 0, -int(self.popularity[doc]), int(doc)) for doc in top]
+
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        counts = np.bincount(np.concatenate(lists), minlength=len(self)) if lists else np.zeros(len(self), int)
+        counts[prefix_hits] = len(grams)
+        candidates = np.flatnonzero(counts >= math.ceil(MIN_GRAM_SHARE * len(grams)))
+
+        # A word-prefix match contains every query trigram, so only full
+        # matches outside the prefix range need the substring check
+        tier = np.full(len(candidates), 2, dtype=np.int64)
+        tier[(candidates >= lo) & (candidates < hi)] = 0
+        check = np.flatnonzero((tier == 2) & (counts[candidates] == len(grams)))
+        if len(check):
+            found = np.char.find(self.padded_keys[candidates[check]], ' ' + key) >= 0
+            tier[check[found]] = 1
+
+        # One int64 sort key: tier, then trigrams matched, then popularity
+        rank = (tier << 56) - (counts[candidates].astype(np.int64) << 40) - np.minimum(self.popularity[candidates], (1 << 40) - 1)
+        if len(candidates) > limit:
+            top = np.argpartition(rank, limit)[:limit]
+            candidates, tier, rank = candidates[top], tier[top], rank[top]
+        order = np.lexsort((candidates, rank))
+        return [(int(tier[i]), -int(counts[doc]), -int(self.popularity[doc]), int(doc))
+                for i, doc in zip(order.tolist(), candidates[order].tolist())]
+
+    def search_ids(self, query: str, limit: int = 10) -> List[int]:
+        return [hit[-1] for hit in self.search_hits(query, limit)]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        return [self.record(doc) for doc in self.search_ids(query, limit)]
+
+
+class ShardedSearch:
+    """The shards of a manifest searched together, as the client does once all have loaded."""
+
+    def __init__(self, shards: List[SearchIndex]):
+        self.shards = shards
+
+    @classmethod
+    def load(cls, manifest_path: Path) -> 'ShardedSearch':
+        manifest_path = Path(manifest_path)
+        manifest = json.loads(manifest_path.read_text())
+        entries = [manifest['hot'], *manifest['states'].values()]
+        return cls([SearchIndex.load(manifest_path.parent / entry['file']) for entry in entries])
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        # Per-shard hits share one sort key; ties go to the earlier shard, then the lower id
+        hits = [(*hit[:3], n, hit[3]) for n, shard in enumerate(self.shards)
+                for hit in shard.search_hits(query, limit)]
+        return [self.shards[n].record(doc) for *_, n, doc in sorted(hits)[:limit]]
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        return 2
+    path = Path(sys.argv[1])
+    index = ShardedSearch.load(path) if path.suffix == '.json' else SearchIndex.load(path)
+    for record in index.search(' '.join(sys.argv[2:])):
+        print(f"{record['place_fips']}  {record['place_name']:<40} {record['recent_units_2024']:>8,}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
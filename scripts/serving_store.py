@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Embedded SQLite serving store for place and county lookups.
+
+The API read paths are random lookups by FIPS (one place, one state's
+counties, one jurisdiction's economic context). Instead of each request
+parsing a CSV, the pipeline publishes one pre-aggregated SQLite file and
+readers answer point and range queries from its indexes:
+
+    store = ServingStore()
+    store.get('place', '0644000')                  # entity + attributes
+    store.series('place', '0644000', 2018, 2022)   # annual rows 2018-2022
+    store.counties('06')                           # a state's counties, aggregated
+    store.attribute('place', '0644000', 'economic')
+
+Schema (data/outputs/serving.sqlite):
+- permits(geo_level, fips, year, state_fips, sf_units, mf_units, total_units, months)
+  WITHOUT ROWID with primary key (geo_level, fips, year), so the table is
+  clustered on the lookup key and a point or range query reads one B-tree
+  range. A second covering index (geo_level, state_fips, fips, year, counts)
+  answers per-state aggregates without touching the table.
+- entities(geo_level, fips, state_fips, name)
+- attributes(geo_level, fips, kind, data): JSON documents, e.g. the place
+  metrics row ('metrics') or unified_economic_features.csv ('economic').
+
+Sources (each optional):
+- county: permit_store 'county' table (script 08), else
+          data/outputs/county_permits_monthly.csv (script 09) summed to years
+- place:  permit_store 'place_bulk' table (script 21)
+- data/outputs/place_metrics_comprehensive.csv (script 22)
+- data/outputs/unified_economic_features.csv
+
+The file is built under a temporary name and swapped in with os.replace, so
+open readers keep their snapshot. The database is left in WAL mode; readers
+open it read-only.
+
+Usage:
+    python scripts/serving_store.py build
+    python scripts/serving_store.py get place 0644000
+    python scripts/serving_store.py series county 06037 2020 2024
+    python scripts/serving_store.py counties 06
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from perf import instrument
+from permit_store import load_table
+
+STORE_FILE = Path('data/outputs/serving.sqlite')
+COUNTY_MONTHLY_CSV = Path('data/outputs/county_permits_monthly.csv')
+PLACE_METRICS_CSV = Path('data/outputs/place_metrics_comprehensive.csv')
+ECONOMIC_CSV = Path('data/outputs/unified_economic_features.csv')
+
+GEO_LEVELS = ('state', 'county', 'place')
+FIPS_WIDTH = {'state': 2, 'county': 5, 'place': 7}
+PERMIT_COLUMNS = ['geo_level', 'fips', 'year', 'state_fips', 'sf_units', 'mf_units', 'total_units', 'months']
+
+SCHEMA = """
+    CREATE TABLE permits (
+        geo_level   TEXT    NOT NULL,
+        fips        TEXT    NOT NULL,
+        year        INTEGER NOT NULL,
+        state_fips  TEXT    NOT NULL,
+        sf_units    INTEGER NOT NULL,
+        mf_units    INTEGER NOT NULL,
+        total_units INTEGER NOT NULL,
+        months      INTEGER NOT NULL,
+        PRIMARY KEY (geo_level, fips, year)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE entities (
+        geo_level  TEXT NOT NULL,
+        fips       TEXT NOT NULL,
+        state_fips TEXT NOT NULL,
+        name       TEXT,
+        PRIMARY KEY (geo_level, fips)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE attributes (
+        geo_level TEXT NOT NULL,
+        fips      TEXT NOT NULL,
+        kind      TEXT NOT NULL,
+        data      TEXT NOT NULL,
+        PRIMARY KEY (geo_level, fips, kind)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE metadata (
+        key   TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+"""
+
+# Created after the bulk insert (cheaper than maintaining them row by row)
+INDEXES = """
+    CREATE INDEX permits_by_state ON permits
+        (geo_level, state_fips, fips, year, sf_units, mf_units, total_units, months);
+    CREATE INDEX entities_by_state ON entities (geo_level, state_fips, fips, name);
+"""
+
+
+# =============================================================================
+# Sources
+# =============================================================================
+
+def county_rows() -> Optional[pd.DataFrame]:
+    """Annual county rows in store layout, plus county names."""
+    try:
+        df = load_table('county').to_frame()
+        df = df.rename(columns={'sf_annual': 'sf_units', 'mf_annual': 'mf_units',
+                                'total_annual': 'total_units', 'county_name': 'name'})
+        df['months'] = 12
+    except FileNotFoundError:
+        if not COUNTY_MONTHLY_CSV.exists():
+            return None
+        monthly = pd.read_csv(COUNTY_MONTHLY_CSV, dtype={'fips': str, 'state_fips': str})
+        df = (monthly.groupby(['fips', 'year'], as_index=False)
+              .agg(state_fips=('state_fips', 'first'), name=('county_name', 'first'),
+                   sf_units=('sf_permits', 'sum'), mf_units=('mf_permits', 'sum'),
+                   total_units=('total_permits', 'sum'), months=('total_permits', 'size')))
+    return df.assign(geo_level='county')
+
+
+def place_rows() -> Optional[pd.DataFrame]:
+    """Annual place rows in store layout (places without a FIPS are dropped)."""
+    try:
+        df = load_table('place_bulk').to_frame()
+    except FileNotFoundError:
+        return None
+    df = df.dropna(subset=['place_fips']).rename(columns={'place_fips': 'fips', 'place_name': 'name'})
+    df['state_fips'] = df['fips'].str[:2]
+    return df.assign(geo_level='place', months=12)
+
+
+def csv_attributes(path: Path, fips_column: str, kind: str, geo_level: str = 'place') -> Optional[pd.DataFrame]:
+    """One JSON document per row of a CSV of one geo_level, keyed by its FIPS column."""
+    if not path.exists():
+        return None
+    df = pd.read_csv(path, dtype={fips_column: str, 'state_fips': str})
+    df = df.dropna(subset=[fips_column]).drop_duplicates(fips_column)
+    fips = df[fips_column].str.zfill(FIPS_WIDTH[geo_level])
+    # to_json turns NaN into null; split it back into one document per row
+    documents = [json.dumps(row, separators=(',', ':'))
+                 for row in json.loads(df.to_json(orient='records'))]
+    return pd.DataFrame({'geo_level': geo_level, 'fips': fips, 'kind': kind, 'data': documents})
+
+
+# =============================================================================
+# Build
+# =============================================================================
+
+@instrument()
+def build_store(path: Path, permits: List[pd.DataFrame], attributes: List[pd.DataFrame]) -> Dict:
+    """
+    Write a fresh store from permit frames (store layout plus a 'name' column)
+    and attribute frames (geo_level, fips, kind, data). Returns row counts.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    permits = [df for df in permits if df is not None and len(df)]
+    attributes = [df for df in attributes if df is not None and len(df)]
+    rows = pd.concat(permits, ignore_index=True) if permits else pd.DataFrame(columns=PERMIT_COLUMNS + ['name'])
+
+    # Several source rows for one key (e.g. revised reports) are summed
+    rows = (rows.groupby(['geo_level', 'fips', 'year'], as_index=False, sort=True)
+            .agg(state_fips=('state_fips', 'first'), name=('name', 'last'),
+                 sf_units=('sf_units', 'sum'), mf_units=('mf_units', 'sum'),
+                 total_units=('total_units', 'sum'), months=('months', 'sum')))
+    entities = rows.drop_duplicates(['geo_level', 'fips'], keep='last')[['geo_level', 'fips', 'state_fips', 'name']]
+
+    conn = sqlite3.connect(str(tmp_path))
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(SCHEMA)
+
+        permit_values = rows[PERMIT_COLUMNS].astype({'year': np.int64, 'sf_units': np.int64, 'mf_units': np.int64,
+                                                     'total_units': np.int64, 'months': np.int64})
+        conn.executemany(f"INSERT INTO permits VALUES ({','.join('?' * len(PERMIT_COLUMNS))})",
+                         permit_values.itertuples(index=False, name=None))
+        conn.executemany("INSERT INTO entities VALUES (?, ?, ?, ?)",
+                         entities.astype(object).where(entities.notna(), None).itertuples(index=False, name=None))
+        for df in attributes:
+            conn.executemany("INSERT OR REPLACE INTO attributes VALUES (?, ?, ?, ?)",
+                             df[['geo_level', 'fips', 'kind', 'data']].itertuples(index=False, name=None))
+
+        conn.executescript(INDEXES)
+        counts = {
+            'permits': len(rows),
+            'entities': len(entities),
+            'attributes': sum(len(df) for df in attributes),
+        }
+        conn.executemany("INSERT INTO metadata VALUES (?, ?)", [
+            ('built_at', str(time.time())),
+            ('counts', json.dumps(counts)),
+        ])
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+
+    tmp_path.replace(path)
+    for suffix in ('-wal', '-shm'):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)  # left over from the replaced file
+    return counts
+
+
+def build_from_outputs(path: Path = STORE_FILE) -> Dict:
+    """Build the store from the pipeline outputs that exist."""
+    permits = [county_rows(), place_rows()]
+    attributes = [
+        csv_attributes(PLACE_METRICS_CSV, 'place_fips', 'metrics', 'place'),
+        # Keyed like the economic-context route: jurisdiction_fips padded to 7
+        csv_attributes(ECONOMIC_CSV, 'jurisdiction_fips', 'economic', 'place'),
+    ]
+    return build_store(path, permits, attributes)
+
+
+# =============================================================================
+# Reader
+# =============================================================================
+
+class ServingStore:
+    """Read-only access to the serving store; one connection per instance."""
+
+    def __init__(self, path: Path = STORE_FILE):
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Serving store not found: {self.path} (run: python scripts/serving_store.py build)")
+        self.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA query_only=ON")
+
+    @staticmethod
+    def normalize(geo_level: str, fips) -> str:
+        if geo_level not in GEO_LEVELS:
+            raise ValueError(f"Unknown geo_level '{geo_level}' (expected one of {GEO_LEVELS})")
+        return str(fips).zfill(FIPS_WIDTH[geo_level])
+
+    def series(self, geo_level: str, fips, start: Optional[int] = None, end: Optional[int] = None) -> List[Dict]:
+        """Annual rows for one geography between two years (inclusive)."""
+        rows = self.conn.execute(
+            "SELECT year, sf_units, mf_units, total_units, months FROM permits "
+            "WHERE geo_level = ? AND fips = ? AND year BETWEEN ? AND ? ORDER BY year",
+            (geo_level, self.normalize(geo_level, fips), start or 0, end or 9999),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def attribute(self, geo_level: str, fips, kind: str) -> Optional[Dict]:
+        row = self.conn.execute(
+            "SELECT data FROM attributes WHERE geo_level = ? AND fips = ? AND kind = ?",
+            (geo_level, self.normalize(geo_level, fips), kind),
+        ).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def get(self, geo_level: str, fips) -> Optional[Dict]:
+        """Entity row with its attributes and permit series, or None."""
+        fips = self.normalize(geo_level, fips)
+        entity = self.conn.execute(
+            "SELECT geo_level, fips, state_fips, name FROM entities WHERE geo_level = ? AND fips = ?",
+            (geo_level, fips),
+        ).fetchone()
+        attributes = self.conn.execute(
+            "SELECT kind, data FROM attributes WHERE geo_level = ? AND fips = ?", (geo_level, fips)
+        ).fetchall()
+        if entity is None and not attributes:
+            return None
+
+        result = dict(entity) if entity else {'geo_level': geo_level, 'fips': fips}
+        result.update({row['kind']: json.loads(row['data']) for row in attributes})
+        result['permits'] = self.series(geo_level, fips)
+        return result
+
+    def counties(self, state_fips, start: Optional[int] = None, end: Optional[int] = None) -> List[Dict]:
+        """
+        A state's counties with permit totals over the years, largest first
+        (the aggregation the counties/[state_fips] route does per request).
+        """
+        rows = self.conn.execute(
+            """
+            SELECT p.fips, p.state_fips, substr(p.fips, 3) AS county_fips, e.name AS county_name,
+                   SUM(p.total_units) AS total_permits, SUM(p.sf_units) AS sf_permits,
+                   SUM(p.mf_units) AS mf_permits, SUM(p.months) AS months,
+                   MIN(p.year) AS first_year, MAX(p.year) AS last_year
+            FROM permits p INDEXED BY permits_by_state
+            LEFT JOIN entities e ON e.geo_level = p.geo_level AND e.fips = p.fips
+            WHERE p.geo_level = 'county' AND p.state_fips = ? AND p.year BETWEEN ? AND ?
+            GROUP BY p.fips
+            ORDER BY total_permits DESC
+            """,
+            (str(state_fips).zfill(2), start or 0, end or 9999),
+        ).fetchall()
+
+        counties = []
+        for row in rows:
+            county = dict(row)
+            county['avg_monthly'] = round(county['total_permits'] / county['months']) if county['months'] else 0
+            county['mf_share_pct'] = (round(county['mf_permits'] / county['total_permits'] * 100, 1)
+                                      if county['total_permits'] else 0.0)
+            counties.append(county)
+        return counties
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ('build', 'get', 'series', 'counties'):
+        print(__doc__)
+        return 2
+
+    if args[0] == 'build':
+        print(f"[INFO] Building serving store: {STORE_FILE}")
+        counts = build_from_outputs()
+        size_kb = STORE_FILE.stat().st_size / 1024
+        print(f"[OK] {counts['permits']:,} permit rows, {counts['entities']:,} entities, "
+              f"{counts['attributes']:,} attributes ({size_kb:,.0f} KB)")
+        return 0
+
+    store = ServingStore()
+    start = time.perf_counter()
+    if args[0] == 'get':
+        result = store.get(args[1], args[2])
+    elif args[0] == 'series':
+        years = [int(y) for y in args[3:5]]
+        result = store.series(args[1], args[2], *years)
+    else:
+        result = store.counties(args[1])
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(json.dumps(result, indent=2))
+    print(f"\n[INFO] {elapsed_ms:.2f} ms", file=sys.stderr)
+    return 0 if result else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
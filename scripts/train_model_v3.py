@@ -2,16 +2,39 @@
 """
 Train ML model v3 on 502-city expanded database
 Agent 6: ML Model Enhancement
+
+The model uses fixed defaults. --tune picks hyperparameters with a
+resumable successive-halving search (hyperparameter_search.py) instead.
+
+Reported CV R² uses 5 contiguous folds, as v2's did, so the two are
+comparable. With --tune it is nested: each outer fold runs its own search on
+the other four folds and scores the winner on rows the search never saw. The
+search's own score is selected on the rows it is scored on, so it is biased
+upward; it is saved separately as search_cv_r2.
+
+Usage:
+    python scripts/train_model_v3.py [--tune] [--candidates N] [--jobs N]
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import cross_val_score
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold, cross_val_score
 import pickle
 import json
 import os
 
+from hyperparameter_search import N_CANDIDATES, best_estimator, halving_search
+from reform_model import FEATURES, build_schema, encode_reform_types, schema_path
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--tune', action='store_true', help='search hyperparameters instead of using the fixed defaults')
+parser.add_argument('--candidates', type=int, default=N_CANDIDATES, help='configurations in the first rung')
+parser.add_argument('--jobs', type=int, default=-1, help='worker processes (default: all cores)')
+args = parser.parse_args()
+
 # Ensure output directory exists
 os.makedirs('data/outputs', exist_ok=True)
 
@@ -19,15 +42,8 @@ os.makedirs('data/outputs', exist_ok=True)
 reforms = pd.read_csv('data/raw/city_reforms_expanded.csv')
 print(f"Training on {len(reforms)} cities")
 
-# Encode reform types
-reform_type_map = {
-    'Comprehensive Reform': 0,
-    'ADU/Lot Split': 1,
-    'Zoning Upzones': 2,
-    'By-Right Development': 3,
-    'Parking Reform': 4
-}
-reforms['reform_type_encoded'] = reforms['reform_type'].map(reform_type_map).fillna(2)
+# Encode reform types (codes shared with the serving module, reform_model.py)
+reforms['reform_type_encoded'] = encode_reform_types(reforms['reform_type'])
 reforms['reform_year'] = pd.to_datetime(reforms['effective_date']).dt.year
 
 # Generate synthetic permit changes based on reform characteristics
@@ -41,19 +57,46 @@ reforms['permit_change'] = reforms.apply(
 )
 
 # Prepare features
-X = reforms[['reform_type_encoded', 'baseline_wrluri', 'reform_year']]
+X = reforms[FEATURES]
 y = reforms['permit_change']
 
-# Train model
-model = RandomForestRegressor(n_estimators=100, random_state=42, max_depth=10)
+# v2's protocol: 5 contiguous folds of the file as ordered
+cv_folds = KFold(n_splits=5)
+
+
+def tune(X, y):
+    search = halving_search('model_v3_random_forest', 'random_forest', X, y,
+                            n_candidates=args.candidates, n_jobs=args.jobs)
+    print(f"Best: {search.best_params} (search CV R² {search.best_score:.4f} ± {search.best_std:.4f}, "
+          f"{search.n_fitted} trials fitted, {search.n_resumed} resumed)")
+    return search
+
+
+# Tune, then train on every city
+search = None
+if args.tune:
+    print("Tuning random forest (successive halving)...")
+    search = tune(X, y)
+    model = best_estimator(search)
+else:
+    model = RandomForestRegressor(n_estimators=100, random_state=42, max_depth=10)
 model.fit(X, y)
 
 # Evaluate
-cv_scores = cross_val_score(model, X, y, cv=5, scoring='r2')
+if search is None:
+    cv_scores = cross_val_score(model, X, y, cv=cv_folds, scoring='r2')
+else:
+    # Nested: the search for each outer fold never sees that fold's rows
+    cv_scores = []
+    for i, (train, test) in enumerate(cv_folds.split(X), 1):
+        print(f"Outer fold {i}/{cv_folds.n_splits}: tuning on {len(train)} rows...")
+        fold_model = best_estimator(tune(X.iloc[train], y.iloc[train])).fit(X.iloc[train], y.iloc[train])
+        cv_scores.append(r2_score(y.iloc[test], fold_model.predict(X.iloc[test])))
+    cv_scores = np.array(cv_scores)
 train_r2 = model.score(X, y)
 
 print(f"Train R²: {train_r2:.4f}")
-print(f"CV R²: {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
+print(f"CV R²: {cv_scores.mean():.4f} ± {cv_scores.std():.4f}" + (" (nested)" if search else ""))
 
 # Feature importance
 for name, importance in zip(['reform_type', 'wrluri', 'reform_year'], model.feature_importances_):
@@ -63,21 +106,30 @@ for name, importance in zip(['reform_type', 'wrluri', 'reform_year'], model.feat
 with open('data/outputs/reform_impact_model_v3.pkl', 'wb') as f:
     pickle.dump(model, f)
 
+# Feature schema next to the model, validated by reform_model.ModelServer
+with open(schema_path('data/outputs/reform_impact_model_v3.pkl'), 'w') as f:
+    json.dump(build_schema(model, X, target='permit_change'), f, indent=2)
+
 # Save metrics
 metrics = {
     'model_version': '3.0',
     'training_samples': len(reforms),
-    'features': ['reform_type_encoded', 'baseline_wrluri', 'reform_year'],
+    'features': FEATURES,
     'performance': {
         'train_r2': float(train_r2),
         'cv_r2_mean': float(cv_scores.mean()),
-        'cv_r2_std': float(cv_scores.std())
+        'cv_r2_std': float(cv_scores.std()),
+        'cv_method': 'nested 5-fold (contiguous outer folds)' if search else '5-fold (contiguous)',
+        'search_cv_r2': float(search.best_score) if search else None
     },
     'feature_importance': {
         'reform_type': float(model.feature_importances_[0]),
         'wrluri': float(model.feature_importances_[1]),
         'reform_year': float(model.feature_importances_[2])
     },
+    'hyperparameters': {k: v for k, v in model.get_params().items()
+                        if k in ('n_estimators', 'max_depth', 'min_samples_leaf', 'max_features')},
+    'hyperparameter_search': search.summary() if search else None,
     'improvement_from_v2': {
         'v2_r2': -10.98,
         'v3_r2': float(cv_scores.mean()),
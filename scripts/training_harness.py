@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Parallel cross-validation harness for the predictive model scripts.
+
+Every (feature set x model x fold) fit is an independent job, plus one
+full-data refit per (feature set x model). All of them run in one joblib
+process pool instead of a serial loop of cross_val_score calls:
+
+- Fold indices are computed once per feature set (KFold, shuffled, seeded),
+  so every model sees the same splits.
+- Each fold's StandardScaler is fitted on that fold's training rows once and
+  its scaled train/test matrices are shared by every model, so scaling is
+  not repeated per model and never sees the held-out rows.
+- Each job records fit and predict wall time and the worker pid.
+
+Wall time therefore grows with jobs / cores. A hyperparameter grid is just
+more models (expand_grid), so it costs wall time in proportion to the grid
+size divided by the number of cores.
+
+Usage:
+    from training_harness import evaluate_models
+    runs = evaluate_models({'Baseline': (X, y)}, {'Ridge Regression': Ridge()}, n_jobs=-1)
+    runs.results   # one dict per (feature set, model): CV and in-sample metrics, fitted model
+    runs.jobs      # one row per job: fold, fit_s, predict_s, r2, pid
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold, ParameterGrid
+from sklearn.preprocessing import StandardScaler
+
+RANDOM_STATE = 42
+N_SPLITS = 5
+FULL = -1  # fold id of the full-data refit
+
+
+@dataclass
+class FoldData:
+    """One fold of one feature set, already scaled with the fold's own scaler."""
+    fold: int
+    X_train: np.ndarray
+    y_train: np.ndarray
+    X_test: np.ndarray
+    y_test: np.ndarray
+
+
+@dataclass
+class HarnessRun:
+    results: List[Dict]
+    jobs: pd.DataFrame
+    wall_s: float
+
+
+def make_folds(n_rows: int, n_splits: int = N_SPLITS, random_state: int = RANDOM_STATE) -> List[Tuple[np.ndarray, np.ndarray]]:
+    cv = KFold(n_splits=min(n_splits, n_rows), shuffle=True, random_state=random_state)
+    return list(cv.split(np.arange(n_rows)))
+
+
+def scaled_folds(X: pd.DataFrame, y: pd.Series, folds: List[Tuple[np.ndarray, np.ndarray]]) -> List[FoldData]:
+    """Scaler-fitted train/test matrices per fold, plus the full data as fold FULL."""
+    X = X.to_numpy(dtype=np.float64)
+    y = y.to_numpy(dtype=np.float64)
+    out = []
+    for fold, (train, test) in enumerate(folds):
+        scaler = StandardScaler().fit(X[train])
+        out.append(FoldData(fold, scaler.transform(X[train]), y[train], scaler.transform(X[test]), y[test]))
+    X_full = StandardScaler().fit_transform(X)
+    out.append(FoldData(FULL, X_full, y, X_full, y))
+    return out
+
+
+def expand_grid(models: Dict[str, object], grids: Dict[str, Dict[str, list]]) -> Dict[str, object]:
+    """One model per parameter combination, named 'Model[param=value, ...]'."""
+    expanded = {}
+    for name, model in models.items():
+        if name not in grids:
+            expanded[name] = model
+            continue
+        for params in ParameterGrid(grids[name]):
+            label = ', '.join(f"{key}={value}" for key, value in sorted(params.items()))
+            expanded[f"{name}[{label}]"] = clone(model).set_params(**params)
+    return expanded
+
+
+def run_job(feature_set: str, model_name: str, model, data: FoldData) -> Dict:
+    """Fit on the fold's training rows and score its test rows (worker process)."""
+    model = clone(model)
+    start = time.perf_counter()
+    model.fit(data.X_train, data.y_train)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(data.X_test)
+    predict_s = time.perf_counter() - start
+
+    return {
+        'feature_set': feature_set,
+        'model_name': model_name,
+        'fold': data.fold,
+        'n_train': len(data.y_train),
+        'n_test': len(data.y_test),
+        'fit_s': round(fit_s, 6),
+        'predict_s': round(predict_s, 6),
+        'r2': r2_score(data.y_test, y_pred) if len(data.y_test) > 1 else np.nan,
+        'pid': os.getpid(),
+        # Only the full refit sends its model and predictions back
+        'model': model if data.fold == FULL else None,
+        'y_pred': y_pred if data.fold == FULL else None,
+    }
+
+
+def feature_importance(model) -> Optional[np.ndarray]:
+    if hasattr(model, 'feature_importances_'):
+        return model.feature_importances_
+    if hasattr(model, 'coef_'):
+        return np.abs(model.coef_)
+    return None
+
+
+def evaluate_models(feature_sets: Dict[str, Tuple[pd.DataFrame, pd.Series]], models: Dict[str, object],
+                    n_splits: int = N_SPLITS, n_jobs: int = -1,
+                    params: Optional[Dict[str, Dict[str, Dict]]] = None) -> HarnessRun:
+    """
+    Cross-validate every model on every feature set in one process pool.
+
+    params optionally overrides model parameters per feature set
+    ({feature_set: {model_name: params}}, e.g. tuned hyperparameters).
+    Results keep the order of feature_sets then models. A model whose fit
+    fails on any fold is reported and left out of the results.
+    """
+    params = params or {}
+    start = time.perf_counter()
+    fold_data = {
+        name: scaled_folds(X, y, make_folds(len(X), n_splits))
+        for name, (X, y) in feature_sets.items()
+    }
+
+    tasks = [
+        (feature_set, model_name, clone(model).set_params(**params.get(feature_set, {}).get(model_name, {})), data)
+        for feature_set, folds in fold_data.items()
+        for model_name, model in models.items()
+        for data in folds
+    ]
+    outcomes = Parallel(n_jobs=n_jobs)(delayed(_safe_job)(*task) for task in tasks)
+
+    results = []
+    for feature_set, (X, y) in feature_sets.items():
+        for model_name in models:
+            runs = [o for o in outcomes if o['feature_set'] == feature_set and o['model_name'] == model_name]
+            errors = [o['error'] for o in runs if 'error' in o]
+            if errors:
+                print(f"  ✗ {feature_set} / {model_name}: Error - {errors[0]}")
+                continue
+            cv = np.array([o['r2'] for o in runs if o['fold'] != FULL])
+            full = next(o for o in runs if o['fold'] == FULL)
+            y_pred = full['y_pred']
+            results.append({
+                'model_type': feature_set,
+                'model_name': model_name,
+                'r2_score': round(r2_score(y, y_pred), 4),
+                'r2_cv_mean': round(cv.mean(), 4),
+                'r2_cv_std': round(cv.std(), 4),
+                'rmse': round(np.sqrt(mean_squared_error(y, y_pred)), 2),
+                'mae': round(mean_absolute_error(y, y_pred), 2),
+                'n_features': X.shape[1],
+                'n_samples': len(X),
+                'feature_importance': feature_importance(full['model']),
+                'feature_names': list(X.columns),
+                'model_object': full['model'],
+                'predictions': y_pred,
+                'fit_s_total': round(sum(o['fit_s'] for o in runs), 4),
+            })
+
+    jobs = pd.DataFrame([{k: v for k, v in o.items() if k not in ('model', 'y_pred')} for o in outcomes])
+    return HarnessRun(results=results, jobs=jobs, wall_s=time.perf_counter() - start)
+
+
+def _safe_job(feature_set: str, model_name: str, model, data: FoldData) -> Dict:
+    try:
+        return run_job(feature_set, model_name, model, data)
+    except Exception as e:  # reported per model by evaluate_models
+        return {'feature_set': feature_set, 'model_name': model_name, 'fold': data.fold, 'error': str(e)}
@@ -0,0 +1,93 @@
+"""
+Shared fixtures for the script tests.
+
+The scripts import their helper modules as top-level names (perf, permit_store,
+...), so scripts/ is put on sys.path the same way running them directly does.
+Tests never touch the network: HTTP code is pointed at StubServer, a local
+http.server whose responses each test scripts.
+"""
+
+import importlib.util
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / 'scripts'
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+def load_script(filename: str):
+    """Import a numbered script (e.g. 20_fetch_place_permits_bulk.py) as a module."""
+    path = SCRIPTS_DIR / filename
+    spec = importlib.util.spec_from_file_location(f"script_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class StubServer:
+    """
+    Local HTTP server. handler(request) returns (status, headers, body) for
+    every GET and HEAD (HEAD sends no body); requests are recorded in
+    .requests (request.command, .path, .headers). A Content-Length header
+    returned by the handler overrides the body length, so a handler can
+    simulate a connection that closes early.
+    """
+
+    def __init__(self, handler: Callable):
+        self.handler = handler
+        self.requests: List = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(self)
+                status, headers, body = stub.handler(self)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if 'Content-Length' not in headers:
+                    self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(body)
+                    self.close_connection = len(body) != int(headers.get('Content-Length', len(body)))
+
+            do_HEAD = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    servers = []
+
+    def start(handler: Callable) -> StubServer:
+        server = StubServer(handler)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def in_tmp(tmp_path, monkeypatch):
+    """Run with the working directory in a temp dir (scripts use relative data/ paths)."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
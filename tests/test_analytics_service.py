@@ -0,0 +1,217 @@
+"""
+Analytics service (analytics_service.py): request parsing, and the DiD and
+SCM queries checked against the batch functions of scripts 31 and 32 on
+small seeded panels.
+"""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics_service as service_module
+from analytics_service import AnalyticsService, build_panels, m31, m32, normalize, normalize_fips
+from permit_store import PermitTable
+
+TREATED_2019 = ['2743000', '2758000', '2706616', '4159000', '4105800', '4123850']
+TREATED_2020 = ['2717000', '4140550', '4164900']
+REFORMS = pd.DataFrame({
+    'place_fips': TREATED_2019 + TREATED_2020,
+    'city_name': [f"City {fips}" for fips in TREATED_2019 + TREATED_2020],
+    'state_fips': [int(fips[:2]) for fips in TREATED_2019 + TREATED_2020],
+    'state_name': ['Minnesota' if fips.startswith('27') else 'Oregon' for fips in TREATED_2019 + TREATED_2020],
+    'baseline_wrluri': np.linspace(0.6, 1.8, 9),
+    'reform_type': ['Comprehensive Reform'] * 6 + ['Parking Reform'] * 3,
+    'effective_date': pd.to_datetime(['2019-07-01'] * 6 + ['2020-01-01'] * 3),
+})
+REFORMS['adoption_year'] = REFORMS['effective_date'].dt.year
+
+
+@pytest.fixture
+def panels(in_tmp, monkeypatch):
+    np.random.seed(0)
+    did_permits = m31.generate_synthetic_permits(REFORMS, n_places=60)
+    permits = PermitTable.from_frame(m32.generate_synthetic_permits(REFORMS, n_controls=30), 'place')
+    panels = build_panels(REFORMS, permits, did_permits)
+    monkeypatch.setattr(service_module, 'PANELS', panels)
+    return panels, did_permits
+
+
+@pytest.fixture
+def service(panels, monkeypatch):
+    monkeypatch.setattr(service_module, 'load_panels', lambda: panels[0])
+    service = AnalyticsService(workers=1, cache_size=8)
+    service.pool.shutdown()
+    service.pool = ThreadPoolExecutor(max_workers=2)  # queries run in-process against the test panels
+    yield service
+    service.close()
+
+
+class Writer:
+    def __init__(self):
+        self.data = b''
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def send(service, raw: bytes):
+    """Feed one raw HTTP request to the service's handler; returns (status, JSON body)."""
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        writer = Writer()
+        await service.handle(reader, writer)
+        return writer.data
+
+    head, _, body = asyncio.run(run()).partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+def get(service, target: str):
+    return send(service, f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+
+
+def post(service, target: str, payload):
+    body = json.dumps(payload).encode()
+    return send(service, f"POST {target} HTTP/1.1\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+
+
+# =============================================================================
+# Parameter normalization and request parsing
+# =============================================================================
+
+def test_seed_zero_is_kept():
+    for seed in (0, '0'):  # JSON body and query string
+        params = normalize('did', {'treated': '2743000', 'adoption_year': '2019', 'seed': seed}, REFORMS)
+        assert params['seed'] == 0
+    assert normalize('did', {'treated': '2743000', 'adoption_year': '2019'}, REFORMS)['seed'] == m31.RANDOM_SEED
+
+
+def test_equal_queries_normalize_identically():
+    a = normalize('did', {'treated': '4159000, 2743000,2743000', 'adoption_year': '2019'}, REFORMS)
+    b = normalize('did', {'treated': ['2743000', 4159000], 'adoption_year': 2019}, REFORMS)
+    assert a == b
+    assert a['treated'] == ['2743000', '4159000']
+
+    cohort = normalize('did', {'reform_type': 'Comprehensive Reform', 'adoption_year': 2019}, REFORMS)
+    assert cohort['treated'] == sorted(TREATED_2019)
+
+    scm = normalize('scm', {'place_fips': 2743000, 'adoption_year': 2019, 'states': '55,6'}, REFORMS)
+    assert scm['place_fips'] == '2743000'
+    assert scm['states'] == ['06', '55']
+    assert scm['reform_type'] == 'Comprehensive Reform'
+    assert scm['max_donors'] == service_module.DEFAULT_MAX_DONORS
+
+
+@pytest.mark.parametrize('kind, raw', [
+    ('did', {'treated': '2743000'}),
+    ('did', {'adoption_year': 2019}),
+    ('scm', {'place_fips': '2743000'}),
+    ('scm', {'place_fips': 'abc', 'adoption_year': 2019}),
+])
+def test_invalid_parameters_are_rejected(kind, raw):
+    with pytest.raises(ValueError):
+        normalize(kind, raw, REFORMS)
+
+
+def test_get_and_post_answer_the_same_query(service):
+    status, body = get(service, '/did?reform_type=Comprehensive+Reform&adoption_year=2019&seed=0')
+    assert status == 200
+    assert body['params']['seed'] == 0
+    assert body['cached'] is False
+
+    status, again = post(service, '/did/?adoption_year=2019', {'reform_type': 'Comprehensive Reform', 'seed': 0})
+    assert status == 200
+    assert again['cached'] is True
+    assert again['result'] == body['result']
+
+
+def test_request_errors(service):
+    assert get(service, '/health')[0] == 200
+    assert get(service, '/nope')[0] == 404
+    assert get(service, '/did?adoption_year=2019')[0] == 400
+    assert post(service, '/did', [1, 2])[0] == 400
+    assert send(service, b'POST /did HTTP/1.1\r\nContent-Length: 5\r\n\r\n{"a":')[0] == 400
+
+    too_large = service_module.MAX_REQUEST_BYTES + 1
+    assert send(service, f"POST /did HTTP/1.1\r\nContent-Length: {too_large}\r\n\r\n".encode())[0] == 400
+
+    status, body = get(service, '/scm?place_fips=9999999&adoption_year=2019')
+    assert status == 404
+    assert '9999999' in body['error']
+
+
+def test_insufficient_data_is_422(service):
+    status, body = get(service, '/did?treated=2743000&adoption_year=2019')  # below MIN_TREATED
+    assert status == 422
+    assert body['result'] is None
+
+
+# =============================================================================
+# Parity with the batch scripts
+# =============================================================================
+
+def test_did_matches_script_31(panels):
+    _, did_permits = panels
+    year = 2019
+    treated = [str(fips) for fips in TREATED_2019]
+
+    controls = m31.match_control_group(treated, did_permits['place_fips'].unique().tolist(), did_permits, year)
+    batch = m31.compute_did_effect(treated, controls, did_permits, year)
+    trends_p = m31.test_parallel_trends(treated, controls, did_permits, year)
+
+    params = normalize('did', {'reform_type': 'Comprehensive Reform', 'adoption_year': year}, REFORMS)
+    result = service_module.run_did(params)
+
+    assert sorted(result['control_places']) == sorted(normalize_fips(c) for c in controls)
+    assert result['treatment_effect'] == round(batch['did_effect'], 2)
+    assert result['treated_change_pct'] == round(batch['treated_change_pct'], 2)
+    assert result['control_change_pct'] == round(batch['control_change_pct'], 2)
+    assert (result['n_treated'], result['n_control']) == (batch['n_treated'], batch['n_control'])
+    assert result['parallel_trends_p_value'] == round(trends_p, 4)
+    assert result['lower_ci_95'] <= result['upper_ci_95']
+
+
+def test_did_bootstrap_follows_the_seed(panels):
+    def run(seed):
+        params = normalize('did', {'reform_type': 'Comprehensive Reform', 'adoption_year': 2019, 'seed': seed},
+                           REFORMS)
+        result = service_module.run_did(params)
+        return result['lower_ci_95'], result['upper_ci_95']
+
+    assert run(0) == run(0)
+    assert run(0) != run(1)
+
+
+def test_scm_with_every_donor_matches_script_32(panels):
+    scm_panels, _ = panels
+    params = normalize('scm', {'place_fips': '2743000', 'adoption_year': 2019, 'max_donors': 1000}, REFORMS)
+    result = service_module.run_scm(params)
+
+    np.random.seed(m31.RANDOM_SEED)  # as run_query seeds before every query
+    batch = m32.analyze_single_city('2743000', params['city_name'], 'Comprehensive Reform', 2019,
+                                    REFORMS, scm_panels['permits'])
+    assert result.pop('donor_filter') == {'states': [], 'exclude_reformed': False, 'max_donors': 1000}
+    assert result == batch
+
+
+def test_scm_donor_filters(panels):
+    params = normalize('scm', {'place_fips': '2743000', 'adoption_year': 2019, 'max_donors': 8}, REFORMS)
+    assert service_module.run_scm(params)['donor_pool_size'] == 8
+
+    params = normalize('scm', {'place_fips': '2743000', 'adoption_year': 2019, 'exclude_reformed': 'true',
+                               'max_donors': 1000}, REFORMS)
+    donors = service_module.run_scm(params)['donor_weights']
+    assert not set(donors) & set(REFORMS['place_fips'])
@@ -0,0 +1,26 @@
+"""Benchmark cases (benchmarks.py) that point scripts at fixture files leave the scripts' paths as they were."""
+
+import pytest
+
+import benchmarks
+from benchmarks import Fixtures, engine, run_case
+
+PATCHED = {
+    'master_csv_parse': ('21_parse_place_data_format', ['INPUT_ZIP', 'INPUT_FILE', 'ANNUAL_PERMITS']),
+    'search_index': ('26_generate_search_index', ['INPUT_FILE', 'OUTPUT_DIR', 'OUTPUT_FILE', 'INDEX_FILE',
+                                                  'SHARD_DIR']),
+    'county_store': ('08_fetch_county_permits', ['COUNTY_DATASET']),
+}
+
+
+@pytest.mark.parametrize('name', sorted(PATCHED))
+def test_case_restores_module_paths(name, in_tmp, monkeypatch):
+    monkeypatch.setitem(benchmarks.SCALES, 'tiny', (60, 4))
+    module, attributes = PATCHED[name]
+    before = {attr: getattr(engine(module), attr) for attr in attributes}
+
+    case = next(case for case in benchmarks.CASES if case.name == name)
+    fx = Fixtures('tiny', in_tmp / 'bench')
+    assert len(run_case(case, fx, repeat=1)) == 1
+
+    assert {attr: getattr(engine(module), attr) for attr in attributes} == before
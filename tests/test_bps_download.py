@@ -0,0 +1,158 @@
+"""Resumable BPS master download (script 20) and ZIP streaming (script 21) against a local server."""
+
+import hashlib
+import json
+import zipfile
+
+import pytest
+
+from conftest import load_script
+
+CONTENT = bytes(range(256)) * 4096  # 1 MiB
+ETAG = '"v1"'
+
+
+@pytest.fixture
+def fetch(in_tmp, monkeypatch):
+    module = load_script('20_fetch_place_permits_bulk.py')
+    monkeypatch.setattr(module, 'RETRY_DELAY', 0)
+    monkeypatch.setattr(module, 'CHUNK_SIZE', 64 * 1024)
+    module.setup_directories()
+    return module
+
+
+def range_server(stub_server, content=CONTENT, etag=ETAG, honor_range=True):
+    """Serves content with ETag; honours Range only while If-Range matches."""
+    def handler(request):
+        headers = {'ETag': etag}
+        range_header = request.headers.get('Range')
+        if_range = request.headers.get('If-Range')
+        if honor_range and range_header and if_range in (None, etag):
+            start = int(range_header.split('=')[1].rstrip('-'))
+            headers['Content-Range'] = f"bytes {start}-{len(content) - 1}/{len(content)}"
+            return 206, headers, content[start:]
+        return 200, headers, content
+    return stub_server(handler)
+
+
+def gets(server):
+    return [r for r in server.requests if r.command == 'GET']
+
+
+def write_partial(fetch, url, data, validator=ETAG):
+    fetch.PARTIAL_FILE.write_bytes(data)
+    fetch.save_metadata(fetch.METADATA_FILE, {'partial_url': url, 'partial_validator': validator})
+
+
+def test_download_records_sha_and_skips_when_current(fetch, stub_server):
+    server = range_server(stub_server)
+    url = f"{server.url}/master.zip"
+
+    assert fetch.download_file(url, fetch.ZIP_FILE)
+    assert fetch.ZIP_FILE.read_bytes() == CONTENT
+    recorded = json.loads(fetch.METADATA_FILE.read_text())
+    assert recorded['sha256'] == hashlib.sha256(CONTENT).hexdigest()
+    assert recorded['etag'] == ETAG
+
+    assert fetch.download_file(url, fetch.ZIP_FILE)
+    assert len(gets(server)) == 1  # second run: HEAD only
+
+
+def test_resumes_partial_file_with_range_and_if_range(fetch, stub_server):
+    server = range_server(stub_server)
+    url = f"{server.url}/master.zip"
+    write_partial(fetch, url, CONTENT[:300_000])
+
+    assert fetch.download_file(url, fetch.ZIP_FILE)
+
+    request = gets(server)[0]
+    assert request.headers['Range'] == 'bytes=300000-'
+    assert request.headers['If-Range'] == ETAG
+    assert fetch.ZIP_FILE.read_bytes() == CONTENT
+
+
+def test_partial_from_an_older_version_is_discarded(fetch, stub_server):
+    server = range_server(stub_server, etag='"v2"')
+    url = f"{server.url}/master.zip"
+    write_partial(fetch, url, b'stale bytes from v1', validator=ETAG)
+
+    assert fetch.download_file(url, fetch.ZIP_FILE)
+
+    assert 'Range' not in gets(server)[0].headers
+    assert fetch.ZIP_FILE.read_bytes() == CONTENT
+
+
+def test_server_ignoring_range_restarts_from_zero(fetch, stub_server):
+    server = range_server(stub_server, honor_range=False)
+    url = f"{server.url}/master.zip"
+    write_partial(fetch, url, CONTENT[:1000])
+
+    assert fetch.download_file(url, fetch.ZIP_FILE)
+    assert fetch.ZIP_FILE.read_bytes() == CONTENT
+
+
+def test_dropped_connection_is_resumed(fetch, stub_server):
+    calls = []
+
+    def handler(request):
+        calls.append(request.headers.get('Range'))
+        if len(calls) == 1:  # first GET: announce the full size, send 40%
+            return 200, {'ETag': ETAG, 'Content-Length': str(len(CONTENT))}, CONTENT[:400_000]
+        start = int(request.headers['Range'].split('=')[1].rstrip('-'))
+        return 206, {'ETag': ETAG}, CONTENT[start:]
+
+    server = stub_server(lambda r: (200, {'ETag': ETAG}, CONTENT) if r.command == 'HEAD' else handler(r))
+    url = f"{server.url}/master.zip"
+
+    assert fetch.download_file(url, fetch.ZIP_FILE)
+    assert calls[0] is None and calls[-1].startswith('bytes=')
+    assert fetch.ZIP_FILE.read_bytes() == CONTENT
+
+
+def test_sha_mismatch_with_pinned_checksum_fails(fetch, stub_server, monkeypatch):
+    monkeypatch.setattr(fetch, 'EXPECTED_SHA256', '0' * 64)
+    server = range_server(stub_server)
+
+    assert not fetch.download_file(f"{server.url}/master.zip", fetch.ZIP_FILE)
+    assert not fetch.ZIP_FILE.exists()
+    assert not fetch.PARTIAL_FILE.exists()
+
+
+def test_place_rows_stream_from_the_zip(in_tmp):
+    parse = load_script('21_parse_place_data_format.py')
+    parse.INPUT_ZIP.parent.mkdir(parents=True)
+    rows = ['LOCATION_TYPE,PLACE_NAME,UNITS_1_UNIT', 'Place,Erie city,10', 'County,Erie County,99', 'Place,Newtown,3']
+    with zipfile.ZipFile(parse.INPUT_ZIP, 'w') as zf:
+        zf.writestr('BPS Compiled.csv', '\n'.join(rows) + '\n')
+
+    df = parse.load_census_data()
+
+    assert df['PLACE_NAME'].tolist() == ['Erie city', 'Newtown']
+    parse.INPUT_ZIP.unlink()  # the archive was closed, so it can be removed (also on Windows)
+
+
+CROSSWALK = (
+    'STATE|STATEFP|PLACEFP|PLACENS|PLACENAME|TYPE|CLASSFP|FUNCSTAT|COUNTIES\n'
+    'PA|42|24000|01214818|Erie city|INCORPORATED PLACE|C1|A|Erie County\n'
+)
+
+
+def test_place_crosswalk_is_fetched_for_script_21(fetch, stub_server, monkeypatch):
+    server = stub_server(lambda r: (200, {}, CROSSWALK.encode()) if r.path.endswith('.txt') else (200, {}, b'<html>'))
+    monkeypatch.setattr(fetch, 'PLACE_CROSSWALK_URL', f"{server.url}/codes2020/national_place2020.txt")
+
+    assert fetch.fetch_place_crosswalk()
+    assert fetch.PLACE_CROSSWALK.read_text() == CROSSWALK
+
+    monkeypatch.setattr(fetch, 'PLACE_CROSSWALK_URL', f"{server.url}/codes2020/error")
+    fetch.PLACE_CROSSWALK.unlink()
+    assert not fetch.fetch_place_crosswalk()
+    assert not fetch.PLACE_CROSSWALK.exists()
+
+
+def test_missing_crosswalk_raises(in_tmp):
+    parse = load_script('21_parse_place_data_format.py')
+    places = parse.pd.DataFrame({'state_fips': ['42'], 'place_name': ['Erie city']})
+
+    with pytest.raises(FileNotFoundError, match='20_fetch_place_permits_bulk'):
+        parse.resolve_place_fips(places)
@@ -0,0 +1,139 @@
+"""Place-level BPS collection (script 11) against a local mock of api.census.gov."""
+
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+import pytest
+
+from conftest import load_script
+
+HEADER = ['NAME', 'PERMITTOTAL_1UNIT', 'PERMITTOTAL_2UNIT', 'PERMITTOTAL_34UNIT', 'PERMITTOTAL_5UNIT', 'state', 'place']
+ROWS = {
+    '42': [['Erie city', '12', '2', '0', '40', '42', '24000'], ['Newtown borough', '3', None, None, None, '42', '53800']],
+    '10': [['Dover city', '50', '0', '4', '120', '10', '21200']],
+}
+STATES = {'42': 'Pennsylvania', '10': 'Delaware'}
+
+
+@pytest.fixture
+def api(in_tmp, monkeypatch):
+    module = load_script('11_fetch_city_permits_api.py')
+    monkeypatch.setattr(module, 'RATE_LIMIT_DELAY', 0.001)
+    monkeypatch.setattr(module, 'MAX_RATE', 1000.0)
+    monkeypatch.setattr(module, 'CENSUS_API_KEY', 'test-key')
+    return module
+
+
+def census_mock(stub_server, api, published=None, responses=None):
+    """
+    Mock /data/{year}/bps/place. Years in the (mutable) published set answer
+    with ROWS, other years 204; responses[(year, state)] lists statuses to
+    send first.
+    """
+    published = {2019} if published is None else published
+    pending = {k: list(v) for k, v in (responses or {}).items()}
+
+    def handler(request):
+        parts = urlsplit(request.path)
+        query = parse_qs(parts.query)
+        year = int(parts.path.split('/')[2])
+        state = query['in'][0].split(':')[1]
+        queued = pending.get((year, state))
+        if queued:
+            return queued.pop(0), {}, b'busy'
+        if year not in published:
+            return 204, {}, b''
+        body = json.dumps([HEADER] + ROWS[state]).encode()
+        return 200, {'Content-Type': 'application/json'}, body
+
+    server = stub_server(handler)
+    api.BASE_URL = f"{server.url}/data"
+    return server
+
+
+def requested(server):
+    pairs = []
+    for request in server.requests:
+        parts = urlsplit(request.path)
+        pairs.append((int(parts.path.split('/')[2]), parse_qs(parts.query)['in'][0].split(':')[1]))
+    return sorted(pairs)
+
+
+def test_request_shape(api, stub_server):
+    server = census_mock(stub_server, api)
+
+    stats = asyncio.run(api.collect_responses([2019], {'42': 'Pennsylvania'}))
+
+    assert stats == {'fetched': 1, 'empty': 0, 'failed': 0, 'skipped': 0}
+    parts = urlsplit(server.requests[0].path)
+    query = parse_qs(parts.query)
+    assert parts.path == '/data/2019/bps/place'
+    assert query['for'] == ['place:*'] and query['in'] == ['state:42'] and query['key'] == ['test-key']
+    assert api.load_response(2019, '42') == [HEADER] + ROWS['42']
+
+
+def test_empty_answers_are_not_saved_and_asked_again(api, stub_server):
+    published = {2019}
+    server = census_mock(stub_server, api, published=published)
+
+    stats = asyncio.run(api.collect_responses([2019, 2025], STATES))
+    assert stats == {'fetched': 2, 'empty': 2, 'failed': 0, 'skipped': 0}
+    assert not api.response_path(2025, '42').exists()
+
+    # 2025 is published between runs: only its pairs are requested again
+    published.add(2025)
+    server.requests.clear()
+    stats = asyncio.run(api.collect_responses([2019, 2025], STATES))
+    assert stats == {'fetched': 2, 'empty': 0, 'failed': 0, 'skipped': 2}
+    assert requested(server) == [(2025, '10'), (2025, '42')]
+    assert api.load_response(2025, '10') == [HEADER] + ROWS['10']
+
+
+def test_null_files_from_older_runs_are_refetched(api, stub_server):
+    server = census_mock(stub_server, api)
+    path = api.response_path(2019, '42')
+    path.parent.mkdir(parents=True)
+    path.write_text('null')
+
+    stats = asyncio.run(api.collect_responses([2019], {'42': 'Pennsylvania'}))
+
+    assert stats['fetched'] == 1 and stats['skipped'] == 0
+    assert requested(server) == [(2019, '42')]
+    assert api.load_response(2019, '42') == [HEADER] + ROWS['42']
+
+
+def test_throttled_request_is_retried(api, stub_server):
+    server = census_mock(stub_server, api, responses={(2019, '42'): [429]})
+
+    stats = asyncio.run(api.collect_responses([2019], {'42': 'Pennsylvania'}))
+
+    assert stats['fetched'] == 1
+    assert requested(server) == [(2019, '42'), (2019, '42')]
+
+
+def test_failed_pairs_are_not_saved(api, stub_server, monkeypatch):
+    monkeypatch.setattr(api, 'MAX_RETRIES', 1)
+    census_mock(stub_server, api, responses={(2019, '10'): [500]})
+
+    stats = asyncio.run(api.collect_responses([2019], STATES))
+
+    assert stats == {'fetched': 1, 'empty': 0, 'failed': 1, 'skipped': 0}
+    assert not api.response_path(2019, '10').exists()
+
+
+def test_main_writes_place_csv(api, stub_server, monkeypatch):
+    monkeypatch.setattr(api, 'YEARS', [2019, 2025])
+    monkeypatch.setattr(api, 'STATE_FIPS', STATES)
+    census_mock(stub_server, api)
+    api.RESPONSE_DIR.parent.mkdir(parents=True, exist_ok=True)
+
+    api.main()
+
+    df = pd.read_csv('data/raw/census_bps_place_all_years.csv', dtype={'place_fips': str, 'state_fips': str})
+    assert len(df) == 3 and set(df['year']) == {2019}
+    places = df.set_index('place_name')
+    assert tuple(places.loc['Erie city', ['sf_permits', 'mf_permits', 'total_permits']]) == (12, 42, 54)
+    assert pd.isna(places.loc['Newtown borough', 'mf_permits'])
+    assert places.loc['Newtown borough', 'total_permits'] == 3
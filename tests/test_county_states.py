@@ -0,0 +1,52 @@
+"""Per-state county documents (script 08) built from the Parquet partitions."""
+
+import json
+
+import pandas as pd
+import pytest
+
+from conftest import load_script
+
+m08 = load_script('08_fetch_county_permits.py')
+
+YEARS = {
+    2021: [('06', '037', 'Los Angeles', 100, 300), ('06', '001', 'Alameda', 40, 60), ('48', '201', 'Harris', 500, 200)],
+    2022: [('06', '037', 'Los Angeles', 120, 310), ('06', '001', 'Alameda', 0, 0), ('48', '201', 'Harris', 520, 210)],
+}
+
+
+@pytest.fixture
+def published(in_tmp, monkeypatch):
+    monkeypatch.setattr(m08, 'COUNTY_DATASET', in_tmp / 'county_permits')
+    monkeypatch.setattr(m08, 'STATE_DIR', in_tmp / 'county_states')
+    (in_tmp / 'county_states').mkdir()
+    (in_tmp / 'county_states' / '99.json').write_text('{}')  # stale state from an earlier run
+
+    for year, rows in YEARS.items():
+        df = pd.DataFrame(rows, columns=['state_fips', 'county_fips', 'county_name', 'sf_annual', 'mf_annual'])
+        df['fips'] = df['state_fips'] + df['county_fips']
+        df['total_annual'] = df['sf_annual'] + df['mf_annual']
+        m08.write_year_partition(df, year)
+
+    assert m08.publish_state_documents() == 2
+    return in_tmp / 'county_states'
+
+
+def test_one_document_per_state(published):
+    assert sorted(path.name for path in published.iterdir()) == ['06.json', '48.json']
+
+
+def test_document_has_the_route_shape(published):
+    doc = json.loads((published / '06.json').read_text())
+    assert (doc['state_fips'], doc['period'], doc['years'], doc['county_count']) == ('06', 'annual', [2021, 2022], 2)
+
+    la, alameda = doc['data']  # sorted by total permits
+    assert la == {
+        'fips': '06037', 'state_fips': '06', 'county_fips': '037', 'county_name': 'Los Angeles',
+        'total_permits': 830, 'sf_permits': 220, 'mf_permits': 610,
+        'months': [{'date': '2021', 'total': 400, 'sf': 100, 'mf': 300},
+                   {'date': '2022', 'total': 430, 'sf': 120, 'mf': 310}],
+        'avg_monthly': round(830 / 24),
+        'mf_share_pct': '73.5',
+    }
+    assert (alameda['total_permits'], alameda['mf_share_pct']) == (100, '60.0')
@@ -0,0 +1,71 @@
+"""Offline Gazetteer lookups (gazetteer.GazetteerIndex): full vs suffix-stripped name keys."""
+
+import pandas as pd
+import pytest
+
+from gazetteer import GazetteerIndex
+
+
+def make_index(rows):
+    places = pd.DataFrame(rows, columns=['geoid', 'name', 'latitude', 'longitude'])
+    places['state_fips'] = places['geoid'].str[:2]
+    places['funcstat'] = 'A'
+    return GazetteerIndex(places)
+
+
+def lookup(index, names, state='26', **kwargs):
+    return index.lookup(pd.Series([state] * len(names)), pd.Series(names), **kwargs)
+
+
+@pytest.fixture
+def jackson():
+    return make_index([
+        ('2641420', 'Jackson city', 42.25, -84.40),
+        ('2641440', 'Jackson township', 42.31, -84.65),
+        ('2622000', 'Detroit city', 42.38, -83.10),
+    ])
+
+
+def test_same_name_places_are_kept_apart(jackson):
+    assert len(jackson) == 3
+
+    result = lookup(jackson, ['Jackson township', 'Jackson city'])
+    assert result['geoid'].tolist() == ['2641440', '2641420']
+    assert result['match'].tolist() == ['exact', 'exact']
+    assert result['latitude'].tolist() == [42.31, 42.25]
+
+
+def test_ambiguous_stripped_name_is_not_guessed(jackson):
+    result = lookup(jackson, ['Jackson', 'Jackson village', 'Jacksn'])
+    assert result['match'].isna().all()
+    assert result['geoid'].isna().all()
+
+
+def test_full_name_matches_exactly():
+    index = make_index([('4224000', 'Erie city', 42.12, -80.08)])
+    result = lookup(index, ['Erie city', 'Erie', 'Erie borough'], state='42')
+    assert result['match'].tolist() == ['exact', 'suffix', 'suffix']
+    assert (result['geoid'] == '4224000').all()
+    assert lookup(index, ['Eriee'], state='42')['match'].tolist() == ['fuzzy']
+
+
+def test_unambiguous_stripped_name_still_matches(jackson):
+    result = lookup(jackson, ['Detroit'])
+    assert result[['geoid', 'match']].values.tolist() == [['2622000', 'suffix']]
+
+
+def test_only_true_duplicates_are_dropped():
+    index = make_index([
+        ('2641420', 'Jackson city', 42.25, -84.40),
+        ('2699999', 'Jackson city', 0.0, 0.0),
+        ('2641440', 'Jackson township', 42.31, -84.65),
+    ])
+    assert len(index) == 2
+    assert lookup(index, ['Jackson city'])['geoid'].tolist() == ['2641420']
+
+
+def test_one_to_one_bare_name_beats_other_descriptor():
+    index = make_index([('4224000', 'Erie city', 42.12, -80.08)])
+    result = lookup(index, ['Erie township', 'Erie'], state='42', one_to_one=True)
+    assert result['match'].isna().tolist() == [True, False]
+    assert result.loc[1, ['geoid', 'match']].tolist() == ['4224000', 'suffix']
@@ -0,0 +1,97 @@
+"""NominatimGeocoder against a local stub of the search endpoint, and script 23's source counts."""
+
+import functools
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from conftest import load_script
+from geocoding import GeocodeCache, geocode_pending
+
+HIT = [{'lat': '44.98', 'lon': '-93.27', 'address': {'county': 'Hennepin County'}}]
+
+
+def query_of(request) -> str:
+    return parse_qs(urlsplit(request.path).query)['q'][0]
+
+
+def run(cache, server, items):
+    return geocode_pending(cache, items, base_url=f"{server.url}/search", rate=1000,
+                           concurrency=2, retry_backoff=0.01)
+
+
+def test_hits_and_empty_results_are_cached(tmp_path, stub_server):
+    server = stub_server(lambda r: (200, {}, json.dumps(HIT if 'Minneapolis' in query_of(r) else []).encode()))
+    cache = GeocodeCache(tmp_path / 'geo.sqlite')
+    items = [(('Minneapolis', '27'), 'Minneapolis, MN'), (('Nowhere', '27'), 'Nowhere, MN')]
+
+    stats = run(cache, server, items)
+
+    assert stats == {'found': 1, 'not_found': 1, 'failed': 0}
+    rows = cache.load().set_index('place_name')
+    assert rows.loc['Minneapolis', 'latitude'] == 44.98
+    assert rows.loc['Minneapolis', 'county_name'] == 'Hennepin County'
+    assert rows.loc['Nowhere', 'source'] == 'not_found'
+
+    # Everything is answered: a second run sends no requests
+    sent = len(server.requests)
+    run(cache, server, items)
+    assert len(server.requests) == sent
+
+
+def test_refused_requests_are_not_cached(tmp_path, stub_server):
+    server = stub_server(lambda r: (403, {}, b'banned'))
+    cache = GeocodeCache(tmp_path / 'geo.sqlite')
+
+    stats = run(cache, server, [(('Minneapolis', '27'), 'Minneapolis, MN')])
+
+    assert stats['failed'] == 1
+    assert len(cache) == 0
+    assert len(server.requests) == 1  # not retried
+
+
+def test_throttling_is_retried(tmp_path, stub_server):
+    responses = iter([(503, {}, b''), (429, {}, b''), (200, {}, json.dumps(HIT).encode())])
+    server = stub_server(lambda r: next(responses))
+    cache = GeocodeCache(tmp_path / 'geo.sqlite')
+
+    stats = run(cache, server, [(('Minneapolis', '27'), 'Minneapolis, MN')])
+
+    assert stats['found'] == 1
+    assert len(server.requests) == 3
+
+
+def test_exhausted_retries_are_not_cached(tmp_path, stub_server):
+    server = stub_server(lambda r: (503, {}, b''))
+    cache = GeocodeCache(tmp_path / 'geo.sqlite')
+
+    stats = run(cache, server, [(('Minneapolis', '27'), 'Minneapolis, MN')])
+
+    assert stats['failed'] == 1
+    assert len(cache) == 0
+
+
+def test_script_23_counts_rows_by_source(in_tmp, stub_server, monkeypatch, capsys):
+    server = stub_server(lambda r: (200, {}, json.dumps(HIT if 'St. Paul' in query_of(r) else []).encode()))
+    m23 = load_script('23_geocode_places.py')
+    monkeypatch.setattr(m23, 'USE_NOMINATIM', True)
+    monkeypatch.setattr(m23, 'geocode_pending', functools.partial(
+        geocode_pending, base_url=f"{server.url}/search", retry_backoff=0.01))
+    monkeypatch.setattr(m23, 'NOMINATIM_DELAY', 0.001)
+
+    m23.CACHE_FILE.parent.mkdir(parents=True)
+    cache = GeocodeCache(m23.CACHE_FILE)
+    cache.put(('Minneapolis', '27'), {'latitude': 44.98, 'longitude': -93.27, 'county_name': '', 'source': 'nominatim'})
+    cache.close()
+
+    # Two rows per cached and per fetched name: counts are rows, not lookups
+    df = pd.DataFrame({'place_name': ['Minneapolis', 'Minneapolis', 'St. Paul', 'St. Paul', 'Nowhere'],
+                       'state_fips': '27'})
+    geocoded = m23.geocode_places(df)
+
+    out = capsys.readouterr().out
+    assert '- From Nominatim: 2 (1 lookups)' in out
+    assert '- From cache: 2' in out
+    assert '- Using fallback: 1' in out
+    assert geocoded['source'].tolist() == ['nominatim'] * 4 + ['fallback']
@@ -0,0 +1,127 @@
+"""Shared HTTP cache (http_cache.py) against a local server."""
+
+import gzip
+import json
+
+import pytest
+import requests
+
+import http_cache
+from http_cache import HttpCache
+
+BODY = b'RegionID,RegionName,2015-01-31\n' + b'1,Alabama,120000.5\n' * 50_000
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, 'CHUNK_SIZE', 64 * 1024)
+    return HttpCache(cache_dir=tmp_path / 'cache')
+
+
+def etag_handler(body=BODY, etag='"z1"'):
+    def handler(request):
+        if request.headers.get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b''
+        return 200, {'ETag': etag, 'Content-Type': 'text/csv'}, body
+    return handler
+
+
+def etag_server(stub_server):
+    return stub_server(etag_handler())
+
+
+def test_body_path_streams_a_miss_into_the_cache(cache, stub_server, monkeypatch):
+    server = etag_server(stub_server)
+    sent = []
+    session_get = cache.session.get
+    monkeypatch.setattr(cache.session, 'get', lambda *a, **kw: sent.append(kw) or session_get(*a, **kw))
+    monkeypatch.setattr(requests.Response, 'content', property(lambda r: pytest.fail('body read into memory')))
+
+    path = cache.get_body_path(f"{server.url}/zhvi.csv")
+
+    assert sent[0]['stream'] is True
+    assert gzip.decompress(path.read_bytes()) == BODY
+    assert cache.stats['fetched'] == 1
+    assert list((cache.cache_dir / 'bodies').glob('*.tmp')) == []
+
+
+def test_body_path_revalidates_and_reuses_the_body(cache, stub_server):
+    server = etag_server(stub_server)
+    first = cache.get_body_path(f"{server.url}/zhvi.csv")
+
+    second = cache.get_body_path(f"{server.url}/zhvi.csv")
+
+    assert second == first
+    assert server.requests[-1].headers['If-None-Match'] == '"z1"'
+    assert cache.stats == {'hit': 0, 'revalidated': 1, 'fetched': 1, 'stale': 0}
+
+
+def test_immutable_hit_makes_no_request(cache, stub_server):
+    server = etag_server(stub_server)
+    url = f"{server.url}/2015/st2015a.txt"
+    path = cache.get_body_path(url)
+
+    assert cache.get_body_path(url) == path
+    assert len(server.requests) == 1
+    assert cache.get(url).content == BODY  # get() and get_body_path share entries
+
+
+def test_changed_body_gets_a_new_entry(cache, stub_server):
+    server = etag_server(stub_server)
+    first = cache.get_body_path(f"{server.url}/zhvi.csv")
+    server.handler = etag_handler(body=BODY + b'2,Alaska,300000\n', etag='"z2"')
+
+    second = cache.get_body_path(f"{server.url}/zhvi.csv")
+
+    assert second != first
+    assert gzip.decompress(second.read_bytes()).endswith(b'2,Alaska,300000\n')
+
+
+def test_error_status_raises_and_is_not_cached(cache, stub_server):
+    server = stub_server(lambda request: (404, {}, b'missing'))
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        cache.get_body_path(f"{server.url}/zhvi.csv")
+    assert not (cache.cache_dir / 'entries').exists()
+
+
+def test_offline_serves_only_cached_bodies(cache, stub_server):
+    server = etag_server(stub_server)
+    path = cache.get_body_path(f"{server.url}/zhvi.csv")
+    cache.offline = True
+
+    assert cache.get_body_path(f"{server.url}/zhvi.csv") == path
+    with pytest.raises(requests.exceptions.ConnectionError):
+        cache.get_body_path(f"{server.url}/other.csv")
+    assert len(server.requests) == 1
+
+
+@pytest.mark.parametrize('body', [b'', b'  \n', b'<!DOCTYPE html><html><body>Service unavailable</body></html>',
+                                  b'{"error": "unknown variable"}', b'error: unknown/unsupported geography'])
+def test_error_body_for_a_historical_year_is_revalidated(cache, stub_server, body):
+    server = stub_server(lambda request: (200, {'Content-Type': 'text/plain'}, body))
+    url = f"{server.url}/2015/st2015a.txt"
+
+    assert cache.get(url).content == body
+    assert cache.get(url).from_cache is False
+    assert len(server.requests) == 2
+
+    # Once the real file is served it is final
+    server.handler = lambda request: (200, {'Content-Type': 'text/plain'}, BODY)
+    assert cache.get_body_path(url) == cache.get_body_path(url)
+    assert len(server.requests) == 3
+    assert cache.get(url).content == BODY
+
+
+def test_entries_without_the_body_check_are_checked_on_load(cache, stub_server):
+    server = etag_server(stub_server)
+    url = f"{server.url}/2015/st2015a.txt"
+    cache.get(url)
+    entry_path = next((cache.cache_dir / 'entries').glob('*.json'))
+    entry = json.loads(entry_path.read_text())
+    del entry['data']
+    entry_path.write_text(json.dumps(entry))
+
+    assert cache.get(url).content == BODY
+    assert len(server.requests) == 1
+    assert json.loads(entry_path.read_text())['data'] is True
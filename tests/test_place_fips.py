@@ -0,0 +1,76 @@
+"""One-to-one place FIPS resolution (place_fips.PlaceFipsResolver over gazetteer.GazetteerIndex)."""
+
+import pandas as pd
+import pytest
+
+from place_fips import PlaceFipsResolver
+
+
+@pytest.fixture
+def resolver():
+    crosswalk = pd.DataFrame({
+        'state_fips': ['42', '42', '42', '42'],
+        'place_code': ['81000', '81008', '22000', '50000'],
+        'name': ['Washington city', 'Washingtonville borough', 'Erie city', 'Newtown borough'],
+        'funcstat': ['A'] * 4,
+    })
+    crosswalk['place_fips'] = crosswalk['state_fips'] + crosswalk['place_code']
+    return PlaceFipsResolver(crosswalk)
+
+
+def resolve(resolver, names, codes=None):
+    states = pd.Series(['42'] * len(names))
+    return resolver.resolve(states, pd.Series(names), pd.Series(codes) if codes else None)
+
+
+def test_exact_suffix_and_code_matches(resolver):
+    result = resolve(resolver, ['Erie', 'Newtown borough', 'Somewhere'], codes=[None, None, '81008'])
+    assert result['place_fips'].tolist() == ['4222000', '4250000', '4281008']
+    assert result['fips_source'].tolist() == ['suffix', 'exact', 'code']
+
+
+def test_suffix_tie_falls_back_to_synthetic(resolver):
+    result = resolve(resolver, ['Washington township', 'Washington borough'])
+    assert result['fips_source'].tolist() == ['synthetic', 'synthetic']
+    assert result['place_fips'].is_unique
+
+
+def test_claimed_rows_are_not_reused_by_later_stages(resolver):
+    result = resolve(resolver, ['Erie', 'Erie township', 'Newtown', 'Newtwn'])
+    # Bare names take the suffix match before names with another descriptor
+    assert result['fips_source'].tolist() == ['suffix', 'synthetic', 'suffix', 'synthetic']
+    assert result['place_fips'].is_unique
+
+
+def test_fuzzy_tie_falls_back_to_synthetic(resolver):
+    result = resolve(resolver, ['Newtwon borough', 'Newtowm borough'])
+    assert result['fips_source'].tolist() == ['synthetic', 'synthetic']
+    assert result['place_fips'].is_unique
+
+
+def test_rows_held_by_earlier_calls_stay_taken(resolver):
+    first = resolve(resolver, ['Newtown'])
+    second = resolve(resolver, ['Newtwn'])
+    assert first['fips_source'].iloc[0] == 'suffix'
+    assert second['fips_source'].iloc[0] == 'synthetic'
+    assert second['place_fips'].iloc[0] != first['place_fips'].iloc[0]
+
+
+def test_alike_names_get_distinct_synthetic_codes(resolver):
+    result = resolve(resolver, ['St. Louis', 'Saint Louis'])
+    assert result['fips_source'].tolist() == ['synthetic', 'synthetic']
+    assert result['place_fips'].is_unique
+
+
+def test_shared_codes_go_to_neither_place(resolver):
+    result = resolve(resolver, ['Somewhere', 'Elsewhere'], codes=['81008', '81008'])
+    assert result['fips_source'].tolist() == ['synthetic', 'synthetic']
+    assert result['place_fips'].is_unique
+
+
+def test_code_held_by_an_earlier_answer_is_not_reused(resolver):
+    first = resolve(resolver, ['Washingtonville'])
+    second = resolve(resolver, ['Somewhere'], codes=['81008'])
+    assert first['place_fips'].iloc[0] == '4281008'
+    assert second['fips_source'].iloc[0] == 'synthetic'
+    assert second['place_fips'].iloc[0] != '4281008'
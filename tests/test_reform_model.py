@@ -0,0 +1,52 @@
+"""
+Batch scoring in reform_model.py: the published prediction is the forest
+mean that model.predict returns, and lower/upper are the spread of the
+individual tree predictions.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from reform_model import FEATURES, ModelServer
+
+
+@pytest.fixture(scope='module')
+def forest():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        'reform_type_encoded': rng.integers(0, 5, 300).astype(float),
+        'baseline_wrluri': rng.uniform(0, 2.5, 300),
+        'reform_year': rng.integers(2015, 2025, 300).astype(float),
+    })[FEATURES]
+    # Skewed noise, so the mean across trees can fall outside the 10-90% band
+    y = 5 * X['reform_type_encoded'] + 3 * X['baseline_wrluri'] + rng.lognormal(0, 1.5, 300) * 10
+    return RandomForestRegressor(n_estimators=30, max_depth=4, random_state=0).fit(X, y), X
+
+
+def test_mean_matches_model_predict(forest):
+    model, X = forest
+    scored = ModelServer(model).predict_array(X)
+    np.testing.assert_allclose(scored['prediction'], model.predict(X))
+
+
+def test_band_is_the_spread_of_tree_predictions(forest):
+    model, X = forest
+    scored = ModelServer(model).predict_array(X)
+    per_tree = np.stack([tree.predict(X.to_numpy()) for tree in model.estimators_])
+    np.testing.assert_allclose(scored['lower'], np.percentile(per_tree, 10, axis=0))
+    np.testing.assert_allclose(scored['upper'], np.percentile(per_tree, 90, axis=0))
+    # A spread, not an interval around the mean: skewed trees put the mean outside it
+    assert np.any((scored['prediction'] < scored['lower']) | (scored['prediction'] > scored['upper']))
+
+
+def test_batches_do_not_change_the_result(forest, monkeypatch):
+    import reform_model
+
+    model, X = forest
+    whole = ModelServer(model).predict_array(X)
+    monkeypatch.setattr(reform_model, 'BATCH_ROWS', 7)
+    batched = ModelServer(model).predict_array(X)
+    for key in ('prediction', 'lower', 'upper'):
+        np.testing.assert_allclose(batched[key], whole[key])
@@ -0,0 +1,271 @@
+"""
+Place search index (search_index.py, script 26) and its TypeScript client.
+
+The parity tests run app/lib/search-index.ts under Node against the same
+index files as SearchIndex/ShardedSearch, after transpiling it with the
+app's typescript devDependency (ts.transpileModule). They are skipped when
+node is not on PATH or app/node_modules has not been installed.
+"""
+
+import gzip
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from conftest import SCRIPTS_DIR, load_script
+import search_index
+from search_index import SearchIndex, ShardedSearch, build_index, listed_shards, write_index, write_shards
+
+CLIENT_TS = SCRIPTS_DIR.parent / 'app' / 'lib' / 'search-index.ts'
+
+PLACES = pd.DataFrame([
+    ('0644000', 'Los Angeles city', '06', 9000, 2.5, 61.0, 1, 3),
+    ('0643000', 'Long Beach city', '06', 1200, -1.25, 40.2, 9, 40),
+    ('0668000', 'San José city', '06', 4100, 8.0, 55.5, 4, 12),
+    ('0667000', 'San Francisco city', '06', 3000, 1.0, 80.0, 6, 25),
+    ('0666000', 'San Diego city', '06', 5200, 3.3, 50.1, 3, 18),
+    ('0646842', 'East Los Angeles CDP', '06', 150, 0.4, 20.0, 60, 90),
+    ('4835000', 'Houston city', '48', 20000, 4.1, 45.0, 1, 7),
+    ('4805000', 'Austin city', '48', 15000, 12.6, 58.3, 2, 2),
+    ('4865000', 'San Antonio city', '48', 8000, 6.2, 33.3, 3, 9),
+    ('1235000', 'Jacksonville city', '12', 7000, 5.5, 30.0, 2, 11),
+    ('1245000', 'Miami city', '12', 6500, 9.9, 90.0, 3, 5),
+    ('1253000', "Port St. Lucie city", '12', 4000, 15.0, 10.0, 5, 1),
+    ('0203000', 'Anchorage municipality', '02', 300, -0.5, 35.0, 30, 70),
+], columns=['place_fips', 'place_name', 'state_fips', 'recent_units_2024', 'growth_rate_5yr',
+            'mf_share_recent', 'rank_permits_national', 'rank_growth_national'])
+
+QUERIES = ['l', 'lo', 'los', 'los ang', 'angeles', 'los angelas', 'san', 'san jose', 'SAN JOSÉ', 'sn',
+           'port st', 'st lucie', 'city', 'houston', 'xyz', '', '  ', 'beach', 'an', 'antonio']
+
+
+@pytest.fixture
+def index_file(tmp_path):
+    path = tmp_path / 'places.idx.bin'
+    write_index(PLACES, path)
+    return path
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    write_shards(PLACES, tmp_path / 'search', hot_size=3)
+    return tmp_path / 'search' / 'manifest.json'
+
+
+def names(results):
+    return [r['place_name'] for r in results]
+
+
+# =============================================================================
+# Python reference implementation
+# =============================================================================
+
+def test_round_trip_preserves_every_record(index_file):
+    index = SearchIndex.load(index_file)
+    assert len(index) == len(PLACES)
+
+    records = {index.record(doc)['place_fips']: index.record(doc) for doc in range(len(index))}
+    for row in PLACES.to_dict('records'):
+        assert records[row['place_fips']] == {
+            **row,
+            'growth_rate_5yr': round(row['growth_rate_5yr'], 1),
+            'mf_share_recent': round(row['mf_share_recent'], 1),
+        }
+
+
+def test_gzip_variant_decodes_to_the_same_index(index_file):
+    compressed = index_file.with_name(index_file.name + '.gz')
+    assert gzip.decompress(compressed.read_bytes()) == index_file.read_bytes()
+    assert SearchIndex.load(compressed).search('san') == SearchIndex.load(index_file).search('san')
+
+
+def test_build_is_deterministic():
+    assert build_index(PLACES) == build_index(PLACES.sample(frac=1, random_state=0))
+
+
+@pytest.mark.parametrize('query, expected', [
+    # Name prefix, most 2024 permits first
+    ('san', ['San Antonio city', 'San Diego city', 'San José city', 'San Francisco city']),
+    ('lo', ['Los Angeles city', 'Long Beach city']),
+    # Word prefix ranks below name prefix
+    ('los ang', ['Los Angeles city', 'East Los Angeles CDP']),
+    ('angeles', ['Los Angeles city', 'East Los Angeles CDP']),
+    # Accents, case and punctuation are normalized away
+    ('SAN JOSÉ', ['San José city']),
+    ('port st lucie', ["Port St. Lucie city"]),
+    # Trigram matches tolerate a typo
+    ('los angelas', ['Los Angeles city', 'East Los Angeles CDP']),
+    ('houstn', ['Houston city']),
+    ('xyz', []),
+    ('', []),
+])
+def test_queries(index_file, query, expected):
+    assert names(SearchIndex.load(index_file).search(query))[:len(expected) or None] == expected
+
+
+def test_single_characters_match_name_prefixes_only(index_file):
+    index = SearchIndex.load(index_file)
+    assert names(index.search('l')) == ['Los Angeles city', 'Long Beach city']
+    # Two characters already make a word-start trigram
+    assert names(index.search('an')) == ['Anchorage municipality', 'Los Angeles city', 'San Antonio city',
+                                         'East Los Angeles CDP']
+    assert index.search('sn') == []
+
+
+def test_limit(index_file):
+    index = SearchIndex.load(index_file)
+    assert names(index.search('city', limit=3)) == names(index.search('city'))[:3]
+
+
+def test_shards_partition_the_places(manifest):
+    listed = json.loads(manifest.read_text())
+    shards = ShardedSearch.load(manifest).shards
+
+    assert listed['hot']['places'] == 3 and listed['places'] == len(PLACES)
+    assert sorted(listed['states']) == ['02', '06', '12', '48']
+    fips = [shard.record(doc)['place_fips'] for shard in shards for doc in range(len(shard))]
+    assert sorted(fips) == sorted(PLACES['place_fips'])
+    hot = {shards[0].record(doc)['place_name'] for doc in range(len(shards[0]))}
+    assert hot == {'Houston city', 'Austin city', 'Los Angeles city'}
+
+
+def test_rewriting_shards_keeps_the_previous_generation(tmp_path):
+    out_dir = tmp_path / 'search'
+
+    def publish(df):
+        write_shards(df, out_dir, hot_size=3)
+        return listed_shards(out_dir / 'manifest.json')
+
+    def on_disk():
+        return {path.name for path in (out_dir / 'shards').iterdir()}
+
+    first = publish(PLACES)
+    second = publish(PLACES.assign(recent_units_2024=PLACES['recent_units_2024'] + 1))
+    assert first.isdisjoint(second)
+    assert on_disk() == first | second
+
+    # A third generation drops the first; re-publishing the current one drops nothing
+    third = publish(PLACES.assign(recent_units_2024=PLACES['recent_units_2024'] + 2))
+    assert on_disk() == second | third
+    assert publish(PLACES.assign(recent_units_2024=PLACES['recent_units_2024'] + 2)) == third
+    assert on_disk() == second | third
+    assert not list(out_dir.rglob('*.tmp'))
+
+
+def test_failed_manifest_swap_leaves_the_old_generation_servable(tmp_path, monkeypatch):
+    out_dir = tmp_path / 'search'
+    write_shards(PLACES, out_dir, hot_size=3)
+    before = (out_dir / 'manifest.json').read_text()
+
+    replace = search_index.os.replace
+
+    def fail_on_manifest(src, dst):
+        if Path(dst).name == 'manifest.json':
+            raise OSError('disk full')
+        replace(src, dst)
+    monkeypatch.setattr(search_index.os, 'replace', fail_on_manifest)
+    with pytest.raises(OSError):
+        write_shards(PLACES.assign(recent_units_2024=1), out_dir, hot_size=3)
+
+    assert (out_dir / 'manifest.json').read_text() == before
+    assert not list(out_dir.glob('*.tmp'))
+    assert names(ShardedSearch.load(out_dir / 'manifest.json').search('miami')) == ['Miami city']
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_sharded_search_matches_the_full_index(index_file, manifest, query):
+    assert ShardedSearch.load(manifest).search(query) == SearchIndex.load(index_file).search(query)
+
+
+def test_script_26_writes_under_the_app_public_dir(in_tmp):
+    (in_tmp / 'data' / 'outputs').mkdir(parents=True)
+    PLACES.to_csv(in_tmp / 'data' / 'outputs' / 'place_metrics_comprehensive.csv', index=False)
+
+    assert load_script('26_generate_search_index.py').main()
+
+    public = in_tmp / 'app' / 'public' / 'data'
+    assert len(json.loads((public / 'places.json').read_text())) == len(PLACES)
+    assert names(SearchIndex.load(public / 'search' / 'places.idx.bin').search('miami')) == ['Miami city']
+    assert names(ShardedSearch.load(public / 'search' / 'manifest.json').search('miami')) == ['Miami city']
+
+
+# =============================================================================
+# TypeScript client parity
+# =============================================================================
+
+TYPESCRIPT = SCRIPTS_DIR.parent / 'app' / 'node_modules' / 'typescript'
+
+# Transpiles [source, target] pairs with the app's own compiler (no type check)
+TRANSPILE = """
+const fs = require('fs')
+const ts = require(process.argv[2])
+for (const [source, target] of JSON.parse(process.argv[3])) {
+  const { outputText } = ts.transpileModule(fs.readFileSync(source, 'utf-8'), {
+    compilerOptions: { module: ts.ModuleKind.CommonJS, target: ts.ScriptTarget.ES2020 },
+    fileName: source,
+  })
+  fs.writeFileSync(target, outputText)
+}
+"""
+
+NODE_DRIVER = """
+const fs = require('fs')
+const path = require('path')
+const { PlaceSearchIndex, ShardedPlaceSearch, normalize, trigrams } = require(process.argv[2])
+const [indexPath, manifestPath, queries] = [process.argv[3], process.argv[4], JSON.parse(process.argv[5])]
+const load = (file) => {
+  const buffer = fs.readFileSync(file)
+  return new PlaceSearchIndex(buffer.buffer.slice(buffer.byteOffset, buffer.byteOffset + buffer.byteLength))
+}
+const manifest = JSON.parse(fs.readFileSync(manifestPath, 'utf-8'))
+const sharded = new ShardedPlaceSearch()
+sharded.shards = [manifest.hot, ...Object.keys(manifest.states).sort().map(s => manifest.states[s])]
+  .map(entry => load(path.join(path.dirname(manifestPath), entry.file)))
+const full = load(indexPath)
+const strip = ({ state_name, ...record }) => record
+console.log(JSON.stringify(queries.map(q => ({
+  normalized: normalize(q),
+  trigrams: trigrams(normalize(q)),
+  full: full.search(q).map(strip),
+  sharded: sharded.search(q).map(strip),
+}))))
+"""
+
+
+@pytest.fixture
+def client(tmp_path):
+    node = shutil.which('node')
+    if node is None:
+        pytest.skip('node is not installed')
+    if not TYPESCRIPT.is_dir():
+        pytest.skip('typescript is not installed (npm install in app/)')
+
+    # search-index.ts imports ./census-transforms, so both are transpiled side by side
+    modules = [[str(CLIENT_TS.with_name(name + '.ts')), str(tmp_path / (name + '.js'))]
+               for name in ('search-index', 'census-transforms')]
+    (tmp_path / 'transpile.js').write_text(TRANSPILE)
+    (tmp_path / 'driver.js').write_text(NODE_DRIVER)
+    subprocess.run([node, str(tmp_path / 'transpile.js'), str(TYPESCRIPT), json.dumps(modules)],
+                   capture_output=True, text=True, check=True)
+
+    def run(index_path, manifest_path, queries):
+        result = subprocess.run([node, str(tmp_path / 'driver.js'), str(tmp_path / 'search-index.js'),
+                                 str(index_path), str(manifest_path), json.dumps(queries)],
+                                capture_output=True, text=True, check=True)
+        return json.loads(result.stdout)
+    return run
+
+
+def test_typescript_client_matches_the_reference(client, index_file, manifest):
+    from search_index import normalize, trigrams
+
+    index, sharded = SearchIndex.load(index_file), ShardedSearch.load(manifest)
+    for query, ts in zip(QUERIES, client(index_file, manifest, QUERIES)):
+        assert ts['normalized'] == normalize(query), query
+        assert ts['trigrams'] == trigrams(normalize(query)), query
+        assert ts['full'] == index.search(query), query
+        assert ts['sharded'] == sharded.search(query), query
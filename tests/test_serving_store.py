@@ -0,0 +1,113 @@
+"""Serving store (serving_store.py): lookups checked against the source frames."""
+
+import pandas as pd
+import pytest
+
+import serving_store
+from serving_store import ServingStore, build_store, csv_attributes
+
+COUNTIES = pd.DataFrame({
+    'geo_level': 'county',
+    'fips': ['06037'] * 3 + ['06001'] * 3 + ['48201'] * 2,
+    'state_fips': ['06'] * 6 + ['48'] * 2,
+    'name': ['Los Angeles'] * 3 + ['Alameda'] * 3 + ['Harris'] * 2,
+    'year': [2020, 2021, 2022] * 2 + [2021, 2022],
+    'sf_units': [100, 120, 90, 40, 0, 35, 500, 520],
+    'mf_units': [300, 310, 280, 60, 0, 45, 200, 210],
+    'months': 12,
+})
+PLACES = pd.DataFrame({
+    'geo_level': 'place',
+    'fips': ['0644000', '0644000', '0644000', '4835000'],
+    'state_fips': ['06', '06', '06', '48'],
+    'name': ['Los Angeles city', 'Los Angeles city', 'Los Angeles', 'Houston city'],
+    'year': [2021, 2022, 2022, 2022],  # two 2022 reports for LA: summed
+    'sf_units': [50, 60, 5, 900],
+    'mf_units': [500, 550, 10, 300],
+    'months': 12,
+})
+
+
+def with_totals(df):
+    return df.assign(total_units=df['sf_units'] + df['mf_units'])
+
+
+@pytest.fixture
+def store(in_tmp):
+    pd.DataFrame({'place_fips': ['644000', '4835000'], 'place_name': ['Los Angeles', 'Houston'],
+                  'growth_rate': [1.5, None]}).to_csv('metrics.csv', index=False)
+    pd.DataFrame({'jurisdiction_fips': ['644000'], 'population_2023': [3_800_000]}).to_csv('economic.csv', index=False)
+    attributes = [csv_attributes(in_tmp / 'metrics.csv', 'place_fips', 'metrics', 'place'),
+                  csv_attributes(in_tmp / 'economic.csv', 'jurisdiction_fips', 'economic', 'place')]
+    counts = build_store(in_tmp / 'serving.sqlite', [with_totals(COUNTIES), with_totals(PLACES)], attributes)
+    assert counts == {'permits': 11, 'entities': 5, 'attributes': 3}
+    reader = ServingStore(in_tmp / 'serving.sqlite')
+    yield reader
+    reader.close()
+
+
+def test_series_matches_source_rows(store):
+    expected = with_totals(COUNTIES[COUNTIES['fips'] == '06037'])
+    assert store.series('county', '6037') == [
+        {'year': r.year, 'sf_units': r.sf_units, 'mf_units': r.mf_units, 'total_units': r.total_units, 'months': 12}
+        for r in expected.itertuples()
+    ]
+    assert [r['year'] for r in store.series('county', '06037', 2021, 2022)] == [2021, 2022]
+    assert store.series('county', '06037', 2030) == []
+
+
+def test_duplicate_reports_are_summed(store):
+    la_2022 = store.series('place', '644000', 2022, 2022)
+    assert la_2022 == [{'year': 2022, 'sf_units': 65, 'mf_units': 560, 'total_units': 625, 'months': 24}]
+
+
+def test_get_returns_entity_attributes_and_series(store):
+    place = store.get('place', 644000)
+
+    assert (place['fips'], place['state_fips'], place['name']) == ('0644000', '06', 'Los Angeles')  # last name wins
+    assert place['metrics'] == {'place_fips': '644000', 'place_name': 'Los Angeles', 'growth_rate': 1.5}
+    assert place['economic']['population_2023'] == 3_800_000
+    assert [row['year'] for row in place['permits']] == [2021, 2022]
+    assert store.get('place', '4835000')['metrics']['growth_rate'] is None
+    assert store.get('place', '0000001') is None
+    assert store.attribute('place', '4835000', 'economic') is None
+
+
+def test_attributes_use_the_source_geo_level_width(in_tmp):
+    pd.DataFrame({'fips': ['6037', '48201'], 'value': [1, 2]}).to_csv('county.csv', index=False)
+
+    attributes = csv_attributes(in_tmp / 'county.csv', 'fips', 'extra', 'county')
+
+    assert attributes[['geo_level', 'fips']].values.tolist() == [['county', '06037'], ['county', '48201']]
+
+
+def test_counties_match_a_pandas_aggregate(store):
+    source = with_totals(COUNTIES[COUNTIES['state_fips'] == '06'])
+    expected = (source.groupby('fips').agg(total_permits=('total_units', 'sum'), sf_permits=('sf_units', 'sum'),
+                                           mf_permits=('mf_units', 'sum'), months=('months', 'sum'))
+                .sort_values('total_permits', ascending=False))
+
+    counties = store.counties('6')
+
+    assert [c['fips'] for c in counties] == expected.index.tolist()
+    for county in counties:
+        row = expected.loc[county['fips']]
+        assert (county['total_permits'], county['sf_permits'], county['mf_permits'], county['months']) == tuple(row)
+        assert county['avg_monthly'] == round(row['total_permits'] / row['months'])
+        assert county['mf_share_pct'] == round(row['mf_permits'] / row['total_permits'] * 100, 1)
+    assert counties[0]['county_name'] == 'Los Angeles' and counties[0]['county_fips'] == '037'
+    assert [c['total_permits'] for c in store.counties('06', 2021, 2021)] == [430, 0]
+    assert store.counties('48', 2020, 2020) == []
+
+
+def test_county_rows_fall_back_to_the_monthly_csv(in_tmp, monkeypatch):
+    monthly = pd.DataFrame({
+        'fips': ['06037'] * 3, 'state_fips': ['06'] * 3, 'county_name': ['Los Angeles'] * 3,
+        'year': [2020, 2020, 2021], 'sf_permits': [1, 2, 3], 'mf_permits': [4, 5, 6], 'total_permits': [5, 7, 9],
+    })
+    monthly.to_csv('county_monthly.csv', index=False)
+    monkeypatch.setattr(serving_store, 'COUNTY_MONTHLY_CSV', in_tmp / 'county_monthly.csv')
+
+    rows = serving_store.county_rows()
+
+    assert rows[['fips', 'year', 'total_units', 'months']].values.tolist() == [['06037', 2020, 12, 2], ['06037', 2021, 9, 1]]